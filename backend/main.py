@@ -9,7 +9,7 @@ import re
 
 from database import engine, get_db
 from models import Base
-from routers import travelers, users, work_orders, approvals, labor, auth, barcodes, notifications, search, dashboard, work_centers, analytics, analytics_advanced, jobs, kitting_timer, features
+from routers import travelers, users, work_orders, approvals, labor, auth, barcodes, notifications, search, dashboard, work_centers, analytics, analytics_advanced, jobs, kitting_timer, features, events
 
 # Create tables
 Base.metadata.create_all(bind=engine)
@@ -437,6 +437,143 @@ async def lifespan(app: FastAPI):
     except Exception as e:
         print(f"Warning: Could not auto-migrate soft-delete columns: {e}")
 
+    # Auto-migrate: labor_entries.updated_at, the delta-sync watermark of
+    # /labor/init and /labor/my-entries. Existing rows get their latest known
+    # change time.
+    try:
+        from sqlalchemy import text, inspect as sa_inspect_sync
+        with engine.connect() as conn:
+            labor_cols = [c['name'] for c in sa_inspect_sync(engine).get_columns('labor_entries')]
+            if 'updated_at' not in labor_cols:
+                conn.execute(text("ALTER TABLE labor_entries ADD COLUMN updated_at TIMESTAMP WITH TIME ZONE"))
+                conn.execute(text("CREATE INDEX IF NOT EXISTS ix_labor_entries_updated_at ON labor_entries (updated_at)"))
+                conn.execute(text(
+                    "UPDATE labor_entries SET updated_at = COALESCE(deleted_at, end_time, created_at) "
+                    "WHERE updated_at IS NULL"
+                ))
+                conn.commit()
+                print("Added 'updated_at' column to labor_entries table")
+    except Exception as e:
+        print(f"Warning: Could not auto-migrate labor_entries.updated_at: {e}")
+
+    # Auto-migrate: remaining-step counters on traveler_progress. Left NULL;
+    # the progress reconcile below fills them, and until then completion
+    # checks count the traveler's steps.
+    try:
+        from sqlalchemy import text, inspect as sa_inspect_remaining
+        with engine.connect() as conn:
+            progress_cols = [c['name'] for c in sa_inspect_remaining(engine).get_columns('traveler_progress')]
+            for col in ('remaining_steps', 'remaining_required'):
+                if col not in progress_cols:
+                    conn.execute(text(f"ALTER TABLE traveler_progress ADD COLUMN {col} INTEGER"))
+                    print(f"Added '{col}' column to traveler_progress table")
+            conn.commit()
+    except Exception as e:
+        print(f"Warning: Could not auto-migrate traveler_progress remaining counters: {e}")
+
+    # Auto-migrate: parsed job-number keys on travelers. Job matching filters
+    # on the indexed base_job_number instead of regexp_replace() over
+    # job_number, and ITAR visibility on itar_restricted instead of a regex per row;
+    # models.install_job_number_keys maintains the columns on write, and rows
+    # written before they existed are backfilled here.
+    try:
+        from sqlalchemy import text, inspect as sa_inspect_jn
+        from utils.job_numbers import job_number_keys, is_itar_job_number
+        with engine.connect() as conn:
+            insp = sa_inspect_jn(engine)
+            traveler_cols = [c['name'] for c in insp.get_columns('travelers')]
+            key_columns = {
+                'base_job_number': 'VARCHAR(50)',
+                'lead_free_suffix': 'BOOLEAN DEFAULT FALSE',
+                'itar_suffix': 'BOOLEAN DEFAULT FALSE',
+                'itar_restricted': 'BOOLEAN',
+            }
+            for col_name, col_type in key_columns.items():
+                if col_name not in traveler_cols:
+                    conn.execute(text(f"ALTER TABLE travelers ADD COLUMN {col_name} {col_type}"))
+                    print(f"Added '{col_name}' column to travelers table")
+            conn.execute(text(
+                "CREATE INDEX IF NOT EXISTS ix_travelers_base_job_number ON travelers (base_job_number)"
+            ))
+            conn.execute(text(
+                "CREATE INDEX IF NOT EXISTS ix_travelers_non_itar_created_at "
+                "ON travelers (created_at, id) WHERE itar_restricted = false"
+            ))
+            conn.commit()
+
+            pending = conn.execute(text(
+                "SELECT id, job_number FROM travelers WHERE base_job_number IS NULL OR itar_restricted IS NULL"
+            )).fetchall()
+            if pending:
+                updates = []
+                for traveler_id, job_number in pending:
+                    keys = job_number_keys(job_number)
+                    updates.append({
+                        "id": traveler_id, "base": keys.base,
+                        "lead_free": keys.lead_free, "itar": keys.itar,
+                        "restricted": is_itar_job_number(job_number),
+                    })
+                conn.execute(text(
+                    "UPDATE travelers SET base_job_number = :base, lead_free_suffix = :lead_free, "
+                    "itar_suffix = :itar, itar_restricted = :restricted WHERE id = :id"
+                ), updates)
+                conn.commit()
+                print(f"Backfilled job-number keys for {len(updates)} travelers")
+    except Exception as e:
+        print(f"Warning: Could not auto-migrate job-number keys: {e}")
+
+    # Auto-migrate: seed the work-order counter from the highest prefix in use.
+    # After this, allocation reads/updates that one row instead of scanning
+    # every traveler's work order (services/work_order_numbers.py).
+    try:
+        from services.work_order_numbers import seed_work_order_counter
+        with engine.connect() as conn:
+            last = seed_work_order_counter(conn)
+            conn.commit()
+            print(f"Work-order counter at {last}")
+    except Exception as e:
+        print(f"Warning: Could not seed work-order counter: {e}")
+
+    # Auto-migrate: backfill the daily labor rollups (services/labor_rollups.py)
+    # the first time the table exists. After this they are kept current on
+    # every labor write and reconciled by rollup_reconcile_loop below;
+    # scripts/rebuild_labor_rollups.py rebuilds by hand.
+    try:
+        from database import SessionLocal
+        from models import LaborDailyRollup
+        from services.labor_rollups import rebuild_labor_rollups
+        db = SessionLocal()
+        try:
+            if db.query(LaborDailyRollup.id).first() is None:
+                result = rebuild_labor_rollups(db)
+                print(f"Backfilled labor rollups: {result}")
+        finally:
+            db.close()
+    except Exception as e:
+        print(f"Warning: Could not backfill labor rollups: {e}")
+
+    # Auto-migrate: (created_at, id) index for keyset paging of GET /travelers
+    try:
+        from sqlalchemy import text as text_keyset
+        with engine.connect() as conn:
+            conn.execute(text_keyset(
+                "CREATE INDEX IF NOT EXISTS ix_travelers_created_at_id ON travelers (created_at, id)"
+            ))
+            conn.commit()
+    except Exception as e:
+        print(f"Warning: Could not create travelers keyset index: {e}")
+
+    # Auto-migrate: (created_at, id) index for keyset paging of GET /labor
+    try:
+        from sqlalchemy import text as text_labor_keyset
+        with engine.connect() as conn:
+            conn.execute(text_labor_keyset(
+                "CREATE INDEX IF NOT EXISTS ix_labor_entries_created_at_id ON labor_entries (created_at, id)"
+            ))
+            conn.commit()
+    except Exception as e:
+        print(f"Warning: Could not create labor_entries keyset index: {e}")
+
     # Auto-migrate: add RMA enum values to travelertype
     try:
         from sqlalchemy import text as text_rma_enum
@@ -685,24 +822,164 @@ async def lifespan(app: FastAPI):
             await asyncio.sleep(1800)  # 30 minutes
             try:
                 from database import SessionLocal
-                from models import KittingTimerSession, Traveler
-                from routers.kitting_timer import _maybe_notify_long_wait, WAITING
-                db = SessionLocal()
-                open_waiting = db.query(KittingTimerSession).filter(
-                    KittingTimerSession.end_time.is_(None),
-                    KittingTimerSession.session_type == WAITING,
-                ).all()
-                for sess in open_waiting:
-                    traveler = db.query(Traveler).filter(Traveler.id == sess.traveler_id).first()
-                    if traveler:
-                        _maybe_notify_long_wait(db, traveler)
-                db.close()
+                from routers.kitting_timer import sweep_waiting_sessions
+
+                def run_sweep():
+                    db = SessionLocal()
+                    try:
+                        return sweep_waiting_sessions(db)
+                    finally:
+                        db.close()
+
+                # One batched KOSH readiness query for all waiting jobs, off
+                # the event loop so a slow KOSH doesn't stall requests.
+                result = await asyncio.to_thread(run_sweep)
+                if result["auto_closed_waiting"] or result["newly_notified"]:
+                    print(f"Kitting sweep: {result}")
             except Exception as e:
                 print(f"Background sweep error: {e}")
     sweep_task = asyncio.create_task(sweep_long_waits_loop())
     print("Started background long-wait sweep (every 30 min)")
 
-    # Prune old notifications daily: read >30d, unread >90d
+    # Mirror KOSH tblJob / tblBOM / inventory aggregate into NEXUS tables so
+    # the job lists can be answered locally (see services/kosh_mirror.py).
+    from services.kosh_mirror import KOSH_MIRROR_ENABLED, KOSH_MIRROR_INTERVAL
+
+    async def kosh_mirror_loop():
+        from database import SessionLocal
+        from services.kosh_mirror import run_mirror_sync
+
+        def run_sync():
+            db = SessionLocal()
+            try:
+                return run_mirror_sync(db)
+            finally:
+                db.close()
+
+        while True:
+            try:
+                results = await asyncio.to_thread(run_sync)
+                for r in results:
+                    if r.get("error") or r.get("changed"):
+                        print(f"KOSH mirror: {r}")
+            except Exception as e:
+                print(f"KOSH mirror sync error: {e}")
+            await asyncio.sleep(KOSH_MIRROR_INTERVAL)
+
+    mirror_task = asyncio.create_task(kosh_mirror_loop()) if KOSH_MIRROR_ENABLED else None
+    if mirror_task:
+        print(f"Started KOSH mirror sync (every {KOSH_MIRROR_INTERVAL}s)")
+
+    # Reconcile the per-traveler progress counters (services/traveler_progress.py):
+    # the first pass backfills travelers that predate them, later passes repair
+    # drift from writes that bypass the ORM.
+    from services.traveler_progress import TRAVELER_PROGRESS_RECONCILE_INTERVAL
+
+    async def progress_reconcile_loop():
+        from database import SessionLocal
+        from services.traveler_progress import reconcile_progress
+
+        def run_reconcile():
+            db = SessionLocal()
+            try:
+                return reconcile_progress(db)
+            finally:
+                db.close()
+
+        while True:
+            try:
+                result = await asyncio.to_thread(run_reconcile)
+                if result.get("repaired"):
+                    print(f"Traveler progress reconcile: {result}")
+            except Exception as e:
+                print(f"Traveler progress reconcile error: {e}")
+            await asyncio.sleep(TRAVELER_PROGRESS_RECONCILE_INTERVAL)
+
+    progress_task = asyncio.create_task(progress_reconcile_loop())
+    print(f"Started traveler progress reconcile (every {TRAVELER_PROGRESS_RECONCILE_INTERVAL}s)")
+
+    # Reconcile the recent daily labor rollups (services/labor_rollups.py):
+    # repairs cells left wrong by labor writes that bypass the ORM.
+    from services.labor_rollups import LABOR_ROLLUP_RECONCILE_INTERVAL
+
+    async def rollup_reconcile_loop():
+        from database import SessionLocal
+        from services.labor_rollups import reconcile_labor_rollups
+
+        def run_reconcile():
+            db = SessionLocal()
+            try:
+                return reconcile_labor_rollups(db)
+            finally:
+                db.close()
+
+        while True:
+            await asyncio.sleep(LABOR_ROLLUP_RECONCILE_INTERVAL)
+            try:
+                result = await asyncio.to_thread(run_reconcile)
+                if result.get("repaired"):
+                    print(f"Labor rollup reconcile: {result}")
+            except Exception as e:
+                print(f"Labor rollup reconcile error: {e}")
+
+    rollup_task = asyncio.create_task(rollup_reconcile_loop())
+    print(f"Started labor rollup reconcile (every {LABOR_ROLLUP_RECONCILE_INTERVAL}s)")
+
+    # Precompute the insights/analytics snapshots (services/snapshots.py) so
+    # those endpoints only read a stored payload. Every worker runs the loop;
+    # the advisory lock inside refresh_snapshots lets one compute at a time.
+    from services.snapshots import ANALYTICS_SNAPSHOT_POLL_INTERVAL
+
+    async def snapshot_refresh_loop():
+        from database import SessionLocal
+        from services.snapshots import refresh_snapshots
+
+        def run_refresh():
+            db = SessionLocal()
+            try:
+                return refresh_snapshots(db)
+            finally:
+                db.close()
+
+        while True:
+            try:
+                await asyncio.to_thread(run_refresh)
+            except Exception as e:
+                print(f"Analytics snapshot refresh error: {e}")
+            await asyncio.sleep(ANALYTICS_SNAPSHOT_POLL_INTERVAL)
+
+    snapshot_task = asyncio.create_task(snapshot_refresh_loop())
+    print(f"Started analytics snapshot refresh (checked every {ANALYTICS_SNAPSHOT_POLL_INTERVAL}s)")
+
+    # Stop labor timers left running past the shift cutoff
+    # (services/labor_auto_stop.py). Every worker runs the loop; the advisory
+    # lock inside auto_stop_labor lets one close entries at a time.
+    from services.labor_auto_stop import LABOR_AUTO_STOP_INTERVAL
+
+    async def labor_auto_stop_loop():
+        from database import SessionLocal
+        from services.labor_auto_stop import auto_stop_labor
+
+        def run_auto_stop():
+            db = SessionLocal()
+            try:
+                return auto_stop_labor(db)
+            finally:
+                db.close()
+
+        while True:
+            try:
+                result = await asyncio.to_thread(run_auto_stop)
+                if result.get("completed_count"):
+                    print(f"Labor auto-stop: {result}")
+            except Exception as e:
+                print(f"Labor auto-stop error: {e}")
+            await asyncio.sleep(LABOR_AUTO_STOP_INTERVAL)
+
+    auto_stop_task = asyncio.create_task(labor_auto_stop_loop())
+    print(f"Started labor auto-stop (every {LABOR_AUTO_STOP_INTERVAL}s)")
+
+    # Prune old notifications daily: read >30d, unread >90d (and expired change events)
     async def prune_notifications_loop():
         from datetime import datetime, timedelta
         while True:
@@ -721,9 +998,13 @@ async def lifespan(app: FastAPI):
                     Notification.created_at < unread_cutoff,
                 ).delete(synchronize_session=False)
                 db.commit()
+                from services.change_events import prune_change_events
+                deleted_events = prune_change_events(db)
                 db.close()
                 if deleted_read or deleted_unread:
                     print(f"Pruned notifications: {deleted_read} read, {deleted_unread} unread")
+                if deleted_events:
+                    print(f"Pruned {deleted_events} change events")
             except Exception as e:
                 print(f"Notification prune error: {e}")
             await asyncio.sleep(86400)  # 24 hours
@@ -734,6 +1015,16 @@ async def lifespan(app: FastAPI):
     # Shutdown
     sweep_task.cancel()
     prune_task.cancel()
+    progress_task.cancel()
+    rollup_task.cancel()
+    snapshot_task.cancel()
+    auto_stop_task.cancel()
+    if mirror_task:
+        mirror_task.cancel()
+    from services.kosh_pool import close_kosh_pool
+    from services.composite_fetch import shutdown_fetch_pool
+    shutdown_fetch_pool()
+    close_kosh_pool()
     print("NEXUS Backend shutting down...")
 
 app = FastAPI(
@@ -757,8 +1048,8 @@ class TrailingSlashMiddleware(BaseHTTPMiddleware):
         # Add cache headers for GET requests (10 seconds browser cache)
         if request.method == "GET" and response.status_code == 200:
             path = request.url.path
-            # Don't cache auth, notifications, or active labor (needs to be real-time)
-            if not any(x in path for x in ['/auth/', '/notifications', '/labor/active', '/labor/init']):
+            # Don't cache auth, notifications, active labor or the event stream (needs to be real-time)
+            if not any(x in path for x in ['/auth/', '/notifications', '/labor/active', '/labor/init', '/events/']):
                 response.headers["Cache-Control"] = "private, max-age=10, stale-while-revalidate=20"
 
         return response
@@ -767,8 +1058,8 @@ app.add_middleware(TrailingSlashMiddleware)
 
 # Convert DB uniqueness/constraint violations into a clean 409 instead of a
 # generic 500. This catches races that slip past app-level pre-checks — e.g.
-# two concurrent DRAFT→CREATED transitions allocating the same work-order
-# number, or duplicate open labor/kitting rows.
+# two users typing the same work-order number by hand at the same moment, or
+# duplicate open labor/kitting rows.
 from sqlalchemy.exc import IntegrityError
 from fastapi.responses import JSONResponse
 
@@ -795,6 +1086,8 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    # Per-phase timings of the composite job endpoints (services/composite_fetch.py)
+    expose_headers=["Server-Timing", "X-Next-Cursor", "X-Total-Count"],
 )
 
 # Include routers
@@ -814,6 +1107,7 @@ app.include_router(analytics_advanced.router, prefix="/analytics", tags=["analyt
 app.include_router(jobs.router, prefix="/jobs", tags=["jobs"])
 app.include_router(kitting_timer.router, prefix="/kitting", tags=["kitting-timer"])
 app.include_router(features.router, prefix="/features", tags=["features"])
+app.include_router(events.router, prefix="/events", tags=["events"])
 
 @app.get("/")
 async def root():
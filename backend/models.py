@@ -1,9 +1,15 @@
-from sqlalchemy import Column, Integer, String, DateTime, Text, Boolean, ForeignKey, Float, Enum, UniqueConstraint, Index
+from sqlalchemy import Column, Integer, BigInteger, String, Date, DateTime, Text, Boolean, ForeignKey, Float, Enum, UniqueConstraint, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func, text
 from database import Base
+from datetime import datetime, timezone
 import enum
 
+
+def _utcnow():
+    return datetime.now(timezone.utc)
+
+
 class UserRole(enum.Enum):
     ADMIN = "ADMIN"
     OPERATOR = "OPERATOR"
@@ -150,10 +156,31 @@ class Traveler(Base):
             unique=True,
             postgresql_where=text("work_order_number IS NOT NULL AND work_order_number <> ''"),
         ),
+        # The travelers list is newest first, (created_at, id) DESC, and pages
+        # by keyset on that pair (utils/pagination.py). Non-ITAR users list
+        # with itar_restricted = false (utils/itar.py); a partial index over just those
+        # rows serves their pages as a plain index scan.
+        Index('ix_travelers_created_at_id', 'created_at', 'id'),
+        Index(
+            'ix_travelers_non_itar_created_at',
+            'created_at', 'id',
+            postgresql_where=text("itar_restricted = false"),
+        ),
     )
 
     id = Column(Integer, primary_key=True, index=True)
     job_number = Column(String(50), nullable=False, index=True)
+    # job_number parsed into its matching key (utils/job_numbers.py): the job
+    # without compliance letters or work descriptor, plus which letters it
+    # carried. Kept in step with job_number on every write (see
+    # install_job_number_keys) so job matching can use the index.
+    base_job_number = Column(String(50), index=True)
+    lead_free_suffix = Column(Boolean, default=False)  # trailing 'L'
+    itar_suffix = Column(Boolean, default=False)  # trailing 'M'
+    # ITAR access classification of job_number (utils/job_numbers.py), set on
+    # every write like the keys above. NULL = not yet classified; list queries
+    # treat that as restricted.
+    itar_restricted = Column(Boolean)
     work_order_number = Column(String(50), index=True)
     po_number = Column(String(255))
     traveler_type = Column(Enum(TravelerType), nullable=False)
@@ -351,6 +378,8 @@ class LaborEntry(Base):
             postgresql_where=text("end_time IS NULL AND is_completed = false"),
             sqlite_where=text("end_time IS NULL AND is_completed = 0"),
         ),
+        # Keyset paging of GET /labor and the labor sync's older history.
+        Index('ix_labor_entries_created_at_id', 'created_at', 'id'),
     )
 
     id = Column(Integer, primary_key=True, index=True)
@@ -368,6 +397,9 @@ class LaborEntry(Base):
     qty_completed = Column(Integer, nullable=True)  # Quantity completed during this labor entry
     comment = Column(Text, nullable=True)  # Optional operator/admin comment
     created_at = Column(DateTime(timezone=True), server_default=func.now())
+    # Stamped (app clock, at flush) on every ORM insert/update of the entry or
+    # of its pause logs — the watermark of /labor delta sync (services/labor_sync.py).
+    updated_at = Column(DateTime(timezone=True), default=_utcnow, onupdate=_utcnow, index=True)
     # Soft delete. Nothing is ever removed from this table — "delete" stamps
     # these and the row drops out of every ORM read (see install_soft_delete_filter
     # below). Pass execution_options(include_deleted=True) to see them again.
@@ -694,6 +726,250 @@ class WorkOrder(Base):
     is_active = Column(Boolean, default=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
 
+
+class WorkOrderCounter(Base):
+    """Last work-order prefix handed out (services/work_order_numbers.py).
+    One row; allocation is a single-row UPDATE ... RETURNING, whose row lock
+    serializes concurrent allocations."""
+    __tablename__ = "work_order_counters"
+
+    name = Column(String(50), primary_key=True)
+    last_value = Column(Integer, nullable=False)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+
+class WorkOrderReservation(Base):
+    """A work-order prefix held by an open traveler form until the traveler is
+    saved (claimed) or the form is abandoned (released, or expired)."""
+    __tablename__ = "work_order_reservations"
+
+    prefix = Column(String(10), primary_key=True)
+    reserved_by = Column(Integer, ForeignKey("users.id"))
+    reserved_at = Column(DateTime(timezone=True), server_default=func.now())
+    expires_at = Column(DateTime(timezone=True), nullable=False)
+    traveler_id = Column(Integer, ForeignKey("travelers.id"))  # set once claimed
+    released_at = Column(DateTime(timezone=True))
+
+# ═══════════════════════════════════════════════════════════════════
+# KOSH MIRROR
+# ═══════════════════════════════════════════════════════════════════
+
+# Local, read-only copies of the KOSH warehouse tables NEXUS reads, kept in
+# step by services/kosh_mirror.py. NEXUS never edits these rows itself — KOSH
+# stays the source of truth; the mirror only lets job lists join against
+# travelers locally and keep working while KOSH is slow. row_hash is KOSH's
+# md5 of the mirrored columns, compared to find changed rows when a table
+# has no usable updated_at.
+
+class KoshJobMirror(Base):
+    """Mirror of warehouse."tblJob"."""
+    __tablename__ = "kosh_jobs_mirror"
+
+    job_number = Column(String(50), primary_key=True)
+    kosh_id = Column(Integer, index=True)
+    description = Column(Text)
+    customer = Column(String(100))
+    cust_pn = Column(String(100))
+    build_qty = Column(Integer)
+    order_qty = Column(Integer)
+    job_rev = Column(String(20))
+    cust_rev = Column(String(20))
+    wo_number = Column(String(50))
+    status = Column(String(30), index=True)
+    notes = Column(Text)
+    created_by = Column(String(100))
+    created_at = Column(DateTime, index=True)  # KOSH timestamps are naive
+    updated_at = Column(DateTime)
+    row_hash = Column(String(32), nullable=False)
+    synced_at = Column(DateTime(timezone=True), server_default=func.now())
+
+
+class KoshBomMirror(Base):
+    """Mirror of warehouse."tblBOM" (every revision — filter like the live queries)."""
+    __tablename__ = "kosh_bom_mirror"
+
+    kosh_id = Column(Integer, primary_key=True)
+    job = Column(String(50), nullable=False, index=True)
+    line = Column(String(10))
+    aci_pn = Column(String(100), index=True)
+    description = Column(Text)  # tblBOM."DESC"
+    mpn = Column(String(100))
+    man = Column(String(100))
+    qty = Column(String(20))  # text in KOSH, kept as text
+    cost = Column(String(20))
+    pou = Column(String(20))
+    job_rev = Column(String(20))
+    last_rev = Column(String(20))
+    cust = Column(String(100))
+    cust_pn = Column(String(100))
+    cust_rev = Column(String(20))
+    created_at = Column(DateTime)
+    updated_at = Column(DateTime)
+    row_hash = Column(String(32), nullable=False)
+
+
+class KoshInventoryMirror(Base):
+    """Aggregate of warehouse."tblWhse_Inventory" per (item, mpn): stock-room
+    on-hand and MFG Floor quantity. Not row-for-row — pcn/vendor/date-code
+    detail stays a live KOSH read."""
+    __tablename__ = "kosh_inventory_mirror"
+    __table_args__ = (
+        UniqueConstraint('item_key', 'mpn_key', name='uq_kosh_inventory_mirror_item_mpn'),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    # KOSH item/mpn with NULL stored as '' so the pair can be unique and joined.
+    item_key = Column(String(100), nullable=False, index=True)
+    mpn_key = Column(String(100), nullable=False, index=True)
+    stockroom_qty = Column(Integer, nullable=False, default=0)
+    mfg_floor_qty = Column(Integer, nullable=False, default=0)
+    row_hash = Column(String(32), nullable=False)
+
+
+class KoshSyncState(Base):
+    """One row per mirrored KOSH table: incremental high-water mark and the
+    bookkeeping behind the sync-lag metric."""
+    __tablename__ = "kosh_sync_state"
+
+    table_name = Column(String(50), primary_key=True)
+    high_water_mark = Column(DateTime)  # max KOSH updated_at applied so far
+    last_synced_at = Column(DateTime(timezone=True))  # last successful pass of any kind
+    last_full_sync_at = Column(DateTime(timezone=True))  # last hash-diff pass
+    last_error = Column(Text)
+    last_error_at = Column(DateTime(timezone=True))
+    rows = Column(Integer, default=0)
+    rows_changed = Column(Integer, default=0)  # upserts + deletes in the last pass
+
+# ═══════════════════════════════════════════════════════════════════
+# TRAVELER PROGRESS COUNTERS
+# ═══════════════════════════════════════════════════════════════════
+#
+# Per-traveler step and labor rollups that the traveler list and dashboard
+# read instead of loading every ProcessStep and LaborEntry of every traveler
+# they show. Derived data only: services/traveler_progress.py recomputes a
+# traveler's rows inside the same transaction as any ORM write to its steps or
+# labor (install_progress_counters below), and its reconcile pass repairs rows
+# that drifted through writes the ORM never saw (bulk UPDATEs, manual SQL, a
+# work center moving department). Counts are raw — the display rules (a
+# COMPLETED traveler reads N/N and 100%) are applied when they are read.
+
+class TravelerProgress(Base):
+    __tablename__ = "traveler_progress"
+
+    traveler_id = Column(Integer, ForeignKey("travelers.id"), primary_key=True)
+    # Steps that count toward progress (hidden departments left out).
+    total_steps = Column(Integer, nullable=False, default=0)
+    completed_steps = Column(Integer, nullable=False, default=0)
+    # First incomplete step by step_number, over every step.
+    current_step = Column(String(100))
+    current_work_center = Column(String(100))
+    qty_accepted = Column(Integer, nullable=False, default=0)
+    qty_rejected = Column(Integer, nullable=False, default=0)
+    # Labor over the whole job; steps_with_labor counts progress steps only.
+    labor_hours = Column(Float, nullable=False, default=0.0)
+    labor_entries = Column(Integer, nullable=False, default=0)
+    active_labor_entries = Column(Integer, nullable=False, default=0)
+    steps_with_labor = Column(Integer, nullable=False, default=0)
+    # Incomplete steps over every step, and incomplete required steps — what
+    # update_step_and_traveler_progress decides traveler completion from.
+    # NULL until first computed (rows that predate the columns).
+    remaining_steps = Column(Integer)
+    remaining_required = Column(Integer)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+
+class TravelerDepartmentProgress(Base):
+    __tablename__ = "traveler_department_progress"
+
+    traveler_id = Column(Integer, ForeignKey("travelers.id"), primary_key=True)
+    department = Column(String(50), primary_key=True)
+    position = Column(Integer, nullable=False, default=0)  # order the department first appears in, by step_number
+    total_steps = Column(Integer, nullable=False, default=0)
+    completed_steps = Column(Integer, nullable=False, default=0)
+
+
+# ═══════════════════════════════════════════════════════════════════
+# LABOR ROLLUPS
+# ═══════════════════════════════════════════════════════════════════
+
+class LaborDailyRollup(Base):
+    """Closed labor summed per day x work center x traveler x employee.
+
+    Maintained by services.labor_rollups (see install_labor_rollups below) so
+    dashboard and labor summaries add up a few rows per day instead of
+    scanning labor_entries. Only entries with an end_time count; open timers
+    are few and are read live.
+    """
+    __tablename__ = "labor_daily_rollups"
+    __table_args__ = (
+        UniqueConstraint('day', 'work_center', 'traveler_id', 'employee_id', name='uq_labor_daily_rollup_cell'),
+    )
+
+    id = Column(Integer, primary_key=True)
+    day = Column(Date, nullable=False, index=True)  # UTC date of the entry's start_time
+    work_center = Column(String(100), nullable=False, default='')  # '' when the entry has none
+    traveler_id = Column(Integer, ForeignKey("travelers.id"), nullable=False, index=True)
+    employee_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    hours = Column(Float, nullable=False, default=0.0)
+    entries = Column(Integer, nullable=False, default=0)
+    completed_entries = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+
+# ═══════════════════════════════════════════════════════════════════
+# ANALYTICS SNAPSHOTS
+# ═══════════════════════════════════════════════════════════════════
+
+class AnalyticsSnapshot(Base):
+    """The latest precomputed payload of an expensive read endpoint
+    (/dashboard/insights, /analytics/all). Written by the snapshot scheduler
+    in services/snapshots.py; the endpoints only read it."""
+    __tablename__ = "analytics_snapshots"
+
+    name = Column(String(50), primary_key=True)  # e.g. "dashboard.insights"
+    payload = Column(Text, nullable=False)  # JSON
+    fingerprint = Column(String(200))  # data_fingerprint() when computed
+    section_timings = Column(Text)  # JSON {section: milliseconds}
+    duration_ms = Column(Float)
+    computed_at = Column(DateTime(timezone=True), nullable=False)
+
+
+# ═══════════════════════════════════════════════════════════════════
+# CHANGE EVENTS
+# ═══════════════════════════════════════════════════════════════════
+
+class ChangeEvent(Base):
+    """One change pushed to browsers over /events/stream (labor started or
+    stopped, step completed, notification created, kitting state changed).
+    Written in the transaction that made the change (install_change_events
+    below); every worker reads new rows and fans them out to its own
+    subscribers — see services/change_events.py."""
+    __tablename__ = "change_events"
+
+    id = Column(Integer, primary_key=True)
+    kind = Column(String(50), nullable=False)  # e.g. "labor.started"
+    traveler_id = Column(Integer, nullable=True)
+    user_id = Column(Integer, nullable=True)  # only this user receives it; NULL = everyone
+    payload = Column(Text)  # JSON
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), index=True)
+
+
+# ═══════════════════════════════════════════════════════════════════
+# TABLE VERSIONS
+# ═══════════════════════════════════════════════════════════════════
+
+class TableVersion(Base):
+    """A counter per table, bumped in every transaction that writes the table
+    through the ORM (install_table_versions below). Read endpoints derive
+    their ETag from the versions of the tables they read, so an unchanged
+    answer is a 304 without running the query — see services/table_versions.py."""
+    __tablename__ = "table_versions"
+
+    name = Column(String(100), primary_key=True)  # table name
+    version = Column(BigInteger, nullable=False, default=0)
+    updated_at = Column(DateTime(timezone=True), nullable=False)
+
+
 # ═══════════════════════════════════════════════════════════════════
 # SOFT DELETE
 # ═══════════════════════════════════════════════════════════════════
@@ -743,3 +1019,264 @@ def install_soft_delete_filter():
 
 
 install_soft_delete_filter()
+
+
+# ═══════════════════════════════════════════════════════════════════
+# JOB NUMBER KEYS
+# ═══════════════════════════════════════════════════════════════════
+
+def sync_job_number_keys(traveler) -> None:
+    """Recompute base_job_number / lead_free_suffix / itar_suffix /
+    itar_restricted from job_number."""
+    from utils.job_numbers import job_number_keys, is_itar_job_number
+
+    keys = job_number_keys(traveler.job_number)
+    traveler.base_job_number = keys.base
+    traveler.lead_free_suffix = keys.lead_free
+    traveler.itar_suffix = keys.itar
+    traveler.itar_restricted = is_itar_job_number(traveler.job_number)
+
+
+def install_job_number_keys():
+    """Keep the parsed job-number columns in step on every ORM insert/update,
+    whichever endpoint changed job_number. Called once at import time."""
+    from sqlalchemy import event
+
+    @event.listens_for(Traveler, "before_insert")
+    def _keys_on_insert(mapper, connection, target):
+        sync_job_number_keys(target)
+
+    @event.listens_for(Traveler, "before_update")
+    def _keys_on_update(mapper, connection, target):
+        sync_job_number_keys(target)
+
+
+install_job_number_keys()
+
+
+# ═══════════════════════════════════════════════════════════════════
+# TRAVELER PROGRESS MAINTENANCE
+# ═══════════════════════════════════════════════════════════════════
+
+def install_progress_counters():
+    """Keep the progress counters of every traveler whose steps or labor
+    changed in step, just before the transaction commits. Flushes sort the
+    changes (services.traveler_progress.progress_changes): a closed or
+    re-timed labor entry becomes a counter delta, a new traveler or a step
+    edit a full recompute of that traveler. before_commit applies both in the
+    same transaction, so the counters commit (or roll back) together with
+    the change. Called once at import time."""
+    from sqlalchemy import event
+    from sqlalchemy.orm import Session as _Session
+
+    # Labor deltas need the values an entry had before the change, which
+    # SQLAlchemy only records for an expired attribute when asked.
+    for attr in (LaborEntry.hours_worked, LaborEntry.is_completed, ProcessStep.traveler_id):
+        event.listen(attr, "set", lambda target, value, oldvalue, initiator: value, active_history=True)
+
+    @event.listens_for(_Session, "after_flush")
+    def _note_touched_travelers(session, flush_context):
+        from services.traveler_progress import progress_changes
+        recompute, deltas = progress_changes(session)
+        session.info.setdefault("progress_touched", set()).update(recompute)
+        pending = session.info.setdefault("progress_deltas", {})
+        for traveler_id, (hours, active) in deltas.items():
+            delta = pending.setdefault(traveler_id, [0.0, 0])
+            delta[0] += hours
+            delta[1] += active
+
+    @event.listens_for(_Session, "before_commit")
+    def _recompute_touched(session):
+        session.flush()  # so after_flush sees changes not yet flushed
+        touched = session.info.pop("progress_touched", None) or set()
+        deltas = session.info.pop("progress_deltas", None) or {}
+        session.info.pop("progress_claimed", None)
+        from services.traveler_progress import apply_labor_deltas, recompute_progress
+        touched |= apply_labor_deltas(session, {t: d for t, d in deltas.items() if t not in touched})
+        if touched:
+            recompute_progress(session, touched)
+
+    @event.listens_for(_Session, "after_rollback")
+    def _forget_touched(session):
+        session.info.pop("progress_touched", None)
+        session.info.pop("progress_deltas", None)
+        session.info.pop("progress_claimed", None)
+
+
+install_progress_counters()
+
+
+# ═══════════════════════════════════════════════════════════════════
+# WORK ORDER COUNTER
+# ═══════════════════════════════════════════════════════════════════
+
+def install_work_order_counter():
+    """Keep the work-order counter at or above every prefix in use. A
+    non-DRAFT traveler saved with a work order typed by hand (or imported)
+    raises the counter past it, so the allocator never hands that prefix out
+    again. Called once at import time."""
+    from sqlalchemy import event
+
+    @event.listens_for(Traveler, "after_insert")
+    def _counter_on_insert(mapper, connection, target):
+        from services.work_order_numbers import note_work_order_used
+        note_work_order_used(connection, target.work_order_number, target.status)
+
+    @event.listens_for(Traveler, "after_update")
+    def _counter_on_update(mapper, connection, target):
+        from sqlalchemy import inspect as sa_inspect
+        from services.work_order_numbers import note_work_order_used
+        state = sa_inspect(target)
+        if state.attrs.work_order_number.history.has_changes() or state.attrs.status.history.has_changes():
+            note_work_order_used(connection, target.work_order_number, target.status)
+
+
+install_work_order_counter()
+
+
+# ═══════════════════════════════════════════════════════════════════
+# LABOR ROLLUP MAINTENANCE
+# ═══════════════════════════════════════════════════════════════════
+
+def install_labor_rollups():
+    """Keep labor_daily_rollups in step with labor entries written through the
+    ORM — closed, edited (hours, times, work center, traveler) or
+    soft-deleted. Flushes note the rollup cells an entry sat in before and
+    after the change; before_commit recomputes just those cells in the same
+    transaction. Called once at import time."""
+    from sqlalchemy import event
+    from sqlalchemy.orm import Session as _Session
+
+    # The cell an edited entry is leaving comes from attribute history, which
+    # SQLAlchemy only records for an expired attribute (the usual state after
+    # a commit) when a listener asks for it.
+    for attr in (LaborEntry.start_time, LaborEntry.work_center, LaborEntry.traveler_id, LaborEntry.employee_id):
+        event.listen(attr, "set", lambda target, value, oldvalue, initiator: value, active_history=True)
+
+    @event.listens_for(_Session, "after_flush")
+    def _note_touched_cells(session, flush_context):
+        from services.labor_rollups import rollup_cells
+        entries = [obj for obj in list(session.new) + list(session.dirty) + list(session.deleted)
+                   if isinstance(obj, LaborEntry)]
+        if entries:
+            cells = session.info.setdefault("labor_rollup_touched", set())
+            for entry in entries:
+                cells.update(rollup_cells(entry))
+
+    @event.listens_for(_Session, "before_commit")
+    def _recompute_touched_cells(session):
+        session.flush()
+        cells = session.info.pop("labor_rollup_touched", None)
+        if cells:
+            from services.labor_rollups import recompute_rollup_cells
+            recompute_rollup_cells(session, cells)
+
+    @event.listens_for(_Session, "after_rollback")
+    def _forget_touched_cells(session):
+        session.info.pop("labor_rollup_touched", None)
+
+
+install_labor_rollups()
+
+
+# ═══════════════════════════════════════════════════════════════════
+# CHANGE EVENT CAPTURE
+# ═══════════════════════════════════════════════════════════════════
+
+def install_change_events():
+    """Record a ChangeEvent for every labor, step, notification and kitting
+    change written through the ORM, whichever endpoint wrote it. Flushes note
+    the events; before_commit adds the rows, so they commit (or roll back)
+    with the change. Called once at import time."""
+    from sqlalchemy import event
+    from sqlalchemy.orm import Session as _Session
+
+    @event.listens_for(_Session, "after_flush")
+    def _note_change_events(session, flush_context):
+        from services.change_events import describe_changes
+        found = describe_changes(session)
+        if found:
+            session.info.setdefault("change_events", []).extend(found)
+
+    @event.listens_for(_Session, "before_commit")
+    def _record_change_events(session):
+        session.flush()
+        found = session.info.pop("change_events", None)
+        if found:
+            session.add_all(ChangeEvent(**e) for e in found)
+
+    @event.listens_for(_Session, "after_rollback")
+    def _forget_change_events(session):
+        session.info.pop("change_events", None)
+
+
+install_change_events()
+
+
+# ═══════════════════════════════════════════════════════════════════
+# TABLE VERSION BUMPS
+# ═══════════════════════════════════════════════════════════════════
+
+def install_table_versions():
+    """Bump the TableVersion of every table a transaction wrote — object
+    flushes and ORM bulk UPDATE/DELETE/INSERT statements alike — just before
+    it commits, so the new versions become visible together with the change.
+    Called once at import time."""
+    from sqlalchemy import event
+    from sqlalchemy.orm import Session as _Session
+
+    def _note(session, tables):
+        tables = {t for t in tables if t != TableVersion.__tablename__}
+        if tables:
+            session.info.setdefault("table_versions_touched", set()).update(tables)
+
+    @event.listens_for(_Session, "after_flush")
+    def _note_flushed_tables(session, flush_context):
+        changed = list(session.new) + list(session.deleted) + [o for o in session.dirty if session.is_modified(o)]
+        _note(session, (obj.__table__.name for obj in changed))
+
+    @event.listens_for(_Session, "do_orm_execute")
+    def _note_bulk_statement_tables(execute_state):
+        if execute_state.is_update or execute_state.is_delete or execute_state.is_insert:
+            table = getattr(execute_state.statement, "table", None)
+            if table is not None and getattr(table, "name", None):
+                _note(execute_state.session, [table.name])
+
+    @event.listens_for(_Session, "before_commit")
+    def _bump_touched_tables(session):
+        session.flush()
+        tables = session.info.pop("table_versions_touched", None)
+        if tables:
+            from services.table_versions import bump_table_versions
+            bump_table_versions(session, tables)
+
+    @event.listens_for(_Session, "after_rollback")
+    def _forget_touched_tables(session):
+        session.info.pop("table_versions_touched", None)
+
+
+install_table_versions()
+
+
+# ═══════════════════════════════════════════════════════════════════
+# LABOR SYNC STAMPS
+# ═══════════════════════════════════════════════════════════════════
+
+def install_labor_sync_stamps():
+    """A pause or resume changes what /labor returns for its entry, so a
+    pause log written through the ORM stamps its labor entry's updated_at
+    too, and delta sync picks the entry up. Called once at import time."""
+    from sqlalchemy import event
+    from sqlalchemy.orm import Session as _Session
+
+    @event.listens_for(_Session, "before_flush")
+    def _stamp_paused_entries(session, flush_context, instances):
+        entry_ids = {obj.labor_entry_id for obj in list(session.new) + list(session.dirty) + list(session.deleted)
+                     if isinstance(obj, PauseLog) and obj.labor_entry_id}
+        for entry_id in entry_ids:
+            entry = session.get(LaborEntry, entry_id)
+            if entry is not None:
+                entry.updated_at = _utcnow()
+
+
+install_labor_sync_stamps()
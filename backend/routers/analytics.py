@@ -11,40 +11,12 @@ from models import (
     TravelerStatus, TravelerTrackingLog, PauseLog, UserRole
 )
 from routers.auth import get_current_user
-import time as _time
+from services.labor_anomalies import detect_labor_anomalies
+from services.operation_estimates import estimate_hours
+from services.snapshots import ANALYTICS_SNAPSHOT, SectionTimer, read_snapshot
 
 router = APIRouter()
 
-# Short in-process cache: this is global, expensive, and polled every ~30s.
-_analytics_cache: dict = {}
-_ANALYTICS_TTL = 30  # seconds
-
-# Operation time estimates (hours) for est vs actual
-OPERATION_ESTIMATES = {
-    "KITTING": 1.5, "FEEDER LOAD": 1.0, "SMT SET UP": 1.5,
-    "SMT TOP": 3.0, "SMT BOTTOM": 3.0, "SMT BOT": 3.0,
-    "REFLOW": 1.5, "WASH": 0.75, "AOI": 1.5, "XRAY": 1.0,
-    "HAND SOLDER": 3.0, "HAND ASSEMBLY": 2.5, "TOUCH UP": 1.5,
-    "INSPECTION": 1.5, "INTERNAL TESTING": 2.0, "TESTING": 2.0,
-    "INTERNAL COATING": 1.5, "CONFORMAL COAT": 1.5,
-    "LABELING": 0.5, "PACKAGING": 0.5, "SHIPPING": 0.5,
-    "QC": 1.5, "PROGRAMMING": 1.0, "DEPANEL": 1.0,
-    "STENCIL": 0.75, "PASTE": 0.75, "ENGINEERING": 1.0,
-    "VERIFY BOM": 0.5, "INVENTORY": 0.5, "PURCHASING": 1.0,
-}
-
-
-def estimate_hours(operation: str) -> float:
-    if not operation:
-        return 1.0
-    op = operation.upper().strip()
-    if op in OPERATION_ESTIMATES:
-        return OPERATION_ESTIMATES[op]
-    for key, val in OPERATION_ESTIMATES.items():
-        if key in op or op in key:
-            return val
-    return 1.0
-
 
 @router.get("/all")
 async def get_analytics(
@@ -52,92 +24,27 @@ async def get_analytics(
     current_user: User = Depends(get_current_user)
 ):
     """All analytics data in one call: anomalies, due date heatmap, est vs actual,
-    yield, daily summary, bottlenecks, operator scorecards."""
+    yield, daily summary, bottlenecks, operator scorecards.
+
+    Served from the latest precomputed snapshot (services/snapshots.py);
+    snapshot_computed_at / snapshot_age_seconds say how old it is."""
+    return read_snapshot(db, ANALYTICS_SNAPSHOT)
 
-    _cached = _analytics_cache.get("all")
-    if _cached and _time.time() - _cached[0] < _ANALYTICS_TTL:
-        return _cached[1]
 
+def compute_analytics(db: Session, timer: SectionTimer) -> dict:
+    """The analytics payload, section by section. Run by the snapshot
+    scheduler, not per request."""
     now = datetime.now(timezone.utc)
     today = now.replace(hour=0, minute=0, second=0, microsecond=0)
 
     # ========== 1. LABOR ANOMALY DETECTION ==========
-    anomalies = []
-
-    # 1a. Forgotten clock-outs: active entries running > 12 hours
-    long_running = db.query(LaborEntry).filter(
-        LaborEntry.end_time.is_(None),
-        LaborEntry.is_completed == False,
-        LaborEntry.start_time < now - timedelta(hours=12)
-    ).all()
-
-    for entry in long_running:
-        hours_running = (now - entry.start_time.replace(tzinfo=timezone.utc) if entry.start_time.tzinfo is None else now - entry.start_time).total_seconds() / 3600
-        traveler = db.query(Traveler).filter(Traveler.id == entry.traveler_id).first()
-        employee = db.query(User).filter(User.id == entry.employee_id).first()
-        anomalies.append({
-            "type": "forgotten_clockout",
-            "severity": "high" if hours_running > 24 else "medium",
-            "entry_id": entry.id,
-            "job_number": traveler.job_number if traveler else "Unknown",
-            "employee_name": f"{employee.first_name} {employee.last_name}" if employee else "Unknown",
-            "work_center": entry.work_center or "Unknown",
-            "hours_running": round(hours_running, 1),
-            "start_time": entry.start_time.isoformat() if entry.start_time else None,
-            "message": f"Running for {round(hours_running, 1)}h without clock-out"
-        })
-
-    # 1b. Unusually short entries (< 2 min, completed)
-    short_entries = db.query(LaborEntry).filter(
-        LaborEntry.end_time.isnot(None),
-        LaborEntry.hours_worked < 0.034,  # ~2 min
-        LaborEntry.hours_worked > 0,
-        LaborEntry.created_at > now - timedelta(days=7)
-    ).limit(20).all()
-
-    for entry in short_entries:
-        traveler = db.query(Traveler).filter(Traveler.id == entry.traveler_id).first()
-        employee = db.query(User).filter(User.id == entry.employee_id).first()
-        mins = round(entry.hours_worked * 60, 1)
-        anomalies.append({
-            "type": "suspiciously_short",
-            "severity": "low",
-            "entry_id": entry.id,
-            "job_number": traveler.job_number if traveler else "Unknown",
-            "employee_name": f"{employee.first_name} {employee.last_name}" if employee else "Unknown",
-            "work_center": entry.work_center or "Unknown",
-            "hours_running": round(entry.hours_worked, 3),
-            "start_time": entry.start_time.isoformat() if entry.start_time else None,
-            "message": f"Only {mins} minutes logged"
-        })
-
-    # 1c. Unusually long completed entries (> 10 hours)
-    long_entries = db.query(LaborEntry).filter(
-        LaborEntry.end_time.isnot(None),
-        LaborEntry.hours_worked > 10,
-        LaborEntry.created_at > now - timedelta(days=7)
-    ).limit(20).all()
-
-    for entry in long_entries:
-        traveler = db.query(Traveler).filter(Traveler.id == entry.traveler_id).first()
-        employee = db.query(User).filter(User.id == entry.employee_id).first()
-        anomalies.append({
-            "type": "unusually_long",
-            "severity": "medium",
-            "entry_id": entry.id,
-            "job_number": traveler.job_number if traveler else "Unknown",
-            "employee_name": f"{employee.first_name} {employee.last_name}" if employee else "Unknown",
-            "work_center": entry.work_center or "Unknown",
-            "hours_running": round(entry.hours_worked, 1),
-            "start_time": entry.start_time.isoformat() if entry.start_time else None,
-            "message": f"{round(entry.hours_worked, 1)}h logged in single entry"
-        })
-
-    # Sort: high severity first
-    severity_order = {"high": 0, "medium": 1, "low": 2}
-    anomalies.sort(key=lambda x: severity_order.get(x["severity"], 3))
+    timer.start("anomalies")
+    # Forgotten clock-outs, suspiciously short and unusually long entries —
+    # one joined query per class, thresholds in services/labor_anomalies.py.
+    anomalies = detect_labor_anomalies(db, now)
 
     # ========== 2. DUE DATE HEATMAP ==========
+    timer.start("due_date_heatmap")
     due_date_data = []
     active_travelers = db.query(Traveler).filter(
         Traveler.is_active == True,
@@ -187,6 +94,7 @@ async def get_analytics(
     due_date_data.sort(key=lambda x: x["days_until"])
 
     # ========== 3. EST VS ACTUAL TIME ==========
+    timer.start("est_vs_actual")
     est_vs_actual = []
     travelers_with_labor = db.query(Traveler).filter(
         Traveler.is_active == True,
@@ -251,6 +159,7 @@ async def get_analytics(
     est_vs_actual = est_vs_actual[:30]
 
     # ========== 4. YIELD DASHBOARD ==========
+    timer.start("yield")
     yield_data = []
     # Get travelers with accepted/rejected quantities
     travelers_yield = db.query(Traveler).filter(
@@ -305,6 +214,7 @@ async def get_analytics(
     yield_data = yield_data[:30]
 
     # ========== 5. DAILY SUMMARY REPORT ==========
+    timer.start("daily_summary")
     # Today's summary
     today_start = today
     today_end = today + timedelta(days=1)
@@ -404,6 +314,7 @@ async def get_analytics(
     }
 
     # ========== 6. BOTTLENECK DETECTION ==========
+    timer.start("bottlenecks")
     bottlenecks = []
 
     # Average time per work center (from completed entries in last 30 days)
@@ -421,22 +332,24 @@ async def get_analytics(
         LaborEntry.work_center.isnot(None)
     ).group_by(LaborEntry.work_center).having(func.count(LaborEntry.id) >= 2).all()
 
-    # Find work centers with queue (multiple active entries or high avg time)
-    for wc, avg_h, count, total_h, max_h in wc_stats:
-        # Count currently active entries at this WC
-        active_at_wc = db.query(func.count(LaborEntry.id)).filter(
-            LaborEntry.work_center == wc,
-            LaborEntry.end_time.is_(None),
-            LaborEntry.is_completed == False
-        ).scalar() or 0
+    # Find work centers with queue (multiple active entries or high avg time).
+    # Active entries and waiting travelers for every work center at once.
+    stat_wcs = [row[0] for row in wc_stats]
+    active_by_wc = dict(db.query(LaborEntry.work_center, func.count(LaborEntry.id)).filter(
+        LaborEntry.work_center.in_(stat_wcs),
+        LaborEntry.end_time.is_(None),
+        LaborEntry.is_completed == False
+    ).group_by(LaborEntry.work_center).all()) if stat_wcs else {}
+    waiting_by_wc = dict(db.query(TravelerTrackingLog.work_center, func.count(Traveler.id)).join(
+        TravelerTrackingLog, TravelerTrackingLog.traveler_id == Traveler.id
+    ).filter(
+        Traveler.status == TravelerStatus.IN_PROGRESS,
+        TravelerTrackingLog.work_center.in_(stat_wcs)
+    ).group_by(TravelerTrackingLog.work_center).all()) if stat_wcs else {}
 
-        # Count travelers currently at this WC (waiting)
-        waiting = db.query(func.count(Traveler.id)).join(
-            TravelerTrackingLog, TravelerTrackingLog.traveler_id == Traveler.id
-        ).filter(
-            Traveler.status == TravelerStatus.IN_PROGRESS,
-            TravelerTrackingLog.work_center == wc
-        ).scalar() or 0
+    for wc, avg_h, count, total_h, max_h in wc_stats:
+        active_at_wc = active_by_wc.get(wc, 0)
+        waiting = waiting_by_wc.get(wc, 0)
 
         # Score bottleneck severity (higher = worse)
         score = (float(avg_h) * 2) + (active_at_wc * 3) + (float(max_h) * 0.5)
@@ -456,6 +369,7 @@ async def get_analytics(
     bottlenecks = bottlenecks[:15]
 
     # ========== 7. OPERATOR SCORECARD ==========
+    timer.start("operator_scorecards")
     scorecards = []
 
     operator_stats = db.query(
@@ -469,37 +383,42 @@ async def get_analytics(
         LaborEntry.hours_worked > 0
     ).group_by(User.id, User.first_name, User.last_name, User.username).all()
 
-    for uid, fn, ln, username, total_entries, total_hours, avg_hours, completed_entries in operator_stats:
-        # Pause stats
-        pause_stats = db.query(
+    # Pauses, steps completed, jobs and active days for every operator at once
+    # (grouped by operator) instead of four queries per operator.
+    operator_ids = [row[0] for row in operator_stats]
+    pauses_by_op, steps_by_op, activity_by_op = {}, {}, {}
+    if operator_ids:
+        pauses_by_op = {r.employee_id: r for r in db.query(
+            LaborEntry.employee_id,
             func.count(PauseLog.id).label("total_pauses"),
             func.coalesce(func.sum(PauseLog.duration_seconds), 0).label("total_pause_seconds")
         ).join(LaborEntry, PauseLog.labor_entry_id == LaborEntry.id).filter(
-            LaborEntry.employee_id == uid,
+            LaborEntry.employee_id.in_(operator_ids),
+            LaborEntry.created_at > thirty_days_ago
+        ).group_by(LaborEntry.employee_id)}
+        steps_by_op = dict(db.query(ProcessStep.completed_by, func.count(ProcessStep.id)).filter(
+            ProcessStep.completed_by.in_(operator_ids),
+            ProcessStep.completed_at > thirty_days_ago
+        ).group_by(ProcessStep.completed_by).all())
+        activity_by_op = {r.employee_id: r for r in db.query(
+            LaborEntry.employee_id,
+            func.count(func.distinct(LaborEntry.traveler_id)).label("unique_jobs"),
+            func.count(func.distinct(func.date(LaborEntry.start_time))).label("active_days"),
+        ).filter(
+            LaborEntry.employee_id.in_(operator_ids),
             LaborEntry.created_at > thirty_days_ago
-        ).first()
+        ).group_by(LaborEntry.employee_id)}
 
+    for uid, fn, ln, username, total_entries, total_hours, avg_hours, completed_entries in operator_stats:
+        pause_stats = pauses_by_op.get(uid)
         total_pauses = pause_stats.total_pauses if pause_stats else 0
         total_pause_secs = float(pause_stats.total_pause_seconds) if pause_stats else 0
         pause_pct = round(total_pause_secs / (float(total_hours) * 3600) * 100, 1) if total_hours and float(total_hours) > 0 else 0
 
-        # Steps completed by this operator
-        steps_done = db.query(func.count(ProcessStep.id)).filter(
-            ProcessStep.completed_by == uid,
-            ProcessStep.completed_at > thirty_days_ago
-        ).scalar() or 0
-
-        # Unique jobs worked
-        unique_jobs = db.query(func.count(func.distinct(LaborEntry.traveler_id))).filter(
-            LaborEntry.employee_id == uid,
-            LaborEntry.created_at > thirty_days_ago
-        ).scalar() or 0
-
-        # Active days (days with at least one entry)
-        active_days = db.query(func.count(func.distinct(func.date(LaborEntry.start_time)))).filter(
-            LaborEntry.employee_id == uid,
-            LaborEntry.created_at > thirty_days_ago
-        ).scalar() or 0
+        steps_done = steps_by_op.get(uid, 0)
+        activity = activity_by_op.get(uid)
+        unique_jobs = activity.unique_jobs if activity else 0
+        active_days = activity.active_days if activity else 0
 
         avg_hours_per_day = round(float(total_hours) / active_days, 2) if active_days > 0 else 0
 
@@ -522,6 +441,7 @@ async def get_analytics(
     scorecards.sort(key=lambda x: x["total_hours"], reverse=True)
 
     # ========== 8. KITTING ANALYTICS ==========
+    timer.start("kitting_analytics")
     # Tracks every kitting step across all traveler types so admin can see
     # total kitting labor, who's waiting on parts (live from KOSH + manual
     # WAITING_PARTS pause logs), trends, waiting-time metrics, and a forecast
@@ -653,64 +573,63 @@ async def get_analytics(
         kosh_status_map = {}
         try:
             from routers.jobs import get_kosh_connection
-            kosh_conn = get_kosh_connection()
-            kosh_cur = kosh_conn.cursor()
-            unique_jobs = list({t.job_number for _, t in active_kit_steps if t.job_number})
-            for jn in unique_jobs:
-                try:
-                    base = jn.rstrip('LM') if jn else jn
-                    kosh_job = None
-                    kosh_jn = jn
-                    for try_jn in (jn, base) if base != jn else (jn,):
+            with get_kosh_connection() as kosh_conn:
+                kosh_cur = kosh_conn.cursor()
+                unique_jobs = list({t.job_number for _, t in active_kit_steps if t.job_number})
+                for jn in unique_jobs:
+                    try:
+                        base = jn.rstrip('LM') if jn else jn
+                        kosh_job = None
+                        kosh_jn = jn
+                        for try_jn in (jn, base) if base != jn else (jn,):
+                            kosh_cur.execute(
+                                'SELECT order_qty, status FROM warehouse."tblJob" WHERE job_number = %s',
+                                (try_jn,),
+                            )
+                            row = kosh_cur.fetchone()
+                            if row:
+                                kosh_job = row
+                                kosh_jn = try_jn
+                                break
+                        if not kosh_job:
+                            continue
+                        order_qty = int(kosh_job[0] or 1)
+                        kosh_status_map[jn] = kosh_job[1]
                         kosh_cur.execute(
-                            'SELECT order_qty, status FROM warehouse."tblJob" WHERE job_number = %s',
-                            (try_jn,),
+                            """
+                            WITH bom_items AS (
+                                SELECT DISTINCT ON (b.aci_pn) b.aci_pn, b.mpn, b.qty
+                                FROM warehouse."tblBOM" b
+                                WHERE b.job = %s
+                                ORDER BY b.aci_pn, b.line
+                            )
+                            SELECT
+                                CAST(COALESCE(NULLIF(bi.qty, ''), '0') AS INTEGER) as qty_per,
+                                COALESCE(SUM(CASE WHEN w.loc_to != 'MFG Floor' THEN w.onhandqty ELSE 0 END), 0) as on_hand
+                            FROM bom_items bi
+                            LEFT JOIN warehouse."tblWhse_Inventory" w
+                                ON bi.aci_pn = w.item OR bi.mpn = w.mpn
+                            GROUP BY bi.aci_pn, bi.qty
+                            """,
+                            (kosh_jn,),
                         )
-                        row = kosh_cur.fetchone()
-                        if row:
-                            kosh_job = row
-                            kosh_jn = try_jn
-                            break
-                    if not kosh_job:
-                        continue
-                    order_qty = int(kosh_job[0] or 1)
-                    kosh_status_map[jn] = kosh_job[1]
-                    kosh_cur.execute(
-                        """
-                        WITH bom_items AS (
-                            SELECT DISTINCT ON (b.aci_pn) b.aci_pn, b.mpn, b.qty
-                            FROM warehouse."tblBOM" b
-                            WHERE b.job = %s
-                            ORDER BY b.aci_pn, b.line
-                        )
-                        SELECT
-                            CAST(COALESCE(NULLIF(bi.qty, ''), '0') AS INTEGER) as qty_per,
-                            COALESCE(SUM(CASE WHEN w.loc_to != 'MFG Floor' THEN w.onhandqty ELSE 0 END), 0) as on_hand
-                        FROM bom_items bi
-                        LEFT JOIN warehouse."tblWhse_Inventory" w
-                            ON bi.aci_pn = w.item OR bi.mpn = w.mpn
-                        GROUP BY bi.aci_pn, bi.qty
-                        """,
-                        (kosh_jn,),
-                    )
-                    bom_rows = kosh_cur.fetchall()
-                    total = len(bom_rows)
-                    short = 0
-                    for r in bom_rows:
-                        req = int(r[0] or 0) * order_qty
-                        oh = int(r[1] or 0)
-                        if oh < req:
-                            short += 1
-                    kosh_shortage_map[jn] = {"total": total, "short": short}
-                except Exception:
-                    # One bad job shouldn't abort the shared transaction and
-                    # wipe kitting shortage data for every other job.
-                    try:
-                        kosh_conn.rollback()
+                        bom_rows = kosh_cur.fetchall()
+                        total = len(bom_rows)
+                        short = 0
+                        for r in bom_rows:
+                            req = int(r[0] or 0) * order_qty
+                            oh = int(r[1] or 0)
+                            if oh < req:
+                                short += 1
+                        kosh_shortage_map[jn] = {"total": total, "short": short}
                     except Exception:
-                        pass
-                    continue
-            kosh_conn.close()
+                        # One bad job shouldn't abort the shared transaction and
+                        # wipe kitting shortage data for every other job.
+                        try:
+                            kosh_conn.rollback()
+                        except Exception:
+                            pass
+                        continue
         except Exception as kosh_err:
             print(f"Kitting KOSH lookup error: {kosh_err}")
 
@@ -858,5 +777,4 @@ async def get_analytics(
         "operator_scorecards": scorecards,
         "kitting_analytics": kitting_analytics,
     }
-    _analytics_cache["all"] = (_time.time(), _result)
     return _result
@@ -28,6 +28,8 @@ from models import (
     KittingTimerSession,
 )
 from routers.auth import get_current_user
+from services.operation_estimates import estimate_hours
+from utils.time_buckets import ISO_DATE_PATTERN, bucket_start, bucketed_series, utc_date_text
 
 router = APIRouter()
 
@@ -36,32 +38,6 @@ DEFAULT_LABOR_RATE = 35.0  # $/hr — used for cost estimates
 WORK_HOURS_PER_DAY = 8
 WORK_DAYS_PER_WEEK = 5
 
-OPERATION_ESTIMATES = {
-    "KITTING": 1.5, "FEEDER LOAD": 1.0, "SMT SET UP": 1.5,
-    "SMT TOP": 3.0, "SMT BOTTOM": 3.0, "SMT BOT": 3.0,
-    "REFLOW": 1.5, "WASH": 0.75, "AOI": 1.5, "XRAY": 1.0,
-    "HAND SOLDER": 3.0, "HAND ASSEMBLY": 2.5, "TOUCH UP": 1.5,
-    "INSPECTION": 1.5, "INTERNAL TESTING": 2.0, "TESTING": 2.0,
-    "INTERNAL COATING": 1.5, "CONFORMAL COAT": 1.5,
-    "LABELING": 0.5, "PACKAGING": 0.5, "SHIPPING": 0.5,
-    "QC": 1.5, "PROGRAMMING": 1.0, "DEPANEL": 1.0,
-    "STENCIL": 0.75, "PASTE": 0.75, "ENGINEERING": 1.0,
-    "VERIFY BOM": 0.5, "INVENTORY": 0.5, "PURCHASING": 1.0,
-}
-
-
-def _estimate(op: str) -> float:
-    if not op:
-        return 1.0
-    up = op.upper().strip()
-    if up in OPERATION_ESTIMATES:
-        return OPERATION_ESTIMATES[up]
-    for k, v in OPERATION_ESTIMATES.items():
-        if k in up or up in k:
-            return v
-    return 1.0
-
-
 def _weekday_hours(start_date, end_date) -> float:
     """Count available work hours between two dates (weekdays only, 8h/day)."""
     hours = 0
@@ -85,45 +61,33 @@ async def get_advanced_analytics(
     # 1. ON-TIME DELIVERY RATE (last 12 weeks)
     # ═══════════════════════════════════════════════════════════════════
     on_time_delivery = {"weeks": [], "overall_rate": 0, "total_shipped": 0, "total_on_time": 0}
+    first_week = today - timedelta(days=today.weekday() + 7 * 11)
     try:
+        # Shipped = completed that week. On time = no due date, or completed
+        # (UTC date) on or before it; a malformed due date counts as late.
+        on_time_expr = or_(
+            Traveler.due_date.is_(None),
+            Traveler.due_date == "",
+            and_(Traveler.due_date.like(ISO_DATE_PATTERN),
+                 utc_date_text(db, Traveler.completed_at) <= Traveler.due_date),
+        )
+        weeks = bucketed_series(db, Traveler.completed_at, "week", first_week, today, {
+            "shipped": func.count(Traveler.id),
+            "on_time": func.sum(case((on_time_expr, 1), else_=0)),
+        })
+
         total_shipped_all = 0
         total_on_time_all = 0
-        for w in range(11, -1, -1):
-            week_start = today - timedelta(days=today.weekday() + 7 * w)
-            week_end = week_start + timedelta(days=6)
-            ws_dt = datetime.combine(week_start, datetime.min.time()).replace(tzinfo=timezone.utc)
-            we_dt = datetime.combine(week_end + timedelta(days=1), datetime.min.time()).replace(tzinfo=timezone.utc)
-
-            completed = db.query(Traveler).filter(
-                Traveler.completed_at >= ws_dt,
-                Traveler.completed_at < we_dt,
-                Traveler.completed_at.isnot(None),
-            ).all()
-
-            shipped = len(completed)
-            on_time = 0
-            for t in completed:
-                if t.due_date:
-                    try:
-                        due = datetime.strptime(t.due_date, "%Y-%m-%d").date()
-                        shipped_date = t.completed_at.date() if t.completed_at else None
-                        if shipped_date and shipped_date <= due:
-                            on_time += 1
-                    except Exception:
-                        pass
-                else:
-                    on_time += 1  # no due date = can't be late
-
+        for week in weeks:
+            shipped, on_time = int(week["shipped"]), int(week["on_time"])
             total_shipped_all += shipped
             total_on_time_all += on_time
-            rate = round(on_time / shipped * 100, 1) if shipped > 0 else 100.0
-
             on_time_delivery["weeks"].append({
-                "week": week_start.strftime("%m/%d"),
+                "week": week["bucket"].strftime("%m/%d"),
                 "shipped": shipped,
                 "on_time": on_time,
                 "late": shipped - on_time,
-                "rate": rate,
+                "rate": round(on_time / shipped * 100, 1) if shipped > 0 else 100.0,
             })
 
         on_time_delivery["total_shipped"] = total_shipped_all
@@ -163,7 +127,7 @@ async def get_advanced_analytics(
 
             # Estimated remaining hours
             remaining_hours = sum(
-                _estimate(s.operation) for s in steps if not s.is_completed
+                estimate_hours(s.operation) for s in steps if not s.is_completed
             )
 
             # Actual hours worked so far
@@ -204,28 +168,18 @@ async def get_advanced_analytics(
     # ═══════════════════════════════════════════════════════════════════
     yield_trend = []
     try:
-        for w in range(11, -1, -1):
-            week_start = today - timedelta(days=today.weekday() + 7 * w)
-            week_end = week_start + timedelta(days=6)
-            ws_dt = datetime.combine(week_start, datetime.min.time()).replace(tzinfo=timezone.utc)
-            we_dt = datetime.combine(week_end + timedelta(days=1), datetime.min.time()).replace(tzinfo=timezone.utc)
-
-            row = db.query(
-                func.coalesce(func.sum(ProcessStep.accepted), 0).label("accepted"),
-                func.coalesce(func.sum(ProcessStep.rejected), 0).label("rejected"),
-            ).filter(
-                ProcessStep.completed_at >= ws_dt,
-                ProcessStep.completed_at < we_dt,
-                ProcessStep.quantity > 0,
-            ).first()
-
-            accepted = int(row.accepted) if row else 0
-            rejected = int(row.rejected) if row else 0
+        weeks = bucketed_series(db, ProcessStep.completed_at, "week", first_week, today, {
+            "accepted": func.sum(ProcessStep.accepted),
+            "rejected": func.sum(ProcessStep.rejected),
+        }, ProcessStep.quantity > 0)
+        for week in weeks:
+            accepted = int(week["accepted"])
+            rejected = int(week["rejected"])
             total = accepted + rejected
             yield_pct = round(accepted / total * 100, 1) if total > 0 else None
 
             yield_trend.append({
-                "week": week_start.strftime("%m/%d"),
+                "week": week["bucket"].strftime("%m/%d"),
                 "accepted": accepted,
                 "rejected": rejected,
                 "total": total,
@@ -291,24 +245,22 @@ async def get_advanced_analytics(
             Traveler.completed_at < day_end,
         ).scalar() or 0
 
-        steps_completed_today = db.query(func.count(ProcessStep.id)).filter(
-            ProcessStep.completed_at >= day_start,
-            ProcessStep.completed_at < day_end,
-        ).scalar() or 0
+        # Today and yesterday side by side: one query each for steps and hours.
+        yesterday = today - timedelta(days=1)
+        steps_by_day = bucketed_series(db, ProcessStep.completed_at, "day", yesterday, today, {
+            "steps": func.count(ProcessStep.id),
+        })
+        hours_by_day = bucketed_series(db, LaborEntry.start_time, "day", yesterday, today, {
+            "hours": func.sum(LaborEntry.hours_worked),
+        }, LaborEntry.hours_worked > 0)
+        steps_yesterday, steps_completed_today = (int(d["steps"]) for d in steps_by_day)
+        hours_yesterday, hours_logged_today = (float(d["hours"]) for d in hours_by_day)
 
         jobs_started_today = db.query(func.count(Traveler.id)).filter(
             Traveler.created_at >= day_start,
             Traveler.created_at < day_end,
         ).scalar() or 0
 
-        hours_logged_today = db.query(
-            func.coalesce(func.sum(LaborEntry.hours_worked), 0)
-        ).filter(
-            LaborEntry.start_time >= day_start,
-            LaborEntry.start_time < day_end,
-            LaborEntry.hours_worked > 0,
-        ).scalar() or 0
-
         active_timers = db.query(func.count(LaborEntry.id)).filter(
             LaborEntry.end_time.is_(None),
             LaborEntry.is_completed == False,
@@ -321,37 +273,13 @@ async def get_advanced_analytics(
             LaborEntry.start_time < day_end,
         ).scalar() or 0
 
-        # Yesterday for comparison
-        yesterday = today - timedelta(days=1)
-        yd_start = datetime.combine(yesterday, datetime.min.time()).replace(tzinfo=timezone.utc)
-        yd_end = day_start
-        hours_yesterday = db.query(
-            func.coalesce(func.sum(LaborEntry.hours_worked), 0)
-        ).filter(
-            LaborEntry.start_time >= yd_start,
-            LaborEntry.start_time < yd_end,
-            LaborEntry.hours_worked > 0,
-        ).scalar() or 0
-
-        steps_yesterday = db.query(func.count(ProcessStep.id)).filter(
-            ProcessStep.completed_at >= yd_start,
-            ProcessStep.completed_at < yd_end,
-        ).scalar() or 0
-
-        # Overdue count
-        overdue_count = 0
-        overdue_travelers = db.query(Traveler).filter(
+        # Overdue: due date (ISO text) before today
+        overdue_count = db.query(func.count(Traveler.id)).filter(
             Traveler.is_active == True,
             Traveler.status.in_([TravelerStatus.CREATED, TravelerStatus.IN_PROGRESS]),
-            Traveler.due_date.isnot(None),
-        ).all()
-        for t in overdue_travelers:
-            try:
-                due = datetime.strptime(t.due_date, "%Y-%m-%d").date()
-                if due < today:
-                    overdue_count += 1
-            except Exception:
-                pass
+            Traveler.due_date.like(ISO_DATE_PATTERN),
+            Traveler.due_date < today.isoformat(),
+        ).scalar() or 0
 
         daily_scorecard = {
             "date": today.isoformat(),
@@ -385,33 +313,37 @@ async def get_advanced_analytics(
             LaborEntry.start_time >= now - timedelta(days=7),
         ).scalar() or 1
 
-        for w_offset in range(2):
-            week_start = today + timedelta(days=(7 * w_offset) - today.weekday())
-            week_end = week_start + timedelta(days=4)  # Mon-Fri
+        # Remaining estimated hours of every job due in the two weeks, bucketed
+        # by due week: one query for the jobs' open steps.
+        this_week = bucket_start(today, "week")
+        window_end = this_week + timedelta(days=11)  # Friday of next week
+        due_jobs = db.query(Traveler.id, Traveler.due_date).filter(
+            Traveler.is_active == True,
+            Traveler.status.in_([TravelerStatus.CREATED, TravelerStatus.IN_PROGRESS]),
+            Traveler.due_date.like(ISO_DATE_PATTERN),
+            Traveler.due_date >= this_week.isoformat(),
+            Traveler.due_date <= window_end.isoformat(),
+        ).all()
+        due_week = {}
+        for tid, due_date in due_jobs:
+            try:
+                due = datetime.strptime(due_date, "%Y-%m-%d").date()
+            except ValueError:
+                continue
+            if due.weekday() < 5:  # Mon-Fri
+                due_week[tid] = bucket_start(due, "week")
+        committed_by_week = defaultdict(float)
+        if due_week:
+            for tid, operation in db.query(ProcessStep.traveler_id, ProcessStep.operation).filter(
+                ProcessStep.traveler_id.in_(list(due_week)),
+                ProcessStep.is_completed == False,
+            ):
+                committed_by_week[due_week[tid]] += estimate_hours(operation)
 
+        for w_offset in range(2):
+            week_start = this_week + timedelta(days=7 * w_offset)
             available_hours = active_ops * WORK_HOURS_PER_DAY * WORK_DAYS_PER_WEEK
-
-            # Committed: remaining estimated hours on jobs due this week
-            committed = 0
-            due_this_week = db.query(Traveler).filter(
-                Traveler.is_active == True,
-                Traveler.status.in_([TravelerStatus.CREATED, TravelerStatus.IN_PROGRESS]),
-                Traveler.due_date.isnot(None),
-            ).all()
-            for t in due_this_week:
-                try:
-                    due = datetime.strptime(t.due_date, "%Y-%m-%d").date()
-                    if week_start <= due <= week_end:
-                        remaining = sum(
-                            _estimate(s.operation) for s in
-                            db.query(ProcessStep).filter(
-                                ProcessStep.traveler_id == t.id,
-                                ProcessStep.is_completed == False
-                            ).all()
-                        )
-                        committed += remaining
-                except Exception:
-                    pass
+            committed = committed_by_week.get(week_start, 0)
 
             utilization = round(committed / available_hours * 100, 1) if available_hours > 0 else 0
 
@@ -742,7 +674,7 @@ async def get_advanced_analytics(
 
         for tid, job, desc, cust, status, hours in recent_travelers:
             est_hours = sum(
-                _estimate(s.operation) for s in
+                estimate_hours(s.operation) for s in
                 db.query(ProcessStep).filter(ProcessStep.traveler_id == tid).all()
             )
             labor_costs.append({
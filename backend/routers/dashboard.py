@@ -5,25 +5,27 @@ from datetime import datetime, timedelta, timezone
 from typing import Optional
 from database import get_db
 from models import (
-    User, Traveler, LaborEntry, WorkCenter,
-    ProcessStep, Approval, TravelerTrackingLog, TravelerStatus, ApprovalStatus
+    User, Traveler, LaborEntry, LaborDailyRollup, WorkCenter,
+    ProcessStep, Approval, TravelerTrackingLog, TravelerStatus, ApprovalStatus, UserRole
 )
 from routers.auth import get_current_user
 from schemas.dashboard_schemas import DashboardStats
+from services.operation_estimates import estimate_hours, resolve_operation
+from services.response_cache import cached_response, cache_stats
+from services.snapshots import INSIGHTS_SNAPSHOT, SectionTimer, read_snapshot, snapshot_status
 from utils.job_display import format_job_display
-import time as _time
 
 router = APIRouter()
 
-# Short in-process response cache for the expensive dashboard endpoints. These
-# return global (non-user-specific) data and are polled every ~30s by every
-# open dashboard, so caching means one computation serves all users/polls in
-# the window instead of each request recomputing (and blocking the worker).
-_stats_cache: dict = {}
+# The expensive dashboard endpoints return global (non-user-specific) data and
+# are polled every ~30s by every open dashboard, so they go through the shared
+# response cache (services/response_cache.py): one computation serves all
+# users/polls — and, with the sqlite backend, all workers — in the window.
 _STATS_TTL = 30  # seconds
 
 
 @router.get("/stats", response_model=DashboardStats)
+@cached_response("dashboard.stats", ttl=_STATS_TTL, vary=("start_date", "end_date"))
 async def get_dashboard_stats(
     start_date: Optional[str] = None,
     end_date: Optional[str] = None,
@@ -50,12 +52,6 @@ async def get_dashboard_stats(
     start_date_str = start_dt.strftime("%Y-%m-%d")
     end_date_str = end_dt.strftime("%Y-%m-%d")
 
-    # Serve a recent cached result if available (global data, polled frequently).
-    _cache_key = (start_date_str, end_date_str)
-    _cached = _stats_cache.get(_cache_key)
-    if _cached and _time.time() - _cached[0] < _STATS_TTL:
-        return _cached[1]
-
     # Filter for travelers whose due_date or ship_date falls in the range (or have no dates set)
     date_range_filter = or_(
         and_(Traveler.due_date.isnot(None), Traveler.due_date >= start_date_str, Traveler.due_date <= end_date_str),
@@ -74,143 +70,95 @@ async def get_dashboard_stats(
 
     status_distribution = {str(status.value): count for status, count in status_counts}
 
-    # Labor Analytics
-    labor_entries = db.query(
-        func.coalesce(func.sum(LaborEntry.hours_worked), 0).label('total_hours')
-    ).filter(
-        LaborEntry.created_at >= start_dt,
-        LaborEntry.created_at <= end_dt,
-        LaborEntry.hours_worked > 0,
-        LaborEntry.end_time.isnot(None)
-    ).first()
+    # Labor Analytics — summed from the daily rollups (services/labor_rollups.py),
+    # a few rows per day, instead of scanning labor_entries for the range.
+    # A rollup day is the UTC date of the entry's start_time.
+    start_day, end_day = start_dt.date(), end_dt.date()
+    rollup_range = (
+        LaborDailyRollup.day >= start_day,
+        LaborDailyRollup.day <= end_day,
+        LaborDailyRollup.hours > 0,
+    )
 
-    total_labor_hours = float(labor_entries.total_hours) if labor_entries else 0.0
+    total_labor_hours = float(db.query(
+        func.coalesce(func.sum(LaborDailyRollup.hours), 0)
+    ).filter(*rollup_range).scalar() or 0)
 
     # Labor by work center
     labor_by_wc = db.query(
-        LaborEntry.work_center,
-        func.sum(LaborEntry.hours_worked).label('hours')
+        LaborDailyRollup.work_center,
+        func.sum(LaborDailyRollup.hours).label('hours')
     ).filter(
-        LaborEntry.created_at >= start_dt,
-        LaborEntry.created_at <= end_dt,
-        LaborEntry.work_center.isnot(None),
-        LaborEntry.hours_worked > 0,
-        LaborEntry.end_time.isnot(None)
-    ).group_by(LaborEntry.work_center).order_by(func.sum(LaborEntry.hours_worked).desc()).limit(10).all()
+        *rollup_range,
+        LaborDailyRollup.work_center != ''
+    ).group_by(LaborDailyRollup.work_center).order_by(func.sum(LaborDailyRollup.hours).desc()).limit(10).all()
 
     labor_by_work_center = [
         {"workCenter": wc or "Unknown", "hours": float(hours)}
         for wc, hours in labor_by_wc
     ]
 
-    # Labor trend by work center (daily/weekly aggregation) with job number details
+    # Labor trend by work center (daily/weekly aggregation) with job number details.
+    # Rollups are per day; ranges over a month are folded into Monday-start weeks
+    # here (what date_trunc('week') gave).
     days_diff = (end_dt - start_dt).days
     from collections import OrderedDict
 
-    if days_diff <= 31:
-        # Get aggregated totals by date + work center
-        labor_trend_data = db.query(
-            func.date(LaborEntry.start_time).label('date'),
-            LaborEntry.work_center,
-            func.sum(LaborEntry.hours_worked).label('hours')
-        ).filter(
-            LaborEntry.start_time >= start_dt,
-            LaborEntry.start_time <= end_dt,
-            LaborEntry.hours_worked > 0,
-            LaborEntry.end_time.isnot(None)
-        ).group_by(func.date(LaborEntry.start_time), LaborEntry.work_center).order_by(func.date(LaborEntry.start_time)).all()
-
-        # Get job-level detail: date + work center + job_number.
-        # Group on traveler_type + rma_number too, NOT job_number alone: an RMA
-        # traveler shares its job_number with the original job, so grouping by
-        # job_number would sum RMA rework hours into the original job's actuals
-        # and emit them as one row. Keeping them apart is the whole point.
-        labor_trend_jobs = db.query(
-            func.date(LaborEntry.start_time).label('date'),
-            LaborEntry.work_center,
-            Traveler.job_number,
-            Traveler.traveler_type,
-            Traveler.rma_number,
-            func.sum(LaborEntry.hours_worked).label('hours')
-        ).join(Traveler, LaborEntry.traveler_id == Traveler.id).filter(
-            LaborEntry.start_time >= start_dt,
-            LaborEntry.start_time <= end_dt,
-            LaborEntry.hours_worked > 0,
-            LaborEntry.end_time.isnot(None)
-        ).group_by(
-            func.date(LaborEntry.start_time), LaborEntry.work_center,
-            Traveler.job_number, Traveler.traveler_type, Traveler.rma_number
-        ).order_by(func.date(LaborEntry.start_time)).all()
-
-        date_map = OrderedDict()
-        for date, wc, hours in labor_trend_data:
-            date_str = date.strftime("%b %d") if date else ""
-            wc_name = wc or "Unknown"
-            if date_str not in date_map:
-                date_map[date_str] = {"date": date_str, "_details": {}}
-            date_map[date_str][wc_name] = round(float(hours), 2)
-
-        # Attach job details
-        for date, wc, job_num, ttype, rma_num, hours in labor_trend_jobs:
-            date_str = date.strftime("%b %d") if date else ""
-            wc_name = wc or "Unknown"
-            if date_str in date_map:
-                details = date_map[date_str]["_details"]
-                if wc_name not in details:
-                    details[wc_name] = []
-                job_label = format_job_display(ttype, rma_num, job_num)
-                details[wc_name].append({"job": job_label or "N/A", "hours": round(float(hours), 2)})
-
-        labor_trend = list(date_map.values())
-    else:
-        labor_trend_data = db.query(
-            func.date_trunc('week', LaborEntry.start_time).label('week'),
-            LaborEntry.work_center,
-            func.sum(LaborEntry.hours_worked).label('hours')
-        ).filter(
-            LaborEntry.start_time >= start_dt,
-            LaborEntry.start_time <= end_dt,
-            LaborEntry.hours_worked > 0,
-            LaborEntry.end_time.isnot(None)
-        ).group_by(func.date_trunc('week', LaborEntry.start_time), LaborEntry.work_center).order_by(func.date_trunc('week', LaborEntry.start_time)).all()
-
-        # Same RMA-vs-original split as the daily branch above.
-        labor_trend_jobs = db.query(
-            func.date_trunc('week', LaborEntry.start_time).label('week'),
-            LaborEntry.work_center,
-            Traveler.job_number,
-            Traveler.traveler_type,
-            Traveler.rma_number,
-            func.sum(LaborEntry.hours_worked).label('hours')
-        ).join(Traveler, LaborEntry.traveler_id == Traveler.id).filter(
-            LaborEntry.start_time >= start_dt,
-            LaborEntry.start_time <= end_dt,
-            LaborEntry.hours_worked > 0,
-            LaborEntry.end_time.isnot(None)
-        ).group_by(
-            func.date_trunc('week', LaborEntry.start_time), LaborEntry.work_center,
-            Traveler.job_number, Traveler.traveler_type, Traveler.rma_number
-        ).order_by(func.date_trunc('week', LaborEntry.start_time)).all()
-
-        date_map = OrderedDict()
-        for week, wc, hours in labor_trend_data:
-            date_str = week.strftime("%b %d") if week else ""
-            wc_name = wc or "Unknown"
-            if date_str not in date_map:
-                date_map[date_str] = {"date": date_str, "_details": {}}
-            date_map[date_str][wc_name] = round(float(hours), 2)
-
-        for week, wc, job_num, ttype, rma_num, hours in labor_trend_jobs:
-            date_str = week.strftime("%b %d") if week else ""
-            wc_name = wc or "Unknown"
-            if date_str in date_map:
-                details = date_map[date_str]["_details"]
-                if wc_name not in details:
-                    details[wc_name] = []
-                job_label = format_job_display(ttype, rma_num, job_num)
-                details[wc_name].append({"job": job_label or "N/A", "hours": round(float(hours), 2)})
-
-        labor_trend = list(date_map.values())
+    def bucket(day):
+        return day if days_diff <= 31 else day - timedelta(days=day.weekday())
+
+    labor_trend_data = db.query(
+        LaborDailyRollup.day,
+        LaborDailyRollup.work_center,
+        func.sum(LaborDailyRollup.hours).label('hours')
+    ).filter(*rollup_range).group_by(
+        LaborDailyRollup.day, LaborDailyRollup.work_center
+    ).order_by(LaborDailyRollup.day).all()
+
+    # Job-level detail: date + work center + job_number.
+    # Group on traveler_type + rma_number too, NOT job_number alone: an RMA
+    # traveler shares its job_number with the original job, so grouping by
+    # job_number would sum RMA rework hours into the original job's actuals
+    # and emit them as one row. Keeping them apart is the whole point.
+    labor_trend_jobs = db.query(
+        LaborDailyRollup.day,
+        LaborDailyRollup.work_center,
+        Traveler.job_number,
+        Traveler.traveler_type,
+        Traveler.rma_number,
+        func.sum(LaborDailyRollup.hours).label('hours')
+    ).join(Traveler, LaborDailyRollup.traveler_id == Traveler.id).filter(*rollup_range).group_by(
+        LaborDailyRollup.day, LaborDailyRollup.work_center,
+        Traveler.job_number, Traveler.traveler_type, Traveler.rma_number
+    ).order_by(LaborDailyRollup.day).all()
+
+    trend_hours = OrderedDict()
+    for day, wc, hours in labor_trend_data:
+        key = (bucket(day), wc or "Unknown")
+        trend_hours[key] = trend_hours.get(key, 0.0) + float(hours)
+    job_hours = OrderedDict()
+    for day, wc, job_num, ttype, rma_num, hours in labor_trend_jobs:
+        key = (bucket(day), wc or "Unknown", job_num, ttype, rma_num)
+        job_hours[key] = job_hours.get(key, 0.0) + float(hours)
+
+    date_map = OrderedDict()
+    for (period, wc_name), hours in trend_hours.items():
+        date_str = period.strftime("%b %d")
+        if date_str not in date_map:
+            date_map[date_str] = {"date": date_str, "_details": {}}
+        date_map[date_str][wc_name] = round(hours, 2)
+
+    # Attach job details
+    for (period, wc_name, job_num, ttype, rma_num), hours in job_hours.items():
+        date_str = period.strftime("%b %d")
+        if date_str in date_map:
+            details = date_map[date_str]["_details"]
+            if wc_name not in details:
+                details[wc_name] = []
+            job_label = format_job_display(ttype, rma_num, job_num)
+            details[wc_name].append({"job": job_label or "N/A", "hours": round(hours, 2)})
+
+    labor_trend = list(date_map.values())
 
     # Production Metrics - filtered by due_date/ship_date
     travelers_created = db.query(func.count(Traveler.id)).filter(
@@ -245,14 +193,11 @@ async def get_dashboard_stats(
         User.first_name,
         User.last_name,
         User.username,
-        func.sum(LaborEntry.hours_worked).label('hours')
-    ).join(LaborEntry, LaborEntry.employee_id == User.id).filter(
-        LaborEntry.created_at >= start_dt,
-        LaborEntry.created_at <= end_dt,
-        LaborEntry.hours_worked > 0,
-        LaborEntry.end_time.isnot(None)
+        func.sum(LaborDailyRollup.hours).label('hours')
+    ).join(LaborDailyRollup, LaborDailyRollup.employee_id == User.id).filter(
+        *rollup_range
     ).group_by(User.id, User.first_name, User.last_name, User.username).order_by(
-        func.sum(LaborEntry.hours_worked).desc()
+        func.sum(LaborDailyRollup.hours).desc()
     ).limit(10).all()
 
     top_employees = [
@@ -283,40 +228,19 @@ async def get_dashboard_stats(
     ).scalar() or 0
 
     # Department trend: labor hours grouped by date + department
-    # Join labor_entries with work_centers to get department
-    from collections import OrderedDict
-    if days_diff <= 31:
-        dept_trend_data = db.query(
-            func.date(LaborEntry.start_time).label('date'),
-            WorkCenter.department,
-            func.sum(LaborEntry.hours_worked).label('hours')
-        ).outerjoin(
-            WorkCenter,
-            func.upper(func.trim(LaborEntry.work_center)) == func.upper(func.trim(WorkCenter.name))
-        ).filter(
-            LaborEntry.start_time >= start_dt,
-            LaborEntry.start_time <= end_dt,
-            LaborEntry.hours_worked > 0,
-            LaborEntry.end_time.isnot(None)
-        ).group_by(func.date(LaborEntry.start_time), WorkCenter.department).order_by(func.date(LaborEntry.start_time)).all()
-    else:
-        dept_trend_data = db.query(
-            func.date_trunc('week', LaborEntry.start_time).label('date'),
-            WorkCenter.department,
-            func.sum(LaborEntry.hours_worked).label('hours')
-        ).outerjoin(
-            WorkCenter,
-            func.upper(func.trim(LaborEntry.work_center)) == func.upper(func.trim(WorkCenter.name))
-        ).filter(
-            LaborEntry.start_time >= start_dt,
-            LaborEntry.start_time <= end_dt,
-            LaborEntry.hours_worked > 0,
-            LaborEntry.end_time.isnot(None)
-        ).group_by(func.date_trunc('week', LaborEntry.start_time), WorkCenter.department).order_by(func.date_trunc('week', LaborEntry.start_time)).all()
+    # Join the rollups with work_centers to get department
+    dept_trend_data = db.query(
+        LaborDailyRollup.day,
+        WorkCenter.department,
+        func.sum(LaborDailyRollup.hours).label('hours')
+    ).outerjoin(
+        WorkCenter,
+        func.upper(func.trim(LaborDailyRollup.work_center)) == func.upper(func.trim(WorkCenter.name))
+    ).filter(*rollup_range).group_by(LaborDailyRollup.day, WorkCenter.department).order_by(LaborDailyRollup.day).all()
 
     dept_date_map = OrderedDict()
-    for date_val, dept, hours in dept_trend_data:
-        date_str = date_val.strftime("%b %d") if date_val else ""
+    for day, dept, hours in dept_trend_data:
+        date_str = bucket(day).strftime("%b %d")
         dept_name = dept or "Unknown"
         # Normalize multi-department strings (e.g. "Engineering/Prep" → "Engineering")
         dept_name = dept_name.split('/')[0].strip()
@@ -405,51 +329,8 @@ async def get_dashboard_stats(
         kosh_conn = None
         kosh_cur = None
 
-    # Approximate hours per operation type (PCB assembly industry averages)
-    OPERATION_ESTIMATES = {
-        "KITTING": {"hours": 1.5, "operators": 1},
-        "FEEDER LOAD": {"hours": 1.0, "operators": 1},
-        "SMT SET UP": {"hours": 1.5, "operators": 1},
-        "SMT TOP": {"hours": 3.0, "operators": 2},
-        "SMT BOTTOM": {"hours": 3.0, "operators": 2},
-        "SMT BOT": {"hours": 3.0, "operators": 2},
-        "REFLOW": {"hours": 1.5, "operators": 1},
-        "WASH": {"hours": 0.75, "operators": 1},
-        "AOI": {"hours": 1.5, "operators": 1},
-        "XRAY": {"hours": 1.0, "operators": 1},
-        "HAND SOLDER": {"hours": 3.0, "operators": 2},
-        "HAND ASSEMBLY": {"hours": 2.5, "operators": 2},
-        "TOUCH UP": {"hours": 1.5, "operators": 1},
-        "INSPECTION": {"hours": 1.5, "operators": 1},
-        "INTERNAL TESTING": {"hours": 2.0, "operators": 1},
-        "TESTING": {"hours": 2.0, "operators": 1},
-        "INTERNAL COATING": {"hours": 1.5, "operators": 1},
-        "CONFORMAL COAT": {"hours": 1.5, "operators": 1},
-        "LABELING": {"hours": 0.5, "operators": 1},
-        "PACKAGING": {"hours": 0.5, "operators": 1},
-        "SHIPPING": {"hours": 0.5, "operators": 1},
-        "QC": {"hours": 1.5, "operators": 1},
-        "PROGRAMMING": {"hours": 1.0, "operators": 1},
-        "DEPANEL": {"hours": 1.0, "operators": 1},
-        "STENCIL": {"hours": 0.75, "operators": 1},
-        "PASTE": {"hours": 0.75, "operators": 1},
-    }
     BUFFER_PERCENT = 0.10  # 10% buffer
 
-    def get_step_estimate(operation_name):
-        """Get estimated hours and operators for an operation using fuzzy match."""
-        if not operation_name:
-            return {"hours": 1.0, "operators": 1}
-        op_upper = operation_name.upper().strip()
-        # Exact match first
-        if op_upper in OPERATION_ESTIMATES:
-            return OPERATION_ESTIMATES[op_upper]
-        # Substring match
-        for key, val in OPERATION_ESTIMATES.items():
-            if key in op_upper or op_upper in key:
-                return val
-        return {"hours": 1.0, "operators": 1}
-
     try:
         # Include ALL non-completed travelers (active + drafts)
         forecast_travelers = db.query(Traveler).filter(
@@ -520,9 +401,7 @@ async def get_dashboard_stats(
             total_completed_steps = 0
 
             for step in steps:
-                est = get_step_estimate(step.operation)
-                est_hours = est["hours"]
-                operators_estimated = est["operators"]
+                est_hours, operators_estimated = resolve_operation(step.operation)
                 buffer = round(est_hours * BUFFER_PERCENT, 2)
                 buffered_hours = est_hours + buffer
                 actual = step_labor.get(step.id, 0)
@@ -713,7 +592,6 @@ async def get_dashboard_stats(
         forecast=forecast,
         active_labor_entries=active_labor_entries
     )
-    _stats_cache[_cache_key] = (_time.time(), _result)
     return _result
 
 
@@ -724,52 +602,54 @@ async def get_dashboard_insights(
 ):
     """All-in-one insights endpoint for dashboard cards. Returns operator efficiency,
     busiest work centers, idle operators, KOSH inventory insights, rejection rates,
-    bottlenecks, due date heatmap, overdue aging, throughput/labor/cycle trends."""
+    bottlenecks, due date heatmap, overdue aging, throughput/labor/cycle trends.
+
+    Served from the latest precomputed snapshot (services/snapshots.py);
+    snapshot_computed_at / snapshot_age_seconds say how old it is."""
+    return read_snapshot(db, INSIGHTS_SNAPSHOT)
+
+
+def compute_dashboard_insights(db: Session, timer: SectionTimer) -> dict:
+    """The insights payload, section by section. Run by the snapshot
+    scheduler, not per request."""
     import math
     from collections import defaultdict
 
-    _cached = _stats_cache.get("__insights__")
-    if _cached and _time.time() - _cached[0] < _STATS_TTL:
-        return _cached[1]
-
     now = datetime.now(timezone.utc)
     today = now.date()
 
     # ─── 1. OPERATOR EFFICIENCY (actual vs estimated per person) ─────────────
+    timer.start("operator_efficiency")
     operator_efficiency = []
     try:
-        employees = db.query(
-            User.id, User.username, User.first_name, User.last_name,
-            func.sum(LaborEntry.hours_worked).label('actual_hours'),
-            func.count(LaborEntry.id).label('entry_count')
-        ).join(LaborEntry, LaborEntry.employee_id == User.id).filter(
-            LaborEntry.hours_worked > 0,
+        # One grouped query for every operator: closed labor of the last 30
+        # days per (operator, step operation). Actual hours count entries with
+        # hours logged; estimated hours are one operation estimate per entry
+        # on a step.
+        rows = db.query(
+            User.id, User.username, User.first_name, User.last_name, ProcessStep.operation,
+            func.sum(case((LaborEntry.hours_worked > 0, LaborEntry.hours_worked), else_=0)).label('actual_hours'),
+            func.count(case((LaborEntry.hours_worked > 0, LaborEntry.id))).label('entry_count'),
+            func.count(ProcessStep.id).label('step_entries'),
+        ).join(LaborEntry, LaborEntry.employee_id == User.id).outerjoin(
+            ProcessStep, ProcessStep.id == LaborEntry.step_id
+        ).filter(
             LaborEntry.end_time.isnot(None),
             LaborEntry.created_at >= now - timedelta(days=30)
-        ).group_by(User.id).order_by(func.sum(LaborEntry.hours_worked).desc()).limit(15).all()
-
-        OPERATION_ESTIMATES = {
-            "KITTING": 1.5, "FEEDER LOAD": 1.0, "SMT SET UP": 1.5, "SMT TOP": 3.0,
-            "SMT BOTTOM": 3.0, "WASH": 0.75, "AOI": 1.5, "HAND SOLDER": 3.0,
-            "HAND ASSEMBLY": 2.5, "INSPECTION": 1.5, "INTERNAL TESTING": 2.0,
-            "LABELING": 0.5, "SHIPPING": 0.5, "DEPANEL": 1.0, "TRIM": 1.0,
-            "WAVE": 1.5, "MANUAL INSERTION": 2.0, "COMPONENT PREP": 1.5,
-        }
-
-        for emp in employees:
-            # Get their completed steps to estimate expected hours
-            completed_steps = db.query(ProcessStep.operation).join(
-                LaborEntry, LaborEntry.step_id == ProcessStep.id
-            ).filter(
-                LaborEntry.employee_id == emp.id,
-                LaborEntry.end_time.isnot(None),
-                LaborEntry.created_at >= now - timedelta(days=30)
-            ).all()
-            est_hours = sum(
-                next((v for k, v in OPERATION_ESTIMATES.items() if k in (s.operation or '').upper()), 1.0)
-                for s in completed_steps
-            )
-            actual = float(emp.actual_hours or 0)
+        ).group_by(User.id, User.username, User.first_name, User.last_name, ProcessStep.operation).all()
+
+        by_operator = {}
+        for r in rows:
+            op = by_operator.setdefault(r.id, {"user": r, "actual": 0.0, "entries": 0, "estimated": 0.0})
+            op["actual"] += float(r.actual_hours or 0)
+            op["entries"] += r.entry_count
+            if r.step_entries:
+                op["estimated"] += r.step_entries * estimate_hours(r.operation)
+
+        # Top 15 by hours logged
+        top = sorted((op for op in by_operator.values() if op["actual"] > 0), key=lambda op: -op["actual"])[:15]
+        for op in top:
+            emp, actual, est_hours = op["user"], op["actual"], op["estimated"]
             efficiency = round((est_hours / actual * 100), 1) if actual > 0 else 0
             operator_efficiency.append({
                 "name": f"{emp.first_name or ''} {emp.last_name or ''}".strip() or emp.username,
@@ -777,12 +657,13 @@ async def get_dashboard_insights(
                 "actual_hours": round(actual, 1),
                 "estimated_hours": round(est_hours, 1),
                 "efficiency": efficiency,
-                "entries": emp.entry_count,
+                "entries": op["entries"],
             })
     except Exception as e:
         print(f"Operator efficiency error: {e}")
 
     # ─── 2. BUSIEST WORK CENTERS (active labor right now) ────────────────────
+    timer.start("busiest_work_centers")
     busiest_wc = []
     try:
         active = db.query(
@@ -804,95 +685,95 @@ async def get_dashboard_insights(
         print(f"Busiest WC error: {e}")
 
     # ─── 4 & 5. KOSH INVENTORY: jobs waiting on parts + top shortages ────────
+    timer.start("kosh_inventory")
     jobs_waiting_on_parts = []
     top_shortages = []
     try:
         from routers.jobs import get_kosh_connection
-        kosh_conn = get_kosh_connection()
-        kosh_cur = kosh_conn.cursor()
-
-        # Get jobs with shortages
-        kosh_cur.execute("""
-            WITH job_bom AS (
-                SELECT j.job_number, j.order_qty, j.customer, j.description, j.status,
-                       COUNT(DISTINCT b.aci_pn) as total_parts
-                FROM warehouse."tblJob" j
-                JOIN warehouse."tblBOM" b ON b.job = j.job_number
-                WHERE j.status IN ('New', 'In Prep', 'In Mfg')
-                GROUP BY j.job_number, j.order_qty, j.customer, j.description, j.status
-                HAVING COUNT(DISTINCT b.aci_pn) > 0
-            )
-            SELECT job_number, order_qty, customer, description, status, total_parts
-            FROM job_bom ORDER BY
-                CASE WHEN status = 'In Mfg' THEN 0 WHEN status = 'In Prep' THEN 1 ELSE 2 END,
-                job_number
-            LIMIT 50
-        """)
-        kosh_jobs = kosh_cur.fetchall()
-
-        shortage_items_map = defaultdict(lambda: {"jobs": [], "total_short": 0})
-
-        for kj in kosh_jobs:
-            job_num, order_qty_raw, customer, desc, status, total_parts = kj
-            order_qty = int(order_qty_raw or 1)
+        with get_kosh_connection() as kosh_conn:
+            kosh_cur = kosh_conn.cursor()
+
+            # Get jobs with shortages
+            kosh_cur.execute("""
+                WITH job_bom AS (
+                    SELECT j.job_number, j.order_qty, j.customer, j.description, j.status,
+                           COUNT(DISTINCT b.aci_pn) as total_parts
+                    FROM warehouse."tblJob" j
+                    JOIN warehouse."tblBOM" b ON b.job = j.job_number
+                    WHERE j.status IN ('New', 'In Prep', 'In Mfg')
+                    GROUP BY j.job_number, j.order_qty, j.customer, j.description, j.status
+                    HAVING COUNT(DISTINCT b.aci_pn) > 0
+                )
+                SELECT job_number, order_qty, customer, description, status, total_parts
+                FROM job_bom ORDER BY
+                    CASE WHEN status = 'In Mfg' THEN 0 WHEN status = 'In Prep' THEN 1 ELSE 2 END,
+                    job_number
+                LIMIT 50
+            """)
+            kosh_jobs = kosh_cur.fetchall()
+
+            shortage_items_map = defaultdict(lambda: {"jobs": [], "total_short": 0})
+
+            for kj in kosh_jobs:
+                job_num, order_qty_raw, customer, desc, status, total_parts = kj
+                order_qty = int(order_qty_raw or 1)
 
-            try:
-                kosh_cur.execute("""
-                    WITH bom_items AS (
-                        SELECT DISTINCT ON (b.aci_pn) b.aci_pn, b.mpn, b.qty, b."DESC"
-                        FROM warehouse."tblBOM" b WHERE b.job = %s
-                        ORDER BY b.aci_pn, b.line
-                    )
-                    SELECT bi.aci_pn, bi."DESC",
-                        CAST(COALESCE(NULLIF(bi.qty, ''), '0') AS INTEGER) as qty_per,
-                        COALESCE(SUM(CASE WHEN w.loc_to != 'MFG Floor' THEN w.onhandqty ELSE 0 END), 0) as on_hand
-                    FROM bom_items bi
-                    LEFT JOIN warehouse."tblWhse_Inventory" w ON bi.aci_pn = w.item OR bi.mpn = w.mpn
-                    GROUP BY bi.aci_pn, bi."DESC", bi.qty
-                """, (job_num,))
-                parts = kosh_cur.fetchall()
-            except Exception:
-                # Don't let one bad job abort the shared transaction and wipe
-                # out shortage insights for every remaining job.
                 try:
-                    kosh_conn.rollback()
+                    kosh_cur.execute("""
+                        WITH bom_items AS (
+                            SELECT DISTINCT ON (b.aci_pn) b.aci_pn, b.mpn, b.qty, b."DESC"
+                            FROM warehouse."tblBOM" b WHERE b.job = %s
+                            ORDER BY b.aci_pn, b.line
+                        )
+                        SELECT bi.aci_pn, bi."DESC",
+                            CAST(COALESCE(NULLIF(bi.qty, ''), '0') AS INTEGER) as qty_per,
+                            COALESCE(SUM(CASE WHEN w.loc_to != 'MFG Floor' THEN w.onhandqty ELSE 0 END), 0) as on_hand
+                        FROM bom_items bi
+                        LEFT JOIN warehouse."tblWhse_Inventory" w ON bi.aci_pn = w.item OR bi.mpn = w.mpn
+                        GROUP BY bi.aci_pn, bi."DESC", bi.qty
+                    """, (job_num,))
+                    parts = kosh_cur.fetchall()
                 except Exception:
-                    pass
-                continue
-            short_count = 0
-            for p in parts:
-                req = int(p[2] or 0) * order_qty
-                oh = int(p[3] or 0)
-                if oh < req:
-                    short_count += 1
-                    shortage_items_map[p[0]]["jobs"].append(job_num)
-                    shortage_items_map[p[0]]["total_short"] += (req - oh)
-                    shortage_items_map[p[0]]["description"] = p[1] or ""
-
-            if short_count > 0:
-                jobs_waiting_on_parts.append({
-                    "job_number": job_num,
-                    "customer": customer or "",
-                    "description": desc or "",
-                    "status": status or "New",
-                    "total_parts": total_parts,
-                    "short_parts": short_count,
-                    "order_qty": order_qty,
-                })
-
-        # Top 10 shortage items
-        top_shortages = sorted(
-            [{"aci_pn": k, "description": v["description"], "short_qty": v["total_short"],
-              "affected_jobs": len(set(v["jobs"])), "jobs": list(set(v["jobs"]))[:5]}
-             for k, v in shortage_items_map.items()],
-            key=lambda x: x["affected_jobs"], reverse=True
-        )[:10]
+                    # Don't let one bad job abort the shared transaction and wipe
+                    # out shortage insights for every remaining job.
+                    try:
+                        kosh_conn.rollback()
+                    except Exception:
+                        pass
+                    continue
+                short_count = 0
+                for p in parts:
+                    req = int(p[2] or 0) * order_qty
+                    oh = int(p[3] or 0)
+                    if oh < req:
+                        short_count += 1
+                        shortage_items_map[p[0]]["jobs"].append(job_num)
+                        shortage_items_map[p[0]]["total_short"] += (req - oh)
+                        shortage_items_map[p[0]]["description"] = p[1] or ""
+
+                if short_count > 0:
+                    jobs_waiting_on_parts.append({
+                        "job_number": job_num,
+                        "customer": customer or "",
+                        "description": desc or "",
+                        "status": status or "New",
+                        "total_parts": total_parts,
+                        "short_parts": short_count,
+                        "order_qty": order_qty,
+                    })
 
-        kosh_conn.close()
+            # Top 10 shortage items
+            top_shortages = sorted(
+                [{"aci_pn": k, "description": v["description"], "short_qty": v["total_short"],
+                  "affected_jobs": len(set(v["jobs"])), "jobs": list(set(v["jobs"]))[:5]}
+                 for k, v in shortage_items_map.items()],
+                key=lambda x: x["affected_jobs"], reverse=True
+            )[:10]
     except Exception as e:
         print(f"KOSH insights error: {e}")
 
     # ─── 6. REJECTION RATE PER WORK CENTER ───────────────────────────────────
+    timer.start("rejection_rates")
     rejection_rates = []
     try:
         steps_with_qty = db.query(
@@ -920,6 +801,7 @@ async def get_dashboard_insights(
         print(f"Rejection rate error: {e}")
 
     # ─── 7. BOTTLENECK DETECTION ─────────────────────────────────────────────
+    timer.start("bottlenecks")
     bottlenecks = []
     try:
         # Steps with most travelers waiting (not completed, not the last step)
@@ -943,6 +825,7 @@ async def get_dashboard_insights(
         print(f"Bottleneck error: {e}")
 
     # ─── 8. DUE DATE HEATMAP ────────────────────────────────────────────────
+    timer.start("due_date_heatmap")
     due_date_heatmap = {"overdue": 0, "today": 0, "this_week": 0, "next_week": 0, "later": 0, "no_date": 0}
     try:
         active_travelers = db.query(Traveler).filter(
@@ -971,6 +854,7 @@ async def get_dashboard_insights(
         print(f"Due date heatmap error: {e}")
 
     # ─── 9. OVERDUE AGING ────────────────────────────────────────────────────
+    timer.start("overdue_aging")
     overdue_aging = []
     try:
         for t in active_travelers:
@@ -995,6 +879,7 @@ async def get_dashboard_insights(
         print(f"Overdue aging error: {e}")
 
     # ─── 10. THROUGHPUT TREND (travelers completed per week, last 8 weeks) ───
+    timer.start("throughput_trend")
     throughput_trend = []
     try:
         for w in range(7, -1, -1):
@@ -1017,6 +902,7 @@ async def get_dashboard_insights(
         print(f"Throughput trend error: {e}")
 
     # ─── 11. LABOR HOURS TREND (per day, last 14 days) ──────────────────────
+    timer.start("labor_hours_trend")
     labor_hours_trend = []
     try:
         for d in range(13, -1, -1):
@@ -1053,5 +939,24 @@ async def get_dashboard_insights(
         "throughput_trend": throughput_trend,
         "labor_hours_trend": labor_hours_trend,
     }
-    _stats_cache["__insights__"] = (_time.time(), _result)
     return _result
+
+
+@router.get("/cache-metrics")
+async def get_cache_metrics(current_user: User = Depends(get_current_user)):
+    """Response-cache counters: hits, misses, requests coalesced onto an
+    in-flight computation, early refreshes."""
+    if current_user.role != UserRole.ADMIN:
+        raise HTTPException(403, "Only admins can view cache metrics")
+    return cache_stats()
+
+
+@router.get("/snapshots")
+async def get_snapshot_status(
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Age, total and per-section compute time of each precomputed snapshot."""
+    if current_user.role != UserRole.ADMIN:
+        raise HTTPException(403, "Only admins can view snapshot timings")
+    return snapshot_status(db)
@@ -0,0 +1,40 @@
+from typing import Optional
+
+from fastapi import APIRouter, Depends, Header, Request
+from fastapi.responses import StreamingResponse
+from sqlalchemy.orm import Session
+
+from database import get_db
+from models import User
+from routers.auth import get_current_user
+from services.change_events import change_event_broker
+
+router = APIRouter()
+
+
+@router.get("/stream")
+async def stream_change_events(
+    request: Request,
+    last_event_id: Optional[int] = Header(None),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Server-sent events: labor.started / labor.stopped / labor.changed /
+    labor.deleted, step.completed / step.reopened, notification.created (to its
+    recipient only) and kitting.changed. Clients refetch the affected views
+    when one arrives instead of polling. Send Last-Event-ID on reconnect to
+    receive what was missed."""
+    user_id = current_user.id
+    # The stream can stay open for hours; don't hold a pooled DB connection
+    # for it. The broker reads events with its own short-lived sessions.
+    db.close()
+    return StreamingResponse(
+        change_event_broker.stream(user_id, last_event_id, request.is_disconnected),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "X-Accel-Buffering": "no",
+            # Keeps GZipMiddleware from buffering the stream.
+            "Content-Encoding": "identity",
+        },
+    )
@@ -1,34 +1,34 @@
 """
-Jobs router — reads job data from the KOSH PostgreSQL database (warehouse schema).
-No data duplication: queries tblJob, tblBOM, tblWhse_Inventory directly.
-All endpoints are ADMIN-only and read-only (NEXUS never writes to KOSH tables).
+Jobs router — job data from the KOSH PostgreSQL database (warehouse schema).
+Job lists are read from the local mirror tables (KoshJobMirror, KoshBomMirror,
+KoshInventoryMirror, kept in sync by services/kosh_mirror.py) while the mirror
+is fresh, and from tblJob live otherwise. Single-job, BOM and stock reads go
+to KOSH through the read-through cache in services/kosh_cache.py; while KOSH
+is down the pages fall back to the mirror or NEXUS travelers.
+All endpoints are ADMIN-only and read-only towards KOSH (NEXUS never writes to
+KOSH tables; only the mirror sync writes the local copies).
 """
 
-import os
+import time
 import logging
 from typing import Optional
-from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
 from sqlalchemy.orm import Session
-import psycopg2
 from psycopg2.extras import RealDictCursor
 
 from database import get_db
 from models import UserRole
 from routers.auth import get_current_user
+from services import kosh_pool
+from services import kosh_breaker as kosh_breaker_module
+from services.kosh_cache import kosh_cache
+from services.composite_fetch import PhaseTimings, fetch_alongside, submit
+from utils.job_numbers import base_job_number
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
-# KOSH database connection config (same PostgreSQL server, different database)
-KOSH_DB_CONFIG = {
-    'host': os.getenv('KOSH_DB_HOST', 'aci-database'),
-    'port': int(os.getenv('KOSH_DB_PORT', 5432)),
-    'database': os.getenv('KOSH_DB_NAME', 'kosh'),
-    'user': os.getenv('KOSH_DB_USER', 'stockpick_user'),
-    'password': os.getenv('KOSH_DB_PASSWORD', 'stockpick_pass'),
-}
-
 
 def _person_name(user) -> str:
     """Display name for a user. `username` is an email address here, so the
@@ -40,89 +40,347 @@ def _person_name(user) -> str:
     return name or (user.username or "Unknown")
 
 
-def get_kosh_connection():
-    """Get a direct connection to the KOSH database."""
+def get_kosh_connection(statement_timeout_ms: Optional[int] = None):
+    """Check a KOSH connection out of the process-wide pool.
+
+    Callers keep the `try: ... finally: conn.close()` shape — close() hands the
+    connection back to the pool instead of tearing it down.
+    """
     try:
-        return psycopg2.connect(**KOSH_DB_CONFIG)
+        return kosh_pool.checkout(statement_timeout_ms)
+    except kosh_breaker_module.KoshCircuitOpen as e:
+        # Fast-fail while KOSH is known to be down; the breaker already logged it.
+        logger.warning(f"KOSH call short-circuited: {e}")
+        raise HTTPException(status_code=503, detail="KOSH database unavailable")
     except Exception as e:
         logger.error(f"Failed to connect to KOSH database: {e}")
         raise HTTPException(status_code=503, detail="KOSH database unavailable")
 
 
+def _raise_if_outage(e: Exception) -> None:
+    """A query that fails because KOSH dropped or timed out is a 503, the same
+    as failing to connect; any other error (a bad query) propagates as is."""
+    if kosh_pool.is_outage(e):
+        logger.error(f"KOSH query failed: {e}")
+        raise HTTPException(status_code=503, detail="KOSH database unavailable")
+
+
+def _kosh_down(e: HTTPException) -> bool:
+    return e.status_code == 503
+
+
 def require_admin(current_user=Depends(get_current_user)):
     if current_user.role != UserRole.ADMIN:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Admin access required")
     return current_user
 
 
-# ─── LIST JOBS ───────────────────────────────────────────────────────────────
+# ─── CACHED KOSH READS ───────────────────────────────────────────────────────
+# One job page fans out to detail / enriched / bom / stock / kitting-status,
+# and each used to re-read the same tblJob row and BOM rows from KOSH. These
+# helpers go through services.kosh_cache instead: the job row is shared by
+# every endpoint, and each BOM-shaped result set is cached per job number.
 
-@router.get("")
-def list_jobs(
-    q: Optional[str] = Query(None, description="Search by job number, customer, or description"),
-    job_status: Optional[str] = Query(None, alias="status", description="Filter by status"),
-    limit: int = Query(100, ge=1, le=500),
-    offset: int = Query(0, ge=0),
-    current_user=Depends(require_admin),
-):
+# Every tblJob column the endpoints below use. The list queries select the
+# same columns, so a list page can prime the cache for the detail pages.
+JOB_COLUMNS = """id, job_number, description, customer, cust_pn, build_qty,
+                   order_qty, job_rev, cust_rev, wo_number, status, notes,
+                   created_by, created_at, updated_at"""
+
+def _kosh_fetchall(sql: str, params) -> list:
+    """Run one read against KOSH and return plain dicts (safe to cache)."""
     conn = get_kosh_connection()
     try:
         cursor = conn.cursor(cursor_factory=RealDictCursor)
+        cursor.execute(sql, params)
+        return [dict(r) for r in cursor.fetchall()]
+    except Exception as e:
+        _raise_if_outage(e)
+        raise
+    finally:
+        conn.close()
 
-        where_clauses = []
-        params = []
 
-        if q:
-            where_clauses.append("(job_number ILIKE %s OR customer ILIKE %s OR description ILIKE %s)")
-            params.extend([f"%{q}%", f"%{q}%", f"%{q}%"])
+def _fetch_kosh_jobs(job_numbers: list) -> dict:
+    """tblJob rows for many job numbers in one round trip, keyed by job_number."""
+    rows = _kosh_fetchall(
+        f'SELECT {JOB_COLUMNS} FROM warehouse."tblJob" WHERE job_number = ANY(%s)',
+        (list(job_numbers),),
+    )
+    return {r["job_number"]: r for r in rows}
 
-        if job_status:
-            where_clauses.append("status = %s")
-            params.append(job_status)
 
-        where_sql = f"WHERE {' AND '.join(where_clauses)}" if where_clauses else ""
+def get_kosh_job(job_number: str) -> Optional[dict]:
+    """Cached tblJob row for one job number, or None if KOSH has no such job."""
+    return kosh_cache.get("job", job_number, lambda: _fetch_kosh_jobs([job_number]).get(job_number))
 
-        # Get total count
-        cursor.execute(f'SELECT COUNT(*) as total FROM warehouse."tblJob" {where_sql}', params)
-        total = cursor.fetchone()["total"]
 
-        # Get jobs
-        cursor.execute(f"""
-            SELECT id, job_number, description, customer, cust_pn, build_qty,
-                   order_qty, job_rev, cust_rev, wo_number, status, notes,
-                   created_by, created_at, updated_at
-            FROM warehouse."tblJob"
-            {where_sql}
-            ORDER BY created_at DESC
-            LIMIT %s OFFSET %s
-        """, params + [limit, offset])
-        jobs = cursor.fetchall()
-
-        # Convert to serializable dicts
-        result = []
-        for j in jobs:
-            result.append({
-                "id": j["id"],
-                "job_number": j["job_number"],
-                "description": j["description"] or "",
-                "customer": j["customer"] or "",
-                "cust_pn": j["cust_pn"] or "",
-                "build_qty": int(j["build_qty"] or 1),
-                "order_qty": int(j["order_qty"] or 1),
-                "job_rev": j["job_rev"] or "",
-                "cust_rev": j.get("cust_rev") or "",
-                "wo_number": j.get("wo_number") or "",
-                "status": j["status"] or "New",
-                "notes": j.get("notes") or "",
-                "created_by": j["created_by"] or "",
-                "created_at": str(j["created_at"]) if j["created_at"] else None,
-                "updated_at": str(j["updated_at"]) if j["updated_at"] else None,
-            })
+def get_kosh_jobs(job_numbers) -> dict:
+    """Cached tblJob rows for many job numbers — misses are fetched together."""
+    return kosh_cache.get_many("job", job_numbers, _fetch_kosh_jobs)
 
-        return {"jobs": result, "total": total, "limit": limit, "offset": offset}
 
-    finally:
-        conn.close()
+def _kosh_job_or_404(job_number: str, detail: Optional[str] = None) -> dict:
+    job = get_kosh_job(job_number)
+    if not job:
+        raise HTTPException(status_code=404, detail=detail or f"Job {job_number} not found")
+    return job
+
+
+def _mirror_job_row(r) -> dict:
+    """A KoshJobMirror row with the same keys as a JOB_COLUMNS select."""
+    return {
+        "id": r.kosh_id,
+        "job_number": r.job_number,
+        "description": r.description,
+        "customer": r.customer,
+        "cust_pn": r.cust_pn,
+        "build_qty": r.build_qty,
+        "order_qty": r.order_qty,
+        "job_rev": r.job_rev,
+        "cust_rev": r.cust_rev,
+        "wo_number": r.wo_number,
+        "status": r.status,
+        "notes": r.notes,
+        "created_by": r.created_by,
+        "created_at": r.created_at,
+        "updated_at": r.updated_at,
+    }
+
+
+def _traveler_job_row(t) -> dict:
+    """A stand-in job row built from a NEXUS traveler, for when neither KOSH
+    nor the mirror knows the job. KOSH-only fields are left blank."""
+    return {
+        "id": None,
+        "job_number": t.job_number,
+        "description": t.part_description,
+        "customer": t.customer_name,
+        "cust_pn": t.part_number,
+        "build_qty": None,
+        "order_qty": t.quantity,
+        "job_rev": t.revision,
+        "cust_rev": t.customer_revision,
+        "wo_number": t.work_order_number,
+        "status": "Unknown",
+        "notes": "",
+        "created_by": "",
+        "created_at": t.created_at,
+        "updated_at": t.updated_at,
+    }
+
+
+def _mirror_job_page(db: Session, q: Optional[str], job_status: Optional[str], limit: int, offset: int,
+                     require_fresh: bool = True):
+    """(total, job rows) for a job list page read from the local KOSH mirror,
+    or None when the mirror is too far behind to stand in for KOSH (or, with
+    require_fresh=False, has never been filled). Rows have the same keys as a
+    JOB_COLUMNS select."""
+    from sqlalchemy import or_
+    from models import KoshJobMirror
+    from services.kosh_mirror import mirror_is_fresh
+
+    if require_fresh and not mirror_is_fresh(db):
+        return None
+    if not require_fresh and db.query(KoshJobMirror.job_number).first() is None:
+        return None
+    query = db.query(KoshJobMirror)
+    if q:
+        like = f"%{q}%"
+        query = query.filter(or_(
+            KoshJobMirror.job_number.ilike(like),
+            KoshJobMirror.customer.ilike(like),
+            KoshJobMirror.description.ilike(like),
+        ))
+    if job_status:
+        query = query.filter(KoshJobMirror.status == job_status)
+    total = query.count()
+    rows = query.order_by(KoshJobMirror.created_at.desc()).limit(limit).offset(offset).all()
+    return total, [_mirror_job_row(r) for r in rows]
+
+
+def _nexus_job_page(db: Session, q: Optional[str], limit: int, offset: int):
+    """(total, job rows) from NEXUS travelers alone: one row per traveler job
+    number, described by its most recent traveler. Used only when KOSH is down
+    and the mirror is empty, so a KOSH status filter cannot be applied."""
+    from sqlalchemy import func, or_
+    from models import Traveler
+
+    query = db.query(
+        Traveler.job_number,
+        func.max(Traveler.id).label("latest_id"),
+        func.max(Traveler.created_at).label("last_created"),
+    )
+    if q:
+        like = f"%{q}%"
+        query = query.filter(or_(
+            Traveler.job_number.ilike(like),
+            Traveler.customer_name.ilike(like),
+            Traveler.part_description.ilike(like),
+        ))
+    grouped = query.group_by(Traveler.job_number).subquery()
+    total = db.query(func.count()).select_from(grouped).scalar() or 0
+    latest_ids = [
+        row.latest_id for row in
+        db.query(grouped.c.latest_id)
+        .order_by(grouped.c.last_created.desc(), grouped.c.job_number)
+        .limit(limit).offset(offset).all()
+    ]
+    by_id = {t.id: t for t in db.query(Traveler).filter(Traveler.id.in_(latest_ids)).all()} if latest_ids else {}
+    return total, [_traveler_job_row(by_id[i]) for i in latest_ids if i in by_id]
+
+
+def _fallback_job(db: Session, job_number: str) -> dict:
+    """Job row for one job while KOSH is unreachable: the mirror's copy however
+    old, else the job's most recent NEXUS traveler, else 404."""
+    from models import KoshJobMirror, Traveler
+
+    row = db.query(KoshJobMirror).filter(KoshJobMirror.job_number == job_number).first()
+    if row is not None:
+        return _mirror_job_row(row)
+    travelers = _travelers_for_job(db, job_number, Traveler.id.desc())
+    traveler = travelers[0] if travelers else None
+    if traveler is None:
+        raise HTTPException(status_code=404, detail=f"Job {job_number} not found (KOSH unavailable)")
+    return {**_traveler_job_row(traveler), "job_number": job_number}
+
+
+def _job_filters(q: Optional[str], job_status: Optional[str]):
+    """WHERE clause and params for a tblJob list query."""
+    where_clauses = []
+    params = []
+
+    if q:
+        where_clauses.append("(job_number ILIKE %s OR customer ILIKE %s OR description ILIKE %s)")
+        params.extend([f"%{q}%", f"%{q}%", f"%{q}%"])
+
+    if job_status:
+        where_clauses.append("status = %s")
+        params.append(job_status)
+
+    where_sql = f"WHERE {' AND '.join(where_clauses)}" if where_clauses else ""
+    return where_sql, params
+
+
+def _kosh_job_count(q: Optional[str], job_status: Optional[str]) -> int:
+    where_sql, params = _job_filters(q, job_status)
+    rows = _kosh_fetchall(f'SELECT COUNT(*) as total FROM warehouse."tblJob" {where_sql}', params)
+    return rows[0]["total"]
+
+
+def _kosh_job_rows(q: Optional[str], job_status: Optional[str], limit: int, offset: int) -> list:
+    """One page of tblJob rows read live from KOSH. Primes the job-row cache:
+    these rows are exactly what the detail pages read."""
+    where_sql, params = _job_filters(q, job_status)
+    jobs = _kosh_fetchall(f"""
+        SELECT {JOB_COLUMNS}
+        FROM warehouse."tblJob"
+        {where_sql}
+        ORDER BY created_at DESC
+        LIMIT %s OFFSET %s
+    """, params + [limit, offset])
+    kosh_cache.prime("job", {j["job_number"]: j for j in jobs})
+    return jobs
+
+
+def _kosh_job_page(q: Optional[str], job_status: Optional[str], limit: int, offset: int):
+    """(total, job rows) for a job list page read live from KOSH."""
+    return _kosh_job_count(q, job_status), _kosh_job_rows(q, job_status, limit, offset)
+
+
+def _job_page(db: Session, q: Optional[str], job_status: Optional[str], limit: int, offset: int):
+    """(total, job rows, source): from the mirror when it is fresh, else KOSH."""
+    page = _mirror_job_page(db, q, job_status, limit, offset)
+    if page is not None:
+        return page[0], page[1], "mirror"
+    total, jobs = _kosh_job_page(q, job_status, limit, offset)
+    return total, jobs, "kosh"
+
+
+def _degraded_job_page(db: Session, q: Optional[str], job_status: Optional[str], limit: int, offset: int):
+    """(total, job rows, source) without KOSH: the mirror however far behind,
+    else NEXUS travelers alone."""
+    page = _mirror_job_page(db, q, job_status, limit, offset, require_fresh=False)
+    if page is not None:
+        return page[0], page[1], "mirror_stale"
+    total, jobs = _nexus_job_page(db, q, limit, offset)
+    return total, jobs, "nexus"
+
+
+def _cached_bom_query(kind: str, sql: str, job_number: str) -> list:
+    """Cached result of a per-job BOM query. The queries all filter tblBOM to
+    the job's current revision, which takes the job number three times."""
+    return kosh_cache.get(kind, job_number, lambda: _kosh_fetchall(sql, (job_number, job_number, job_number)))
+
+
+# ─── KOSH METRICS (must be before /{job_number}) ──────────────────────────────
+
+@router.get("/kosh/metrics")
+def get_kosh_metrics(db: Session = Depends(get_db), current_user=Depends(require_admin)):
+    """Connection-pool, circuit-breaker, read-cache and mirror sync-lag metrics
+    for the KOSH link."""
+    from services.kosh_mirror import mirror_status
+
+    return {
+        "pool": kosh_pool.get_kosh_pool().stats(),
+        "breaker": kosh_breaker_module.kosh_breaker.stats(),
+        "cache": kosh_cache.stats(),
+        "mirror": mirror_status(db),
+    }
+
+
+@router.post("/kosh/mirror/sync")
+def sync_kosh_mirror(
+    full: bool = Query(False, description="Run a full hash-diff pass instead of an incremental one"),
+    db: Session = Depends(get_db),
+    current_user=Depends(require_admin),
+):
+    """Run one KOSH mirror pass now instead of waiting for the background loop."""
+    from services.kosh_mirror import run_mirror_sync, mirror_status
+
+    try:
+        results = run_mirror_sync(db, force_full=full)
+    except Exception as e:
+        logger.error(f"KOSH mirror sync failed: {e}")
+        raise HTTPException(status_code=503, detail="KOSH database unavailable")
+    return {"results": results, "mirror": mirror_status(db)}
+
+
+# ─── LIST JOBS ───────────────────────────────────────────────────────────────
+
+@router.get("")
+def list_jobs(
+    q: Optional[str] = Query(None, description="Search by job number, customer, or description"),
+    job_status: Optional[str] = Query(None, alias="status", description="Filter by status"),
+    limit: int = Query(100, ge=1, le=500),
+    offset: int = Query(0, ge=0),
+    db: Session = Depends(get_db),
+    current_user=Depends(require_admin),
+):
+    total, jobs, source = _job_page(db, q, job_status, limit, offset)
+
+    # Convert to serializable dicts
+    result = []
+    for j in jobs:
+        result.append({
+            "id": j["id"],
+            "job_number": j["job_number"],
+            "description": j["description"] or "",
+            "customer": j["customer"] or "",
+            "cust_pn": j["cust_pn"] or "",
+            "build_qty": int(j["build_qty"] or 1),
+            "order_qty": int(j["order_qty"] or 1),
+            "job_rev": j["job_rev"] or "",
+            "cust_rev": j.get("cust_rev") or "",
+            "wo_number": j.get("wo_number") or "",
+            "status": j["status"] or "New",
+            "notes": j.get("notes") or "",
+            "created_by": j["created_by"] or "",
+            "created_at": str(j["created_at"]) if j["created_at"] else None,
+            "updated_at": str(j["updated_at"]) if j["updated_at"] else None,
+        })
+
+    return {"jobs": result, "total": total, "limit": limit, "offset": offset, "source": source}
 
 
 # ─── JOB LOOKUP (for TravelerForm — must be BEFORE {job_number} to avoid conflict) ──
@@ -130,10 +388,9 @@ def list_jobs(
 @router.get("/lookup/{job_number}")
 def lookup_job(job_number: str, current_user=Depends(get_current_user)):
     """Lookup a job from KOSH by job number. Available to all authenticated users (for traveler creation)."""
-    conn = get_kosh_connection()
-    try:
-        cursor = conn.cursor(cursor_factory=RealDictCursor)
-        cursor.execute("""
+    # TravelerForm looks up as the user types, so the same prefixes come back
+    # again and again — cache the match list per search string.
+    jobs = kosh_cache.get("lookup", job_number, lambda: _kosh_fetchall("""
             SELECT job_number, description, customer, cust_pn, build_qty, order_qty,
                    job_rev, cust_rev, wo_number, status
             FROM warehouse."tblJob"
@@ -142,27 +399,23 @@ def lookup_job(job_number: str, current_user=Depends(get_current_user)):
                 CASE WHEN job_number = %s THEN 0 ELSE 1 END,
                 created_at DESC
             LIMIT 10
-        """, (f"%{job_number}%", job_number))
-        jobs = cursor.fetchall()
-
-        return [
-            {
-                "job_number": j["job_number"],
-                "description": j["description"] or "",
-                "customer": j["customer"] or "",
-                "cust_pn": j["cust_pn"] or "",
-                "build_qty": int(j["build_qty"] or 1),
-                "order_qty": int(j["order_qty"] or 1),
-                "job_rev": j["job_rev"] or "",
-                "cust_rev": j.get("cust_rev") or "",
-                "wo_number": j.get("wo_number") or "",
-                "status": j["status"] or "New",
-            }
-            for j in jobs
-        ]
+        """, (f"%{job_number}%", job_number)))
 
-    finally:
-        conn.close()
+    return [
+        {
+            "job_number": j["job_number"],
+            "description": j["description"] or "",
+            "customer": j["customer"] or "",
+            "cust_pn": j["cust_pn"] or "",
+            "build_qty": int(j["build_qty"] or 1),
+            "order_qty": int(j["order_qty"] or 1),
+            "job_rev": j["job_rev"] or "",
+            "cust_rev": j.get("cust_rev") or "",
+            "wo_number": j.get("wo_number") or "",
+            "status": j["status"] or "New",
+        }
+        for j in jobs
+    ]
 
 
 # ─── ENRICHED JOBS LIST (bulk enriched data for list page) ────────────────
@@ -187,6 +440,10 @@ def traveler_matches_job(traveler_jn: str, jn: str) -> bool:
     condition is what separates a descriptor from a sub-job: "-KANBAN" and
     " CABLE ASSY" are work descriptors, while "-4A", "-2 ASSY" and "-1" carry
     digits because they identify a different job.
+
+    Every pair this accepts has the same utils.job_numbers.base_job_number, so
+    queries narrow on the indexed travelers.base_job_number column first and
+    run this rule only on those candidates (_travelers_for_job).
     """
     tj, j = traveler_jn.upper().strip(), jn.upper().strip()
     if tj == j:
@@ -204,65 +461,39 @@ def traveler_matches_job(traveler_jn: str, jn: str) -> bool:
     return descriptor.isalpha()
 
 
-@router.get("/list-enriched")
-def list_jobs_enriched(
-    q: Optional[str] = Query(None),
-    job_status: Optional[str] = Query(None, alias="status"),
-    limit: int = Query(100, ge=1, le=500),
-    offset: int = Query(0, ge=0),
-    db: Session = Depends(get_db),
-    current_user=Depends(require_admin),
-):
-    """Jobs list with traveler counts, progress, shortage counts, and health indicators."""
-    from models import Traveler, TravelerStatus, LaborEntry
-    from utils.job_display import is_rma
-    from collections import defaultdict
-    from datetime import date
-
-    conn = get_kosh_connection()
-    try:
-        cursor = conn.cursor(cursor_factory=RealDictCursor)
+def _travelers_for_job(db: Session, job_number: str, order_by=None) -> list:
+    """NEXUS travelers that belong to this job per traveler_matches_job.
 
-        where_clauses = []
-        params = []
-        if q:
-            where_clauses.append("(job_number ILIKE %s OR customer ILIKE %s OR description ILIKE %s)")
-            params.extend([f"%{q}%", f"%{q}%", f"%{q}%"])
-        if job_status:
-            where_clauses.append("status = %s")
-            params.append(job_status)
+    Equal base job numbers are a precondition for a match, so candidates come
+    from the indexed base_job_number column and only that handful is checked
+    in Python.
+    """
+    from models import Traveler
 
-        where_sql = f"WHERE {' AND '.join(where_clauses)}" if where_clauses else ""
+    query = db.query(Traveler).filter(Traveler.base_job_number == base_job_number(job_number))
+    if order_by is not None:
+        query = query.order_by(order_by)
+    return [t for t in query.all() if traveler_matches_job(t.job_number, job_number)]
 
-        cursor.execute(f'SELECT COUNT(*) as total FROM warehouse."tblJob" {where_sql}', params)
-        total = cursor.fetchone()["total"]
 
-        cursor.execute(f"""
-            SELECT id, job_number, description, customer, cust_pn, build_qty,
-                   order_qty, job_rev, cust_rev, wo_number, status, notes,
-                   created_by, created_at, updated_at
-            FROM warehouse."tblJob"
-            {where_sql}
-            ORDER BY created_at DESC
-            LIMIT %s OFFSET %s
-        """, params + [limit, offset])
-        jobs = cursor.fetchall()
-    finally:
-        conn.close()
+def _traveler_rollups(db: Session, job_numbers: list):
+    """NEXUS side of the enriched jobs list: (travelers_by_job,
+    rma_travelers_by_job, labor_by_traveler) for one page of job numbers."""
+    from models import Traveler, LaborEntry
+    from utils.job_display import is_rma
+    from collections import defaultdict
+    from sqlalchemy import func as _sa_func
 
     # Batch-fetch traveler data for all job numbers.
     # Travelers carry compliance suffixes (job "8414" -> traveler "8414L"/"8414M"),
     # so an exact IN(job_numbers) would UNDERCOUNT lead-free/ITAR jobs. Match on
-    # the base number (trailing L/M stripped) on both sides so those variants are
-    # included; the Python grouping below then assigns each to the right job.
-    from sqlalchemy import func as _sa_func
-    job_numbers = [j["job_number"] for j in jobs]
-    base_jobs = list({jn.upper().rstrip('LM') for jn in job_numbers}) if job_numbers else []
+    # the stored base_job_number (indexed; suffixes and descriptors stripped) so
+    # those variants are included; the grouping below then assigns each to the
+    # right job.
+    base_jobs = list({base_job_number(jn) for jn in job_numbers}) if job_numbers else []
     all_travelers = (
         db.query(Traveler)
-        .filter(
-            _sa_func.regexp_replace(_sa_func.upper(Traveler.job_number), '[LM]+$', '').in_(base_jobs)
-        )
+        .filter(Traveler.base_job_number.in_(base_jobs))
         .all()
     ) if base_jobs else []
 
@@ -276,14 +507,25 @@ def list_jobs_enriched(
     # traveler_matches_job: this mapping decides which job a traveler's labor
     # hours are attributed to, so a descriptor suffix must not create a second
     # candidate job and silently move someone's hours.
-    def _job_matches(traveler_jn: str, jn: str) -> bool:
-        tj, j = traveler_jn.upper(), jn.upper()
-        if tj == j:
-            return True
-        if tj.startswith(j):
-            remainder = tj[len(j):]
-            return remainder != "" and all(c in ("L", "M") for c in remainder)
-        return False
+    #
+    # Both lookups are dict hits: the exact job number, else each shorter stem
+    # left after stripping trailing compliance letters; when several jobs on the
+    # page qualify, the one listed first wins.
+    page_position = {}
+    for i, jn in enumerate(job_numbers):
+        page_position.setdefault(jn.upper(), (i, jn))
+
+    def _target_job(traveler_jn: str):
+        tj = traveler_jn.upper()
+        if tj in page_position:
+            return page_position[tj][1]
+        matches = []
+        stem = tj
+        while stem and stem[-1] in ("L", "M"):
+            stem = stem[:-1]
+            if stem in page_position:
+                matches.append(page_position[stem])
+        return min(matches)[1] if matches else None
 
     # RMA travelers are bucketed separately. An RMA traveler carries the job
     # number of the job it reworks, so folding it in here would add its rework
@@ -292,9 +534,7 @@ def list_jobs_enriched(
     travelers_by_job = defaultdict(list)
     rma_travelers_by_job = defaultdict(list)
     for t in all_travelers:
-        # Prefer an exact match; fall back to a compliance-suffix match.
-        exact = next((jn for jn in job_numbers if t.job_number.upper() == jn.upper()), None)
-        target = exact or next((jn for jn in job_numbers if _job_matches(t.job_number, jn)), None)
+        target = _target_job(t.job_number)
         if target is not None:
             bucket = rma_travelers_by_job if is_rma(t) else travelers_by_job
             bucket[target].append(t)
@@ -316,6 +556,64 @@ def list_jobs_enriched(
         for tid, hrs in labor_rows:
             labor_by_traveler[tid] = float(hrs or 0)
 
+    return travelers_by_job, rma_travelers_by_job, labor_by_traveler
+
+
+@router.get("/list-enriched")
+def list_jobs_enriched(
+    response: Response,
+    q: Optional[str] = Query(None),
+    job_status: Optional[str] = Query(None, alias="status"),
+    limit: int = Query(100, ge=1, le=500),
+    offset: int = Query(0, ge=0),
+    db: Session = Depends(get_db),
+    current_user=Depends(require_admin),
+):
+    """Jobs list with traveler counts, progress, shortage counts, and health indicators."""
+    from models import TravelerStatus
+    from datetime import date
+
+    timings = PhaseTimings()
+
+    # Jobs come from the local KOSH mirror when it is fresh — the whole page is
+    # then answered from NEXUS — and from KOSH live otherwise. Live, the KOSH
+    # COUNT(*) runs on the fetch pool alongside the page query and the NEXUS
+    # traveler/labor rollups. If KOSH is down (or the circuit breaker is
+    # failing it fast) the page is still served from NEXUS, flagged
+    # kosh_unavailable, rather than erroring out.
+    kosh_unavailable = False
+    count_future = None
+    with timings.phase("jobs"):
+        page = _mirror_job_page(db, q, job_status, limit, offset)
+        if page is not None:
+            total, jobs = page
+            source = "mirror"
+        else:
+            count_future = submit(lambda: _kosh_job_count(q, job_status), timings, "kosh_count")
+            try:
+                jobs = _kosh_job_rows(q, job_status, limit, offset)
+                source = "kosh"
+            except HTTPException as e:
+                if not _kosh_down(e):
+                    raise
+                kosh_unavailable = True
+                count_future = None
+                total, jobs, source = _degraded_job_page(db, q, job_status, limit, offset)
+
+    job_numbers = [j["job_number"] for j in jobs]
+    with timings.phase("nexus"):
+        travelers_by_job, rma_travelers_by_job, labor_by_traveler = _traveler_rollups(db, job_numbers)
+
+    if count_future is not None:
+        try:
+            total = count_future.result()
+        except HTTPException as e:
+            if not _kosh_down(e):
+                raise
+            kosh_unavailable = True
+            total = offset + len(jobs)
+
+    merge_started = time.perf_counter()
     result = []
     for j in jobs:
         jn = j["job_number"]
@@ -371,46 +669,40 @@ def list_jobs_enriched(
             "has_overdue": has_overdue,
         })
 
-    return {"jobs": result, "total": total, "limit": limit, "offset": offset}
+    timings.record("merge", time.perf_counter() - merge_started)
+    timings.apply(response)
+    return {
+        "jobs": result, "total": total, "limit": limit, "offset": offset,
+        "source": source, "kosh_unavailable": kosh_unavailable,
+    }
 
 
 # ─── JOB DETAIL ──────────────────────────────────────────────────────────────
 
 @router.get("/{job_number}")
 def get_job_detail(job_number: str, current_user=Depends(require_admin)):
-    conn = get_kosh_connection()
-    try:
-        cursor = conn.cursor(cursor_factory=RealDictCursor)
+    job = _kosh_job_or_404(job_number)
 
-        # Get job record
-        cursor.execute('SELECT * FROM warehouse."tblJob" WHERE job_number = %s', (job_number,))
-        job = cursor.fetchone()
-        if not job:
-            raise HTTPException(status_code=404, detail=f"Job {job_number} not found")
-
-        build_qty = int(job["build_qty"] or 1)
-        order_qty = int(job["order_qty"] or 1)
-
-        return {
-            "id": job["id"],
-            "job_number": job["job_number"],
-            "description": job["description"] or "",
-            "customer": job["customer"] or "",
-            "cust_pn": job["cust_pn"] or "",
-            "build_qty": build_qty,
-            "order_qty": order_qty,
-            "job_rev": job["job_rev"] or "",
-            "cust_rev": job.get("cust_rev") or "",
-            "wo_number": job.get("wo_number") or "",
-            "status": job["status"] or "New",
-            "notes": job.get("notes") or "",
-            "created_by": job["created_by"] or "",
-            "created_at": str(job["created_at"]) if job["created_at"] else None,
-            "updated_at": str(job["updated_at"]) if job["updated_at"] else None,
-        }
+    build_qty = int(job["build_qty"] or 1)
+    order_qty = int(job["order_qty"] or 1)
 
-    finally:
-        conn.close()
+    return {
+        "id": job["id"],
+        "job_number": job["job_number"],
+        "description": job["description"] or "",
+        "customer": job["customer"] or "",
+        "cust_pn": job["cust_pn"] or "",
+        "build_qty": build_qty,
+        "order_qty": order_qty,
+        "job_rev": job["job_rev"] or "",
+        "cust_rev": job.get("cust_rev") or "",
+        "wo_number": job.get("wo_number") or "",
+        "status": job["status"] or "New",
+        "notes": job.get("notes") or "",
+        "created_by": job["created_by"] or "",
+        "created_at": str(job["created_at"]) if job["created_at"] else None,
+        "updated_at": str(job["updated_at"]) if job["updated_at"] else None,
+    }
 
 
 # ─── BOM LINES (components list with live inventory) ─────────────────────────
@@ -418,130 +710,119 @@ def get_job_detail(job_number: str, current_user=Depends(require_admin)):
 @router.get("/{job_number}/bom")
 def get_job_bom(job_number: str, current_user=Depends(require_admin)):
     """Get BOM lines for a job with live stock counts from warehouse inventory."""
-    conn = get_kosh_connection()
-    try:
-        cursor = conn.cursor(cursor_factory=RealDictCursor)
-
-        # Verify job exists & get quantities
-        cursor.execute('SELECT build_qty, order_qty FROM warehouse."tblJob" WHERE job_number = %s', (job_number,))
-        job = cursor.fetchone()
-        if not job:
-            raise HTTPException(status_code=404, detail=f"Job {job_number} not found")
-
-        build_qty = int(job["build_qty"] or 1)
-        order_qty = int(job["order_qty"] or 1)
-
-        # Same BOM + inventory query from KOSH app.py (job_detail route)
-        cursor.execute("""
-            WITH bom_lines AS (
-                SELECT DISTINCT ON (b.aci_pn)
-                    b.line,
-                    b.aci_pn,
-                    b."DESC",
-                    b.mpn as bom_mpn,
-                    b.man,
-                    b.qty,
-                    b.cost,
-                    b.pou,
-                    b.job_rev,
-                    b.last_rev,
-                    b.cust,
-                    b.cust_pn,
-                    b.cust_rev
-                FROM warehouse."tblBOM" b
-                WHERE b.job = %s
-                    AND (b.job_rev = (SELECT job_rev FROM warehouse."tblBOM" WHERE job = %s AND job_rev IS NOT NULL AND job_rev != '' ORDER BY created_at DESC LIMIT 1)
-                         OR NOT EXISTS (SELECT 1 FROM warehouse."tblBOM" WHERE job = %s AND job_rev IS NOT NULL AND job_rev != ''))
-                ORDER BY b.aci_pn, b.line
-            ),
-            inventory_match AS (
-                SELECT DISTINCT ON (COALESCE(w.pcn, bl.aci_pn || '_nopcn'), bl.aci_pn)
-                    bl.line,
-                    bl.aci_pn,
-                    bl."DESC",
-                    COALESCE(w.mpn, bl.bom_mpn) as mpn,
-                    bl.man,
-                    bl.qty,
-                    bl.cost,
-                    bl.pou,
-                    bl.job_rev,
-                    bl.last_rev,
-                    bl.cust,
-                    bl.cust_pn,
-                    bl.cust_rev,
-                    w.pcn,
-                    COALESCE(w.item, bl.aci_pn) as item,
-                    COALESCE(w.onhandqty, 0) as onhandqty,
-                    COALESCE(w.mfg_qty, '0') as mfg_qty,
-                    w.loc_to,
-                    CASE WHEN bl.aci_pn = w.item THEN 1 WHEN w.item IS NOT NULL THEN 2 ELSE 3 END as match_priority
-                FROM bom_lines bl
-                LEFT JOIN warehouse."tblWhse_Inventory" w
-                    ON (bl.aci_pn = w.item OR bl.bom_mpn = w.mpn)
-                    AND COALESCE(w.loc_to, '') != 'MFG Floor'
-                ORDER BY COALESCE(w.pcn, bl.aci_pn || '_nopcn'), bl.aci_pn, match_priority
-            )
-            SELECT
-                line as line_no,
-                aci_pn,
-                "DESC" as description,
-                mpn,
-                man as manufacturer,
-                CAST(COALESCE(NULLIF(qty, ''), '0') AS INTEGER) as qty_per_board,
-                COALESCE(SUM(onhandqty), 0) as on_hand,
-                COALESCE(SUM(CAST(NULLIF(mfg_qty, '') AS INTEGER)), 0) as mfg_floor_qty,
-                pcn,
-                item,
-                COALESCE(loc_to, '') as location,
-                CAST(COALESCE(NULLIF(cost, ''), '0') AS DECIMAL(10,4)) as unit_cost,
-                pou
-            FROM inventory_match
-            GROUP BY line, aci_pn, "DESC", mpn, man, qty, cost, pou, job_rev, last_rev, cust, cust_pn, cust_rev, pcn, item, loc_to
-            ORDER BY
-                CASE WHEN line ~ '^[0-9]+$' THEN CAST(line AS INTEGER) ELSE 999999 END,
-                line
-        """, (job_number, job_number, job_number))
-        raw_lines = cursor.fetchall()
-
-        bom_lines = []
-        shortage_count = 0
-        for line in raw_lines:
-            qty_per_board = int(line["qty_per_board"] or 0)
-            required = qty_per_board * order_qty
-            on_hand = int(line["on_hand"] or 0)
-            mfg_floor = int(line["mfg_floor_qty"] or 0)
-            shortage = on_hand - required
-
-            if shortage < 0:
-                shortage_count += 1
-
-            bom_lines.append({
-                "line_no": line["line_no"],
-                "aci_pn": line["aci_pn"],
-                "description": line["description"] or "",
-                "mpn": line["mpn"] or "",
-                "manufacturer": line["manufacturer"] or "",
-                "qty_per_board": qty_per_board,
-                "required": required,
-                "on_hand": on_hand,
-                "mfg_floor_qty": mfg_floor,
-                "shortage": shortage,
-                "location": line["location"] if on_hand > 0 else "",
-                "unit_cost": float(line["unit_cost"] or 0),
-                "pou": line["pou"] or "",
-            })
-
-        return {
-            "job_number": job_number,
-            "build_qty": build_qty,
-            "order_qty": order_qty,
-            "total_lines": len(set(l["line_no"] for l in bom_lines)),
-            "shortage_count": shortage_count,
-            "lines": bom_lines,
-        }
+    # Verify job exists & get quantities
+    job = _kosh_job_or_404(job_number)
+
+    build_qty = int(job["build_qty"] or 1)
+    order_qty = int(job["order_qty"] or 1)
+
+    # Same BOM + inventory query from KOSH app.py (job_detail route)
+    raw_lines = _cached_bom_query("bom", """
+        WITH bom_lines AS (
+            SELECT DISTINCT ON (b.aci_pn)
+                b.line,
+                b.aci_pn,
+                b."DESC",
+                b.mpn as bom_mpn,
+                b.man,
+                b.qty,
+                b.cost,
+                b.pou,
+                b.job_rev,
+                b.last_rev,
+                b.cust,
+                b.cust_pn,
+                b.cust_rev
+            FROM warehouse."tblBOM" b
+            WHERE b.job = %s
+                AND (b.job_rev = (SELECT job_rev FROM warehouse."tblBOM" WHERE job = %s AND job_rev IS NOT NULL AND job_rev != '' ORDER BY created_at DESC LIMIT 1)
+                     OR NOT EXISTS (SELECT 1 FROM warehouse."tblBOM" WHERE job = %s AND job_rev IS NOT NULL AND job_rev != ''))
+            ORDER BY b.aci_pn, b.line
+        ),
+        inventory_match AS (
+            SELECT DISTINCT ON (COALESCE(w.pcn, bl.aci_pn || '_nopcn'), bl.aci_pn)
+                bl.line,
+                bl.aci_pn,
+                bl."DESC",
+                COALESCE(w.mpn, bl.bom_mpn) as mpn,
+                bl.man,
+                bl.qty,
+                bl.cost,
+                bl.pou,
+                bl.job_rev,
+                bl.last_rev,
+                bl.cust,
+                bl.cust_pn,
+                bl.cust_rev,
+                w.pcn,
+                COALESCE(w.item, bl.aci_pn) as item,
+                COALESCE(w.onhandqty, 0) as onhandqty,
+                COALESCE(w.mfg_qty, '0') as mfg_qty,
+                w.loc_to,
+                CASE WHEN bl.aci_pn = w.item THEN 1 WHEN w.item IS NOT NULL THEN 2 ELSE 3 END as match_priority
+            FROM bom_lines bl
+            LEFT JOIN warehouse."tblWhse_Inventory" w
+                ON (bl.aci_pn = w.item OR bl.bom_mpn = w.mpn)
+                AND COALESCE(w.loc_to, '') != 'MFG Floor'
+            ORDER BY COALESCE(w.pcn, bl.aci_pn || '_nopcn'), bl.aci_pn, match_priority
+        )
+        SELECT
+            line as line_no,
+            aci_pn,
+            "DESC" as description,
+            mpn,
+            man as manufacturer,
+            CAST(COALESCE(NULLIF(qty, ''), '0') AS INTEGER) as qty_per_board,
+            COALESCE(SUM(onhandqty), 0) as on_hand,
+            COALESCE(SUM(CAST(NULLIF(mfg_qty, '') AS INTEGER)), 0) as mfg_floor_qty,
+            pcn,
+            item,
+            COALESCE(loc_to, '') as location,
+            CAST(COALESCE(NULLIF(cost, ''), '0') AS DECIMAL(10,4)) as unit_cost,
+            pou
+        FROM inventory_match
+        GROUP BY line, aci_pn, "DESC", mpn, man, qty, cost, pou, job_rev, last_rev, cust, cust_pn, cust_rev, pcn, item, loc_to
+        ORDER BY
+            CASE WHEN line ~ '^[0-9]+$' THEN CAST(line AS INTEGER) ELSE 999999 END,
+            line
+    """, job_number)
+
+    bom_lines = []
+    shortage_count = 0
+    for line in raw_lines:
+        qty_per_board = int(line["qty_per_board"] or 0)
+        required = qty_per_board * order_qty
+        on_hand = int(line["on_hand"] or 0)
+        mfg_floor = int(line["mfg_floor_qty"] or 0)
+        shortage = on_hand - required
+
+        if shortage < 0:
+            shortage_count += 1
+
+        bom_lines.append({
+            "line_no": line["line_no"],
+            "aci_pn": line["aci_pn"],
+            "description": line["description"] or "",
+            "mpn": line["mpn"] or "",
+            "manufacturer": line["manufacturer"] or "",
+            "qty_per_board": qty_per_board,
+            "required": required,
+            "on_hand": on_hand,
+            "mfg_floor_qty": mfg_floor,
+            "shortage": shortage,
+            "location": line["location"] if on_hand > 0 else "",
+            "unit_cost": float(line["unit_cost"] or 0),
+            "pou": line["pou"] or "",
+        })
 
-    finally:
-        conn.close()
+    return {
+        "job_number": job_number,
+        "build_qty": build_qty,
+        "order_qty": order_qty,
+        "total_lines": len(set(l["line_no"] for l in bom_lines)),
+        "shortage_count": shortage_count,
+        "lines": bom_lines,
+    }
 
 
 # ─── RELATED TRAVELERS (from NEXUS database) ────────────────────────────────
@@ -555,13 +836,7 @@ def get_job_travelers(job_number: str, db: Session = Depends(get_db), current_us
     # shown "8813L-4DA"'s traveler and job "8813L-4" was shown all seven of its
     # sub-assemblies', so jobs with no traveler of their own looked covered.
     # Filter with the same rule the enriched job list uses.
-    candidates = (
-        db.query(Traveler)
-        .filter(Traveler.job_number.ilike(f"{job_number}%"))
-        .order_by(Traveler.created_at.desc())
-        .all()
-    )
-    travelers = [t for t in candidates if traveler_matches_job(t.job_number, job_number)]
+    travelers = _travelers_for_job(db, job_number, Traveler.created_at.desc())
 
     result = []
     for t in travelers:
@@ -602,79 +877,68 @@ def get_job_travelers(job_number: str, db: Session = Depends(get_db), current_us
 @router.get("/{job_number}/stock")
 def get_job_stock(job_number: str, current_user=Depends(require_admin)):
     """Read-only warehouse inventory for all BOM items — includes ALL locations (Stock Room + MFG Floor)."""
-    conn = get_kosh_connection()
-    try:
-        cursor = conn.cursor(cursor_factory=RealDictCursor)
-
-        # Verify job exists
-        cursor.execute('SELECT order_qty FROM warehouse."tblJob" WHERE job_number = %s', (job_number,))
-        job = cursor.fetchone()
-        if not job:
-            raise HTTPException(status_code=404, detail=f"Job {job_number} not found")
-
-        order_qty = int(job["order_qty"] or 1)
-
-        # Get ALL warehouse inventory records for BOM items (no MFG Floor filter)
-        cursor.execute("""
-            WITH bom_items AS (
-                SELECT DISTINCT ON (b.aci_pn) b.aci_pn, b.mpn as bom_mpn, b.qty, b."DESC", b.line
-                FROM warehouse."tblBOM" b
-                WHERE b.job = %s
-                    AND (b.job_rev = (SELECT job_rev FROM warehouse."tblBOM" WHERE job = %s AND job_rev IS NOT NULL AND job_rev != '' ORDER BY created_at DESC LIMIT 1)
-                         OR NOT EXISTS (SELECT 1 FROM warehouse."tblBOM" WHERE job = %s AND job_rev IS NOT NULL AND job_rev != ''))
-                ORDER BY b.aci_pn, b.line
-            )
-            SELECT
-                bi.aci_pn,
-                bi."DESC" as description,
-                bi.line as line_no,
-                CAST(COALESCE(NULLIF(bi.qty, ''), '0') AS INTEGER) as qty_per_board,
-                w.pcn,
-                w.item as whse_item,
-                COALESCE(w.mpn, bi.bom_mpn) as mpn,
-                COALESCE(w.onhandqty, 0) as on_hand,
-                COALESCE(CAST(NULLIF(w.mfg_qty, '') AS INTEGER), 0) as mfg_qty,
-                COALESCE(w.loc_to, '') as location,
-                COALESCE(w.vendor, '') as vendor,
-                COALESCE(w.dc, '') as date_code,
-                COALESCE(w.po, '') as po_number
-            FROM bom_items bi
-            LEFT JOIN warehouse."tblWhse_Inventory" w
-                ON (bi.aci_pn = w.item OR bi.bom_mpn = w.mpn)
-            ORDER BY
-                CASE WHEN bi.line ~ '^[0-9]+$' THEN CAST(bi.line AS INTEGER) ELSE 999999 END,
-                bi.aci_pn, w.loc_to, w.pcn
-        """, (job_number, job_number, job_number))
-        rows = cursor.fetchall()
-
-        stock_items = []
-        for r in rows:
-            qty_per_board = int(r["qty_per_board"] or 0)
-            required = qty_per_board * order_qty
-            on_hand = int(r["on_hand"] or 0)
-            mfg_qty = int(r["mfg_qty"] or 0)
-
-            stock_items.append({
-                "line_no": r["line_no"] or "",
-                "aci_pn": r["aci_pn"],
-                "description": r["description"] or "",
-                "pcn": r["pcn"],
-                "mpn": r["mpn"] or "",
-                "on_hand": on_hand,
-                "mfg_qty": mfg_qty,
-                "location": r["location"],
-                "qty_per_board": qty_per_board,
-                "required": required,
-                "shortage": on_hand - required,
-                "vendor": r["vendor"],
-                "date_code": r["date_code"],
-                "po_number": r["po_number"],
-            })
-
-        return {"job_number": job_number, "order_qty": order_qty, "stock": stock_items}
+    # Verify job exists
+    job = _kosh_job_or_404(job_number)
+
+    order_qty = int(job["order_qty"] or 1)
+
+    # Get ALL warehouse inventory records for BOM items (no MFG Floor filter)
+    rows = _cached_bom_query("stock", """
+        WITH bom_items AS (
+            SELECT DISTINCT ON (b.aci_pn) b.aci_pn, b.mpn as bom_mpn, b.qty, b."DESC", b.line
+            FROM warehouse."tblBOM" b
+            WHERE b.job = %s
+                AND (b.job_rev = (SELECT job_rev FROM warehouse."tblBOM" WHERE job = %s AND job_rev IS NOT NULL AND job_rev != '' ORDER BY created_at DESC LIMIT 1)
+                     OR NOT EXISTS (SELECT 1 FROM warehouse."tblBOM" WHERE job = %s AND job_rev IS NOT NULL AND job_rev != ''))
+            ORDER BY b.aci_pn, b.line
+        )
+        SELECT
+            bi.aci_pn,
+            bi."DESC" as description,
+            bi.line as line_no,
+            CAST(COALESCE(NULLIF(bi.qty, ''), '0') AS INTEGER) as qty_per_board,
+            w.pcn,
+            w.item as whse_item,
+            COALESCE(w.mpn, bi.bom_mpn) as mpn,
+            COALESCE(w.onhandqty, 0) as on_hand,
+            COALESCE(CAST(NULLIF(w.mfg_qty, '') AS INTEGER), 0) as mfg_qty,
+            COALESCE(w.loc_to, '') as location,
+            COALESCE(w.vendor, '') as vendor,
+            COALESCE(w.dc, '') as date_code,
+            COALESCE(w.po, '') as po_number
+        FROM bom_items bi
+        LEFT JOIN warehouse."tblWhse_Inventory" w
+            ON (bi.aci_pn = w.item OR bi.bom_mpn = w.mpn)
+        ORDER BY
+            CASE WHEN bi.line ~ '^[0-9]+$' THEN CAST(bi.line AS INTEGER) ELSE 999999 END,
+            bi.aci_pn, w.loc_to, w.pcn
+    """, job_number)
+
+    stock_items = []
+    for r in rows:
+        qty_per_board = int(r["qty_per_board"] or 0)
+        required = qty_per_board * order_qty
+        on_hand = int(r["on_hand"] or 0)
+        mfg_qty = int(r["mfg_qty"] or 0)
+
+        stock_items.append({
+            "line_no": r["line_no"] or "",
+            "aci_pn": r["aci_pn"],
+            "description": r["description"] or "",
+            "pcn": r["pcn"],
+            "mpn": r["mpn"] or "",
+            "on_hand": on_hand,
+            "mfg_qty": mfg_qty,
+            "location": r["location"],
+            "qty_per_board": qty_per_board,
+            "required": required,
+            "shortage": on_hand - required,
+            "vendor": r["vendor"],
+            "date_code": r["date_code"],
+            "po_number": r["po_number"],
+        })
 
-    finally:
-        conn.close()
+    return {"job_number": job_number, "order_qty": order_qty, "stock": stock_items}
 
 
 # ─── MANUFACTURING PROGRESS ─────────────────────────────────────────────────
@@ -682,26 +946,13 @@ def get_job_stock(job_number: str, current_user=Depends(require_admin)):
 @router.get("/{job_number}/progress")
 def get_job_progress(job_number: str, db: Session = Depends(get_db), current_user=Depends(require_admin)):
     """Get manufacturing progress: X of Y QTY manufactured based on completed travelers."""
-    from models import Traveler, TravelerStatus
+    from models import TravelerStatus
 
-    conn = get_kosh_connection()
-    try:
-        cursor = conn.cursor(cursor_factory=RealDictCursor)
-        cursor.execute('SELECT order_qty FROM warehouse."tblJob" WHERE job_number = %s', (job_number,))
-        job = cursor.fetchone()
-        if not job:
-            raise HTTPException(status_code=404, detail=f"Job {job_number} not found")
-
-        order_qty = int(job["order_qty"] or 1)
-    finally:
-        conn.close()
+    job = _kosh_job_or_404(job_number)
+    order_qty = int(job["order_qty"] or 1)
 
     # Count completed quantities from NEXUS travelers
-    travelers = (
-        db.query(Traveler)
-        .filter(Traveler.job_number.ilike(f"{job_number}%"))
-        .all()
-    )
+    travelers = _travelers_for_job(db, job_number)
 
     total_travelers = len(travelers)
     completed_travelers = sum(1 for t in travelers if t.status == TravelerStatus.COMPLETED)
@@ -724,70 +975,70 @@ def get_job_progress(job_number: str, db: Session = Depends(get_db), current_use
 # ─── ENRICHED JOB (single call with all data) ─────────────────────────────
 
 @router.get("/{job_number}/enriched")
-def get_job_enriched(job_number: str, db: Session = Depends(get_db), current_user=Depends(require_admin)):
+def get_job_enriched(job_number: str, response: Response, db: Session = Depends(get_db),
+                     current_user=Depends(require_admin)):
     """Get job with traveler count, progress, shortage count, kitting status, labor hours — ONE call."""
-    from models import Traveler, TravelerStatus, ProcessStep, LaborEntry
-
-    conn = get_kosh_connection()
-    try:
-        cursor = conn.cursor(cursor_factory=RealDictCursor)
+    from models import TravelerStatus, LaborEntry
 
-        # Get job from KOSH
-        cursor.execute('SELECT * FROM warehouse."tblJob" WHERE job_number = %s', (job_number,))
-        job = cursor.fetchone()
-        if not job:
-            raise HTTPException(status_code=404, detail=f"Job {job_number} not found")
+    timings = PhaseTimings()
 
-        order_qty = int(job["order_qty"] or 1)
-
-        # Get BOM shortage count + kitting status
-        shortage_count = 0
-        total_bom_lines = 0
-        kitted_lines = 0
+    # KOSH side: job row + BOM rows (same rows as /kitting-status). bom_rows is
+    # None when KOSH dropped between the two reads.
+    def kosh_side():
+        job = _kosh_job_or_404(job_number)
         try:
-            cursor.execute("""
-                WITH bom_lines AS (
-                    SELECT DISTINCT ON (b.aci_pn)
-                        b.aci_pn, b.qty, b.mpn as bom_mpn
-                    FROM warehouse."tblBOM" b
-                    WHERE b.job = %s
-                        AND (b.job_rev = (SELECT job_rev FROM warehouse."tblBOM" WHERE job = %s AND job_rev IS NOT NULL AND job_rev != '' ORDER BY created_at DESC LIMIT 1)
-                             OR NOT EXISTS (SELECT 1 FROM warehouse."tblBOM" WHERE job = %s AND job_rev IS NOT NULL AND job_rev != ''))
-                    ORDER BY b.aci_pn
-                )
-                SELECT
-                    bl.aci_pn,
-                    CAST(COALESCE(NULLIF(bl.qty, ''), '0') AS INTEGER) as qty_per_board,
-                    COALESCE(SUM(CASE WHEN COALESCE(w.loc_to, '') != 'MFG Floor' THEN w.onhandqty ELSE 0 END), 0) as stockroom_qty,
-                    COALESCE(SUM(CASE WHEN w.loc_to = 'MFG Floor' THEN CAST(NULLIF(w.mfg_qty, '') AS INTEGER) ELSE 0 END), 0) as mfg_floor_qty
-                FROM bom_lines bl
-                LEFT JOIN warehouse."tblWhse_Inventory" w
-                    ON (bl.aci_pn = w.item OR bl.bom_mpn = w.mpn)
-                GROUP BY bl.aci_pn, bl.qty
-            """, (job_number, job_number, job_number))
-            bom_rows = cursor.fetchall()
-            for row in bom_rows:
-                total_bom_lines += 1
-                qty_per_board = int(row["qty_per_board"] or 0)
-                required = qty_per_board * order_qty
-                stockroom = int(row["stockroom_qty"] or 0)
-                mfg_floor = int(row["mfg_floor_qty"] or 0)
-                if stockroom < required:
-                    shortage_count += 1
-                if mfg_floor >= required and required > 0:
-                    kitted_lines += 1
+            return job, _cached_bom_query("kitting", KITTING_BOM_SQL, job_number)
+        except HTTPException as e:
+            if not _kosh_down(e):
+                raise
+            return job, None
         except Exception as e:
             logger.warning(f"Error fetching BOM data for {job_number}: {e}")
-
-    finally:
-        conn.close()
-
-    # Traveler data from NEXUS
-    travelers = (
-        db.query(Traveler)
-        .filter(Traveler.job_number.ilike(f"{job_number}%"))
-        .all()
-    )
+            return job, []
+
+    # NEXUS side: travelers and their labor hours. Runs on this thread (it
+    # owns the db session) while the KOSH side runs on the fetch pool.
+    def nexus_side():
+        travelers = _travelers_for_job(db, job_number)
+        traveler_ids = [t.id for t in travelers]
+        total_labor_hours = 0.0
+        if traveler_ids:
+            labor_hours = db.query(LaborEntry).filter(LaborEntry.traveler_id.in_(traveler_ids)).all()
+            total_labor_hours = round(sum(e.hours_worked or 0 for e in labor_hours), 2)
+        return travelers, total_labor_hours
+
+    kosh_result, (travelers, total_labor_hours) = fetch_alongside(kosh_side, nexus_side, timings)
+    merge_started = time.perf_counter()
+
+    # While KOSH is unreachable the job comes from the mirror or NEXUS
+    # travelers instead, and the KOSH-only BOM figures are reported as unknown.
+    kosh_unavailable = False
+    try:
+        job, bom_rows = kosh_result.result()
+    except HTTPException as e:
+        if not _kosh_down(e):
+            raise
+        job, bom_rows = _fallback_job(db, job_number), None
+    if bom_rows is None:
+        kosh_unavailable = True
+        bom_rows = []
+
+    order_qty = int(job["order_qty"] or 1)
+
+    # BOM shortage count + kitting status
+    shortage_count = 0
+    total_bom_lines = 0
+    kitted_lines = 0
+    for row in bom_rows:
+        total_bom_lines += 1
+        qty_per_board = int(row["qty_per_board"] or 0)
+        required = qty_per_board * order_qty
+        stockroom = int(row["stockroom_qty"] or 0)
+        mfg_floor = int(row["mfg_floor_qty"] or 0)
+        if stockroom < required:
+            shortage_count += 1
+        if mfg_floor >= required and required > 0:
+            kitted_lines += 1
 
     traveler_count = len(travelers)
     completed_travelers = sum(1 for t in travelers if t.status == TravelerStatus.COMPLETED)
@@ -795,13 +1046,6 @@ def get_job_enriched(job_number: str, db: Session = Depends(get_db), current_use
     qty_manufactured = sum(t.quantity for t in travelers if t.status == TravelerStatus.COMPLETED)
     progress_percent = round((qty_manufactured / order_qty * 100), 1) if order_qty > 0 else 0
 
-    # Total labor hours across all travelers for this job
-    traveler_ids = [t.id for t in travelers]
-    total_labor_hours = 0.0
-    if traveler_ids:
-        labor_hours = db.query(LaborEntry).filter(LaborEntry.traveler_id.in_(traveler_ids)).all()
-        total_labor_hours = round(sum(e.hours_worked or 0 for e in labor_hours), 2)
-
     # Check for overdue travelers
     from datetime import date
     has_overdue = any(
@@ -823,13 +1067,17 @@ def get_job_enriched(job_number: str, db: Session = Depends(get_db), current_use
 
     # Kitting status
     kitting_percent = round((kitted_lines / total_bom_lines * 100), 1) if total_bom_lines > 0 else 0
-    if kitting_percent >= 100:
+    if kosh_unavailable:
+        kitting_status = "unknown"
+    elif kitting_percent >= 100:
         kitting_status = "ready"
     elif kitting_percent > 0:
         kitting_status = "partial"
     else:
         kitting_status = "none"
 
+    timings.record("merge", time.perf_counter() - merge_started)
+    timings.apply(response)
     return {
         "id": job["id"],
         "job_number": job["job_number"],
@@ -859,104 +1107,100 @@ def get_job_enriched(job_number: str, db: Session = Depends(get_db), current_use
         "total_bom_lines": total_bom_lines,
         "health": health,
         "has_overdue": has_overdue,
+        "kosh_unavailable": kosh_unavailable,
     }
 
 
 # ─── KITTING STATUS ───────────────────────────────────────────────────────
 
+# Per BOM line: stock-room on-hand vs MFG Floor quantity. One row per ACI part
+# number (bom_lines is DISTINCT ON aci_pn), so /enriched reads the same cached
+# rows for its shortage and kitting counts.
+KITTING_BOM_SQL = """
+    WITH bom_lines AS (
+        SELECT DISTINCT ON (b.aci_pn)
+            b.aci_pn, b."DESC", b.qty, b.mpn as bom_mpn, b.line
+        FROM warehouse."tblBOM" b
+        WHERE b.job = %s
+            AND (b.job_rev = (SELECT job_rev FROM warehouse."tblBOM" WHERE job = %s AND job_rev IS NOT NULL AND job_rev != '' ORDER BY created_at DESC LIMIT 1)
+                 OR NOT EXISTS (SELECT 1 FROM warehouse."tblBOM" WHERE job = %s AND job_rev IS NOT NULL AND job_rev != ''))
+        ORDER BY b.aci_pn
+    )
+    SELECT
+        bl.aci_pn,
+        bl."DESC" as description,
+        bl.line as line_no,
+        CAST(COALESCE(NULLIF(bl.qty, ''), '0') AS INTEGER) as qty_per_board,
+        COALESCE(SUM(CASE WHEN COALESCE(w.loc_to, '') != 'MFG Floor' THEN w.onhandqty ELSE 0 END), 0) as stockroom_qty,
+        COALESCE(SUM(CASE WHEN w.loc_to = 'MFG Floor' THEN CAST(NULLIF(w.mfg_qty, '') AS INTEGER) ELSE 0 END), 0) as mfg_floor_qty
+    FROM bom_lines bl
+    LEFT JOIN warehouse."tblWhse_Inventory" w
+        ON (bl.aci_pn = w.item OR bl.bom_mpn = w.mpn)
+    GROUP BY bl.aci_pn, bl."DESC", bl.line, bl.qty
+    ORDER BY
+        CASE WHEN bl.line ~ '^[0-9]+$' THEN CAST(bl.line AS INTEGER) ELSE 999999 END,
+        bl.aci_pn
+"""
+
+
 @router.get("/{job_number}/kitting-status")
 def get_kitting_status(job_number: str, current_user=Depends(require_admin)):
     """Compare BOM required quantities vs MFG Floor quantities from KOSH inventory."""
-    conn = get_kosh_connection()
-    try:
-        cursor = conn.cursor(cursor_factory=RealDictCursor)
-
-        cursor.execute('SELECT order_qty FROM warehouse."tblJob" WHERE job_number = %s', (job_number,))
-        job = cursor.fetchone()
-        if not job:
-            raise HTTPException(status_code=404, detail=f"Job {job_number} not found")
-
-        order_qty = int(job["order_qty"] or 1)
-
-        cursor.execute("""
-            WITH bom_lines AS (
-                SELECT DISTINCT ON (b.aci_pn)
-                    b.aci_pn, b."DESC", b.qty, b.mpn as bom_mpn, b.line
-                FROM warehouse."tblBOM" b
-                WHERE b.job = %s
-                    AND (b.job_rev = (SELECT job_rev FROM warehouse."tblBOM" WHERE job = %s AND job_rev IS NOT NULL AND job_rev != '' ORDER BY created_at DESC LIMIT 1)
-                         OR NOT EXISTS (SELECT 1 FROM warehouse."tblBOM" WHERE job = %s AND job_rev IS NOT NULL AND job_rev != ''))
-                ORDER BY b.aci_pn
-            )
-            SELECT
-                bl.aci_pn,
-                bl."DESC" as description,
-                bl.line as line_no,
-                CAST(COALESCE(NULLIF(bl.qty, ''), '0') AS INTEGER) as qty_per_board,
-                COALESCE(SUM(CASE WHEN COALESCE(w.loc_to, '') != 'MFG Floor' THEN w.onhandqty ELSE 0 END), 0) as stockroom_qty,
-                COALESCE(SUM(CASE WHEN w.loc_to = 'MFG Floor' THEN CAST(NULLIF(w.mfg_qty, '') AS INTEGER) ELSE 0 END), 0) as mfg_floor_qty
-            FROM bom_lines bl
-            LEFT JOIN warehouse."tblWhse_Inventory" w
-                ON (bl.aci_pn = w.item OR bl.bom_mpn = w.mpn)
-            GROUP BY bl.aci_pn, bl."DESC", bl.line, bl.qty
-            ORDER BY
-                CASE WHEN bl.line ~ '^[0-9]+$' THEN CAST(bl.line AS INTEGER) ELSE 999999 END,
-                bl.aci_pn
-        """, (job_number, job_number, job_number))
-        rows = cursor.fetchall()
-
-        components = []
-        total_components = 0
-        kitted = 0
-        in_stockroom = 0
-        short = 0
-
-        for row in rows:
-            total_components += 1
-            qty_per_board = int(row["qty_per_board"] or 0)
-            required = qty_per_board * order_qty
-            stockroom_qty = int(row["stockroom_qty"] or 0)
-            mfg_floor_qty = int(row["mfg_floor_qty"] or 0)
-
-            if required == 0:
-                comp_status = "ready"
-                kitted += 1
-            elif mfg_floor_qty >= required:
-                comp_status = "ready"
-                kitted += 1
-            elif stockroom_qty >= required:
-                comp_status = "in_stockroom"
-                in_stockroom += 1
-            else:
-                comp_status = "short"
-                short += 1
-
-            components.append({
-                "line_no": row["line_no"] or "",
-                "aci_pn": row["aci_pn"],
-                "description": row["description"] or "",
-                "required": required,
-                "on_mfg_floor": mfg_floor_qty,
-                "in_stockroom": stockroom_qty,
-                "short_qty": max(0, required - stockroom_qty - mfg_floor_qty),
-                "status": comp_status,
-            })
-
-        percent = round((kitted / total_components * 100), 1) if total_components > 0 else 0
+    job = _kosh_job_or_404(job_number)
+
+    order_qty = int(job["order_qty"] or 1)
+
+    rows = _cached_bom_query("kitting", KITTING_BOM_SQL, job_number)
+
+    components = []
+    total_components = 0
+    kitted = 0
+    in_stockroom = 0
+    short = 0
+
+    for row in rows:
+        total_components += 1
+        qty_per_board = int(row["qty_per_board"] or 0)
+        required = qty_per_board * order_qty
+        stockroom_qty = int(row["stockroom_qty"] or 0)
+        mfg_floor_qty = int(row["mfg_floor_qty"] or 0)
+
+        if required == 0:
+            comp_status = "ready"
+            kitted += 1
+        elif mfg_floor_qty >= required:
+            comp_status = "ready"
+            kitted += 1
+        elif stockroom_qty >= required:
+            comp_status = "in_stockroom"
+            in_stockroom += 1
+        else:
+            comp_status = "short"
+            short += 1
+
+        components.append({
+            "line_no": row["line_no"] or "",
+            "aci_pn": row["aci_pn"],
+            "description": row["description"] or "",
+            "required": required,
+            "on_mfg_floor": mfg_floor_qty,
+            "in_stockroom": stockroom_qty,
+            "short_qty": max(0, required - stockroom_qty - mfg_floor_qty),
+            "status": comp_status,
+        })
 
-        return {
-            "job_number": job_number,
-            "order_qty": order_qty,
-            "total_components": total_components,
-            "kitted": kitted,
-            "in_stockroom": in_stockroom,
-            "short": short,
-            "percent": percent,
-            "components": components,
-        }
+    percent = round((kitted / total_components * 100), 1) if total_components > 0 else 0
 
-    finally:
-        conn.close()
+    return {
+        "job_number": job_number,
+        "order_qty": order_qty,
+        "total_components": total_components,
+        "kitted": kitted,
+        "in_stockroom": in_stockroom,
+        "short": short,
+        "percent": percent,
+        "components": components,
+    }
 
 
 # ─── AUTO-CREATE TRAVELER ─────────────────────────────────────────────────
@@ -966,15 +1210,7 @@ def auto_create_traveler(job_number: str, db: Session = Depends(get_db), current
     """Auto-create a DRAFT traveler from a KOSH job. Infers type from description, creates default steps."""
     from models import Traveler, TravelerType, TravelerStatus, Priority, ProcessStep, WorkCenter
 
-    conn = get_kosh_connection()
-    try:
-        cursor = conn.cursor(cursor_factory=RealDictCursor)
-        cursor.execute('SELECT * FROM warehouse."tblJob" WHERE job_number = %s', (job_number,))
-        job = cursor.fetchone()
-        if not job:
-            raise HTTPException(status_code=404, detail=f"Job {job_number} not found in KOSH")
-    finally:
-        conn.close()
+    job = _kosh_job_or_404(job_number, detail=f"Job {job_number} not found in KOSH")
 
     # Infer traveler type from description/part
     desc_lower = (job["description"] or "").lower()
@@ -1071,36 +1307,23 @@ def auto_create_traveler(job_number: str, db: Session = Depends(get_db), current
 # ─── JOB TIMELINE ────────────────────────────────────────────────────────
 
 @router.get("/{job_number}/timeline")
-def get_job_timeline(job_number: str, db: Session = Depends(get_db), current_user=Depends(require_admin)):
+def get_job_timeline(job_number: str, response: Response, db: Session = Depends(get_db),
+                     current_user=Depends(require_admin)):
     """Chronological timeline of all events for a job across KOSH and NEXUS."""
     from models import Traveler, TravelerStatus, ProcessStep, LaborEntry, User
 
-    events = []
+    # The KOSH job row is fetched on the fetch pool while the NEXUS events
+    # below are gathered on this thread.
+    timings = PhaseTimings()
+    kosh_job = submit(lambda: get_kosh_job(job_number), timings)
+    nexus_started = time.perf_counter()
 
-    # KOSH: job creation date
-    conn = get_kosh_connection()
-    try:
-        cursor = conn.cursor(cursor_factory=RealDictCursor)
-        cursor.execute('SELECT created_at, created_by, status FROM warehouse."tblJob" WHERE job_number = %s', (job_number,))
-        job = cursor.fetchone()
-        if job and job["created_at"]:
-            events.append({
-                "type": "job_created",
-                "timestamp": str(job["created_at"]),
-                "title": "Job created in KOSH",
-                "detail": f"Created by {job['created_by'] or 'Unknown'}, Status: {job['status'] or 'New'}",
-                "icon": "briefcase",
-            })
-    finally:
-        conn.close()
+    events = []
 
-    # NEXUS: travelers and their events
-    travelers = (
-        db.query(Traveler)
-        .filter(Traveler.job_number.ilike(f"{job_number}%"))
-        .order_by(Traveler.created_at)
-        .all()
-    )
+    # NEXUS: travelers and their events. Same matching rule as the job's
+    # traveler list — a bare ILIKE prefix pulled in other jobs' travelers
+    # ("8813L-4" claimed "8813L-4A") and could not use an index.
+    travelers = _travelers_for_job(db, job_number, Traveler.created_at)
 
     for t in travelers:
         creator = db.query(User).filter(User.id == t.created_by).first()
@@ -1172,9 +1395,6 @@ def get_job_timeline(job_number: str, db: Session = Depends(get_db), current_use
                     "traveler_id": t.id,
                 })
 
-    # Sort all events chronologically
-    events.sort(key=lambda e: e["timestamp"] or "")
-
     # Per-traveler metadata so the timeline can be split into one lane per
     # traveler with its own hours. A job commonly carries several travelers (WO
     # breakouts, plus RMA rework), and merging them into a single stream made it
@@ -1200,10 +1420,34 @@ def get_job_timeline(job_number: str, db: Session = Depends(get_db), current_use
             "completed_steps": done_steps,
             "total_steps": total_steps,
         })
+    timings.record("nexus", time.perf_counter() - nexus_started)
+
+    # KOSH: job creation date (left out while KOSH is unreachable)
+    kosh_unavailable = False
+    try:
+        job = kosh_job.result()
+    except HTTPException as e:
+        if not _kosh_down(e):
+            raise
+        kosh_unavailable = True
+        job = None
+    if job and job["created_at"]:
+        events.append({
+            "type": "job_created",
+            "timestamp": str(job["created_at"]),
+            "title": "Job created in KOSH",
+            "detail": f"Created by {job['created_by'] or 'Unknown'}, Status: {job['status'] or 'New'}",
+            "icon": "briefcase",
+        })
+
+    # Sort all events chronologically
+    events.sort(key=lambda e: e["timestamp"] or "")
 
+    timings.apply(response)
     return {
         "job_number": job_number,
         "events": events,
         "total": len(events),
         "travelers": traveler_lanes,
+        "kosh_unavailable": kosh_unavailable,
     }
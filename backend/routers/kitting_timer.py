@@ -21,7 +21,7 @@ writes to KOSH — it only reads from it (same pattern as analytics.py).
 from datetime import datetime, timezone
 from typing import Optional, List
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
 from pydantic import BaseModel
 from sqlalchemy import func
 from sqlalchemy.orm import Session
@@ -117,9 +117,27 @@ def _get_kitting_step(db: Session, traveler_id: int) -> Optional[ProcessStep]:
     )
 
 
-def _kosh_parts_ready(job_number: str) -> Optional[bool]:
+def _kosh_readiness(job_numbers, fresh: bool = False) -> dict:
+    """Parts readiness for many job numbers (see services.kitting_readiness),
+    through the KOSH cache: numbers already evaluated within KOSH_CACHE_TTL
+    are answered from memory, the rest in ONE KOSH query. fresh=True drops the
+    cached answers first. KOSH errors propagate."""
+    from services.kosh_cache import kosh_cache
+    from services.kitting_readiness import evaluate_readiness
+
+    job_numbers = [jn for jn in dict.fromkeys(job_numbers) if jn]
+    if fresh:
+        for jn in job_numbers:
+            kosh_cache.invalidate("parts_ready", jn)
+    return kosh_cache.get_many("parts_ready", job_numbers, evaluate_readiness)
+
+
+def _kosh_parts_ready(job_number: str, fresh: bool = False) -> Optional[bool]:
     """Read-only check: are all BOM parts on hand for this job in KOSH?
 
+    Reads go through the KOSH cache (GET /timer/{id} polls this), so the answer
+    can be up to KOSH_CACHE_TTL old; pass fresh=True to re-read KOSH.
+
     Returns:
         True  → all parts present (job is unblocked)
         False → at least one shortage
@@ -128,60 +146,8 @@ def _kosh_parts_ready(job_number: str) -> Optional[bool]:
     if not job_number:
         return None
     try:
-        from routers.jobs import get_kosh_connection
-
-        kosh_conn = get_kosh_connection()
-        kosh_cur = kosh_conn.cursor()
-        try:
-            base = job_number.rstrip("LM") if job_number else job_number
-            kosh_job = None
-            kosh_jn = job_number
-            for try_jn in (job_number, base) if base != job_number else (job_number,):
-                kosh_cur.execute(
-                    'SELECT order_qty FROM warehouse."tblJob" WHERE job_number = %s',
-                    (try_jn,),
-                )
-                row = kosh_cur.fetchone()
-                if row:
-                    kosh_job = row
-                    kosh_jn = try_jn
-                    break
-            if not kosh_job:
-                return None
-            order_qty = int(kosh_job[0] or 1)
-
-            kosh_cur.execute(
-                """
-                WITH bom_items AS (
-                    SELECT DISTINCT ON (b.aci_pn) b.aci_pn, b.mpn, b.qty
-                    FROM warehouse."tblBOM" b
-                    WHERE b.job = %s
-                    ORDER BY b.aci_pn, b.line
-                )
-                SELECT
-                    CAST(COALESCE(NULLIF(bi.qty, ''), '0') AS INTEGER) as qty_per,
-                    COALESCE(SUM(CASE WHEN w.loc_to != 'MFG Floor' THEN w.onhandqty ELSE 0 END), 0) as on_hand
-                FROM bom_items bi
-                LEFT JOIN warehouse."tblWhse_Inventory" w
-                    ON bi.aci_pn = w.item OR bi.mpn = w.mpn
-                GROUP BY bi.aci_pn, bi.qty
-                """,
-                (kosh_jn,),
-            )
-            bom_rows = kosh_cur.fetchall()
-            if not bom_rows:
-                return None
-            for r in bom_rows:
-                req = int(r[0] or 0) * order_qty
-                oh = int(r[1] or 0)
-                if oh < req:
-                    return False
-            return True
-        finally:
-            try:
-                kosh_conn.close()
-            except Exception:
-                pass
+        readiness = _kosh_readiness([job_number], fresh=fresh).get(job_number)
+        return readiness["ready"] if readiness else None
     except Exception as e:
         print(f"kitting_timer KOSH check error: {e}")
         return None
@@ -625,35 +591,105 @@ def get_timer_state(
     return _compute_state(db, traveler)
 
 
-@router.post("/sweep-long-waits")
-def sweep_long_waits(
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
-):
-    """Scan every traveler with an open WAITING_PARTS session and fire long-wait
-    notifications for any that exceed the threshold and have not yet been
-    notified. Idempotent. Returns the count of newly notified sessions.
+def sweep_waiting_sessions(db: Session) -> dict:
+    """Walk every open WAITING_PARTS session: close the ones whose parts have
+    arrived in KOSH, and fire long-wait notifications for the rest.
 
-    Useful for cron / scheduled invocation. Cheap query — only touches open
-    sessions, so it scales with concurrent waiting jobs, not history.
+    Readiness for all waiting jobs is evaluated in ONE KOSH query up front, so
+    the sweep costs one round trip however many jobs are waiting. If KOSH is
+    unreachable the sweep still sends long-wait notifications.
     """
     open_waiting = (
-        db.query(KittingTimerSession)
+        db.query(KittingTimerSession, Traveler)
+        .join(Traveler, Traveler.id == KittingTimerSession.traveler_id)
         .filter(
             KittingTimerSession.end_time.is_(None),
             KittingTimerSession.session_type == WAITING,
         )
         .all()
     )
-    fired = 0
-    for sess in open_waiting:
-        traveler = db.query(Traveler).filter(Traveler.id == sess.traveler_id).first()
-        if not traveler:
+    try:
+        readiness = _kosh_readiness([t.job_number for _, t in open_waiting], fresh=True)
+    except Exception as e:
+        print(f"kitting sweep KOSH readiness error: {e}")
+        readiness = {}
+
+    auto_closed = 0
+    notified = 0
+    for _sess, traveler in open_waiting:
+        ready = (readiness.get(traveler.job_number) or {}).get("ready")
+        # Readiness was just cached for the whole batch, so the check inside
+        # _maybe_auto_close_waiting doesn't go back to KOSH.
+        if ready is True and _maybe_auto_close_waiting(db, traveler) is not None:
+            auto_closed += 1
             continue
-        evt = _maybe_notify_long_wait(db, traveler)
-        if evt is not None:
-            fired += 1
-    return {"open_waiting_sessions": len(open_waiting), "newly_notified": fired}
+        if _maybe_notify_long_wait(db, traveler) is not None:
+            notified += 1
+    return {
+        "open_waiting_sessions": len(open_waiting),
+        "auto_closed_waiting": auto_closed,
+        "newly_notified": notified,
+    }
+
+
+@router.post("/sweep-long-waits")
+def sweep_long_waits(
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    """Scan every traveler with an open WAITING_PARTS session: auto-close the
+    sessions whose parts KOSH now reports on hand, and fire long-wait
+    notifications for any that exceed the threshold and have not yet been
+    notified. Idempotent. Returns the counts of closed and newly notified
+    sessions.
+
+    Useful for cron / scheduled invocation. Cheap query — only touches open
+    sessions, so it scales with concurrent waiting jobs, not history; KOSH is
+    asked once for all of them.
+    """
+    return sweep_waiting_sessions(db)
+
+
+# Upper bound on job numbers per /readiness call — one KOSH query covers them
+# all, but the inventory aggregate grows with the number of distinct parts.
+MAX_READINESS_JOBS = 200
+
+
+@router.get("/readiness")
+def get_parts_readiness(
+    jobs: str = Query(..., description="Comma-separated job numbers"),
+    fresh: bool = Query(False, description="Bypass cached answers and re-read KOSH"),
+    current_user: User = Depends(get_current_user),
+):
+    """Bulk KOSH parts readiness: for each job, whether every BOM line is
+    covered by stock-room inventory. `ready` is null when KOSH has no such job
+    or no BOM for it."""
+    job_numbers = list(dict.fromkeys(j.strip() for j in jobs.split(",") if j.strip()))
+    if not job_numbers:
+        raise HTTPException(status_code=400, detail="No job numbers given")
+    if len(job_numbers) > MAX_READINESS_JOBS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"At most {MAX_READINESS_JOBS} job numbers per request",
+        )
+    try:
+        readiness = _kosh_readiness(job_numbers, fresh=fresh)
+    except Exception as e:
+        print(f"kitting readiness KOSH error: {e}")
+        raise HTTPException(status_code=503, detail="KOSH database unavailable")
+
+    results = [
+        readiness.get(jn) or {
+            "job_number": jn, "kosh_job_number": None, "ready": None, "bom_lines": 0, "short_lines": 0,
+        }
+        for jn in job_numbers
+    ]
+    return {
+        "jobs": results,
+        "ready": sum(1 for r in results if r["ready"] is True),
+        "short": sum(1 for r in results if r["ready"] is False),
+        "unknown": sum(1 for r in results if r["ready"] is None),
+    }
 
 
 @router.get("/analytics/{traveler_id}", response_model=AnalyticsOut)
@@ -695,7 +731,9 @@ def manual_kosh_sync(
     Useful from a frontend "Check parts" button. Read-only against KOSH.
     """
     traveler = _get_traveler_or_404(db, traveler_id)
-    parts_ready = _kosh_parts_ready(traveler.job_number)
+    # An explicit "Check parts" must see KOSH as it is now, not as cached; the
+    # auto-close check right after then reuses this fresh read.
+    parts_ready = _kosh_parts_ready(traveler.job_number, fresh=True)
     fired = _maybe_auto_close_waiting(db, traveler)
     return {
         "traveler_id": traveler.id,
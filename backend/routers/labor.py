@@ -1,15 +1,19 @@
 import logging
 
-from fastapi import APIRouter, Depends, HTTPException, Request, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, StreamingResponse
 from sqlalchemy.orm import Session
 from typing import List, Optional
 from datetime import datetime, timedelta, timezone
 from pydantic import BaseModel, model_validator
 
 from database import get_db
-from models import User, LaborEntry, Traveler, ProcessStep, ManualStep, NotificationType, WorkCenter, TravelerStatus, TravelerType, UserRole, PauseLog, AuditLog
+from models import User, LaborEntry, LaborDailyRollup, Traveler, ProcessStep, ManualStep, NotificationType, WorkCenter, TravelerStatus, TravelerType, UserRole, PauseLog, AuditLog
 from routers.auth import get_current_user
 from services.notification_service import create_notification_for_admins
+from services.table_versions import versioned_etag
+from utils.pagination import after_cursor, encode_cursor
 
 logger = logging.getLogger(__name__)
 
@@ -27,10 +31,23 @@ def get_pause_data(db: Session, entry_id: int):
     }
 
 
-def get_pause_data_batch(db: Session, entry_ids: list):
+def _iso(value):
+    return value.isoformat() if value is not None else None
+
+
+def _plain_pause_log(log: PauseLog) -> dict:
+    """PauseLogResponse's fields, JSON-ready, without building the model."""
+    return {
+        "id": log.id, "paused_at": _iso(log.paused_at), "resumed_at": _iso(log.resumed_at),
+        "duration_seconds": log.duration_seconds, "comment": log.comment, "reason": log.reason,
+    }
+
+
+def get_pause_data_batch(db: Session, entry_ids: list, plain: bool = False):
     """Batch-fetch pause logs for many labor entries in a single query.
     Returns a dict {entry_id: pause_data_dict} matching get_pause_data's shape.
-    Avoids the N+1 that crushed labor endpoints under admin polling load."""
+    Avoids the N+1 that crushed labor endpoints under admin polling load.
+    plain=True gives the logs as JSON-ready dicts instead of PauseLogResponse."""
     if not entry_ids:
         return {}
     logs = db.query(PauseLog).filter(PauseLog.labor_entry_id.in_(entry_ids)).order_by(PauseLog.paused_at).all()
@@ -42,7 +59,7 @@ def get_pause_data_batch(db: Session, entry_ids: list):
         entry_logs = grouped.get(eid, [])
         total_seconds = sum(l.duration_seconds or 0 for l in entry_logs)
         result[eid] = {
-            "pause_logs": [PauseLogResponse.model_validate(l) for l in entry_logs],
+            "pause_logs": [_plain_pause_log(l) if plain else PauseLogResponse.model_validate(l) for l in entry_logs],
             "total_pause_seconds": round(total_seconds, 1) if entry_logs else None,
             "pause_count": len(entry_logs) if entry_logs else None,
         }
@@ -51,6 +68,8 @@ def get_pause_data_batch(db: Session, entry_ids: list):
 def update_step_and_traveler_progress(db: Session, labor_entry: LaborEntry):
     """When a labor entry is completed, mark its linked process step as completed
     and update the traveler's status accordingly."""
+    from services.traveler_progress import claim_step_completion
+
     if not labor_entry.step_id:
         return
 
@@ -58,6 +77,15 @@ def update_step_and_traveler_progress(db: Session, labor_entry: LaborEntry):
     if not step or step.is_completed:
         return
 
+    # Claim the step and take it off the traveler's remaining counters in
+    # one row-locked UPDATE each (services/traveler_progress.py) — no loading
+    # every step of a 60-step traveler on each clock-out, and two operators
+    # clocking out of the last steps at once can't both miss completion.
+    remaining = claim_step_completion(db, step)
+    if remaining is None:
+        return  # another clock-out completed this step first
+    remaining_steps, remaining_required = remaining
+
     # Mark the step as completed
     step.is_completed = True
     step.completed_at = labor_entry.end_time or datetime.now()
@@ -78,15 +106,13 @@ def update_step_and_traveler_progress(db: Session, labor_entry: LaborEntry):
     # unchecked. For non-shipping steps, the traveler completes only when every
     # step is checked off.
     is_shipping_step = (step.operation or "").strip().upper() == "SHIPPING"
-    all_steps = db.query(ProcessStep).filter(ProcessStep.traveler_id == traveler.id).all()
 
     if is_shipping_step:
-        required_done = all(s.is_completed for s in all_steps if s.is_required)
-        if required_done:
+        if remaining_required == 0:
             traveler.status = TravelerStatus.COMPLETED
             traveler.completed_at = datetime.now()
     else:
-        if all_steps and all(s.is_completed for s in all_steps):
+        if remaining_steps == 0:
             traveler.status = TravelerStatus.COMPLETED
             traveler.completed_at = datetime.now()
 
@@ -1119,29 +1145,26 @@ async def delete_pause_log(
     return {"message": "Pause deleted", "id": pause_id}
 
 
-@router.get("/", response_model=List[LaborEntryResponse])
-@router.get("", response_model=List[LaborEntryResponse], include_in_schema=False)
-async def get_all_labor_entries(
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
-):
-    """Get all labor entries"""
+LABOR_PAGE_SIZE = 200
+LABOR_PAGE_MAX = 1000
 
-    labor_entries = db.query(LaborEntry).order_by(LaborEntry.created_at.desc()).all()
 
-    # Batch-fetch all related users and travelers to avoid N+1 queries
+def plain_labor_rows(db: Session, labor_entries: list) -> list:
+    """LaborEntryResponse-shaped rows as JSON-ready dicts. Employees,
+    travelers and pauses are batch-fetched (three queries for any page), and
+    no model is built per row — for pages of hundreds of entries that
+    construction was most of the response time."""
     employee_ids = list(set(e.employee_id for e in labor_entries if e.employee_id))
     traveler_ids = list(set(e.traveler_id for e in labor_entries if e.traveler_id))
-
     employees = {u.id: u for u in db.query(User).filter(User.id.in_(employee_ids)).all()} if employee_ids else {}
     travelers = {t.id: t for t in db.query(Traveler).filter(Traveler.id.in_(traveler_ids)).all()} if traveler_ids else {}
+    pause_map = get_pause_data_batch(db, [e.id for e in labor_entries], plain=True)
 
-    result = []
+    rows = []
     for entry in labor_entries:
         employee = employees.get(entry.employee_id)
         traveler = travelers.get(entry.traveler_id)
-
-        entry_dict = {
+        rows.append({
             "id": entry.id,
             "traveler_id": entry.traveler_id,
             "step_id": entry.step_id,
@@ -1149,26 +1172,87 @@ async def get_all_labor_entries(
             "employee_name": f"{employee.first_name} {employee.last_name}" if employee else "Unknown",
             "job_number": traveler.job_number if traveler else None,
             "job_display": rma_job_display(traveler),
-            "start_time": entry.start_time,
-            "pause_time": entry.pause_time,
-            "end_time": entry.end_time,
+            "start_time": _iso(entry.start_time),
+            "pause_time": _iso(entry.pause_time),
+            "end_time": _iso(entry.end_time),
             "hours_worked": entry.hours_worked,
             "description": entry.description,
             "is_completed": entry.is_completed,
             "work_center": entry.work_center,
+            "work_center_code": None,
             "sequence_number": entry.sequence_number,
-            "created_at": entry.created_at,
+            "qty_completed": entry.qty_completed,
+            "comment": entry.comment,
+            "created_at": _iso(entry.created_at),
             "work_order": traveler.work_order_number if traveler else None,
             "po_number": traveler.po_number if traveler else None,
             "part_number": traveler.part_number if traveler else None,
             "quantity": traveler.quantity if traveler else None,
-            "qty_completed": entry.qty_completed,
-            "comment": entry.comment,
-            **get_pause_data(db, entry.id)
-        }
-        result.append(LaborEntryResponse(**entry_dict))
+            **pause_map.get(entry.id, {"pause_logs": [], "total_pause_seconds": None, "pause_count": None})
+        })
+    return rows
 
-    return result
+
+@router.get("/", response_model=List[LaborEntryResponse])
+@router.get("", response_model=List[LaborEntryResponse], include_in_schema=False)
+async def get_all_labor_entries(
+    employee_id: Optional[int] = None,
+    traveler_id: Optional[int] = None,
+    work_center: Optional[str] = None,
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+    cursor: Optional[str] = None,
+    limit: Optional[int] = Query(None, ge=1, le=LABOR_PAGE_MAX),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Get labor entries, newest first.
+
+    Filters run in SQL: employee_id, traveler_id, work_center (exact, case-
+    and space-insensitive) and start_date/end_date (YYYY-MM-DD, inclusive UTC
+    start days).
+
+    Pass cursor= (empty) and optionally limit= (default LABOR_PAGE_SIZE) to
+    page by keyset: follow the X-Next-Cursor response header until it is
+    absent. Without cursor or limit every matching entry is returned, as
+    before."""
+    from sqlalchemy import func as sql_func
+    from services.labor_rollups import day_start
+
+    try:
+        first_day = datetime.strptime(start_date, "%Y-%m-%d").date() if start_date else None
+        last_day = datetime.strptime(end_date, "%Y-%m-%d").date() if end_date else None
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Dates must be YYYY-MM-DD")
+
+    query = db.query(LaborEntry)
+    if employee_id is not None:
+        query = query.filter(LaborEntry.employee_id == employee_id)
+    if traveler_id is not None:
+        query = query.filter(LaborEntry.traveler_id == traveler_id)
+    if work_center and work_center.strip():
+        query = query.filter(sql_func.upper(sql_func.trim(LaborEntry.work_center)) == work_center.strip().upper())
+    if first_day:
+        query = query.filter(LaborEntry.start_time >= day_start(first_day))
+    if last_day:
+        query = query.filter(LaborEntry.start_time < day_start(last_day + timedelta(days=1)))
+    query = query.order_by(LaborEntry.created_at.desc(), LaborEntry.id.desc())
+
+    headers = {}
+    if cursor is not None or limit is not None:
+        page_size = limit or LABOR_PAGE_SIZE
+        if cursor:
+            try:
+                query = after_cursor(query, LaborEntry, cursor)
+            except ValueError as e:
+                raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+        labor_entries = query.limit(page_size).all()
+        if len(labor_entries) == page_size:
+            headers["X-Next-Cursor"] = encode_cursor(labor_entries[-1].created_at, labor_entries[-1].id)
+    else:
+        labor_entries = query.all()
+
+    return JSONResponse(plain_labor_rows(db, labor_entries), headers=headers)
 
 @router.get("/traveler/{traveler_id}", response_model=List[LaborEntryResponse])
 async def get_traveler_labor_entries(
@@ -1218,14 +1302,73 @@ async def get_traveler_labor_entries(
     return result
 
 
+def labor_entry_dicts(db: Session, labor_entries: list) -> list:
+    """/labor/init rows for these entries: employee, traveler and pause data
+    batch-fetched in three queries however many entries there are."""
+    employee_ids = list(set(e.employee_id for e in labor_entries if e.employee_id))
+    traveler_ids = list(set(e.traveler_id for e in labor_entries if e.traveler_id))
+    entry_ids = [e.id for e in labor_entries]
+    employees = {u.id: u for u in db.query(User).filter(User.id.in_(employee_ids)).all()} if employee_ids else {}
+    travelers = {t.id: t for t in db.query(Traveler).filter(Traveler.id.in_(traveler_ids)).all()} if traveler_ids else {}
+    pause_map = get_pause_data_batch(db, entry_ids)
+
+    entries = []
+    for entry in labor_entries:
+        emp = employees.get(entry.employee_id)
+        trav = travelers.get(entry.traveler_id)
+        entry_dict = {
+            "id": entry.id, "traveler_id": entry.traveler_id, "step_id": entry.step_id,
+            "employee_id": entry.employee_id,
+            "employee_name": f"{emp.first_name} {emp.last_name}" if emp else "Unknown",
+            "job_number": trav.job_number if trav else None,
+            "job_display": rma_job_display(trav),
+            "start_time": entry.start_time, "pause_time": entry.pause_time,
+            "end_time": entry.end_time, "hours_worked": entry.hours_worked or 0,
+            "description": entry.description or "", "is_completed": entry.is_completed,
+            "work_center": entry.work_center, "work_center_code": None,
+            "sequence_number": entry.sequence_number, "qty_completed": entry.qty_completed,
+            "comment": entry.comment, "created_at": entry.created_at,
+            "work_order": trav.work_order_number if trav else None,
+            "po_number": trav.po_number if trav else None,
+            "part_number": trav.part_number if trav else None,
+            "quantity": trav.quantity if trav else None,
+            **pause_map.get(entry.id, {"pause_logs": [], "total_pause_seconds": None, "pause_count": None})
+        }
+        entries.append(entry_dict)
+    return entries
+
+
+def sync_labor_page(db: Session, current_user: User, since: Optional[str], before: Optional[str],
+                    limit: Optional[int]) -> dict:
+    """A delta-sync page (services/labor_sync) of the caller's entries — every
+    employee's for an admin — with rows built like /labor/init's."""
+    from services.labor_sync import sync_labor_entries
+
+    employee_id = None if current_user.role == UserRole.ADMIN else current_user.id
+    try:
+        page = sync_labor_entries(db, employee_id=employee_id, since=since, before=before, limit=limit)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    page["entries"] = labor_entry_dicts(db, page["entries"])
+    return page
+
+
 @router.get("/init")
 async def get_labor_init(
     days: int = 0,
+    sync: bool = False,
+    since: Optional[str] = None,
+    before: Optional[str] = None,
+    limit: Optional[int] = Query(None, ge=1),
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
-    """Combined endpoint: returns active entry + my entries + auto-stop check in one call.
-    days=0 (default) returns all entries with no time limit."""
+    """Combined endpoint: returns active entry + my entries in one call.
+    Forgotten timers are closed by the scheduled auto-stop
+    (services/labor_auto_stop), not here — this endpoint only reads.
+    days=0 (default) returns all entries with no time limit.
+    sync=true (or a since= token) returns one delta-sync page of entries
+    instead of all of them — see services/labor_sync."""
     from sqlalchemy import func as sqlfunc
 
     # 1. Active entry
@@ -1258,80 +1401,43 @@ async def get_labor_init(
             **get_pause_data(db, active_labor.id)
         }
 
-    # 2. My entries (same logic as /my-entries) — always return all, no time limit
-    base_query = db.query(LaborEntry)
-    if current_user.role != UserRole.ADMIN:
-        base_query = base_query.filter(LaborEntry.employee_id == current_user.id)
-    labor_entries = base_query.order_by(LaborEntry.created_at.desc()).all()
-
-    employee_ids = list(set(e.employee_id for e in labor_entries if e.employee_id))
-    traveler_ids = list(set(e.traveler_id for e in labor_entries if e.traveler_id))
-    entry_ids = [e.id for e in labor_entries]
-    employees = {u.id: u for u in db.query(User).filter(User.id.in_(employee_ids)).all()} if employee_ids else {}
-    travelers = {t.id: t for t in db.query(Traveler).filter(Traveler.id.in_(traveler_ids)).all()} if traveler_ids else {}
-    pause_map = get_pause_data_batch(db, entry_ids)
-
-    entries = []
-    for entry in labor_entries:
-        emp = employees.get(entry.employee_id)
-        trav = travelers.get(entry.traveler_id)
-        entry_dict = {
-            "id": entry.id, "traveler_id": entry.traveler_id, "step_id": entry.step_id,
-            "employee_id": entry.employee_id,
-            "employee_name": f"{emp.first_name} {emp.last_name}" if emp else "Unknown",
-            "job_number": trav.job_number if trav else None,
-            "job_display": rma_job_display(trav),
-            "start_time": entry.start_time, "pause_time": entry.pause_time,
-            "end_time": entry.end_time, "hours_worked": entry.hours_worked or 0,
-            "description": entry.description or "", "is_completed": entry.is_completed,
-            "work_center": entry.work_center, "work_center_code": None,
-            "sequence_number": entry.sequence_number, "qty_completed": entry.qty_completed,
-            "comment": entry.comment, "created_at": entry.created_at,
-            "work_order": trav.work_order_number if trav else None,
-            "po_number": trav.po_number if trav else None,
-            "part_number": trav.part_number if trav else None,
-            "quantity": trav.quantity if trav else None,
-            **pause_map.get(entry.id, {"pause_logs": [], "total_pause_seconds": None, "pause_count": None})
-        }
-        entries.append(entry_dict)
-
-    # 3. Auto-stop check (5pm)
-    auto_stopped = 0
-    now = datetime.now()
-    if now.hour >= 17:
-        running = db.query(LaborEntry).filter(LaborEntry.is_completed == False, LaborEntry.end_time.is_(None)).all()
-        for le in running:
-            if le.start_time and le.start_time.replace(tzinfo=None).date() < now.date():
-                end_dt = datetime.combine(le.start_time.replace(tzinfo=None).date(), datetime.strptime("17:00", "%H:%M").time())
-                if le.start_time.tzinfo is not None:
-                    end_dt = end_dt.replace(tzinfo=le.start_time.tzinfo)
-                le.end_time = end_dt
-                le.is_completed = True
-                if le.start_time:
-                    start_naive = le.start_time.replace(tzinfo=None)
-                    end_naive = le.end_time.replace(tzinfo=None) if le.end_time else start_naive
-                    diff = (end_naive - start_naive).total_seconds()
-                    pause_secs = sum(p.duration_seconds or 0 for p in db.query(PauseLog).filter(PauseLog.labor_entry_id == le.id).all())
-                    le.hours_worked = round(max(diff - pause_secs, 0) / 3600, 2)
-                auto_stopped += 1
-        if auto_stopped > 0:
-            db.commit()
+    # 2. My entries (same logic as /my-entries) — a sync page, or all of them
+    page = None
+    if sync or since or before:
+        page = sync_labor_page(db, current_user, since, before, limit)
+        entries = page.pop("entries")
+    else:
+        base_query = db.query(LaborEntry)
+        if current_user.role != UserRole.ADMIN:
+            base_query = base_query.filter(LaborEntry.employee_id == current_user.id)
+        labor_entries = base_query.order_by(LaborEntry.created_at.desc()).all()
+        entries = labor_entry_dicts(db, labor_entries)
 
     return {
         "active_entry": active_entry,
         "entries": entries,
-        "auto_stopped": auto_stopped,
+        **(page or {}),
     }
 
 
 @router.get("/my-entries", response_model=List[LaborEntryResponse])
+@versioned_etag("labor_entries", "pause_logs", "travelers", "users")
 async def get_my_labor_entries(
     days: int = 0,
+    sync: bool = False,
+    since: Optional[str] = None,
+    before: Optional[str] = None,
+    limit: Optional[int] = Query(None, ge=1),
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
     """Get labor entries - for ADMIN shows all entries, for others shows only their entries.
-    days=0 (default) returns all entries with no time limit."""
+    days=0 (default) returns all entries with no time limit.
+    sync=true (or a since= token) returns a delta-sync page instead of a list:
+    {entries, deleted_ids, sync_token, has_more, older_cursor, full} — see
+    services/labor_sync."""
+    if sync or since or before:
+        return JSONResponse(jsonable_encoder(sync_labor_page(db, current_user, since, before, limit)))
 
     # Admin can see all entries, others see only their own. Always all-time, no limit.
     base_query = db.query(LaborEntry)
@@ -1443,8 +1549,9 @@ async def auto_stop_entries_at_5pm(
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
-    """Auto-stop all active labor entries at 5pm (17:00)
-    This can be called by a scheduled task or manually by admin"""
+    """Run the end-of-shift auto-stop now (services/labor_auto_stop). It also
+    runs on a schedule; this is for an admin who doesn't want to wait."""
+    from services.labor_auto_stop import auto_stop_labor
 
     # Only admin can trigger this
     if current_user.role != UserRole.ADMIN:
@@ -1453,34 +1560,12 @@ async def auto_stop_entries_at_5pm(
             detail="Only administrators can trigger auto-stop"
         )
 
-    # Get all active (uncompleted) entries
-    active_entries = db.query(LaborEntry).filter(
-        (LaborEntry.end_time.is_(None)) &
-        (LaborEntry.is_completed == False)
-    ).all()
-
-    # Set end time to 5pm (17:00) of today
-    today = datetime.now().date()
-    end_time_5pm = datetime.combine(today, datetime.strptime("17:00:00", "%H:%M:%S").time())
-
-    completed_count = 0
-    for entry in active_entries:
-        # Only auto-stop if entry started before 5pm
-        if entry.start_time < end_time_5pm:
-            entry.end_time = end_time_5pm
-            entry.is_completed = True
-            # Calculate hours worked
-            time_diff = end_time_5pm - entry.start_time
-            entry.hours_worked = round(time_diff.total_seconds() / 3600, 2)
-            update_step_and_traveler_progress(db, entry)
-            completed_count += 1
-
-    db.commit()
-
+    result = auto_stop_labor(db)
+    if "skipped" in result:
+        return {"message": "Auto-stop is already running", "completed_count": 0}
     return {
-        "message": f"Auto-stopped {completed_count} active entries at 5pm",
-        "completed_count": completed_count,
-        "end_time": end_time_5pm.isoformat()
+        "message": f"Auto-stopped {result['completed_count']} active entries at the shift cutoff",
+        **result,
     }
 
 @router.get("/check-auto-stop")
@@ -1488,47 +1573,26 @@ async def check_and_auto_stop(
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
-    """Check if it's past 5pm and auto-stop any active entries from today
-    This should be called when page loads to ensure entries are auto-stopped"""
-
-    now = datetime.now()
-    today = now.date()
-    five_pm = datetime.combine(today, datetime.strptime("17:00:00", "%H:%M:%S").time())
-
-    # Only process if current time is past 5pm
-    if now < five_pm:
-        return {
-            "message": "Not yet 5pm, no auto-stop performed",
-            "current_time": now.isoformat(),
-            "cutoff_time": five_pm.isoformat(),
-            "completed_count": 0
-        }
-
-    # Get all active entries that started today (or earlier) and before 5pm
-    active_entries = db.query(LaborEntry).filter(
-        (LaborEntry.end_time.is_(None)) &
-        (LaborEntry.is_completed == False) &
-        (LaborEntry.start_time < five_pm)
+    """How many running timers are past the shift cutoff and waiting for the
+    scheduled auto-stop. Read-only: the stopping itself happens in
+    services/labor_auto_stop."""
+    from services.labor_auto_stop import cutoff_for, latest_cutoff, started_before
+
+    now = datetime.now(timezone.utc)
+    cutoff = latest_cutoff(now)
+    open_starts = db.query(LaborEntry.start_time).filter(
+        LaborEntry.end_time.is_(None),
+        LaborEntry.is_completed == False,
+        LaborEntry.start_time < started_before(now),
     ).all()
-
-    completed_count = 0
-    for entry in active_entries:
-        entry.end_time = five_pm
-        entry.is_completed = True
-        # Calculate hours worked
-        time_diff = five_pm - entry.start_time
-        entry.hours_worked = round(time_diff.total_seconds() / 3600, 2)
-        update_step_and_traveler_progress(db, entry)
-        completed_count += 1
-
-    if completed_count > 0:
-        db.commit()
+    pending = sum(1 for (start,) in open_starts if start and cutoff_for(start) <= now)
 
     return {
-        "message": f"Auto-stopped {completed_count} entries at 5pm cutoff",
+        "message": f"{pending} entries past the shift cutoff are waiting for auto-stop",
         "current_time": now.isoformat(),
-        "cutoff_time": five_pm.isoformat(),
-        "completed_count": completed_count
+        "cutoff_time": cutoff.isoformat(),
+        "completed_count": 0,
+        "pending_count": pending,
     }
 
 @router.get("/summary")
@@ -1537,26 +1601,40 @@ async def get_labor_summary(
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
-    """Get labor summary statistics"""
-
-    start_date = datetime.now() - timedelta(days=days)
-
-    # Get labor entries for the period
-    labor_entries = db.query(LaborEntry).filter(
-        LaborEntry.created_at >= start_date
-    )
+    """Get labor summary statistics.
+
+    Closed labor is summed from the daily rollups (services/labor_rollups.py)
+    for the last `days` whole UTC days, today included; open timers are
+    counted live."""
+    from sqlalchemy import func, case
+    from services.labor_rollups import day_start
+
+    start_day = (datetime.now(timezone.utc) - timedelta(days=days)).date()
+
+    closed = db.query(
+        func.coalesce(func.sum(LaborDailyRollup.hours), 0),
+        func.coalesce(func.sum(LaborDailyRollup.entries), 0),
+        func.coalesce(func.sum(LaborDailyRollup.completed_entries), 0),
+    ).filter(LaborDailyRollup.day >= start_day)
+    open_entries = db.query(
+        func.coalesce(func.sum(LaborEntry.hours_worked), 0),
+        func.count(LaborEntry.id),
+        func.coalesce(func.sum(case((LaborEntry.is_completed == True, 1), else_=0)), 0),
+    ).filter(LaborEntry.end_time.is_(None), LaborEntry.start_time >= day_start(start_day))
 
     # For non-admin users, filter to their own entries
     if current_user.role != UserRole.ADMIN:
-        labor_entries = labor_entries.filter(LaborEntry.employee_id == current_user.id)
+        closed = closed.filter(LaborDailyRollup.employee_id == current_user.id)
+        open_entries = open_entries.filter(LaborEntry.employee_id == current_user.id)
 
-    labor_entries = labor_entries.all()
+    closed_hours, closed_count, closed_completed = closed.one()
+    open_hours, open_count, open_completed = open_entries.one()
 
     # Calculate statistics
-    total_hours = sum(entry.hours_worked for entry in labor_entries)
-    total_entries = len(labor_entries)
-    completed_entries = len([entry for entry in labor_entries if entry.is_completed])
-    active_entries = len([entry for entry in labor_entries if not entry.is_completed and entry.end_time is None])
+    total_hours = float(closed_hours) + float(open_hours)
+    total_entries = int(closed_count) + int(open_count)
+    completed_entries = int(closed_completed) + int(open_completed)
+    active_entries = int(open_count) - int(open_completed)
 
     return {
         "period_days": days,
@@ -1570,110 +1648,30 @@ async def get_labor_summary(
 @router.get("/hours-summary")
 async def get_labor_hours_summary(
     days: int = 30,
+    format: str = Query("json", pattern="^(json|csv)$"),
+    granularity: str = Query("day", pattern="^(day|week|month)$"),
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
-    """Get labor hours summary report with weekly and monthly breakdowns per employee"""
+    """Get labor hours summary report with weekly and monthly breakdowns per employee.
 
-    from collections import defaultdict
-    from datetime import date
+    Summed in SQL per employee per day (services/labor_hours_summary.py).
+    format=csv streams one line per employee per `granularity` bucket
+    instead, for payroll."""
+    from services.labor_hours_summary import build_hours_summary, daily_hours, hours_csv
 
     start_date = datetime.now() - timedelta(days=days)
+    rows = daily_hours(db, start_date)
+
+    if format == "csv":
+        filename = f"labor-hours-{granularity}-{datetime.now().strftime('%Y%m%d')}.csv"
+        return StreamingResponse(
+            hours_csv(rows, granularity),
+            media_type="text/csv",
+            headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+        )
 
-    # Get labor entries for the period (completed only)
-    labor_entries = db.query(LaborEntry).filter(
-        (LaborEntry.created_at >= start_date) &
-        (LaborEntry.is_completed == True) &
-        (LaborEntry.end_time.isnot(None))
-    ).all()
-
-    # Group entries by employee
-    employee_data = defaultdict(lambda: {
-        "employee_id": None,
-        "employee_name": "",
-        "weekly_hours": defaultdict(float),
-        "monthly_hours": defaultdict(float),
-        "daily_hours": defaultdict(float),
-        "total_hours": 0
-    })
-
-    for entry in labor_entries:
-        # Get employee info
-        employee = db.query(User).filter(User.id == entry.employee_id).first()
-        if not employee:
-            continue
-
-        employee_key = entry.employee_id
-        employee_name = f"{employee.first_name} {employee.last_name}"
-
-        if employee_data[employee_key]["employee_id"] is None:
-            employee_data[employee_key]["employee_id"] = entry.employee_id
-            employee_data[employee_key]["employee_name"] = employee_name
-
-        # Parse start time to get week and month
-        entry_date = entry.start_time.date() if isinstance(entry.start_time, datetime) else entry.start_time
-
-        # Calculate week start (Monday)
-        week_start = entry_date - timedelta(days=entry_date.weekday())
-        week_key = week_start.strftime("%Y-%m-%d")  # Week starting Monday
-
-        # Calculate month
-        month_key = entry_date.strftime("%Y-%m")  # YYYY-MM format
-
-        # Calculate day
-        day_key = entry_date.strftime("%Y-%m-%d")
-
-        # Add hours to respective buckets
-        hours = entry.hours_worked or 0
-        employee_data[employee_key]["weekly_hours"][week_key] += hours
-        employee_data[employee_key]["monthly_hours"][month_key] += hours
-        employee_data[employee_key]["daily_hours"][day_key] += hours
-        employee_data[employee_key]["total_hours"] += hours
-
-    # Format response
-    summary = []
-    for emp_id, data in employee_data.items():
-        # Convert weekly hours to list format
-        weekly_breakdown = [
-            {
-                "week_start": week,
-                "week_end": (datetime.strptime(week, "%Y-%m-%d") + timedelta(days=6)).strftime("%Y-%m-%d"),
-                "hours": round(hours, 2)
-            }
-            for week, hours in sorted(data["weekly_hours"].items())
-        ]
-
-        # Convert monthly hours to list format
-        monthly_breakdown = [
-            {
-                "month": month,
-                "month_name": datetime.strptime(month + "-01", "%Y-%m-%d").strftime("%B %Y"),
-                "hours": round(hours, 2)
-            }
-            for month, hours in sorted(data["monthly_hours"].items())
-        ]
-
-        # Convert daily hours to list format
-        daily_breakdown = [
-            {
-                "date": day,
-                "hours": round(hours, 2)
-            }
-            for day, hours in sorted(data["daily_hours"].items())
-        ]
-
-        summary.append({
-            "employee_id": data["employee_id"],
-            "employee_name": data["employee_name"],
-            "total_hours": round(data["total_hours"], 2),
-            "weekly_breakdown": weekly_breakdown,
-            "monthly_breakdown": monthly_breakdown,
-            "daily_breakdown": daily_breakdown
-        })
-
-    # Sort by employee name
-    summary.sort(key=lambda x: x["employee_name"])
-
+    summary = build_hours_summary(rows)
     return {
         "period_days": days,
         "employees": summary,
@@ -1687,11 +1685,17 @@ async def get_labor_by_category(
     work_order: Optional[str] = None,
     start_date: Optional[str] = None,
     end_date: Optional[str] = None,
+    summary: bool = False,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
-    """Get labor entries grouped by work center category (e.g. SMT hrs. Actual, HAND hrs. Actual)"""
+    """Get labor entries grouped by work center category (e.g. SMT hrs. Actual, HAND hrs. Actual).
+
+    Filters run in SQL. With summary=true, returns hours per category summed
+    from the daily labor rollups instead of one row per entry (closed labor
+    only; dates are UTC start days)."""
     from sqlalchemy import func as sql_func
+    from services.labor_rollups import day_start
 
     # Build a lookup of work center name -> category
     work_centers = db.query(WorkCenter).all()
@@ -1700,8 +1704,56 @@ async def get_labor_by_category(
         if wc.name and wc.category:
             wc_category_map[wc.name.upper().strip()] = wc.category
 
-    # Get all labor entries
-    query = db.query(LaborEntry)
+    # Strip search terms before comparing — inputs arrive with stray
+    # leading/trailing spaces (e.g. " 24133-50" from a copy-paste or QR scan),
+    # and comparing the un-stripped value against the clean stored value
+    # matched nothing, emptying the whole report.
+    job_term = (job_number or '').strip().lower()
+    wo_term = (work_order or '').strip().lower()
+    category_names = None
+    if category and category.strip():
+        category_names = [name for name, cat in wc_category_map.items() if cat.lower() == category.strip().lower()]
+    try:
+        first_day = datetime.strptime(start_date, "%Y-%m-%d").date() if start_date else None
+        last_day = datetime.strptime(end_date, "%Y-%m-%d").date() if end_date else None
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Dates must be YYYY-MM-DD")
+
+    def traveler_filters(query, source):
+        if job_term or wo_term:
+            query = query.join(Traveler, Traveler.id == source.traveler_id)
+        if job_term:
+            query = query.filter(sql_func.lower(sql_func.coalesce(Traveler.job_number, '')).contains(job_term, autoescape=True))
+        if wo_term:
+            query = query.filter(sql_func.lower(sql_func.coalesce(Traveler.work_order_number, '')).contains(wo_term, autoescape=True))
+        if category_names is not None:
+            query = query.filter(sql_func.upper(sql_func.trim(source.work_center)).in_(category_names))
+        return query
+
+    if summary:
+        query = traveler_filters(db.query(
+            LaborDailyRollup.work_center,
+            sql_func.sum(LaborDailyRollup.hours),
+            sql_func.sum(LaborDailyRollup.entries),
+        ), LaborDailyRollup)
+        if first_day:
+            query = query.filter(LaborDailyRollup.day >= first_day)
+        if last_day:
+            query = query.filter(LaborDailyRollup.day <= last_day)
+        totals = {}
+        for wc_name, hours, entries in query.group_by(LaborDailyRollup.work_center):
+            cat = wc_category_map.get((wc_name or '').upper().strip(), "Uncategorized")
+            bucket = totals.setdefault(cat, {"category": cat, "hours_worked": 0.0, "entries": 0})
+            bucket["hours_worked"] += float(hours or 0)
+            bucket["entries"] += int(entries or 0)
+        return sorted(({**t, "hours_worked": round(t["hours_worked"], 2)} for t in totals.values()),
+                      key=lambda t: t["category"])
+
+    query = traveler_filters(db.query(LaborEntry), LaborEntry)
+    if first_day:
+        query = query.filter(LaborEntry.start_time >= day_start(first_day))
+    if last_day:
+        query = query.filter(LaborEntry.start_time < day_start(last_day + timedelta(days=1)))
     labor_entries = query.order_by(LaborEntry.created_at.desc()).all()
 
     # Batch-fetch related data
@@ -1719,37 +1771,6 @@ async def get_labor_by_category(
         wc_name = (entry.work_center or '').upper().strip()
         entry_category = wc_category_map.get(wc_name, None)
 
-        # Filter by category if specified
-        if category and category.strip():
-            if not entry_category or entry_category.lower() != category.lower():
-                continue
-
-        # Filter by job number. Strip the search term before comparing — inputs
-        # arrive with stray leading/trailing spaces (e.g. " 24133-50" from a
-        # copy-paste or QR scan), and comparing the un-stripped value against the
-        # clean stored value matched nothing, emptying the whole report.
-        if job_number and job_number.strip():
-            job = (traveler.job_number if traveler else '') or ''
-            if job_number.strip().lower() not in job.lower():
-                continue
-
-        # Filter by work order (same strip — a leading space here was the actual
-        # cause of "No labor entries found" on jobs that clearly had labor).
-        if work_order and work_order.strip():
-            wo = (traveler.work_order_number if traveler else '') or ''
-            if work_order.strip().lower() not in wo.lower():
-                continue
-
-        # Filter by date range
-        if start_date and entry.start_time:
-            entry_date = entry.start_time.strftime('%Y-%m-%d')
-            if entry_date < start_date:
-                continue
-        if end_date and entry.start_time:
-            entry_date = entry.start_time.strftime('%Y-%m-%d')
-            if entry_date > end_date:
-                continue
-
         results.append({
             "id": entry.id,
             "traveler_id": entry.traveler_id,
@@ -6,12 +6,13 @@ Provides search functionality across travelers, users, work orders, and labor en
 import re
 from fastapi import APIRouter, Depends, Query
 from sqlalchemy.orm import Session
-from sqlalchemy import or_, and_, not_, func, distinct
+from sqlalchemy import or_, and_, func, distinct
 from typing import List, Optional
 from database import get_db
 from models import Traveler, User, WorkOrder, LaborEntry, ProcessStep, WorkCenter, UserRole
 from routers.auth import get_current_user
 from utils.job_display import rma_job_display
+from utils.itar import itar_visible
 
 router = APIRouter(tags=["Search"])
 
@@ -44,10 +45,7 @@ async def global_search(
     )
 
     # ITAR filtering for non-privileged users
-    is_admin = current_user.role.value == 'ADMIN' if hasattr(current_user.role, 'value') else current_user.role == 'ADMIN'
-    has_itar_access = getattr(current_user, 'is_itar', False)
-    if not is_admin and not has_itar_access:
-        traveler_query = traveler_query.filter(not_(Traveler.job_number.op('~')(r'[0-9]M[L[:space:]]|[0-9]M$|[0-9]ML$')))
+    traveler_query = itar_visible(traveler_query, current_user)
 
     travelers = traveler_query.limit(limit).all()
 
@@ -322,49 +322,3 @@ async def get_active_entry(
     ).first()
 
     return active_entry
-
-@router.get("/check-auto-stop")
-async def check_and_auto_stop(
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
-):
-    """Check if it's past 5pm and auto-stop any active entries
-    This should be called when page loads to ensure entries are auto-stopped"""
-
-    now = datetime.now()
-    today = now.date()
-    five_pm = datetime.combine(today, datetime.strptime("17:00:00", "%H:%M:%S").time())
-
-    # Only process if current time is past 5pm
-    if now < five_pm:
-        return {
-            "message": "Not yet 5pm, no auto-stop performed",
-            "current_time": now.isoformat(),
-            "cutoff_time": five_pm.isoformat(),
-            "completed_count": 0
-        }
-
-    # Get all active entries that started before 5pm
-    active_entries = db.query(TravelerTimeEntry).filter(
-        (TravelerTimeEntry.end_time.is_(None)) &
-        (TravelerTimeEntry.is_completed == False) &
-        (TravelerTimeEntry.start_time < five_pm)
-    ).all()
-
-    completed_count = 0
-    for entry in active_entries:
-        entry.end_time = five_pm
-        entry.is_completed = True
-        time_diff = five_pm - entry.start_time
-        entry.hours_worked = round(time_diff.total_seconds() / 3600, 2)
-        completed_count += 1
-
-    if completed_count > 0:
-        db.commit()
-
-    return {
-        "message": f"Auto-stopped {completed_count} entries at 5pm cutoff",
-        "current_time": now.isoformat(),
-        "cutoff_time": five_pm.isoformat(),
-        "completed_count": completed_count
-    }
@@ -1,4 +1,4 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Request
+from fastapi import APIRouter, Depends, HTTPException, status, Request, Response
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from sqlalchemy.orm import Session
 from sqlalchemy import or_, func
@@ -7,10 +7,11 @@ from typing import List, Optional
 import json
 import logging
 import re
+import time
 from datetime import datetime
 
 from database import get_db
-from models import User, Traveler, ProcessStep, SubStep, ManualStep, AuditLog, WorkOrder, WorkCenter, TravelerTrackingLog, NotificationType, TravelerStatus, LaborEntry, UserRole, RmaUnitTracking, TravelerGroup
+from models import User, Traveler, ProcessStep, SubStep, ManualStep, AuditLog, WorkOrder, WorkCenter, TravelerTrackingLog, NotificationType, TravelerStatus, LaborEntry, UserRole, RmaUnitTracking, TravelerGroup, WorkOrderReservation
 from schemas.traveler_schemas import (
     TravelerCreate, Traveler as TravelerSchema, TravelerUpdate,
     TravelerList, ProcessStepCreate, ManualStepCreate,
@@ -20,6 +21,15 @@ from schemas.tracking_schemas import TrackingScanRequest, TrackingScanResponse,
 from routers.auth import get_current_user
 from services.email_service import send_approval_notification
 from services.notification_service import create_notification_for_admins
+from utils.job_numbers import base_job_number, is_itar_job_number
+from utils.itar import itar_visible, is_itar_traveler, can_view_itar
+from utils.pagination import after_cursor, encode_cursor
+from services.traveler_progress import load_progress
+from services.table_versions import versioned_etag
+from services.work_order_numbers import (
+    next_work_order_prefix, allocate_work_order_prefix, reserve_work_order_prefix,
+    claim_work_order_prefix, release_work_order_prefix,
+)
 
 logger = logging.getLogger(__name__)
 
@@ -298,35 +308,37 @@ MANUFACTURING_STEPS["MODIFICATION"] = [
 
 @router.get("/next-work-order-number")
 async def get_next_work_order_number(db: Session = Depends(get_db)):
-    """Get the next sequential work order number (5-digit prefix).
-    Only counts non-DRAFT travelers so that deleted drafts' work orders can be reused."""
-    import re
-
-    # Query work order numbers from non-DRAFT travelers only
-    # This means drafts don't "consume" work order numbers permanently
-    # If a draft is deleted, its work order becomes available again
-    travelers = db.query(Traveler.work_order_number).filter(
-        Traveler.work_order_number.isnot(None),
-        Traveler.work_order_number != '',
-        Traveler.status != 'DRAFT'  # Exclude drafts from the count
-    ).all()
-
-    max_prefix = 26014  # Starting number if no existing travelers
+    """Preview the next sequential work order number (5-digit prefix). Read from
+    the work-order counter; nothing is consumed, so two open forms can show the
+    same number — use POST /work-order-numbers/reserve to hold one."""
+    return {"next_work_order_prefix": next_work_order_prefix(db)}
 
-    for (work_order,) in travelers:
-        if work_order:
-            # Extract the numeric prefix before any dash
-            # Format: "26015-1" -> extract "26015"
-            # Format: "26015" -> extract "26015"
-            match = re.match(r'^(\d{5})', str(work_order))
-            if match:
-                prefix_num = int(match.group(1))
-                if prefix_num > max_prefix:
-                    max_prefix = prefix_num
+@router.post("/work-order-numbers/reserve")
+async def reserve_work_order_number(
+    current_user: User = Depends(get_user_or_system),
+    db: Session = Depends(get_db)
+):
+    """Allocate the next work order prefix and hold it for this user's traveler
+    form. Creating a traveler with it claims it; DELETE gives it back."""
+    reservation = reserve_work_order_prefix(db, current_user.id)
+    db.commit()
+    return {"next_work_order_prefix": reservation.prefix, "expires_at": reservation.expires_at}
 
-    next_number = max_prefix + 1
-    # Ensure it's 5 digits with leading zeros if needed
-    return {"next_work_order_prefix": str(next_number).zfill(5)}
+@router.delete("/work-order-numbers/{prefix}")
+async def release_work_order_number(
+    prefix: str,
+    current_user: User = Depends(get_user_or_system),
+    db: Session = Depends(get_db)
+):
+    """Release an unclaimed reservation (the form was closed without saving).
+    Only the user who reserved it, or an admin, may give it back."""
+    reservation = db.get(WorkOrderReservation, prefix)
+    is_admin = current_user.role.value == 'ADMIN' if hasattr(current_user.role, 'value') else current_user.role == 'ADMIN'
+    if reservation is not None and reservation.reserved_by != current_user.id and not is_admin:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="This work order number is reserved by another user")
+    released = release_work_order_prefix(db, prefix)
+    db.commit()
+    return {"prefix": prefix, "released": released}
 
 @router.get("/manufacturing-steps/{traveler_type}")
 async def get_manufacturing_steps(traveler_type: str):
@@ -496,6 +508,8 @@ async def create_traveler(
         db.add(db_traveler)
         db.flush()
         db.refresh(db_traveler)
+        # The work order the form reserved now belongs to this traveler.
+        claim_work_order_prefix(db, db_traveler.work_order_number, db_traveler.id)
 
         # Create process steps
         for step_data in traveler_data.process_steps:
@@ -608,131 +622,107 @@ async def create_traveler(
             detail=f"Error creating traveler: {str(e)}"
         )
 
+# Approximate traveler totals for the list's X-Total-Count, per ITAR visibility.
+# A COUNT over the whole table on every page was most of a deep page's cost; the
+# total only drives "N travelers" in the UI, so it is recounted at most every
+# _TOTAL_TTL seconds and only when a client asks for it.
+_total_cache: dict = {}
+_TOTAL_TTL = 60  # seconds
+
+
+def _cached_traveler_total(db: Session, current_user: User) -> int:
+    key = "all" if can_view_itar(current_user) else "non_itar"
+    cached = _total_cache.get(key)
+    if cached and time.time() - cached[0] < _TOTAL_TTL:
+        return cached[1]
+    total = itar_visible(db.query(func.count(Traveler.id)), current_user).scalar() or 0
+    _total_cache[key] = (time.time(), total)
+    return total
+
+
 @router.get("")
+@versioned_etag("travelers", "traveler_progress", "traveler_department_progress")
 async def get_travelers(
+    response: Response,
     skip: int = 0,
     limit: int = 50,
+    cursor: Optional[str] = None,
+    include_total: bool = False,
     current_user: User = Depends(get_user_or_system),
     db: Session = Depends(get_db)
 ):
-    """Get list of travelers with server-side pagination. Optimized: single bulk query for steps, labor, departments."""
-    from sqlalchemy.orm import joinedload
-    from sqlalchemy import func as sqlfunc, not_
+    """Get list of travelers, newest first, with server-side pagination. Progress comes from the stored per-traveler counters.
 
-    query = db.query(Traveler).options(joinedload(Traveler.process_steps))
+    Two paging modes, same response body:
+    - skip/limit (offset) — the original mode, kept for existing clients.
+    - cursor (keyset) — pass cursor= (empty) for the first page, then the
+      X-Next-Cursor response header of each page until it is absent. Each
+      page is an index range scan however deep it is, and rows created while
+      paging do not shift later pages. skip is ignored in this mode.
 
-    is_admin = current_user.role.value == 'ADMIN' if hasattr(current_user.role, 'value') else current_user.role == 'ADMIN'
-    has_itar_access = getattr(current_user, 'is_itar', False)
-
-    if not is_admin and not has_itar_access:
-        query = query.filter(not_(Traveler.job_number.op('~')(r'[0-9]M[L[:space:]]|[0-9]M$|[0-9]ML$')))
-
-    # Get total count first (for pagination)
-    total_count = query.count()
-
-    travelers = query.order_by(Traveler.created_at.desc()).offset(skip).limit(limit).all()
+    include_total=true adds X-Total-Count, an approximate total cached for up
+    to a minute.
+    """
+    query = itar_visible(db.query(Traveler), current_user)
+    query = query.order_by(Traveler.created_at.desc(), Traveler.id.desc())
+
+    if include_total:
+        response.headers["X-Total-Count"] = str(_cached_traveler_total(db, current_user))
+
+    if cursor is not None:
+        if cursor:
+            try:
+                query = after_cursor(query, Traveler, cursor)
+            except ValueError as e:
+                raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+        travelers = query.limit(limit).all()
+        if travelers and len(travelers) == limit:
+            response.headers["X-Next-Cursor"] = encode_cursor(travelers[-1].created_at, travelers[-1].id)
+    else:
+        travelers = query.offset(skip).limit(limit).all()
     if not travelers:
         return []
 
-    traveler_ids = [t.id for t in travelers]
-
-    # Bulk: work center -> department map (single query, cached)
-    wc_dept_map = {wc.code: wc.department or 'Other' for wc in db.query(WorkCenter.code, WorkCenter.department).all()}
-
-    # Per-traveler steps that count toward progress (hidden departments dropped).
-    # Built before the labor rollup because the rollup's numerator has to be
-    # scoped to the same set of steps as its denominator.
-    progress_steps_by_traveler = {
-        t.id: [s for s in (t.process_steps or [])
-               if counts_toward_progress(wc_dept_map.get(s.work_center_code, 'Other'))]
-        for t in travelers
-    }
-    progress_step_ids = [s.id for steps in progress_steps_by_traveler.values() for s in steps]
-
-    # Bulk: labor stats per traveler (single query). Hours and entry counts cover
-    # ALL labor on the job — kitting time was still worked and still belongs in
-    # the total.
-    from sqlalchemy import case, literal_column, Integer
-    labor_stats = db.query(
-        LaborEntry.traveler_id,
-        sqlfunc.sum(LaborEntry.hours_worked).label('total_hours'),
-        sqlfunc.count(LaborEntry.id).label('entry_count'),
-        sqlfunc.sum(case((LaborEntry.is_completed == False, 1), else_=0)).label('active_count'),
-    ).filter(
-        LaborEntry.traveler_id.in_(traveler_ids)
-    ).group_by(LaborEntry.traveler_id).all()
-
-    labor_map = {r.traveler_id: r for r in labor_stats}
-
-    # steps_with_labor is a progress ratio, so unlike the hour totals above it
-    # counts only steps in the progress set — otherwise a job with kitting labor
-    # reports more worked steps than it has steps, and percent exceeds 100.
-    labor_steps_map = {}
-    if progress_step_ids:
-        labor_steps_map = {
-            r.traveler_id: r.n
-            for r in db.query(
-                LaborEntry.traveler_id,
-                sqlfunc.count(sqlfunc.distinct(LaborEntry.step_id)).label('n'),
-            ).filter(
-                LaborEntry.traveler_id.in_(traveler_ids),
-                LaborEntry.step_id.in_(progress_step_ids),
-            ).group_by(LaborEntry.traveler_id).all()
-        }
+    # Step, department and labor counts come from the maintained counters
+    # (services/traveler_progress.py), not from loading every step and labor
+    # entry of the page.
+    progress, departments = load_progress(db, [t.id for t in travelers])
 
-    # Build results
     results = []
     for t in travelers:
         data = {c.name: getattr(t, c.name) for c in t.__table__.columns}
-        all_steps = t.process_steps if t.process_steps else []
+        p = progress[t.id]
         # Steps in a hidden department (Receiving) stay on the traveler but are
         # left out of the progress math so they can't dilute the percentage.
-        steps = progress_steps_by_traveler.get(t.id, [])
-        total = len(steps)
-        completed = sum(1 for s in steps if s.is_completed)
-        shown_completed, shown_total = displayed_step_counts(t.status, completed, total)
+        total = p.total_steps
+        shown_completed, shown_total = displayed_step_counts(t.status, p.completed_steps, total)
         data['total_steps'] = shown_total
         data['completed_steps'] = shown_completed
-        data['percent_complete'] = step_percent_complete(t.status, completed, total)
-
-        # Department progress (computed from already-loaded steps — no extra queries)
-        dept_progress = {}
-        for step in all_steps:
-            dept = wc_dept_map.get(step.work_center_code, 'Other')
-            for d in visible_departments(dept):
-                if d not in dept_progress:
-                    dept_progress[d] = {'total': 0, 'completed': 0}
-                dept_progress[d]['total'] += 1
-                if step.is_completed:
-                    dept_progress[d]['completed'] += 1
+        data['percent_complete'] = step_percent_complete(t.status, p.completed_steps, total)
 
         # Resolved through the same helpers as the detail view's department
         # progress: a COMPLETED traveler reads N/N and 100% per department. Doing
         # the raw math here instead left a shipped job showing 100% overall on the
         # card while its own department chips underneath read 0%.
         data['department_progress'] = [
-            {'department': dept,
-             'completed_steps': displayed_step_counts(t.status, d['completed'], d['total'])[0],
-             'total_steps': displayed_step_counts(t.status, d['completed'], d['total'])[1],
-             'percent_complete': step_percent_complete(t.status, d['completed'], d['total'])}
-            for dept, d in dept_progress.items()
+            {'department': d.department,
+             'completed_steps': displayed_step_counts(t.status, d.completed_steps, d.total_steps)[0],
+             'total_steps': displayed_step_counts(t.status, d.completed_steps, d.total_steps)[1],
+             'percent_complete': step_percent_complete(t.status, d.completed_steps, d.total_steps)}
+            for d in departments.get(t.id, [])
         ]
 
-        # Labor progress (from bulk query)
-        ls = labor_map.get(t.id)
-        if ls:
-            total_hours = round(float(ls.total_hours or 0), 2)
-            steps_with_labor = labor_steps_map.get(t.id, 0)
-            data['labor_progress'] = {
-                'total_hours': total_hours,
-                'entries_count': ls.entry_count or 0,
-                'active_entries': ls.active_count or 0,
-                'steps_with_labor': steps_with_labor,
-                'total_steps': total,
-                'percent': round(steps_with_labor / total * 100, 1) if total > 0 else 0.0,
-            }
-        else:
-            data['labor_progress'] = {'total_hours': 0, 'entries_count': 0, 'active_entries': 0, 'steps_with_labor': 0, 'total_steps': total, 'percent': 0.0}
+        # Hours and entry counts cover ALL labor on the job — kitting time was
+        # still worked. steps_with_labor is a progress ratio, so it counts only
+        # steps in the progress set; otherwise percent could exceed 100.
+        data['labor_progress'] = {
+            'total_hours': round(p.labor_hours or 0, 2),
+            'entries_count': p.labor_entries,
+            'active_entries': p.active_labor_entries,
+            'steps_with_labor': p.steps_with_labor,
+            'total_steps': total,
+            'percent': round(p.steps_with_labor / total * 100, 1) if total > 0 else 0.0,
+        }
 
         results.append(data)
 
@@ -764,7 +754,7 @@ async def get_latest_revision_traveler(
     # ITAR access check
     is_admin = current_user.role.value == 'ADMIN' if hasattr(current_user.role, 'value') else current_user.role == 'ADMIN'
     has_itar_access = getattr(current_user, 'is_itar', False)
-    is_itar_job = bool(re.search(r'[0-9]M[L\s]|[0-9]M$|[0-9]ML$', traveler.job_number))
+    is_itar_job = is_itar_traveler(traveler)
     if is_itar_job and not is_admin and not has_itar_access:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="ITAR restricted: You do not have permission to view this traveler")
 
@@ -856,7 +846,7 @@ async def get_original_by_work_order(
     # ITAR access check — mirror the other traveler lookups.
     is_admin = current_user.role.value == 'ADMIN' if hasattr(current_user.role, 'value') else current_user.role == 'ADMIN'
     has_itar_access = getattr(current_user, 'is_itar', False)
-    is_itar_job = bool(re.search(r'[0-9]M[L\s]|[0-9]M$|[0-9]ML$', traveler.job_number or ''))
+    is_itar_job = is_itar_traveler(traveler)
     if is_itar_job and not is_admin and not has_itar_access:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="ITAR restricted: You do not have permission to view this traveler")
 
@@ -1033,7 +1023,7 @@ async def get_traveler_group(
 
     members = []
     for t in sorted(group.travelers, key=lambda x: x.group_sequence or 0):
-        is_itar_job = bool(re.search(r'[0-9]M[L\s]|[0-9]M$|[0-9]ML$', t.job_number))
+        is_itar_job = is_itar_traveler(t)
         if is_itar_job and not is_admin and not has_itar_access:
             members.append({
                 "id": t.id,
@@ -1113,13 +1103,22 @@ def _find_travelers_for_lookup(db: Session, raw: str):
     upper = [c.upper() for c in candidates]
     base = db.query(Traveler).options(joinedload(Traveler.process_steps))
 
-    travelers = base.filter(
-        or_(
-            func.upper(Traveler.job_number).in_(upper),
-            func.upper(Traveler.work_order_number).in_(upper),
-            func.upper(Traveler.po_number).in_(upper),
-        )
-    ).all()
+    # Job-number hits narrow on the indexed base_job_number (a traveler whose
+    # job number equals a candidate necessarily shares its base), then the
+    # exact comparison runs on those rows.
+    bases = list({base_job_number(c) for c in upper})
+    travelers = [
+        t for t in base.filter(
+            or_(
+                Traveler.base_job_number.in_(bases),
+                func.upper(Traveler.work_order_number).in_(upper),
+                func.upper(Traveler.po_number).in_(upper),
+            )
+        ).all()
+        if (t.job_number or '').upper() in upper
+        or (t.work_order_number or '').upper() in upper
+        or (t.po_number or '').upper() in upper
+    ]
 
     match_terms = upper
     if not travelers:
@@ -1184,7 +1183,7 @@ async def get_all_work_orders_for_job(
     # ITAR access check
     is_admin = current_user.role.value == 'ADMIN' if hasattr(current_user.role, 'value') else current_user.role == 'ADMIN'
     has_itar_access = getattr(current_user, 'is_itar', False)
-    is_itar_job = bool(re.search(r'[0-9]M[L\s]|[0-9]M$|[0-9]ML$', job_number))
+    is_itar_job = is_itar_job_number(job_number)
     if is_itar_job and not is_admin and not has_itar_access:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="ITAR restricted: You do not have permission to view this traveler")
 
@@ -1261,7 +1260,7 @@ async def get_traveler_by_job_number(
     # ITAR access check
     is_admin = current_user.role.value == 'ADMIN' if hasattr(current_user.role, 'value') else current_user.role == 'ADMIN'
     has_itar_access = getattr(current_user, 'is_itar', False)
-    is_itar_job = bool(re.search(r'[0-9]M[L\s]|[0-9]M$|[0-9]ML$', job_number))
+    is_itar_job = is_itar_job_number(job_number)
     if is_itar_job and not is_admin and not has_itar_access:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="ITAR restricted: You do not have permission to view this traveler")
 
@@ -1335,12 +1334,9 @@ async def get_dashboard_summary(
     db: Session = Depends(get_db)
 ):
     """Get active travelers with progress/step data for the dashboard, filtered by due_date/ship_date range."""
-    from sqlalchemy.orm import joinedload
     from sqlalchemy import func, or_, and_
 
-    query = db.query(Traveler).options(
-        joinedload(Traveler.process_steps)
-    ).filter(
+    query = db.query(Traveler).filter(
         ~Traveler.status.in_([TravelerStatus.ARCHIVED, TravelerStatus.CANCELLED])
     )
 
@@ -1356,11 +1352,7 @@ async def get_dashboard_summary(
         )
 
     # ITAR filtering for non-privileged users
-    is_admin = current_user.role.value == 'ADMIN' if hasattr(current_user.role, 'value') else current_user.role == 'ADMIN'
-    has_itar_access = getattr(current_user, 'is_itar', False)
-    if not is_admin and not has_itar_access:
-        from sqlalchemy import not_
-        query = query.filter(not_(Traveler.job_number.op('~')(r'[0-9]M[L[:space:]]|[0-9]M$|[0-9]ML$')))
+    query = itar_visible(query, current_user)
 
     travelers = query.order_by(Traveler.created_at.desc()).all()
 
@@ -1386,66 +1378,39 @@ async def get_dashboard_summary(
         for scan in scans:
             latest_scans[scan.traveler_id] = scan.work_center
 
-    # Build work center -> department map for all work centers
-    all_work_centers = db.query(WorkCenter).all()
-    wc_dept_map = {wc.code: wc.department or 'Other' for wc in all_work_centers}
-
-    # Get labor entries for all dashboard travelers in bulk
-    dash_traveler_ids = [t.id for t in travelers]
-    dash_labor_entries = db.query(LaborEntry).filter(LaborEntry.traveler_id.in_(dash_traveler_ids)).all() if dash_traveler_ids else []
-    dash_labor_by_traveler = {}
-    for le in dash_labor_entries:
-        dash_labor_by_traveler.setdefault(le.traveler_id, []).append(le)
+    # Step, department, quantity and labor rollups from the maintained
+    # counters (services/traveler_progress.py).
+    progress, departments = load_progress(db, [t.id for t in travelers])
 
     results = []
     for t in travelers:
-        steps = sorted(t.process_steps, key=lambda s: s.step_number)
+        p = progress[t.id]
         # Progress ignores hidden-department steps (Receiving); current step and
-        # the qty rollups below still consider every step on the traveler.
-        progress_steps = [s for s in steps
-                          if counts_toward_progress(wc_dept_map.get(s.work_center_code, 'Other'))]
-        raw_total = len(progress_steps)
-        raw_completed = sum(1 for s in progress_steps if s.is_completed)
-        percent_complete = step_percent_complete(t.status, raw_completed, raw_total)
-        completed_steps, total_steps = displayed_step_counts(t.status, raw_completed, raw_total)
+        # the qty rollups still consider every step on the traveler.
+        percent_complete = step_percent_complete(t.status, p.completed_steps, p.total_steps)
+        completed_steps, total_steps = displayed_step_counts(t.status, p.completed_steps, p.total_steps)
 
         # Current step = first incomplete step
-        current_step_obj = next((s for s in steps if not s.is_completed), None)
-        current_step = current_step_obj.operation if current_step_obj else ("Complete" if total_steps > 0 else "No steps")
-        current_work_center = current_step_obj.work_center_code if current_step_obj else None
-
-        # Sum accepted/rejected across all steps
-        qty_accepted = sum(s.accepted or 0 for s in steps)
-        qty_rejected = sum(s.rejected or 0 for s in steps)
-
-        # Department progress
-        dept_progress = {}
-        for step in steps:
-            dept = wc_dept_map.get(step.work_center_code, 'Other')
-            for individual_dept in visible_departments(dept):
-                if individual_dept not in dept_progress:
-                    dept_progress[individual_dept] = {'total': 0, 'completed': 0}
-                dept_progress[individual_dept]['total'] += 1
-                if step.is_completed:
-                    dept_progress[individual_dept]['completed'] += 1
+        current_step = p.current_step or ("Complete" if total_steps > 0 else "No steps")
+        current_work_center = p.current_work_center
 
         department_progress = [
             {
-                'department': dept,
-                'total_steps': data['total'],
-                'completed_steps': data['completed'],
-                'percent_complete': round((data['completed'] / data['total']) * 100, 1) if data['total'] > 0 else 0,
+                'department': d.department,
+                'total_steps': d.total_steps,
+                'completed_steps': d.completed_steps,
+                'percent_complete': round((d.completed_steps / d.total_steps) * 100, 1) if d.total_steps > 0 else 0,
             }
-            for dept, data in dept_progress.items()
+            for d in departments.get(t.id, [])
         ]
 
-        # Labor progress
-        t_labor = dash_labor_by_traveler.get(t.id, [])
-        total_labor_hours = round(sum(le.hours_worked or 0 for le in t_labor), 2)
-        labor_entries_count = len(t_labor)
-        active_labor = sum(1 for le in t_labor if not le.is_completed)
-        steps_with_labor = len(set(le.step_id for le in t_labor if le.step_id))
+        total_labor_hours = round(p.labor_hours or 0, 2)
+        labor_entries_count = p.labor_entries
+        active_labor = p.active_labor_entries
+        steps_with_labor = p.steps_with_labor
         labor_percent = round((steps_with_labor / total_steps) * 100, 1) if total_steps > 0 else 0.0
+        qty_accepted = p.qty_accepted
+        qty_rejected = p.qty_rejected
 
         results.append({
             "id": t.id,
@@ -1666,7 +1631,7 @@ async def get_traveler_by_job(
     is_admin = current_user.role.value == 'ADMIN' if hasattr(current_user.role, 'value') else current_user.role == 'ADMIN'
     has_itar_access = getattr(current_user, 'is_itar', False)
 
-    is_itar_job = bool(re.search(r'[0-9]M[L\s]|[0-9]M$|[0-9]ML$', traveler.job_number))
+    is_itar_job = is_itar_traveler(traveler)
     if is_itar_job and not is_admin and not has_itar_access:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
@@ -1888,6 +1853,8 @@ def _attach_labor_signoff(db: Session, traveler: Traveler, result: dict) -> None
 
 
 @router.get("/{traveler_id}")
+@versioned_etag("travelers", "process_steps", "sub_steps", "manual_steps", "rma_unit_tracking",
+                "traveler_groups", "labor_entries", "users")
 async def get_traveler(
     traveler_id: int,
     current_user: User = Depends(get_user_or_system),
@@ -1909,7 +1876,7 @@ async def get_traveler(
     is_admin = current_user.role.value == 'ADMIN' if hasattr(current_user.role, 'value') else current_user.role == 'ADMIN'
     has_itar_access = getattr(current_user, 'is_itar', False)
 
-    is_itar_job = bool(re.search(r'[0-9]M[L\s]|[0-9]M$|[0-9]ML$', traveler.job_number))
+    is_itar_job = is_itar_traveler(traveler)
     if is_itar_job and not is_admin and not has_itar_access:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
@@ -1923,7 +1890,7 @@ async def get_traveler(
         group = db.query(TravelerGroup).filter(TravelerGroup.id == traveler.group_id).first()
         members = []
         for s in siblings:
-            s_itar = bool(re.search(r'[0-9]M[L\s]|[0-9]M$|[0-9]ML$', s.job_number))
+            s_itar = is_itar_traveler(s)
             if s_itar and not is_admin and not has_itar_access:
                 members.append({
                     "id": s.id, "job_number": "ITAR Restricted", "traveler_type": "RESTRICTED",
@@ -2230,20 +2197,9 @@ async def patch_traveler(
         and traveler.status.value == 'DRAFT'
         and not (updates.get('work_order_number') or traveler.work_order_number)
     ):
-        import re as _wo_re
-        existing = db.query(Traveler.work_order_number).filter(
-            Traveler.work_order_number.isnot(None),
-            Traveler.work_order_number != '',
-            Traveler.status != 'DRAFT',
-        ).all()
-        max_prefix = 26014
-        for (wo,) in existing:
-            m = _wo_re.match(r'^(\d{5})', str(wo or ''))
-            if m:
-                n = int(m.group(1))
-                if n > max_prefix:
-                    max_prefix = n
-        allocated = str(max_prefix + 1).zfill(5)
+        # One counter-row UPDATE; its row lock keeps two concurrent
+        # promotions from getting the same number.
+        allocated = allocate_work_order_prefix(db)
         updates['work_order_number'] = allocated
         print(f"Allocated WO {allocated} on DRAFT → CREATED transition for traveler {traveler_id}")
 
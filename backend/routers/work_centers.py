@@ -10,6 +10,7 @@ from database import get_db
 from models import User, WorkCenter, WorkCenterAuditLog, UserRole, NotificationType
 from routers.auth import get_current_user
 from services.notification_service import create_notification_for_admins
+from services.table_versions import versioned_etag
 
 router = APIRouter()
 
@@ -121,6 +122,7 @@ class ReorderRequest(BaseModel):
 
 @router.get("/", response_model=List[WorkCenterResponse])
 @router.get("", response_model=List[WorkCenterResponse], include_in_schema=False)
+@versioned_etag("work_centers")
 async def get_work_centers(
     traveler_type: Optional[str] = None,
     include_inactive: bool = False,
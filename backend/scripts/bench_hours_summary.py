@@ -0,0 +1,118 @@
+"""Benchmark /labor/hours-summary on a generated labor table.
+
+Fills a scratch database with --entries completed labor entries (default
+500,000) spread over --employees employees and the last --days days, then
+times the grouped summary (services/labor_hours_summary) as JSON and as CSV.
+With --legacy it also times the old approach on a sample — every entry loaded
+as an ORM object plus one employee query per entry — and extrapolates.
+
+    python scripts/bench_hours_summary.py                       # SQLite file in /tmp
+    python scripts/bench_hours_summary.py --url postgresql://... --entries 500000 --legacy
+
+Use a scratch database: the tables are created and the rows are left behind.
+"""
+import argparse
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import create_engine, event  # noqa: E402
+from sqlalchemy.orm import sessionmaker  # noqa: E402
+
+from models import (  # noqa: E402
+    Base, LaborEntry, Priority, Traveler, TravelerStatus, TravelerType, User, UserRole,
+)
+from services.labor_hours_summary import build_hours_summary, daily_hours, hours_csv  # noqa: E402
+
+INSERT_BATCH = 10_000
+
+
+def _populate(db, entries: int, employees: int, days: int):
+    users = [User(username=f"bench{n}", email=f"bench{n}@bench", first_name="Bench", last_name=str(n),
+                  hashed_password="x", role=UserRole.OPERATOR, is_active=True) for n in range(employees)]
+    db.add_all(users)
+    db.flush()
+    traveler = Traveler(job_number="BENCH", work_order_number="BENCH-WO", traveler_type=TravelerType.ASSY,
+                        part_number="BENCH", part_description="Benchmark", revision="A", quantity=1,
+                        priority=Priority.NORMAL, work_center="ASSEMBLY", status=TravelerStatus.IN_PROGRESS,
+                        created_by=users[0].id, is_active=True)
+    db.add(traveler)
+    db.commit()
+
+    rng = random.Random(7)
+    now = datetime.now(timezone.utc)
+    table = LaborEntry.__table__
+    for first in range(0, entries, INSERT_BATCH):
+        rows = []
+        for _ in range(min(INSERT_BATCH, entries - first)):
+            start = now - timedelta(days=rng.uniform(0, days))
+            hours = round(rng.uniform(0.1, 4.0), 2)
+            rows.append({
+                "traveler_id": traveler.id, "employee_id": rng.choice(users).id, "work_center": "ASSEMBLY",
+                "start_time": start, "end_time": start + timedelta(hours=hours), "hours_worked": hours,
+                "is_completed": True, "created_at": start, "updated_at": start,
+            })
+        db.execute(table.insert(), rows)
+        db.commit()
+
+
+def _legacy(db, since, sample: int) -> float:
+    """Seconds for the old per-entry path over `sample` entries."""
+    started = time.perf_counter()
+    entries = db.query(LaborEntry).filter(
+        LaborEntry.created_at >= since, LaborEntry.is_completed == True, LaborEntry.end_time.isnot(None),
+    ).limit(sample).all()
+    for entry in entries:
+        db.query(User).filter(User.id == entry.employee_id).first()
+    return time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--url", default="sqlite:////tmp/bench_hours_summary.db")
+    parser.add_argument("--entries", type=int, default=500_000)
+    parser.add_argument("--employees", type=int, default=120)
+    parser.add_argument("--days", type=int, default=30)
+    parser.add_argument("--legacy", action="store_true", help="also time the old per-entry path")
+    parser.add_argument("--legacy-sample", type=int, default=20_000)
+    args = parser.parse_args()
+
+    engine = create_engine(args.url)
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    db = sessionmaker(bind=engine)()
+
+    started = time.perf_counter()
+    _populate(db, args.entries, args.employees, args.days)
+    print(f"populated {args.entries} entries in {time.perf_counter() - started:.1f}s")
+
+    statements = []
+    event.listen(engine, "before_cursor_execute", lambda *a: statements.append(1))
+    since = datetime.now() - timedelta(days=args.days)
+
+    started = time.perf_counter()
+    rows = daily_hours(db, since)
+    summary = build_hours_summary(rows)
+    elapsed = time.perf_counter() - started
+    print(f"json   {elapsed * 1000:8.1f}ms  queries={len(statements)}  "
+          f"employees={len(summary)}  day rows={len(rows)}")
+
+    for granularity in ("day", "week", "month"):
+        started = time.perf_counter()
+        lines = sum(1 for _ in hours_csv(daily_hours(db, since), granularity))
+        print(f"csv/{granularity:<5} {(time.perf_counter() - started) * 1000:6.1f}ms  lines={lines}")
+
+    if args.legacy:
+        sample = min(args.legacy_sample, args.entries)
+        seconds = _legacy(db, since, sample)
+        print(f"legacy {seconds * 1000:8.1f}ms for {sample} entries "
+              f"(~{seconds * args.entries / sample:.0f}s extrapolated to {args.entries})")
+    db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""Benchmark KOSH access: a fresh psycopg2 connection per call vs the pool.
+
+Runs the job-detail lookup every jobs page makes (tblJob by job_number) from
+several threads, first opening and closing a connection per call the way the
+routers used to, then through services.kosh_pool. Intended for the local
+stand-in (docker/docker-compose.kosh-standin.yml), but works against any KOSH
+reachable through the KOSH_DB_* variables.
+
+    KOSH_DB_HOST=localhost KOSH_DB_PORT=5433 python scripts/bench_kosh_pool.py \
+        --threads 8 --calls 200
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import psycopg2  # noqa: E402
+
+from services.kosh_pool import KOSH_DB_CONFIG, KOSH_CONNECT_TIMEOUT, KoshPool  # noqa: E402
+
+QUERY = 'SELECT * FROM warehouse."tblJob" WHERE job_number = %s'
+
+
+def _job_numbers(limit):
+    conn = psycopg2.connect(connect_timeout=KOSH_CONNECT_TIMEOUT, **KOSH_DB_CONFIG)
+    try:
+        cur = conn.cursor()
+        cur.execute('SELECT job_number FROM warehouse."tblJob" ORDER BY id LIMIT %s', (limit,))
+        return [r[0] for r in cur.fetchall()]
+    finally:
+        conn.close()
+
+
+def _unpooled(job_number):
+    conn = psycopg2.connect(connect_timeout=KOSH_CONNECT_TIMEOUT, **KOSH_DB_CONFIG)
+    try:
+        cur = conn.cursor()
+        cur.execute(QUERY, (job_number,))
+        cur.fetchone()
+    finally:
+        conn.close()
+
+
+def _pooled(pool):
+    def call(job_number):
+        with pool.connection() as conn:
+            cur = conn.cursor()
+            cur.execute(QUERY, (job_number,))
+            cur.fetchone()
+    return call
+
+
+def _run(label, fn, job_numbers, threads, calls):
+    def timed(i):
+        started = time.perf_counter()
+        fn(job_numbers[i % len(job_numbers)])
+        return (time.perf_counter() - started) * 1000
+
+    wall = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as ex:
+        samples = sorted(ex.map(timed, range(calls)))
+    wall = time.perf_counter() - wall
+    p95 = samples[min(len(samples) - 1, int(len(samples) * 0.95))]
+    print(
+        f"{label:<10} calls={calls} threads={threads} "
+        f"p50={statistics.median(samples):.1f}ms p95={p95:.1f}ms "
+        f"mean={statistics.mean(samples):.1f}ms throughput={calls / wall:.0f}/s"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--calls", type=int, default=200)
+    args = parser.parse_args()
+
+    job_numbers = _job_numbers(200)
+    if not job_numbers:
+        sys.exit("KOSH has no jobs — is the stand-in seeded?")
+
+    _run("unpooled", _unpooled, job_numbers, args.threads, args.calls)
+    pool = KoshPool(maxconn=args.threads)
+    try:
+        _run("pooled", _pooled(pool), job_numbers, args.threads, args.calls)
+        print("pool stats:", pool.stats())
+    finally:
+        pool.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,146 @@
+"""Fault-injecting TCP proxy in front of the KOSH stand-in.
+
+Sits between a local backend and the stand-in PostgreSQL
+(docker/docker-compose.kosh-standin.yml) and makes KOSH misbehave on demand, to
+watch the circuit breaker open, fail fast, probe and close again, and to check
+that the jobs pages degrade to NEXUS-only data (kosh_unavailable) instead of
+hanging:
+
+    python scripts/kosh_fault_proxy.py --listen 5434 --upstream localhost:5433 \\
+        --latency-ms 200 --jitter-ms 100 --fail-rate 0.2 --hang-rate 0.05
+    KOSH_DB_HOST=localhost KOSH_DB_PORT=5434 uvicorn main:app
+
+  --latency-ms / --jitter-ms  delay added to every server → client chunk
+  --fail-rate                 share of new connections reset straight away
+  --hang-rate                 share of new connections accepted but never
+                              forwarded (the client waits out its timeout)
+  --drop-rate                 share of server → client chunks after which the
+                              connection is cut mid-query
+
+`kill -USR1 <pid>` toggles a full outage (every connection cut and refused);
+`kill -USR2 <pid>` toggles a slow mode that adds 20s to each response. Breaker
+state is visible at GET /jobs/kosh/metrics.
+"""
+import argparse
+import asyncio
+import random
+import signal
+
+CHUNK = 65536
+SLOW_MODE_SECONDS = 20
+
+
+class FaultProxy:
+    def __init__(self, upstream_host, upstream_port, latency_ms=0, jitter_ms=0,
+                 fail_rate=0.0, hang_rate=0.0, drop_rate=0.0):
+        self.upstream_host = upstream_host
+        self.upstream_port = upstream_port
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.fail_rate = fail_rate
+        self.hang_rate = hang_rate
+        self.drop_rate = drop_rate
+        self.outage = False
+        self.slow = False
+        self.open_writers = set()
+        self.counts = {"connections": 0, "failed": 0, "hung": 0, "dropped": 0}
+
+    def toggle_outage(self):
+        self.outage = not self.outage
+        print(f"outage {'ON' if self.outage else 'OFF'}", flush=True)
+        if self.outage:
+            for w in list(self.open_writers):
+                w.close()
+
+    def toggle_slow(self):
+        self.slow = not self.slow
+        print(f"slow mode {'ON' if self.slow else 'OFF'}", flush=True)
+
+    async def _delay(self):
+        seconds = (self.latency_ms + random.uniform(0, self.jitter_ms)) / 1000
+        if self.slow:
+            seconds += SLOW_MODE_SECONDS
+        if seconds:
+            await asyncio.sleep(seconds)
+
+    async def _pipe(self, reader, writer, inject):
+        try:
+            while not reader.at_eof():
+                data = await reader.read(CHUNK)
+                if not data:
+                    break
+                if inject:
+                    await self._delay()
+                    if self.outage or random.random() < self.drop_rate:
+                        self.counts["dropped"] += 1
+                        break
+                writer.write(data)
+                await writer.drain()
+        except (ConnectionError, asyncio.CancelledError):
+            pass
+        finally:
+            writer.close()
+
+    async def handle(self, client_reader, client_writer):
+        self.counts["connections"] += 1
+        roll = random.random()
+        if self.outage or roll < self.fail_rate:
+            self.counts["failed"] += 1
+            client_writer.close()
+            return
+        if roll < self.fail_rate + self.hang_rate:
+            self.counts["hung"] += 1
+            self.open_writers.add(client_writer)
+            try:
+                await client_reader.read()  # until the client gives up
+            finally:
+                self.open_writers.discard(client_writer)
+                client_writer.close()
+            return
+        try:
+            up_reader, up_writer = await asyncio.open_connection(self.upstream_host, self.upstream_port)
+        except OSError as e:
+            print(f"upstream connect failed: {e}", flush=True)
+            client_writer.close()
+            return
+        self.open_writers.update((client_writer, up_writer))
+        try:
+            await asyncio.gather(
+                self._pipe(client_reader, up_writer, inject=False),
+                self._pipe(up_reader, client_writer, inject=True),
+            )
+        finally:
+            self.open_writers.difference_update((client_writer, up_writer))
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--listen", type=int, default=5434)
+    parser.add_argument("--upstream", default="localhost:5433")
+    parser.add_argument("--latency-ms", type=float, default=0)
+    parser.add_argument("--jitter-ms", type=float, default=0)
+    parser.add_argument("--fail-rate", type=float, default=0.0)
+    parser.add_argument("--hang-rate", type=float, default=0.0)
+    parser.add_argument("--drop-rate", type=float, default=0.0)
+    args = parser.parse_args()
+
+    host, _, port = args.upstream.rpartition(":")
+    proxy = FaultProxy(host or "localhost", int(port), args.latency_ms, args.jitter_ms,
+                       args.fail_rate, args.hang_rate, args.drop_rate)
+    loop = asyncio.get_running_loop()
+    loop.add_signal_handler(signal.SIGUSR1, proxy.toggle_outage)
+    loop.add_signal_handler(signal.SIGUSR2, proxy.toggle_slow)
+
+    server = await asyncio.start_server(proxy.handle, "0.0.0.0", args.listen)
+    print(f"KOSH fault proxy :{args.listen} -> {args.upstream}", flush=True)
+    async with server:
+        while True:
+            await asyncio.sleep(30)
+            print(f"stats {proxy.counts}", flush=True)
+
+
+if __name__ == "__main__":
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        pass
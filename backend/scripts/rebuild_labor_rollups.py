@@ -0,0 +1,35 @@
+"""Rebuild the daily labor rollups from labor_entries.
+
+The rollups are maintained on every ORM labor write; run this after changing
+labor_entries behind the ORM's back (bulk UPDATEs, manual SQL, restores).
+
+    python scripts/rebuild_labor_rollups.py                    # everything
+    python scripts/rebuild_labor_rollups.py --since 2026-01-01
+"""
+import argparse
+import os
+import sys
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database import SessionLocal  # noqa: E402
+from services.labor_rollups import rebuild_labor_rollups  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--since", help="first day to rebuild (YYYY-MM-DD); default: all")
+    args = parser.parse_args()
+    since = datetime.strptime(args.since, "%Y-%m-%d").date() if args.since else None
+
+    db = SessionLocal()
+    try:
+        result = rebuild_labor_rollups(db, since)
+        print(f"Rebuilt {result['cells']} rollup cells from {result['entries']} labor entries")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
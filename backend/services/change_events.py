@@ -0,0 +1,275 @@
+"""
+Change events pushed to browsers over server-sent events.
+
+Dashboards, the notification bell and the labor pages poll every 30s–2min
+whether or not anything changed. GET /events/stream lets them refetch only
+when something did:
+
+  - describe_changes() turns an ORM flush into events — labor started /
+    stopped / changed, step completed / reopened, notification created,
+    kitting state changed. models.install_change_events calls it for every
+    flush and writes the events as change_events rows in the same
+    transaction, so labor.py, travelers.py, kitting_timer.py and the
+    notification service all emit without each remembering to, and a
+    rolled-back change emits nothing.
+  - ChangeEventBroker runs in every worker. While it has subscribers it reads
+    rows newer than the last one it saw every CHANGE_EVENT_POLL_INTERVAL
+    seconds (indexed queries per worker, however many browsers) and hands
+    them to its subscribers, so an event written by any worker reaches every
+    browser. A reconnecting browser sends Last-Event-ID and is replayed what
+    it missed.
+  - Ids are handed out when a row is flushed, not when it commits, so a
+    transaction holding id 10 can commit after id 11 was delivered. The
+    broker re-checks the ids created in the last CHANGE_EVENT_LATE_WINDOW
+    seconds on every poll and delivers the ones it has not seen yet; a replay
+    re-sends that window too. Events only tell a page to refetch, so a
+    repeat costs one refetch where a miss would leave the page stale.
+  - Events with a user_id (notifications) go only to that user.
+
+Rows older than CHANGE_EVENT_RETENTION seconds are pruned by
+prune_change_events(), run from main.py's daily prune loop.
+"""
+
+import asyncio
+import json
+import logging
+import os
+from datetime import datetime, timedelta, timezone
+from typing import Callable, List, Optional, Set, Tuple
+
+from sqlalchemy import false, func, inspect as sa_inspect, or_
+
+from models import ChangeEvent, KittingTimerSession, LaborEntry, Notification, ProcessStep
+
+logger = logging.getLogger(__name__)
+
+CHANGE_EVENT_POLL_INTERVAL = float(os.getenv('CHANGE_EVENT_POLL_INTERVAL', 1.0))  # seconds
+CHANGE_EVENT_RETENTION = int(os.getenv('CHANGE_EVENT_RETENTION', 3600))  # seconds
+# Longest a transaction may take between writing its events and committing
+# them and still have them delivered live.
+CHANGE_EVENT_LATE_WINDOW = float(os.getenv('CHANGE_EVENT_LATE_WINDOW', 30))  # seconds
+SSE_KEEPALIVE = 15  # seconds between comment lines, so proxies keep the stream open
+REPLAY_LIMIT = 500
+
+
+def _event(kind: str, traveler_id=None, user_id=None, **payload) -> dict:
+    return {"kind": kind, "traveler_id": traveler_id, "user_id": user_id,
+            "payload": json.dumps(payload, default=str)}
+
+
+def _changed_to(obj, attr: str):
+    """(changed, new value) for one attribute in the pending flush."""
+    history = sa_inspect(obj).attrs[attr].history
+    return bool(history.added), (history.added[0] if history.added else None)
+
+
+def describe_changes(session) -> List[dict]:
+    """ChangeEvent column values for the objects in the flush in progress
+    (called from after_flush, while attribute history is still set)."""
+    found = []
+    for obj in session.new:
+        if isinstance(obj, LaborEntry):
+            kind = "labor.started" if obj.end_time is None else "labor.stopped"
+            found.append(_event(kind, obj.traveler_id, entry_id=obj.id, employee_id=obj.employee_id,
+                                work_center=obj.work_center))
+        elif isinstance(obj, Notification):
+            found.append(_event("notification.created", user_id=obj.user_id, notification_id=obj.id))
+        elif isinstance(obj, KittingTimerSession):
+            found.append(_event("kitting.changed", obj.traveler_id, session_type=obj.session_type))
+    for obj in session.dirty:
+        if not session.is_modified(obj):
+            continue
+        if isinstance(obj, LaborEntry):
+            ended, end_time = _changed_to(obj, "end_time")
+            deleted, deleted_at = _changed_to(obj, "deleted_at")
+            if deleted and deleted_at is not None:
+                kind = "labor.deleted"
+            elif ended and end_time is not None:
+                kind = "labor.stopped"
+            else:
+                kind = "labor.changed"
+            found.append(_event(kind, obj.traveler_id, entry_id=obj.id, employee_id=obj.employee_id,
+                                work_center=obj.work_center))
+        elif isinstance(obj, ProcessStep):
+            changed, completed = _changed_to(obj, "is_completed")
+            if changed:
+                found.append(_event("step.completed" if completed else "step.reopened", obj.traveler_id,
+                                    step_id=obj.id, operation=obj.operation))
+        elif isinstance(obj, KittingTimerSession):
+            found.append(_event("kitting.changed", obj.traveler_id, session_type=obj.session_type))
+    return found
+
+
+def labor_stopped_events(rows) -> List[dict]:
+    """labor.stopped events for entries closed by a bulk UPDATE, which no
+    flush sees. rows carry id, traveler_id, employee_id and work_center."""
+    return [_event("labor.stopped", r.traveler_id, entry_id=r.id, employee_id=r.employee_id,
+                   work_center=r.work_center) for r in rows]
+
+
+def prune_change_events(db) -> int:
+    cutoff = datetime.now(timezone.utc) - timedelta(seconds=CHANGE_EVENT_RETENTION)
+    deleted = db.query(ChangeEvent).filter(ChangeEvent.created_at < cutoff).delete(synchronize_session=False)
+    db.commit()
+    return deleted
+
+
+def _as_message(event: ChangeEvent) -> dict:
+    return {"id": event.id, "kind": event.kind, "traveler_id": event.traveler_id,
+            "user_id": event.user_id, "data": json.loads(event.payload or "{}")}
+
+
+def format_sse(message: dict) -> str:
+    data = json.dumps({"kind": message["kind"], "traveler_id": message["traveler_id"], **message["data"]})
+    return f"id: {message['id']}\nevent: {message['kind']}\ndata: {data}\n\n"
+
+
+class _Subscriber:
+    def __init__(self, user_id: int):
+        self.user_id = user_id
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=1000)
+
+    def wants(self, message: dict) -> bool:
+        return message["user_id"] is None or message["user_id"] == self.user_id
+
+
+class ChangeEventBroker:
+    """Fans change_events rows out to this worker's SSE subscribers."""
+
+    def __init__(self, session_factory: Optional[Callable] = None,
+                 poll_interval: float = CHANGE_EVENT_POLL_INTERVAL):
+        self._session_factory = session_factory
+        self.poll_interval = poll_interval
+        self._subscribers: set = set()
+        self._last_id: Optional[int] = None
+        self._recent: Set[int] = set()  # ids up to _last_id seen in the late window
+        self._poll_lock = asyncio.Lock()  # the run loop and callers share _last_id / _recent
+        self._task: Optional[asyncio.Task] = None
+
+    def _session(self):
+        if self._session_factory is None:
+            from database import SessionLocal
+            self._session_factory = SessionLocal
+        return self._session_factory()
+
+    @staticmethod
+    def _late_cutoff() -> datetime:
+        return datetime.now(timezone.utc) - timedelta(seconds=CHANGE_EVENT_LATE_WINDOW)
+
+    @staticmethod
+    def _window_ids(db, up_to: int) -> Set[int]:
+        """Committed ids up to `up_to` created inside the late window."""
+        return {i for (i,) in db.query(ChangeEvent.id).filter(
+            ChangeEvent.id <= up_to, ChangeEvent.created_at >= ChangeEventBroker._late_cutoff())}
+
+    def _start(self) -> Tuple[int, Set[int]]:
+        """The newest id now, and the window's ids below it (the backlog a
+        first poll does not deliver)."""
+        db = self._session()
+        try:
+            latest = db.query(func.max(ChangeEvent.id)).scalar() or 0
+            return latest, self._window_ids(db, latest)
+        finally:
+            db.close()
+
+    def _poll_read(self, last_id: int, recent: Set[int]) -> Tuple[List[dict], Set[int]]:
+        """Rows newer than last_id plus window rows below it that committed
+        since the last poll, and the window's ids as of this read."""
+        db = self._session()
+        try:
+            window = self._window_ids(db, last_id)
+            late = window - recent
+            rows = db.query(ChangeEvent).filter(
+                or_(ChangeEvent.id > last_id, ChangeEvent.id.in_(late) if late else false())
+            ).order_by(ChangeEvent.id).limit(REPLAY_LIMIT).all()
+            return [_as_message(r) for r in rows], window
+        finally:
+            db.close()
+
+    def _read(self, after_id: int, limit: int = REPLAY_LIMIT) -> List[dict]:
+        """Rows newer than after_id, and the late window's rows below it."""
+        db = self._session()
+        try:
+            rows = db.query(ChangeEvent).filter(
+                or_(ChangeEvent.id > after_id, ChangeEvent.created_at >= self._late_cutoff())
+            ).order_by(ChangeEvent.id).limit(limit).all()
+            return [_as_message(r) for r in rows]
+        finally:
+            db.close()
+
+    async def poll_once(self) -> int:
+        """Deliver rows committed since the last poll (the first poll only
+        notes where "now" is). Returns how many were delivered."""
+        async with self._poll_lock:
+            if self._last_id is None:
+                self._last_id, self._recent = await asyncio.to_thread(self._start)
+                return 0
+            messages, window = await asyncio.to_thread(self._poll_read, self._last_id, self._recent)
+            self._recent = window
+            for message in messages:
+                self._recent.add(message["id"])
+                self._last_id = max(self._last_id, message["id"])
+                for subscriber in list(self._subscribers):
+                    if subscriber.wants(message):
+                        try:
+                            subscriber.queue.put_nowait(message)
+                        except asyncio.QueueFull:
+                            logger.warning(f"Dropping change events for slow subscriber (user {subscriber.user_id})")
+            return len(messages)
+
+    async def _run(self) -> None:
+        while self._subscribers:
+            try:
+                await self.poll_once()
+            except Exception as e:
+                logger.warning(f"Change event poll failed: {e}")
+            await asyncio.sleep(self.poll_interval)
+        # Idle: the next subscriber starts from "now", not from a backlog.
+        self._task = None
+        self._last_id = None
+        self._recent = set()
+
+    def subscribe(self, user_id: int) -> _Subscriber:
+        subscriber = _Subscriber(user_id)
+        self._subscribers.add(subscriber)
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+        return subscriber
+
+    def unsubscribe(self, subscriber: _Subscriber) -> None:
+        self._subscribers.discard(subscriber)
+
+    async def replay(self, subscriber: _Subscriber, after_id: int) -> List[dict]:
+        """What a reconnecting subscriber missed since after_id, plus the late
+        window's events, which may have committed after it saw after_id."""
+        messages = await asyncio.to_thread(self._read, after_id)
+        return [m for m in messages if subscriber.wants(m)]
+
+    async def stream(self, user_id: int, last_event_id: Optional[int] = None,
+                     is_disconnected: Optional[Callable] = None):
+        """SSE text for one browser, until it disconnects."""
+        subscriber = self.subscribe(user_id)
+        try:
+            yield "retry: 3000\n\n"
+            # Events subscribed to before the replay read can arrive both
+            # ways; the broker never queues an id twice.
+            replayed = set()
+            if last_event_id is not None:
+                for message in await self.replay(subscriber, last_event_id):
+                    replayed.add(message["id"])
+                    yield format_sse(message)
+            while True:
+                try:
+                    message = await asyncio.wait_for(subscriber.queue.get(), timeout=SSE_KEEPALIVE)
+                except asyncio.TimeoutError:
+                    if is_disconnected is not None and await is_disconnected():
+                        return
+                    yield ": keepalive\n\n"
+                    continue
+                if message["id"] not in replayed:
+                    yield format_sse(message)
+        finally:
+            self.unsubscribe(subscriber)
+
+
+change_event_broker = ChangeEventBroker()
@@ -0,0 +1,116 @@
+"""
+Concurrent KOSH + NEXUS fetches for composite job endpoints.
+
+The enriched job pages and the job timeline read KOSH (job row, BOM) and the
+NEXUS database (travelers, labor, steps), and used to do it strictly one after
+the other, so a page cost KOSH + NEXUS. The two sides are independent, so
+fetch_alongside() runs the KOSH side on a small shared thread pool while the
+NEXUS side runs on the request's own thread, and the page costs
+max(KOSH, NEXUS) instead. submit() is the lower-level form for handlers that
+do their NEXUS work inline and collect the KOSH result afterwards.
+
+The NEXUS side stays on the calling thread on purpose: the request's
+SQLAlchemy Session must not be used from two threads, and the KOSH side never
+touches it. The pool is bounded (KOSH_FETCH_WORKERS) so a burst of page loads
+cannot open more concurrent KOSH work than the KOSH connection pool serves
+anyway; excess work queues.
+
+PhaseTimings records how long each phase took and renders a Server-Timing
+header (visible in the browser's network panel), e.g.
+
+    Server-Timing: kosh;dur=182.4, nexus;dur=41.0, merge;dur=2.1, total;dur=186.0
+"""
+
+import os
+import time
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Callable, Optional, Tuple
+
+KOSH_FETCH_WORKERS = int(os.getenv('KOSH_FETCH_WORKERS', 8))
+
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(max_workers=KOSH_FETCH_WORKERS, thread_name_prefix="kosh-fetch")
+    return _executor
+
+
+def shutdown_fetch_pool() -> None:
+    global _executor
+    with _executor_lock:
+        executor, _executor = _executor, None
+    if executor is not None:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
+class PhaseTimings:
+    """Wall-clock milliseconds per named phase of one request."""
+
+    def __init__(self):
+        self._started = time.perf_counter()
+        self._lock = threading.Lock()
+        self.phases: dict = {}
+
+    def record(self, name: str, seconds: float) -> None:
+        with self._lock:
+            self.phases[name] = self.phases.get(name, 0.0) + seconds * 1000
+
+    @contextmanager
+    def phase(self, name: str):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - started)
+
+    def header(self) -> str:
+        with self._lock:
+            parts = [f"{name};dur={ms:.1f}" for name, ms in self.phases.items()]
+        parts.append(f"total;dur={(time.perf_counter() - self._started) * 1000:.1f}")
+        return ", ".join(parts)
+
+    def apply(self, response) -> None:
+        """Set the Server-Timing header on a FastAPI/Starlette response."""
+        response.headers["Server-Timing"] = self.header()
+
+
+def submit(remote: Callable, timings: Optional[PhaseTimings] = None, name: str = "kosh") -> Future:
+    """Start `remote` on the fetch pool, timed as phase `name`. For handlers
+    that do their NEXUS work inline and collect the KOSH result afterwards."""
+    def timed_remote():
+        if timings is None:
+            return remote()
+        with timings.phase(name):
+            return remote()
+
+    return _get_executor().submit(timed_remote)
+
+
+def fetch_alongside(
+    remote: Callable,
+    local: Callable,
+    timings: Optional[PhaseTimings] = None,
+    remote_name: str = "kosh",
+    local_name: str = "nexus",
+) -> Tuple[Future, object]:
+    """Run `remote` on the fetch pool while `local` runs on this thread.
+
+    Returns (future, local_result) once both are done. The future holds the
+    remote result; future.result() re-raises whatever `remote` raised, so the
+    caller decides whether a KOSH failure degrades or propagates. An exception
+    from `local` propagates immediately.
+    """
+    timings = timings or PhaseTimings()
+    future = submit(remote, timings, remote_name)
+    with timings.phase(local_name):
+        local_result = local()
+    future.exception()  # wait for the remote side without raising here
+    return future, local_result
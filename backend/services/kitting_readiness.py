@@ -0,0 +1,133 @@
+"""
+Batch parts-readiness for kitting: are all of a job's BOM parts on hand in KOSH?
+
+The kitting timer used to answer this one job at a time — one tblJob lookup
+plus a BOM-vs-inventory CTE per WAITING_PARTS session — so a sweep over every
+waiting job cost one KOSH round trip per job. evaluate_readiness() answers it
+for a whole set of job numbers with ONE query and does the comparison here:
+
+  - tblJob rows for every candidate number (exact, and with trailing L/M
+    compliance letters stripped — travelers carry them, KOSH jobs may not)
+  - the BOM items of those jobs, one row per (job, aci_pn)
+  - stock-room inventory aggregated by (item, mpn) for just those parts, once,
+    however many jobs share a part
+
+Rule (unchanged from the per-job check): a BOM line is covered when the
+stock-room on-hand of every inventory row matching its ACI part number OR its
+MPN is at least qty_per_board x order_qty. MFG Floor rows don't count. A job
+is ready when every line is covered, short when any line is not, and unknown
+(None) when KOSH has no such job or no BOM for it.
+"""
+
+from collections import defaultdict
+from typing import Dict, Iterable, Optional
+
+from psycopg2.extras import RealDictCursor
+
+from services import kosh_pool
+
+READINESS_SQL = """
+    WITH jobs AS (
+        SELECT job_number, order_qty
+        FROM warehouse."tblJob"
+        WHERE job_number = ANY(%s)
+    ),
+    bom_items AS (
+        SELECT DISTINCT ON (b.job, b.aci_pn) b.job, b.aci_pn, b.mpn, b.qty
+        FROM warehouse."tblBOM" b
+        WHERE b.job IN (SELECT job_number FROM jobs)
+        ORDER BY b.job, b.aci_pn, b.line
+    )
+    SELECT 'job' AS kind, job_number AS job, NULL AS item, NULL AS mpn, order_qty AS qty
+    FROM jobs
+    UNION ALL
+    SELECT 'bom', bi.job, bi.aci_pn, bi.mpn, CAST(COALESCE(NULLIF(bi.qty, ''), '0') AS INTEGER)
+    FROM bom_items bi
+    UNION ALL
+    SELECT 'stock', NULL, w.item, w.mpn, SUM(w.onhandqty)
+    FROM warehouse."tblWhse_Inventory" w
+    WHERE w.loc_to != 'MFG Floor'
+        AND (w.item IN (SELECT aci_pn FROM bom_items) OR w.mpn IN (SELECT mpn FROM bom_items))
+    GROUP BY w.item, w.mpn
+"""
+
+
+def kosh_candidates(job_number: str) -> tuple:
+    """KOSH job numbers a traveler job number may refer to, best match first."""
+    base = job_number.rstrip("LM")
+    return (job_number, base) if base and base != job_number else (job_number,)
+
+
+def fetch_readiness_rows(candidates: list) -> list:
+    conn = kosh_pool.checkout()
+    try:
+        cursor = conn.cursor(cursor_factory=RealDictCursor)
+        cursor.execute(READINESS_SQL, (list(candidates),))
+        return cursor.fetchall()
+    finally:
+        conn.close()
+
+
+def compute_readiness(job_numbers: Iterable[str], rows: Iterable[dict]) -> Dict[str, dict]:
+    """Readiness per traveler job number from the rows READINESS_SQL returns."""
+    order_qty: Dict[str, int] = {}
+    bom: Dict[str, list] = defaultdict(list)
+    stock = []
+    for r in rows:
+        if r["kind"] == "job":
+            order_qty[r["job"]] = int(r["qty"] or 1)
+        elif r["kind"] == "bom":
+            bom[r["job"]].append((r["item"], r["mpn"], int(r["qty"] or 0)))
+        else:
+            stock.append((r["item"], r["mpn"], int(r["qty"] or 0)))
+
+    # Index the (item, mpn) groups both ways. A group matching a line on item
+    # AND mpn must still be counted once, hence the set union below.
+    by_item = defaultdict(set)
+    by_mpn = defaultdict(set)
+    for idx, (item, mpn, _) in enumerate(stock):
+        if item is not None:
+            by_item[item].add(idx)
+        if mpn is not None:
+            by_mpn[mpn].add(idx)
+
+    on_hand_memo: Dict[tuple, int] = {}
+
+    def on_hand(aci_pn: Optional[str], mpn: Optional[str]) -> int:
+        key = (aci_pn, mpn)
+        if key not in on_hand_memo:
+            groups = set()
+            if aci_pn is not None:
+                groups |= by_item.get(aci_pn, set())
+            if mpn is not None:
+                groups |= by_mpn.get(mpn, set())
+            on_hand_memo[key] = sum(stock[i][2] for i in groups)
+        return on_hand_memo[key]
+
+    result = {}
+    for jn in job_numbers:
+        kosh_jn = next((c for c in kosh_candidates(jn) if c in order_qty), None)
+        lines = bom.get(kosh_jn, []) if kosh_jn else []
+        short = sum(1 for aci_pn, mpn, qty_per in lines if on_hand(aci_pn, mpn) < qty_per * order_qty[kosh_jn])
+        result[jn] = {
+            "job_number": jn,
+            "kosh_job_number": kosh_jn,
+            "ready": (short == 0) if lines else None,
+            "bom_lines": len(lines),
+            "short_lines": short,
+        }
+    return result
+
+
+def evaluate_readiness(job_numbers: Iterable[str]) -> Dict[str, dict]:
+    """Parts readiness for many traveler job numbers in one KOSH round trip.
+
+    Returns {job_number: {"job_number", "kosh_job_number", "ready",
+    "bom_lines", "short_lines"}} for every number asked for. KOSH errors
+    propagate — the caller decides whether unknown means None or a 503.
+    """
+    job_numbers = [jn for jn in dict.fromkeys(job_numbers) if jn]
+    if not job_numbers:
+        return {}
+    candidates = list(dict.fromkeys(c for jn in job_numbers for c in kosh_candidates(jn)))
+    return compute_readiness(job_numbers, fetch_readiness_rows(candidates))
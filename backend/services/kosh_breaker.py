@@ -0,0 +1,149 @@
+"""
+Circuit breaker for KOSH.
+
+When KOSH is down or crawling, every request that touches it used to sit out
+the full connect timeout (or statement timeout) before failing, and jobs pages
+stacked up behind each other doing exactly that. The breaker watches the
+outcome of KOSH calls and, once KOSH is clearly unhealthy, fails new calls
+immediately instead:
+
+  CLOSED     normal. Each failure (connect error, dropped connection, statement
+             timeout, pool exhaustion) or call slower than KOSH_BREAKER_SLOW_SECONDS
+             adds to a consecutive-failure count; a healthy call resets it.
+             KOSH_BREAKER_FAILURES in a row → OPEN.
+  OPEN       fast-fail: allow() is False, callers raise KoshCircuitOpen without
+             touching the network. After KOSH_BREAKER_RESET_SECONDS → HALF_OPEN.
+  HALF_OPEN  one probe call at a time is let through. Success → CLOSED;
+             failure → OPEN for another reset period. A probe that never
+             reports back is replaced after another reset period.
+
+kosh_pool.checkout() consults the breaker and reports connect failures; the
+pooled connection's cursors report each query's outcome and latency (not the
+latency, for checkouts made long_running — the mirror sync's bulk pulls).
+"""
+
+import os
+import time
+import threading
+from typing import Callable
+
+KOSH_BREAKER_FAILURES = int(os.getenv('KOSH_BREAKER_FAILURES', 5))
+KOSH_BREAKER_RESET_SECONDS = float(os.getenv('KOSH_BREAKER_RESET_SECONDS', 30))
+KOSH_BREAKER_SLOW_SECONDS = float(os.getenv('KOSH_BREAKER_SLOW_SECONDS', 8))
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class KoshCircuitOpen(Exception):
+    """KOSH calls are being short-circuited after repeated failures."""
+
+
+class CircuitBreaker:
+    def __init__(
+        self,
+        failure_threshold: int = KOSH_BREAKER_FAILURES,
+        reset_seconds: float = KOSH_BREAKER_RESET_SECONDS,
+        slow_call_seconds: float = KOSH_BREAKER_SLOW_SECONDS,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.failure_threshold = max(1, failure_threshold)
+        self.reset_seconds = reset_seconds
+        self.slow_call_seconds = slow_call_seconds
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._state = CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probe_started_at = None
+        self._counters = {
+            "failures": 0,
+            "slow_calls": 0,
+            "rejected": 0,
+            "opened": 0,
+            "probes": 0,
+        }
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            self._advance()
+            return self._state
+
+    def _advance(self) -> None:
+        # Caller holds the lock.
+        if self._state == OPEN and self._clock() - self._opened_at >= self.reset_seconds:
+            self._state = HALF_OPEN
+            self._probe_started_at = None
+
+    def allow(self) -> bool:
+        """May a KOSH call go ahead right now? False means fail fast."""
+        with self._lock:
+            self._advance()
+            if self._state == CLOSED:
+                return True
+            if self._state == HALF_OPEN:
+                now = self._clock()
+                if self._probe_started_at is None or now - self._probe_started_at >= self.reset_seconds:
+                    self._probe_started_at = now
+                    self._counters["probes"] += 1
+                    return True
+            self._counters["rejected"] += 1
+            return False
+
+    def check(self) -> None:
+        """allow(), raising KoshCircuitOpen when the call must not go ahead."""
+        if not self.allow():
+            raise KoshCircuitOpen(
+                f"KOSH circuit open after {self.failure_threshold} consecutive failures"
+            )
+
+    def record_success(self, duration: float = 0.0) -> None:
+        if self.slow_call_seconds and duration > self.slow_call_seconds:
+            with self._lock:
+                self._counters["slow_calls"] += 1
+            self.record_failure()
+            return
+        with self._lock:
+            self._failures = 0
+            if self._state != CLOSED:
+                self._state = CLOSED
+                self._probe_started_at = None
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._counters["failures"] += 1
+            self._failures += 1
+            self._advance()
+            if self._state == HALF_OPEN or (self._state == CLOSED and self._failures >= self.failure_threshold):
+                self._state = OPEN
+                self._opened_at = self._clock()
+                self._probe_started_at = None
+                self._counters["opened"] += 1
+
+    def reset(self) -> None:
+        with self._lock:
+            self._state = CLOSED
+            self._failures = 0
+            self._probe_started_at = None
+
+    def stats(self) -> dict:
+        with self._lock:
+            self._advance()
+            retry_in = (
+                max(0.0, round(self.reset_seconds - (self._clock() - self._opened_at), 1))
+                if self._state == OPEN else 0.0
+            )
+            return {
+                "state": self._state,
+                "consecutive_failures": self._failures,
+                "failure_threshold": self.failure_threshold,
+                "reset_seconds": self.reset_seconds,
+                "slow_call_seconds": self.slow_call_seconds,
+                "retry_in_seconds": retry_in,
+                **self._counters,
+            }
+
+
+kosh_breaker = CircuitBreaker()
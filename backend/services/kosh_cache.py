@@ -0,0 +1,243 @@
+"""
+Read-through cache for KOSH job and BOM data.
+
+A job page asks KOSH for the same tblJob row (and the same BOM rows) from
+several endpoints within a few seconds — detail, enriched, BOM, stock, kitting
+status — and the kitting timer asks again for every poll. This cache sits in
+front of those reads, keyed by (kind, job number):
+
+  - fresh for KOSH_CACHE_TTL seconds: served straight from memory.
+  - stale up to KOSH_CACHE_STALE seconds: served immediately while ONE
+    background refresh re-reads KOSH (stale-while-revalidate), so a slow KOSH
+    never sits in the request path for data we already have.
+  - KOSH down: a failed load falls back to whatever value is cached, however
+    old, rather than failing the page. Only a true miss surfaces the error.
+  - bounded: at most KOSH_CACHE_MAX_ENTRIES entries, least recently used
+    evicted first.
+
+get_many() loads every missing key through one bulk loader call, which is how
+list pages prefetch a whole page of jobs in a single KOSH round trip.
+
+Per-process, like the dashboard/analytics response caches. Values are treated
+as read-only by callers — they are shared between requests.
+"""
+
+import os
+import time
+import logging
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Hashable, Iterable, Optional
+
+logger = logging.getLogger(__name__)
+
+KOSH_CACHE_TTL = float(os.getenv('KOSH_CACHE_TTL', 60))  # seconds fresh
+KOSH_CACHE_STALE = float(os.getenv('KOSH_CACHE_STALE', 600))  # seconds servable while refreshing
+KOSH_CACHE_MAX_ENTRIES = int(os.getenv('KOSH_CACHE_MAX_ENTRIES', 2000))
+
+
+class KoshCache:
+    def __init__(
+        self,
+        ttl: float = KOSH_CACHE_TTL,
+        stale_ttl: float = KOSH_CACHE_STALE,
+        max_entries: int = KOSH_CACHE_MAX_ENTRIES,
+        refresh_workers: int = 2,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.ttl = ttl
+        self.stale_ttl = max(stale_ttl, ttl)
+        self.max_entries = max_entries
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[tuple, tuple]" = OrderedDict()  # key -> (value, fetched_at)
+        self._refreshing: set = set()
+        self._executor = ThreadPoolExecutor(max_workers=refresh_workers, thread_name_prefix="kosh-cache")
+        self._counters = {
+            "hits": 0,
+            "misses": 0,
+            "stale_served": 0,
+            "refreshes": 0,
+            "refresh_errors": 0,
+            "served_on_error": 0,
+            "evictions": 0,
+        }
+
+    # ─── reads ──────────────────────────────────────────────────────────
+
+    def get(self, kind: str, job_number: Hashable, loader: Callable[[], object]):
+        """Cached value for (kind, job_number), loading it with loader() on a
+        miss. `None` is a valid, cacheable result (e.g. job not in KOSH)."""
+        key = (kind, job_number)
+        entry = self._lookup(key)
+        if entry is not None:
+            value, age = entry
+            if age <= self.ttl:
+                self._count("hits")
+                return value
+            if age <= self.stale_ttl:
+                self._count("stale_served")
+                self._refresh_in_background(key, loader)
+                return value
+        else:
+            self._count("misses")
+        try:
+            value = loader()
+        except Exception:
+            if entry is not None:
+                # Too old to serve normally, but KOSH is failing — old data
+                # beats an error page.
+                self._count("served_on_error")
+                logger.warning(f"KOSH load failed for {key}; serving cached value")
+                return entry[0]
+            raise
+        self._store(key, value)
+        return value
+
+    def get_many(
+        self,
+        kind: str,
+        job_numbers: Iterable[Hashable],
+        bulk_loader: Callable[[list], Dict[Hashable, object]],
+    ) -> Dict[Hashable, object]:
+        """Values for many job numbers. Fresh and stale entries come from the
+        cache; everything else is loaded through ONE bulk_loader(missing) call,
+        which returns {job_number: value}. Numbers it leaves out are cached as
+        None so the next page doesn't ask KOSH for them again."""
+        wanted = list(dict.fromkeys(job_numbers))
+        result: Dict[Hashable, object] = {}
+        missing = []
+        stale = []
+        fallback = {}
+        for jn in wanted:
+            entry = self._lookup((kind, jn))
+            if entry is None:
+                self._count("misses")
+                missing.append(jn)
+                continue
+            value, age = entry
+            if age <= self.ttl:
+                self._count("hits")
+                result[jn] = value
+            elif age <= self.stale_ttl:
+                self._count("stale_served")
+                result[jn] = value
+                stale.append(jn)
+            else:
+                missing.append(jn)
+                fallback[jn] = value
+        if stale:
+            self._refresh_many_in_background(kind, stale, bulk_loader)
+        if missing:
+            try:
+                loaded = bulk_loader(missing)
+            except Exception:
+                if not fallback:
+                    raise
+                self._count("served_on_error")
+                logger.warning(f"KOSH bulk load failed for {kind}; serving cached values")
+                result.update(fallback)
+                return result
+            for jn in missing:
+                value = loaded.get(jn)
+                self._store((kind, jn), value)
+                result[jn] = value
+        return result
+
+    def prime(self, kind: str, values: Dict[Hashable, object]) -> None:
+        """Store values fetched elsewhere (e.g. a list query) as fresh entries."""
+        for jn, value in values.items():
+            self._store((kind, jn), value)
+
+    def invalidate(self, kind: Optional[str] = None, job_number: Optional[Hashable] = None) -> None:
+        with self._lock:
+            if kind is None and job_number is None:
+                self._entries.clear()
+                return
+            for key in [k for k in self._entries
+                        if (kind is None or k[0] == kind) and (job_number is None or k[1] == job_number)]:
+                del self._entries[key]
+
+    def stats(self) -> dict:
+        with self._lock:
+            counters = dict(self._counters)
+            size = len(self._entries)
+            refreshing = len(self._refreshing)
+        lookups = counters["hits"] + counters["stale_served"] + counters["misses"]
+        return {
+            "entries": size,
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl,
+            "stale_seconds": self.stale_ttl,
+            "refreshing": refreshing,
+            "hit_rate": round((counters["hits"] + counters["stale_served"]) / lookups, 3) if lookups else 0.0,
+            **counters,
+        }
+
+    # ─── internals ──────────────────────────────────────────────────────
+
+    def _count(self, name: str, n: int = 1) -> None:
+        with self._lock:
+            self._counters[name] += n
+
+    def _lookup(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            self._entries.move_to_end(key)
+            value, fetched_at = entry
+        return value, self._clock() - fetched_at
+
+    def _store(self, key, value) -> None:
+        with self._lock:
+            self._entries[key] = (value, self._clock())
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._counters["evictions"] += 1
+
+    def _refresh_in_background(self, key, loader) -> None:
+        with self._lock:
+            if key in self._refreshing:
+                return
+            self._refreshing.add(key)
+
+        def run():
+            try:
+                self._store(key, loader())
+                self._count("refreshes")
+            except Exception as e:
+                self._count("refresh_errors")
+                logger.warning(f"KOSH background refresh failed for {key}: {e}")
+            finally:
+                with self._lock:
+                    self._refreshing.discard(key)
+
+        self._executor.submit(run)
+
+    def _refresh_many_in_background(self, kind, job_numbers, bulk_loader) -> None:
+        with self._lock:
+            todo = [jn for jn in job_numbers if (kind, jn) not in self._refreshing]
+            self._refreshing.update((kind, jn) for jn in todo)
+        if not todo:
+            return
+
+        def run():
+            try:
+                loaded = bulk_loader(todo)
+                for jn in todo:
+                    self._store((kind, jn), loaded.get(jn))
+                self._count("refreshes")
+            except Exception as e:
+                self._count("refresh_errors")
+                logger.warning(f"KOSH background refresh failed for {kind}: {e}")
+            finally:
+                with self._lock:
+                    self._refreshing.difference_update((kind, jn) for jn in todo)
+
+        self._executor.submit(run)
+
+
+kosh_cache = KoshCache()
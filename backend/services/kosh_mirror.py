@@ -0,0 +1,383 @@
+"""
+Incremental mirror of the KOSH warehouse tables into the NEXUS database.
+
+Job lists join KOSH jobs to NEXUS travelers. Done live, that means a KOSH
+query, then a NEXUS query, then matching in Python — and the page is only as
+fast as KOSH. The mirror keeps local copies (models.KoshJobMirror,
+KoshBomMirror, KoshInventoryMirror) so those pages can be answered from NEXUS
+alone.
+
+Each pass, per table:
+
+  - incremental, when the KOSH table has an updated_at column: pull rows with
+    updated_at at or after the stored high-water mark (minus a small overlap
+    for transactions that committed late) and upsert the ones whose hash
+    changed.
+  - hash diff, every KOSH_MIRROR_FULL_EVERY seconds or when there is no
+    updated_at: pull (key, md5 of the row) for the whole table, fetch only the
+    rows whose hash differs, and delete local rows KOSH no longer has. This
+    is also what catches deletes, which an updated_at scan never sees.
+
+The inventory mirror is an aggregate per (item, mpn): stock-room on-hand and
+MFG Floor quantity, the same split the kitting queries use. Incremental passes
+recompute only the groups with touched rows.
+
+run_mirror_sync() is called by the background loop in main.py. On Postgres it
+takes an advisory lock so that only one worker syncs at a time. The sync-lag
+metric is in mirror_status().
+"""
+
+import os
+import hashlib
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional
+
+from psycopg2.extras import RealDictCursor
+
+from models import KoshJobMirror, KoshBomMirror, KoshInventoryMirror, KoshSyncState
+from services import kosh_pool
+from utils.db_helpers import single_runner
+
+KOSH_MIRROR_ENABLED = os.getenv('KOSH_MIRROR_ENABLED', 'true').lower() not in ('0', 'false', 'no')
+KOSH_MIRROR_INTERVAL = int(os.getenv('KOSH_MIRROR_INTERVAL', 120))  # seconds between passes
+KOSH_MIRROR_FULL_EVERY = int(os.getenv('KOSH_MIRROR_FULL_EVERY', 3600))  # seconds between hash-diff passes
+KOSH_MIRROR_MAX_LAG = int(os.getenv('KOSH_MIRROR_MAX_LAG', 900))  # older than this, routers read KOSH live
+KOSH_MIRROR_STATEMENT_TIMEOUT_MS = int(os.getenv('KOSH_MIRROR_STATEMENT_TIMEOUT_MS', 120000))
+
+# Re-read this much before the high-water mark: a KOSH transaction can stamp
+# updated_at = NOW() and commit after a pass has already read past it.
+INCREMENTAL_OVERLAP = timedelta(seconds=60)
+FETCH_CHUNK = 1000
+ADVISORY_LOCK_KEY = 7_406_001  # arbitrary, unique to the KOSH mirror
+
+
+class MirrorTable:
+    """One mirrored KOSH table: (KOSH column, mirror attribute) pairs, the key
+    that identifies a row on both sides, and the mirror model."""
+
+    def __init__(self, name: str, model, columns: List[tuple], key: tuple):
+        self.name = name
+        self.model = model
+        self.columns = columns
+        self.kosh_key, self.mirror_key = key
+
+    @property
+    def select_list(self) -> str:
+        return ", ".join(f'"{c}"' for c, _ in self.columns)
+
+    @property
+    def hash_expr(self) -> str:
+        return f"md5(ROW({self.select_list})::text)"
+
+    def to_mirror(self, row: dict) -> dict:
+        values = {attr: row[col] for col, attr in self.columns}
+        values["row_hash"] = row["row_hash"]
+        return values
+
+
+JOBS = MirrorTable("tblJob", KoshJobMirror, [
+    ("id", "kosh_id"), ("job_number", "job_number"), ("description", "description"),
+    ("customer", "customer"), ("cust_pn", "cust_pn"), ("build_qty", "build_qty"),
+    ("order_qty", "order_qty"), ("job_rev", "job_rev"), ("cust_rev", "cust_rev"),
+    ("wo_number", "wo_number"), ("status", "status"), ("notes", "notes"),
+    ("created_by", "created_by"), ("created_at", "created_at"), ("updated_at", "updated_at"),
+], key=("job_number", "job_number"))
+
+BOM = MirrorTable("tblBOM", KoshBomMirror, [
+    ("id", "kosh_id"), ("job", "job"), ("line", "line"), ("aci_pn", "aci_pn"),
+    ("DESC", "description"), ("mpn", "mpn"), ("man", "man"), ("qty", "qty"),
+    ("cost", "cost"), ("pou", "pou"), ("job_rev", "job_rev"), ("last_rev", "last_rev"),
+    ("cust", "cust"), ("cust_pn", "cust_pn"), ("cust_rev", "cust_rev"),
+    ("created_at", "created_at"), ("updated_at", "updated_at"),
+], key=("id", "kosh_id"))
+
+INVENTORY = "tblWhse_Inventory"
+
+INVENTORY_AGGREGATE_SQL = """
+    SELECT
+        COALESCE(w.item, '') AS item_key,
+        COALESCE(w.mpn, '') AS mpn_key,
+        COALESCE(SUM(CASE WHEN COALESCE(w.loc_to, '') != 'MFG Floor' THEN w.onhandqty ELSE 0 END), 0) AS stockroom_qty,
+        COALESCE(SUM(CASE WHEN w.loc_to = 'MFG Floor' THEN CAST(NULLIF(w.mfg_qty, '') AS INTEGER) ELSE 0 END), 0) AS mfg_floor_qty
+    FROM warehouse."tblWhse_Inventory" w
+    {where}
+    GROUP BY 1, 2
+"""
+
+# Column existence is looked up once per process — KOSH's schema doesn't move.
+_updated_at_support: Dict[str, bool] = {}
+
+
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def _aware(dt: Optional[datetime]) -> Optional[datetime]:
+    """SQLite hands timezone-aware columns back naive; treat those as UTC."""
+    if dt is not None and dt.tzinfo is None:
+        return dt.replace(tzinfo=timezone.utc)
+    return dt
+
+
+def _chunks(items: list, size: int = FETCH_CHUNK):
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+
+def _has_updated_at(cursor, table: str) -> bool:
+    if table not in _updated_at_support:
+        cursor.execute(
+            "SELECT 1 FROM information_schema.columns "
+            "WHERE table_schema = 'warehouse' AND table_name = %s AND column_name = 'updated_at'",
+            (table,),
+        )
+        _updated_at_support[table] = cursor.fetchone() is not None
+    return _updated_at_support[table]
+
+
+def _state(db, table: str) -> KoshSyncState:
+    state = db.query(KoshSyncState).filter(KoshSyncState.table_name == table).first()
+    if state is None:
+        state = KoshSyncState(table_name=table, rows=0, rows_changed=0)
+        db.add(state)
+        db.flush()
+    return state
+
+
+def _due_for_full(state: KoshSyncState, now: datetime) -> bool:
+    last_full = _aware(state.last_full_sync_at)
+    return last_full is None or (now - last_full).total_seconds() >= KOSH_MIRROR_FULL_EVERY
+
+
+# ─── row tables (tblJob, tblBOM) ─────────────────────────────────────────────
+
+def _apply_rows(db, spec: MirrorTable, rows: List[dict]) -> int:
+    """Upsert KOSH rows into the mirror, skipping rows whose hash is unchanged.
+    Returns the number of rows written."""
+    if not rows:
+        return 0
+    key_col = getattr(spec.model, spec.mirror_key)
+    incoming = {r[spec.kosh_key]: spec.to_mirror(r) for r in rows}
+    existing = {}
+    for chunk in _chunks(list(incoming)):
+        existing.update(db.query(key_col, spec.model.row_hash).filter(key_col.in_(chunk)).all())
+    inserts = [v for k, v in incoming.items() if k not in existing]
+    updates = [v for k, v in incoming.items() if k in existing and existing[k] != v["row_hash"]]
+    if inserts:
+        db.bulk_insert_mappings(spec.model, inserts)
+    if updates:
+        db.bulk_update_mappings(spec.model, updates)
+    return len(inserts) + len(updates)
+
+
+def _fetch_rows(cursor, spec: MirrorTable, where: str = "", params=()) -> List[dict]:
+    cursor.execute(
+        f'SELECT {spec.select_list}, {spec.hash_expr} AS row_hash FROM warehouse."{spec.name}" {where}',
+        params,
+    )
+    return cursor.fetchall()
+
+
+def _sync_rows_incremental(db, cursor, spec: MirrorTable, state: KoshSyncState) -> int:
+    if state.high_water_mark is None:
+        return _sync_rows_full(db, cursor, spec, state)
+    rows = _fetch_rows(cursor, spec, "WHERE updated_at >= %s",
+                       (state.high_water_mark - INCREMENTAL_OVERLAP,))
+    changed = _apply_rows(db, spec, rows)
+    marks = [r["updated_at"] for r in rows if r["updated_at"] is not None]
+    if marks:
+        state.high_water_mark = max([state.high_water_mark] + marks)
+    return changed
+
+
+def _sync_rows_full(db, cursor, spec: MirrorTable, state: KoshSyncState) -> int:
+    """Hash diff: compare (key, hash) for the whole table, fetch what differs,
+    delete what KOSH no longer has."""
+    cursor.execute(f'SELECT "{spec.kosh_key}" AS k, {spec.hash_expr} AS h FROM warehouse."{spec.name}"')
+    remote = {r["k"]: r["h"] for r in cursor.fetchall()}
+    key_col = getattr(spec.model, spec.mirror_key)
+    local = dict(db.query(key_col, spec.model.row_hash).all())
+
+    stale_keys = [k for k, h in remote.items() if local.get(k) != h]
+    changed = 0
+    for chunk in _chunks(stale_keys):
+        rows = _fetch_rows(cursor, spec, f'WHERE "{spec.kosh_key}" = ANY(%s)', (chunk,))
+        changed += _apply_rows(db, spec, rows)
+
+    gone = [k for k in local if k not in remote]
+    for chunk in _chunks(gone):
+        db.query(spec.model).filter(key_col.in_(chunk)).delete(synchronize_session=False)
+    changed += len(gone)
+
+    if _has_updated_at(cursor, spec.name):
+        cursor.execute(f'SELECT MAX(updated_at) AS m FROM warehouse."{spec.name}"')
+        state.high_water_mark = cursor.fetchone()["m"]
+    return changed
+
+
+# ─── inventory aggregate ─────────────────────────────────────────────────────
+
+def _group_hash(row: dict) -> str:
+    return hashlib.md5(f'{row["stockroom_qty"]}|{row["mfg_floor_qty"]}'.encode()).hexdigest()
+
+
+def _apply_groups(db, groups: List[dict], replace_all: bool = False) -> int:
+    """Upsert aggregate groups. replace_all=True means `groups` is the whole
+    aggregate, so local groups missing from it are deleted."""
+    cols = (KoshInventoryMirror.id, KoshInventoryMirror.item_key,
+            KoshInventoryMirror.mpn_key, KoshInventoryMirror.row_hash)
+    if replace_all:
+        current_rows = db.query(*cols).all()
+    else:
+        current_rows = []
+        for chunk in _chunks(list({g["item_key"] for g in groups})):
+            current_rows += db.query(*cols).filter(KoshInventoryMirror.item_key.in_(chunk)).all()
+    existing = {(r.item_key, r.mpn_key): r for r in current_rows}
+
+    inserts, updates = [], []
+    for g in groups:
+        values = {
+            "item_key": g["item_key"],
+            "mpn_key": g["mpn_key"],
+            "stockroom_qty": int(g["stockroom_qty"] or 0),
+            "mfg_floor_qty": int(g["mfg_floor_qty"] or 0),
+        }
+        values["row_hash"] = _group_hash(values)
+        current = existing.get((g["item_key"], g["mpn_key"]))
+        if current is None:
+            inserts.append(values)
+        elif current.row_hash != values["row_hash"]:
+            updates.append({"id": current.id, **values})
+    if inserts:
+        db.bulk_insert_mappings(KoshInventoryMirror, inserts)
+    if updates:
+        db.bulk_update_mappings(KoshInventoryMirror, updates)
+
+    gone = []
+    if replace_all:
+        seen = {(g["item_key"], g["mpn_key"]) for g in groups}
+        gone = [r.id for key, r in existing.items() if key not in seen]
+        for chunk in _chunks(gone):
+            db.query(KoshInventoryMirror).filter(KoshInventoryMirror.id.in_(chunk)).delete(synchronize_session=False)
+    return len(inserts) + len(updates) + len(gone)
+
+
+def _sync_inventory_full(db, cursor, state: KoshSyncState) -> int:
+    cursor.execute(INVENTORY_AGGREGATE_SQL.format(where=""))
+    groups = cursor.fetchall()
+    changed = _apply_groups(db, groups, replace_all=True)
+    if _has_updated_at(cursor, INVENTORY):
+        cursor.execute('SELECT MAX(updated_at) AS m FROM warehouse."tblWhse_Inventory"')
+        state.high_water_mark = cursor.fetchone()["m"]
+    return changed
+
+
+def _sync_inventory_incremental(db, cursor, state: KoshSyncState) -> int:
+    """Recompute just the (item, mpn) groups that have rows touched since the
+    high-water mark. A row moved to another item leaves its old group stale
+    until the next hash-diff pass."""
+    if state.high_water_mark is None:
+        return _sync_inventory_full(db, cursor, state)
+    since = state.high_water_mark - INCREMENTAL_OVERLAP
+    cursor.execute(
+        'SELECT MAX(updated_at) AS m FROM warehouse."tblWhse_Inventory" WHERE updated_at >= %s', (since,)
+    )
+    mark = cursor.fetchone()["m"]
+    if mark is None:
+        return 0
+    cursor.execute(INVENTORY_AGGREGATE_SQL.format(where="""
+        WHERE (COALESCE(w.item, ''), COALESCE(w.mpn, '')) IN (
+            SELECT COALESCE(item, ''), COALESCE(mpn, '')
+            FROM warehouse."tblWhse_Inventory"
+            WHERE updated_at >= %s
+        )
+    """), (since,))
+    changed = _apply_groups(db, cursor.fetchall())
+    state.high_water_mark = max(state.high_water_mark, mark)
+    return changed
+
+
+# ─── driver ──────────────────────────────────────────────────────────────────
+
+def sync_table(db, cursor, table: str, force_full: bool = False) -> dict:
+    """One sync pass for one mirrored table; commits on success. Returns a
+    summary for logging."""
+    now = _utcnow()
+    state = _state(db, table)
+    full = force_full or _due_for_full(state, now) or not _has_updated_at(cursor, table)
+    if table == INVENTORY:
+        changed = (_sync_inventory_full if full else _sync_inventory_incremental)(db, cursor, state)
+        model = KoshInventoryMirror
+    else:
+        spec = JOBS if table == JOBS.name else BOM
+        changed = (_sync_rows_full if full else _sync_rows_incremental)(db, cursor, spec, state)
+        model = spec.model
+    state.last_synced_at = now
+    if full:
+        state.last_full_sync_at = now
+    state.rows_changed = changed
+    state.rows = db.query(model).count()
+    state.last_error = None
+    db.commit()
+    return {"table": table, "mode": "full" if full else "incremental", "changed": changed, "rows": state.rows}
+
+
+def run_mirror_sync(db, force_full: bool = False) -> List[dict]:
+    """Sync every mirrored table once. A table that fails keeps its previous
+    contents and records the error; the others still sync."""
+    results = []
+    with single_runner(db, ADVISORY_LOCK_KEY) as ours:
+        if not ours:
+            return [{"skipped": "another worker is syncing"}]
+        conn = kosh_pool.checkout(KOSH_MIRROR_STATEMENT_TIMEOUT_MS, long_running=True)
+        try:
+            cursor = conn.cursor(cursor_factory=RealDictCursor)
+            for table in (JOBS.name, BOM.name, INVENTORY):
+                try:
+                    results.append(sync_table(db, cursor, table, force_full=force_full))
+                except Exception as e:
+                    db.rollback()
+                    conn.rollback()
+                    state = _state(db, table)
+                    state.last_error = str(e)[:2000]
+                    state.last_error_at = _utcnow()
+                    db.commit()
+                    results.append({"table": table, "error": str(e)})
+        finally:
+            conn.close()
+    return results
+
+
+def mirror_status(db) -> dict:
+    """Sync-lag metric: per table, seconds since the last successful pass,
+    plus the overall (worst) lag."""
+    now = _utcnow()
+    tables = {}
+    for state in db.query(KoshSyncState).all():
+        synced = _aware(state.last_synced_at)
+        tables[state.table_name] = {
+            "lag_seconds": round((now - synced).total_seconds(), 1) if synced else None,
+            "last_synced_at": synced.isoformat() if synced else None,
+            "last_full_sync_at": _aware(state.last_full_sync_at).isoformat() if state.last_full_sync_at else None,
+            "high_water_mark": state.high_water_mark.isoformat() if state.high_water_mark else None,
+            "rows": state.rows,
+            "rows_changed": state.rows_changed,
+            "last_error": state.last_error,
+        }
+    lags = [t["lag_seconds"] for t in tables.values()]
+    worst = None if not lags or None in lags else max(lags)
+    return {
+        "enabled": KOSH_MIRROR_ENABLED,
+        "sync_lag_seconds": worst,
+        "max_lag_seconds": KOSH_MIRROR_MAX_LAG,
+        "tables": tables,
+    }
+
+
+def mirror_is_fresh(db, table: str = JOBS.name) -> bool:
+    """True when `table` has been fully loaded at least once and synced within
+    KOSH_MIRROR_MAX_LAG — i.e. safe to answer from instead of KOSH."""
+    state = db.query(KoshSyncState).filter(KoshSyncState.table_name == table).first()
+    if state is None or state.last_full_sync_at is None or state.last_synced_at is None:
+        return False
+    return (_utcnow() - _aware(state.last_synced_at)).total_seconds() <= KOSH_MIRROR_MAX_LAG
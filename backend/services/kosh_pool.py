@@ -0,0 +1,437 @@
+"""
+KOSH connection pool.
+
+KOSH is the warehouse database (warehouse."tblJob", "tblBOM",
+"tblWhse_Inventory") that NEXUS reads but never writes. Every KOSH read used to
+open its own psycopg2 connection and close it on return, so each jobs / BOM /
+stock / kitting page paid a TCP + auth handshake per call. One process-wide pool
+now serves every KOSH caller:
+
+  - size limits: at most KOSH_POOL_MAX connections are checked out at once; a
+    caller past that waits up to KOSH_POOL_TIMEOUT seconds for a slot, then
+    fails fast instead of piling more connections onto KOSH.
+  - health checks: a connection idle longer than KOSH_POOL_PING_AFTER seconds
+    is pinged (SELECT 1) before it is handed out, and one older than
+    KOSH_POOL_RECYCLE seconds is replaced, so a KOSH restart or a dropped
+    tunnel never surfaces as a request error.
+  - per-checkout statement timeouts: every checkout runs under
+    KOSH_STATEMENT_TIMEOUT_MS unless the caller asks for another limit.
+  - metrics: stats() reports checkouts, waits, timeouts, connects and discards
+    (served at GET /jobs/kosh/metrics).
+  - circuit breaker: checkout() goes through services.kosh_breaker, so once
+    KOSH keeps failing (or crawling) callers fail fast with KoshCircuitOpen
+    instead of each waiting out a connect or statement timeout.
+
+Worker processes each get their own pool — psycopg2 connections must not cross
+a fork — so KOSH sees at most workers × KOSH_POOL_MAX connections from NEXUS.
+"""
+
+import os
+import time
+import logging
+import threading
+from contextlib import contextmanager
+from typing import Callable, Optional
+
+import psycopg2
+
+from services import kosh_breaker as breaker_module
+from services.kosh_breaker import CircuitBreaker
+
+logger = logging.getLogger(__name__)
+
+# KOSH database connection config (same PostgreSQL server, different database)
+KOSH_DB_CONFIG = {
+    'host': os.getenv('KOSH_DB_HOST', 'aci-database'),
+    'port': int(os.getenv('KOSH_DB_PORT', 5432)),
+    'database': os.getenv('KOSH_DB_NAME', 'kosh'),
+    'user': os.getenv('KOSH_DB_USER', 'stockpick_user'),
+    'password': os.getenv('KOSH_DB_PASSWORD', 'stockpick_pass'),
+}
+
+KOSH_POOL_MIN = int(os.getenv('KOSH_POOL_MIN', 1))
+KOSH_POOL_MAX = int(os.getenv('KOSH_POOL_MAX', 8))
+KOSH_POOL_TIMEOUT = float(os.getenv('KOSH_POOL_TIMEOUT', 5))  # seconds to wait for a free slot
+KOSH_CONNECT_TIMEOUT = int(os.getenv('KOSH_CONNECT_TIMEOUT', 5))  # seconds, psycopg2 connect_timeout
+KOSH_STATEMENT_TIMEOUT_MS = int(os.getenv('KOSH_STATEMENT_TIMEOUT_MS', 15000))
+KOSH_POOL_RECYCLE = float(os.getenv('KOSH_POOL_RECYCLE', 300))  # seconds, same as the NEXUS engine
+KOSH_POOL_PING_AFTER = float(os.getenv('KOSH_POOL_PING_AFTER', 30))  # idle seconds before a pre-ping
+
+
+class KoshPoolTimeout(Exception):
+    """No KOSH connection became free within the checkout timeout."""
+
+
+def is_outage(exc: BaseException) -> bool:
+    """Does this error say KOSH is unreachable or overloaded (as opposed to a
+    bad query)? Only these count against the circuit breaker. Statement
+    timeouts (QueryCanceled) are OperationalErrors."""
+    return isinstance(exc, (psycopg2.OperationalError, psycopg2.InterfaceError, KoshPoolTimeout, OSError))
+
+
+def _default_connect():
+    return psycopg2.connect(connect_timeout=KOSH_CONNECT_TIMEOUT, **KOSH_DB_CONFIG)
+
+
+class _Slot:
+    """A pooled connection plus the bookkeeping the health checks need."""
+
+    __slots__ = ("conn", "created_at", "last_used", "statement_timeout_ms")
+
+    def __init__(self, conn):
+        now = time.monotonic()
+        self.conn = conn
+        self.created_at = now
+        self.last_used = now
+        self.statement_timeout_ms = None  # unknown until the first checkout sets it
+
+
+class KoshPool:
+    """Thread-safe, bounded pool of KOSH connections.
+
+    Connections are opened lazily up to `maxconn` and reused LIFO (the most
+    recently returned one is the warmest). `connect` is injectable so tests and
+    the offline benchmark can stand in for a real server.
+    """
+
+    def __init__(
+        self,
+        connect: Callable = _default_connect,
+        minconn: int = KOSH_POOL_MIN,
+        maxconn: int = KOSH_POOL_MAX,
+        checkout_timeout: float = KOSH_POOL_TIMEOUT,
+        statement_timeout_ms: int = KOSH_STATEMENT_TIMEOUT_MS,
+        recycle_seconds: float = KOSH_POOL_RECYCLE,
+        ping_after_seconds: float = KOSH_POOL_PING_AFTER,
+    ):
+        if maxconn < 1:
+            raise ValueError("maxconn must be at least 1")
+        self._connect = connect
+        self.minconn = max(0, min(minconn, maxconn))
+        self.maxconn = maxconn
+        self.checkout_timeout = checkout_timeout
+        self.statement_timeout_ms = statement_timeout_ms
+        self.recycle_seconds = recycle_seconds
+        self.ping_after_seconds = ping_after_seconds
+
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(maxconn)
+        self._idle: list = []
+        self._checked_out: dict = {}  # id(conn) -> _Slot
+        self._closed = False
+        self._counters = {
+            "checkouts": 0,
+            "waits": 0,
+            "wait_seconds": 0.0,
+            "timeouts": 0,
+            "connects": 0,
+            "connect_errors": 0,
+            "pings": 0,
+            "discarded": 0,
+            "recycled": 0,
+        }
+
+    # ─── checkout / return ──────────────────────────────────────────────
+
+    def acquire(self, statement_timeout_ms: Optional[int] = None):
+        """Check out a healthy connection. Blocks up to checkout_timeout for a
+        free slot, then raises KoshPoolTimeout. Pair with release()."""
+        if self._closed:
+            raise RuntimeError("KOSH pool is closed")
+        started = time.monotonic()
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                self._counters["waits"] += 1
+            if not self._slots.acquire(timeout=self.checkout_timeout):
+                with self._lock:
+                    self._counters["timeouts"] += 1
+                raise KoshPoolTimeout(
+                    f"no KOSH connection free within {self.checkout_timeout}s "
+                    f"({self.maxconn} in use)"
+                )
+            with self._lock:
+                self._counters["wait_seconds"] += time.monotonic() - started
+
+        try:
+            slot = self._take_healthy()
+            self._apply_statement_timeout(slot, statement_timeout_ms or self.statement_timeout_ms)
+        except Exception:
+            self._slots.release()
+            raise
+
+        slot.last_used = time.monotonic()
+        with self._lock:
+            self._checked_out[id(slot.conn)] = slot
+            self._counters["checkouts"] += 1
+        return slot.conn
+
+    def release(self, conn, discard: bool = False) -> None:
+        """Return a connection. Any open transaction is rolled back so the next
+        borrower starts clean; a connection that cannot roll back is dropped."""
+        with self._lock:
+            slot = self._checked_out.pop(id(conn), None)
+        if slot is None:
+            # Not ours (or already returned) — never double-release the slot.
+            return
+        try:
+            if not discard and not conn.closed:
+                try:
+                    conn.rollback()
+                except Exception:
+                    discard = True
+            if discard or conn.closed or self._closed:
+                self._discard(slot)
+            else:
+                slot.last_used = time.monotonic()
+                with self._lock:
+                    self._idle.append(slot)
+        finally:
+            self._slots.release()
+
+    @contextmanager
+    def connection(self, statement_timeout_ms: Optional[int] = None):
+        """`with kosh_pool.connection() as conn:` — checkout and guaranteed return."""
+        conn = self.acquire(statement_timeout_ms)
+        try:
+            yield conn
+        finally:
+            self.release(conn)
+
+    # ─── internals ──────────────────────────────────────────────────────
+
+    def _take_healthy(self) -> _Slot:
+        while True:
+            with self._lock:
+                slot = self._idle.pop() if self._idle else None
+            if slot is None:
+                return self._open()
+            now = time.monotonic()
+            if slot.conn.closed:
+                self._discard(slot)
+                continue
+            if self.recycle_seconds and now - slot.created_at > self.recycle_seconds:
+                with self._lock:
+                    self._counters["recycled"] += 1
+                self._discard(slot)
+                continue
+            if self.ping_after_seconds is not None and now - slot.last_used > self.ping_after_seconds:
+                with self._lock:
+                    self._counters["pings"] += 1
+                if not self._ping(slot.conn):
+                    self._discard(slot)
+                    continue
+            return slot
+
+    def _open(self) -> _Slot:
+        try:
+            conn = self._connect()
+        except Exception:
+            with self._lock:
+                self._counters["connect_errors"] += 1
+            raise
+        with self._lock:
+            self._counters["connects"] += 1
+        return _Slot(conn)
+
+    @staticmethod
+    def _ping(conn) -> bool:
+        try:
+            cur = conn.cursor()
+            try:
+                cur.execute("SELECT 1")
+                cur.fetchone()
+            finally:
+                cur.close()
+            conn.rollback()
+            return True
+        except Exception:
+            return False
+
+    @staticmethod
+    def _apply_statement_timeout(slot: _Slot, timeout_ms: int) -> None:
+        # SET is session-scoped once committed, so it only has to be issued when
+        # this checkout wants a different limit from the last one.
+        if slot.statement_timeout_ms == timeout_ms:
+            return
+        cur = slot.conn.cursor()
+        try:
+            cur.execute("SET statement_timeout = %s", (int(timeout_ms),))
+        finally:
+            cur.close()
+        slot.conn.commit()
+        slot.statement_timeout_ms = timeout_ms
+
+    def _discard(self, slot: _Slot) -> None:
+        with self._lock:
+            self._counters["discarded"] += 1
+        try:
+            slot.conn.close()
+        except Exception:
+            pass
+
+    # ─── lifecycle / metrics ────────────────────────────────────────────
+
+    def warm(self) -> None:
+        """Open `minconn` connections up front. Failures are logged, not raised —
+        KOSH being down must never stop NEXUS from starting."""
+        for _ in range(self.minconn - len(self._idle)):
+            try:
+                slot = self._open()
+            except Exception as e:
+                logger.warning(f"KOSH pool warm-up failed: {e}")
+                return
+            with self._lock:
+                self._idle.append(slot)
+
+    def close(self) -> None:
+        """Close every idle connection; checked-out ones close on return."""
+        with self._lock:
+            self._closed = True
+            idle, self._idle = self._idle, []
+        for slot in idle:
+            try:
+                slot.conn.close()
+            except Exception:
+                pass
+
+    def stats(self) -> dict:
+        with self._lock:
+            counters = dict(self._counters)
+            in_use = len(self._checked_out)
+            idle = len(self._idle)
+        counters["wait_seconds"] = round(counters["wait_seconds"], 3)
+        return {
+            "max_size": self.maxconn,
+            "in_use": in_use,
+            "idle": idle,
+            "statement_timeout_ms": self.statement_timeout_ms,
+            **counters,
+        }
+
+
+class _ReportingCursor:
+    """Cursor wrapper that reports each execute()'s outcome and latency to the
+    circuit breaker. Everything else is delegated to the real cursor. With
+    count_slow off, a slow query still reports a healthy call but not its
+    latency."""
+
+    def __init__(self, cursor, breaker: CircuitBreaker, count_slow: bool = True):
+        self._cursor = cursor
+        self._breaker = breaker
+        self._count_slow = count_slow
+
+    def execute(self, *args, **kwargs):
+        started = time.monotonic()
+        try:
+            result = self._cursor.execute(*args, **kwargs)
+        except Exception as e:
+            if is_outage(e):
+                self._breaker.record_failure()
+            raise
+        self._breaker.record_success(time.monotonic() - started if self._count_slow else 0.0)
+        return result
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+    def __iter__(self):
+        return iter(self._cursor)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self._cursor.close()
+        return False
+
+
+class PooledConnection:
+    """A checked-out psycopg2 connection whose close() returns it to the pool.
+
+    Lets the existing `conn = get_kosh_connection(); try: ... finally:
+    conn.close()` call sites use the pool unchanged. Everything else (commit,
+    rollback, ...) is delegated to the real connection; cursors additionally
+    report to the circuit breaker when one is given.
+    """
+
+    def __init__(self, pool: KoshPool, conn, breaker: Optional[CircuitBreaker] = None,
+                 count_slow: bool = True):
+        self._pool = pool
+        self._conn = conn
+        self._breaker = breaker
+        self._count_slow = count_slow
+        self._returned = False
+
+    def cursor(self, *args, **kwargs):
+        cursor = self._conn.cursor(*args, **kwargs)
+        if self._breaker is None:
+            return cursor
+        return _ReportingCursor(cursor, self._breaker, self._count_slow)
+
+    def close(self) -> None:
+        if not self._returned:
+            self._returned = True
+            self._pool.release(self._conn)
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
+
+
+# Process-wide pool. Created lazily on first use so importing this module (and
+# therefore the routers) never touches the network.
+_pool: Optional[KoshPool] = None
+_pool_lock = threading.Lock()
+
+
+def get_kosh_pool() -> KoshPool:
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = KoshPool()
+    return _pool
+
+
+def set_kosh_pool(pool: Optional[KoshPool]) -> Optional[KoshPool]:
+    """Swap the process-wide pool (tests, benchmarks). Returns the old one."""
+    global _pool
+    with _pool_lock:
+        old, _pool = _pool, pool
+    return old
+
+
+def checkout(statement_timeout_ms: Optional[int] = None, long_running: bool = False) -> PooledConnection:
+    """Check a connection out of the process-wide pool; close() returns it.
+
+    Raises KoshCircuitOpen without touching the network while the breaker is
+    open. Connect failures and pool exhaustion count against the breaker.
+    long_running is for batch work that is slow by design (the mirror's full
+    pulls): its queries are exempt from the breaker's slow-call rule, so a
+    big sync cannot push the interactive pages into degraded mode. Its
+    failures still count.
+    """
+    breaker = breaker_module.kosh_breaker
+    breaker.check()
+    pool = get_kosh_pool()
+    try:
+        conn = pool.acquire(statement_timeout_ms)
+    except Exception as e:
+        if is_outage(e):
+            breaker.record_failure()
+        raise
+    return PooledConnection(pool, conn, breaker, count_slow=not long_running)
+
+
+def close_kosh_pool() -> None:
+    global _pool
+    with _pool_lock:
+        pool, _pool = _pool, None
+    if pool is not None:
+        pool.close()
@@ -0,0 +1,105 @@
+"""
+Labor anomaly detection for /analytics/all.
+
+Three classes of suspicious labor entry, each found by one query that joins
+the entry to its traveler and employee and projects only the columns the
+anomaly card shows — the query count is the same for zero anomalies or five
+hundred:
+
+  - forgotten_clockout: an open timer running longer than
+    ANOMALY_FORGOTTEN_CLOCKOUT_HOURS (high severity past twice that).
+  - suspiciously_short: a closed entry of under ANOMALY_SHORT_ENTRY_MINUTES
+    logged in the last ANOMALY_LOOKBACK_DAYS.
+  - unusually_long: a closed entry of over ANOMALY_LONG_ENTRY_HOURS logged in
+    the last ANOMALY_LOOKBACK_DAYS.
+
+The short and long lists keep the newest ANOMALY_LIST_LIMIT entries each.
+"""
+
+import os
+from datetime import datetime, timedelta, timezone
+from typing import List, Optional
+
+from models import LaborEntry, Traveler, User
+
+ANOMALY_FORGOTTEN_CLOCKOUT_HOURS = float(os.getenv('ANOMALY_FORGOTTEN_CLOCKOUT_HOURS', 12))
+ANOMALY_SHORT_ENTRY_MINUTES = float(os.getenv('ANOMALY_SHORT_ENTRY_MINUTES', 2))
+ANOMALY_LONG_ENTRY_HOURS = float(os.getenv('ANOMALY_LONG_ENTRY_HOURS', 10))
+ANOMALY_LOOKBACK_DAYS = int(os.getenv('ANOMALY_LOOKBACK_DAYS', 7))
+ANOMALY_LIST_LIMIT = int(os.getenv('ANOMALY_LIST_LIMIT', 20))
+
+SEVERITY_ORDER = {"high": 0, "medium": 1, "low": 2}
+
+
+def _entries(db):
+    """Labor entries with just what an anomaly card needs, traveler and
+    employee joined in."""
+    return db.query(
+        LaborEntry.id, LaborEntry.work_center, LaborEntry.start_time, LaborEntry.hours_worked,
+        Traveler.job_number, User.first_name, User.last_name,
+    ).outerjoin(Traveler, Traveler.id == LaborEntry.traveler_id
+    ).outerjoin(User, User.id == LaborEntry.employee_id)
+
+
+def _as_utc(value: datetime) -> datetime:
+    return value.replace(tzinfo=timezone.utc) if value.tzinfo is None else value
+
+
+def _anomaly(row, kind: str, severity: str, hours: float, message: str) -> dict:
+    return {
+        "type": kind,
+        "severity": severity,
+        "entry_id": row.id,
+        "job_number": row.job_number or "Unknown",
+        "employee_name": f"{row.first_name} {row.last_name}" if row.first_name is not None else "Unknown",
+        "work_center": row.work_center or "Unknown",
+        "hours_running": hours,
+        "start_time": row.start_time.isoformat() if row.start_time else None,
+        "message": message,
+    }
+
+
+def detect_labor_anomalies(
+    db,
+    now: Optional[datetime] = None,
+    forgotten_clockout_hours: float = ANOMALY_FORGOTTEN_CLOCKOUT_HOURS,
+    short_entry_minutes: float = ANOMALY_SHORT_ENTRY_MINUTES,
+    long_entry_hours: float = ANOMALY_LONG_ENTRY_HOURS,
+) -> List[dict]:
+    """Every anomaly, high severity first. Three queries."""
+    now = now or datetime.now(timezone.utc)
+    recent = now - timedelta(days=ANOMALY_LOOKBACK_DAYS)
+    anomalies = []
+
+    forgotten = _entries(db).filter(
+        LaborEntry.end_time.is_(None),
+        LaborEntry.is_completed == False,
+        LaborEntry.start_time < now - timedelta(hours=forgotten_clockout_hours),
+    ).order_by(LaborEntry.start_time).all()
+    for row in forgotten:
+        hours_running = round((now - _as_utc(row.start_time)).total_seconds() / 3600, 1)
+        anomalies.append(_anomaly(
+            row, "forgotten_clockout", "high" if hours_running > forgotten_clockout_hours * 2 else "medium",
+            hours_running, f"Running for {hours_running}h without clock-out"))
+
+    short = _entries(db).filter(
+        LaborEntry.end_time.isnot(None),
+        LaborEntry.hours_worked < short_entry_minutes / 60,
+        LaborEntry.hours_worked > 0,
+        LaborEntry.created_at > recent,
+    ).order_by(LaborEntry.created_at.desc()).limit(ANOMALY_LIST_LIMIT).all()
+    for row in short:
+        anomalies.append(_anomaly(row, "suspiciously_short", "low", round(row.hours_worked, 3),
+                                  f"Only {round(row.hours_worked * 60, 1)} minutes logged"))
+
+    long = _entries(db).filter(
+        LaborEntry.end_time.isnot(None),
+        LaborEntry.hours_worked > long_entry_hours,
+        LaborEntry.created_at > recent,
+    ).order_by(LaborEntry.created_at.desc()).limit(ANOMALY_LIST_LIMIT).all()
+    for row in long:
+        anomalies.append(_anomaly(row, "unusually_long", "medium", round(row.hours_worked, 1),
+                                  f"{round(row.hours_worked, 1)}h logged in single entry"))
+
+    anomalies.sort(key=lambda a: SEVERITY_ORDER.get(a["severity"], 3))
+    return anomalies
@@ -0,0 +1,163 @@
+"""
+End-of-shift auto-stop for forgotten labor timers.
+
+A timer left running from an earlier shop day is stopped at its shift
+cutoff (LABOR_AUTO_STOP_HOUR, 17:00 shop time). This used to happen inside
+GET /labor/init and GET /labor/check-auto-stop — reads that loaded every
+running entry, queried each one's pauses and committed — and again, by
+slightly different rules, in POST /labor/auto-stop-5pm. auto_stop_labor() is now the one implementation:
+
+  - main.py runs it every LABOR_AUTO_STOP_INTERVAL seconds; POST
+    /labor/auto-stop-5pm runs it on demand. On Postgres it holds an advisory
+    lock (utils.db_helpers.single_runner), so one worker runs it at a time.
+  - An entry's cutoff is the first LABOR_AUTO_STOP_HOUR at or after its
+    start, in LABOR_AUTO_STOP_TIMEZONE (the server's zone when unset). As
+    /labor/init did, only entries started before today (shop time) are
+    stopped, so same-day overtime past 17:00 keeps running; set
+    LABOR_AUTO_STOP_SAME_DAY=true to stop today's timers at today's cutoff
+    too. Open entries past their cutoff come from one projection query and
+    are grouped by cutoff — normally a single group — and each group is
+    closed by one UPDATE: end_time is the cutoff, hours_worked is (cutoff - start_time)
+    minus the entry's summed pause durations, computed in SQL, never below
+    zero.
+  - The UPDATE only matches entries that are still open, so a rerun, a second
+    worker or an operator stopping the timer meanwhile closes nothing twice.
+  - A bulk UPDATE bypasses the ORM flush hooks, so the closed rows (RETURNING)
+    are handed to the commit hooks by hand: labor rollup cells, traveler
+    progress counters and labor.stopped change events. The ORM UPDATE itself
+    still bumps the labor_entries table version.
+"""
+
+import os
+from collections import defaultdict
+from datetime import datetime, time, timedelta, timezone
+from typing import Optional
+
+from sqlalchemy import Numeric, case, cast, func, literal, select, update
+from sqlalchemy.types import DateTime
+
+from models import LaborEntry, PauseLog
+from utils.db_helpers import single_runner
+
+LABOR_AUTO_STOP_HOUR = int(os.getenv('LABOR_AUTO_STOP_HOUR', 17))
+LABOR_AUTO_STOP_INTERVAL = int(os.getenv('LABOR_AUTO_STOP_INTERVAL', 300))  # seconds
+LABOR_AUTO_STOP_TIMEZONE = os.getenv('LABOR_AUTO_STOP_TIMEZONE', '')
+LABOR_AUTO_STOP_SAME_DAY = os.getenv('LABOR_AUTO_STOP_SAME_DAY', 'false').lower() in ('1', 'true', 'yes')
+ADVISORY_LOCK_KEY = 7_406_004  # arbitrary, unique to labor auto-stop
+
+
+def _shop_zone():
+    if LABOR_AUTO_STOP_TIMEZONE:
+        from zoneinfo import ZoneInfo
+        return ZoneInfo(LABOR_AUTO_STOP_TIMEZONE)
+    return datetime.now().astimezone().tzinfo
+
+
+def _as_utc(value: datetime) -> datetime:
+    return value.replace(tzinfo=timezone.utc) if value.tzinfo is None else value.astimezone(timezone.utc)
+
+
+def cutoff_for(start_time: datetime, zone=None) -> datetime:
+    """The first shift cutoff at or after start_time, in UTC. Naive start
+    times are taken to be UTC, as everywhere else in labor."""
+    zone = zone or _shop_zone()
+    local = _as_utc(start_time).astimezone(zone)
+    cutoff = datetime.combine(local.date(), time(LABOR_AUTO_STOP_HOUR), tzinfo=zone)
+    if cutoff < local:
+        cutoff = datetime.combine(local.date() + timedelta(days=1), time(LABOR_AUTO_STOP_HOUR), tzinfo=zone)
+    return cutoff.astimezone(timezone.utc)
+
+
+def latest_cutoff(now: datetime, zone=None) -> datetime:
+    """The most recent shift cutoff at or before now, in UTC."""
+    zone = zone or _shop_zone()
+    local = _as_utc(now).astimezone(zone)
+    cutoff = datetime.combine(local.date(), time(LABOR_AUTO_STOP_HOUR), tzinfo=zone)
+    if cutoff > local:
+        cutoff = datetime.combine(local.date() - timedelta(days=1), time(LABOR_AUTO_STOP_HOUR), tzinfo=zone)
+    return cutoff.astimezone(timezone.utc)
+
+
+def started_before(now: datetime, zone=None) -> datetime:
+    """Only entries started before this instant (UTC) are auto-stopped:
+    the start of today in shop time, or the latest cutoff with
+    LABOR_AUTO_STOP_SAME_DAY."""
+    zone = zone or _shop_zone()
+    if LABOR_AUTO_STOP_SAME_DAY:
+        return latest_cutoff(now, zone)
+    today = _as_utc(now).astimezone(zone).date()
+    return datetime.combine(today, time(0), tzinfo=zone).astimezone(timezone.utc)
+
+
+def _seconds_until(db, cutoff: datetime, column):
+    """SQL seconds from `column` to the constant `cutoff`."""
+    if db.get_bind().dialect.name == "postgresql":
+        return func.extract('epoch', literal(cutoff, DateTime(timezone=True)) - column)
+    # SQLite keeps datetimes as naive text; labor times are stored as UTC.
+    return (func.julianday(cutoff.replace(tzinfo=None)) - func.julianday(column)) * 86400
+
+
+def _still_open():
+    return (
+        LaborEntry.end_time.is_(None),
+        LaborEntry.is_completed == False,
+        LaborEntry.deleted_at.is_(None),
+    )
+
+
+def auto_stop_labor(db, now: Optional[datetime] = None) -> dict:
+    """Stop every open timer whose shift cutoff has passed, and commit.
+    Returns {"completed_count", "cutoffs"}; {"skipped": ...} when another
+    worker holds the lock."""
+    now = now or datetime.now(timezone.utc)
+    zone = _shop_zone()
+    with single_runner(db, ADVISORY_LOCK_KEY) as got_lock:
+        if not got_lock:
+            return {"skipped": "another worker is auto-stopping"}
+
+        candidates = db.query(LaborEntry.id, LaborEntry.start_time).filter(
+            *_still_open(),
+            LaborEntry.start_time.isnot(None),
+            LaborEntry.start_time < started_before(now, zone),
+        ).all()
+        groups = defaultdict(list)
+        for row in candidates:
+            cutoff = cutoff_for(row.start_time, zone)
+            if cutoff <= now:
+                groups[cutoff].append(row.id)
+
+        paused_seconds = select(func.coalesce(func.sum(PauseLog.duration_seconds), 0)).where(
+            PauseLog.labor_entry_id == LaborEntry.id,
+            PauseLog.deleted_at.is_(None),
+        ).scalar_subquery()
+
+        closed = []
+        for cutoff, ids in sorted(groups.items()):
+            worked = _seconds_until(db, cutoff, LaborEntry.start_time) - paused_seconds
+            closed += db.execute(
+                update(LaborEntry)
+                .where(LaborEntry.id.in_(ids), *_still_open())
+                .values(
+                    end_time=cutoff,
+                    is_completed=True,
+                    hours_worked=func.round(cast(case((worked > 0, worked), else_=0) / 3600, Numeric), 2),
+                    updated_at=now,
+                )
+                .returning(LaborEntry.id, LaborEntry.traveler_id, LaborEntry.employee_id,
+                           LaborEntry.work_center, LaborEntry.start_time)
+                .execution_options(synchronize_session=False)
+            ).all()
+
+        if closed:
+            from services.change_events import labor_stopped_events
+            from services.labor_rollups import rollup_cell
+            cells = {rollup_cell(r.start_time, r.work_center, r.traveler_id, r.employee_id) for r in closed}
+            cells.discard(None)
+            db.info.setdefault("labor_rollup_touched", set()).update(cells)
+            db.info.setdefault("progress_touched", set()).update(r.traveler_id for r in closed if r.traveler_id)
+            db.info.setdefault("change_events", []).extend(labor_stopped_events(closed))
+        db.commit()
+        return {
+            "completed_count": len(closed),
+            "cutoffs": [c.isoformat() for c in sorted(groups)],
+        }
@@ -0,0 +1,154 @@
+"""
+Per-employee labor hours by day, week and month (/labor/hours-summary).
+
+The summary used to load every completed entry in the window as an ORM object,
+look its employee up with one query per entry, and bucket hours in Python —
+at payroll time, tens of thousands of round trips. Now:
+
+  - daily_hours() is one grouped query: completed labor summed per employee
+    per UTC start day (utils.time_buckets.bucket_column — date_trunc on
+    PostgreSQL), with the employee's name from a single join. Its result has
+    at most employees x days rows, whatever the number of entries.
+  - build_hours_summary() folds those rows into the weekly (Monday start),
+    monthly and daily breakdowns the endpoint has always returned.
+  - hours_csv() renders the same rows as CSV for payroll, one line per
+    employee per day, week or month, yielded a line at a time so the
+    response streams.
+
+scripts/bench_hours_summary.py times it against a generated table.
+"""
+
+import csv
+import io
+from collections import defaultdict
+from datetime import date, datetime, timedelta
+from typing import Iterable, Iterator, List, NamedTuple, Optional
+
+from sqlalchemy import func
+
+from models import LaborEntry, User
+from utils.time_buckets import bucket_column, bucket_start
+
+CSV_GRANULARITIES = ("day", "week", "month")
+
+
+class DailyHours(NamedTuple):
+    employee_id: int
+    employee_name: str
+    day: date
+    hours: float
+
+
+def _as_date(value) -> date:
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    return date.fromisoformat(str(value)[:10])
+
+
+def daily_hours(db, since: datetime, employee_id: Optional[int] = None) -> List[DailyHours]:
+    """Completed labor created since `since`, summed per employee per start
+    day, ordered by employee name then day. One query."""
+    day = bucket_column(db, LaborEntry.start_time, "day").label("day")
+    query = db.query(
+        LaborEntry.employee_id, User.first_name, User.last_name, day,
+        func.coalesce(func.sum(LaborEntry.hours_worked), 0).label("hours"),
+    ).join(User, User.id == LaborEntry.employee_id).filter(
+        LaborEntry.created_at >= since,
+        LaborEntry.is_completed == True,
+        LaborEntry.end_time.isnot(None),
+    )
+    if employee_id is not None:
+        query = query.filter(LaborEntry.employee_id == employee_id)
+    rows = query.group_by(LaborEntry.employee_id, User.first_name, User.last_name, day).all()
+    result = [DailyHours(r.employee_id, f"{r.first_name} {r.last_name}", _as_date(r.day), float(r.hours))
+              for r in rows]
+    result.sort(key=lambda r: (r.employee_name, r.employee_id, r.day))
+    return result
+
+
+def _bucket_key(day: date, granularity: str) -> str:
+    if granularity == "month":
+        return day.strftime("%Y-%m")
+    return bucket_start(day, granularity).strftime("%Y-%m-%d")
+
+
+def build_hours_summary(rows: Iterable[DailyHours]) -> List[dict]:
+    """The per-employee breakdowns of /labor/hours-summary, sorted by name."""
+    employees = {}
+    for row in rows:
+        data = employees.get(row.employee_id)
+        if data is None:
+            data = employees[row.employee_id] = {
+                "employee_id": row.employee_id,
+                "employee_name": row.employee_name,
+                "weekly_hours": defaultdict(float),
+                "monthly_hours": defaultdict(float),
+                "daily_hours": defaultdict(float),
+                "total_hours": 0,
+            }
+        data["weekly_hours"][_bucket_key(row.day, "week")] += row.hours
+        data["monthly_hours"][_bucket_key(row.day, "month")] += row.hours
+        data["daily_hours"][_bucket_key(row.day, "day")] += row.hours
+        data["total_hours"] += row.hours
+
+    summary = []
+    for data in employees.values():
+        summary.append({
+            "employee_id": data["employee_id"],
+            "employee_name": data["employee_name"],
+            "total_hours": round(data["total_hours"], 2),
+            "weekly_breakdown": [
+                {
+                    "week_start": week,
+                    "week_end": (date.fromisoformat(week) + timedelta(days=6)).strftime("%Y-%m-%d"),
+                    "hours": round(hours, 2),
+                }
+                for week, hours in sorted(data["weekly_hours"].items())
+            ],
+            "monthly_breakdown": [
+                {
+                    "month": month,
+                    "month_name": date.fromisoformat(month + "-01").strftime("%B %Y"),
+                    "hours": round(hours, 2),
+                }
+                for month, hours in sorted(data["monthly_hours"].items())
+            ],
+            "daily_breakdown": [
+                {"date": day, "hours": round(hours, 2)}
+                for day, hours in sorted(data["daily_hours"].items())
+            ],
+        })
+    summary.sort(key=lambda x: x["employee_name"])
+    return summary
+
+
+def hours_csv(rows: Iterable[DailyHours], granularity: str = "day") -> Iterator[str]:
+    """CSV lines — employee_id, employee_name, period, hours — one per
+    employee per `granularity` bucket, header first. `rows` must be ordered
+    by employee (daily_hours() is)."""
+    if granularity not in CSV_GRANULARITIES:
+        raise ValueError(f"Unknown granularity: {granularity!r}")
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+
+    def line(*values) -> str:
+        buffer.seek(0)
+        buffer.truncate()
+        writer.writerow(values)
+        return buffer.getvalue()
+
+    yield line("employee_id", "employee_name", granularity, "hours")
+    current, totals = None, {}
+    for row in rows:
+        if current is not None and row.employee_id != current.employee_id:
+            for period, hours in sorted(totals.items()):
+                yield line(current.employee_id, current.employee_name, period, round(hours, 2))
+            totals = {}
+        current = row
+        key = _bucket_key(row.day, granularity)
+        totals[key] = totals.get(key, 0.0) + row.hours
+    if current is not None:
+        for period, hours in sorted(totals.items()):
+            yield line(current.employee_id, current.employee_name, period, round(hours, 2))
@@ -0,0 +1,220 @@
+"""
+Daily labor rollups.
+
+The dashboard stats and the labor summary used to sum labor_entries over the
+requested range on every call — a scan that grows with every shift clocked.
+models.LaborDailyRollup holds closed labor pre-summed per
+day x work center x traveler x employee, so any date range is a sum over a few
+rows per day:
+
+  - rollup_cells() names the cells a labor entry sits in, before and after an
+    unflushed change. models.install_labor_rollups notes them on flush, and
+    recompute_rollup_cells() rebuilds just those cells from labor_entries in
+    before_commit — closing, editing or soft-deleting an entry through the ORM
+    moves its hours in the same transaction. Recomputing a cell (rather than
+    adding deltas) means a cell is always exactly what its entries say. Each
+    cell row is upserted and so row-locked before its entries are summed, so
+    two labor writes to one cell neither collide on the unique constraint nor
+    lose each other's hours: the second waits and sums after the first.
+  - rebuild_labor_rollups() recomputes a whole range from labor_entries: the
+    backfill for entries that predate the table. main.py runs it at startup
+    when the table is empty; scripts/rebuild_labor_rollups.py runs it by hand.
+  - reconcile_labor_rollups() is the repair for writes the ORM never sees
+    (bulk UPDATEs, manual SQL): it compares the last
+    LABOR_ROLLUP_RECONCILE_DAYS days against labor_entries and recomputes the
+    cells that disagree through the locked path above. main.py runs it every
+    LABOR_ROLLUP_RECONCILE_INTERVAL seconds.
+
+A cell's day is the UTC date of the entry's start_time. Only entries with an
+end_time are counted; open timers are read live. Soft-deleted entries drop
+out because the recompute queries go through the session's soft-delete filter.
+"""
+
+import os
+from collections import defaultdict
+from datetime import date, datetime, time, timedelta, timezone
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from sqlalchemy import func, case, delete, select, update, inspect as sa_inspect
+
+from models import LaborEntry, LaborDailyRollup
+from utils.db_helpers import single_runner
+
+Cell = Tuple[date, str, int, int]  # (day, work_center, traveler_id, employee_id)
+
+REBUILD_BATCH = 5000
+LABOR_ROLLUP_RECONCILE_INTERVAL = int(os.getenv('LABOR_ROLLUP_RECONCILE_INTERVAL', 3600))  # seconds
+LABOR_ROLLUP_RECONCILE_DAYS = int(os.getenv('LABOR_ROLLUP_RECONCILE_DAYS', 35))
+ADVISORY_LOCK_KEY = 7_406_005  # arbitrary, unique to labor rollup reconciliation
+
+
+def labor_day(start_time: Optional[datetime]) -> Optional[date]:
+    """The rollup day of a start_time: its UTC date. Naive values are taken
+    to be UTC already."""
+    if start_time is None:
+        return None
+    if start_time.tzinfo is not None:
+        start_time = start_time.astimezone(timezone.utc)
+    return start_time.date()
+
+
+def day_start(day: date) -> datetime:
+    return datetime.combine(day, time.min, tzinfo=timezone.utc)
+
+
+def rollup_cell(start_time, work_center, traveler_id, employee_id) -> Optional[Cell]:
+    day = labor_day(start_time)
+    if day is None or traveler_id is None or employee_id is None:
+        return None
+    return (day, work_center or '', traveler_id, employee_id)
+
+
+def rollup_cells(entry: LaborEntry) -> Set[Cell]:
+    """The cells this entry counts toward now and counted toward before the
+    pending change (its attribute history is still set during after_flush)."""
+    state = sa_inspect(entry)
+    current, previous = {}, {}
+    for attr in ("start_time", "work_center", "traveler_id", "employee_id"):
+        history = state.attrs[attr].history
+        current[attr] = getattr(entry, attr)
+        previous[attr] = history.deleted[0] if history.deleted else current[attr]
+    cells = {rollup_cell(**current), rollup_cell(**previous)}
+    cells.discard(None)
+    return cells
+
+
+def _aggregates():
+    return (
+        func.coalesce(func.sum(case((LaborEntry.hours_worked > 0, LaborEntry.hours_worked), else_=0)), 0),
+        func.count(LaborEntry.id),
+        func.coalesce(func.sum(case((LaborEntry.is_completed == True, 1), else_=0)), 0),
+    )
+
+
+def _cell_filter(table, cell: Cell):
+    day, work_center, traveler_id, employee_id = cell
+    return (table.c.day == day, table.c.work_center == work_center,
+            table.c.traveler_id == traveler_id, table.c.employee_id == employee_id)
+
+
+def _lock_cell(db, cell: Cell) -> None:
+    """Make sure the cell's row exists and hold its row lock for the rest of
+    the transaction. A cell another transaction is inserting or updating is
+    waited for rather than violating the unique constraint."""
+    table = LaborDailyRollup.__table__
+    day, work_center, traveler_id, employee_id = cell
+    row = {"day": day, "work_center": work_center, "traveler_id": traveler_id,
+           "employee_id": employee_id, "hours": 0.0, "entries": 0, "completed_entries": 0}
+    dialect = db.get_bind().dialect.name
+    if dialect in ("postgresql", "sqlite"):
+        if dialect == "postgresql":
+            from sqlalchemy.dialects.postgresql import insert
+        else:
+            from sqlalchemy.dialects.sqlite import insert
+        db.execute(insert(table).values(row).on_conflict_do_update(
+            index_elements=[table.c.day, table.c.work_center, table.c.traveler_id, table.c.employee_id],
+            set_={"entries": table.c.entries},
+        ))
+        return
+    if db.execute(select(table.c.id).where(*_cell_filter(table, cell)).with_for_update()).first() is None:
+        db.execute(table.insert().values(row))
+
+
+def recompute_rollup_cells(db, cells: Iterable[Cell]) -> int:
+    """Rebuild these rollup cells from labor_entries in the caller's
+    transaction. Cells are locked in sorted order, so transactions touching
+    overlapping cells cannot deadlock, and each is summed only once locked.
+    Cells left with no closed entries are deleted. Returns how many cells
+    were written."""
+    table = LaborDailyRollup.__table__
+    written = 0
+    for cell in sorted(set(cells)):
+        day, work_center, traveler_id, employee_id = cell
+        _lock_cell(db, cell)
+        hours, entries, completed = db.query(*_aggregates()).filter(
+            LaborEntry.traveler_id == traveler_id,
+            LaborEntry.employee_id == employee_id,
+            func.coalesce(LaborEntry.work_center, '') == work_center,
+            LaborEntry.start_time >= day_start(day),
+            LaborEntry.start_time < day_start(day + timedelta(days=1)),
+            LaborEntry.end_time.isnot(None),
+        ).one()
+        if not entries:
+            db.execute(delete(table).where(*_cell_filter(table, cell)))
+        else:
+            db.execute(update(table).where(*_cell_filter(table, cell)).values(
+                hours=round(float(hours), 4), entries=int(entries), completed_entries=int(completed),
+            ))
+        written += 1
+    return written
+
+
+def _scan(db, since: Optional[date]) -> Tuple[Dict[Cell, list], int]:
+    """({cell: [hours, entries, completed]}, entries scanned) for closed labor
+    from `since`, streamed in id order and summed in Python, so the day
+    boundary is the same UTC date the incremental path uses whatever the
+    database session's time zone."""
+    totals = defaultdict(lambda: [0.0, 0, 0])
+    query = db.query(
+        LaborEntry.id, LaborEntry.start_time, LaborEntry.work_center, LaborEntry.traveler_id,
+        LaborEntry.employee_id, LaborEntry.hours_worked, LaborEntry.is_completed,
+    ).filter(LaborEntry.end_time.isnot(None))
+    if since is not None:
+        query = query.filter(LaborEntry.start_time >= day_start(since))
+    scanned = 0
+    for e in query.order_by(LaborEntry.id).yield_per(REBUILD_BATCH):
+        cell = rollup_cell(e.start_time, e.work_center, e.traveler_id, e.employee_id)
+        if cell is None:
+            continue
+        bucket = totals[cell]
+        bucket[0] += e.hours_worked if e.hours_worked and e.hours_worked > 0 else 0.0
+        bucket[1] += 1
+        bucket[2] += 1 if e.is_completed else 0
+        scanned += 1
+    return totals, scanned
+
+
+def rebuild_labor_rollups(db, since: Optional[date] = None) -> dict:
+    """Recompute every rollup from `since` (inclusive; everything when None)
+    from labor_entries, and commit. Replaces the range wholesale, so run it
+    when nothing else is writing labor (startup, by hand);
+    reconcile_labor_rollups() is the live repair."""
+    totals, scanned = _scan(db, since)
+    clear = delete(LaborDailyRollup)
+    if since is not None:
+        clear = clear.where(LaborDailyRollup.day >= since)
+    db.execute(clear)
+    db.bulk_insert_mappings(LaborDailyRollup, [
+        {"day": day, "work_center": wc, "traveler_id": traveler_id, "employee_id": employee_id,
+         "hours": round(hours, 4), "entries": entries, "completed_entries": completed}
+        for (day, wc, traveler_id, employee_id), (hours, entries, completed) in totals.items()
+    ])
+    db.commit()
+    return {"entries": scanned, "cells": len(totals)}
+
+
+def reconcile_labor_rollups(db, days: Optional[int] = None, today: Optional[date] = None) -> dict:
+    """Compare the rollups of the last `days` days (LABOR_ROLLUP_RECONCILE_DAYS)
+    with labor_entries and recompute the cells that drifted, and commit. Safe
+    alongside live labor writes; on Postgres only one worker runs it at a
+    time."""
+    days = LABOR_ROLLUP_RECONCILE_DAYS if days is None else days
+    since = (today or datetime.now(timezone.utc).date()) - timedelta(days=days)
+    with single_runner(db, ADVISORY_LOCK_KEY) as got_lock:
+        if not got_lock:
+            return {"skipped": "another worker is reconciling"}
+        totals, scanned = _scan(db, since)
+        stored = {
+            (r.day, r.work_center, r.traveler_id, r.employee_id): (r.hours, r.entries, r.completed_entries)
+            for r in db.query(LaborDailyRollup.day, LaborDailyRollup.work_center, LaborDailyRollup.traveler_id,
+                              LaborDailyRollup.employee_id, LaborDailyRollup.hours, LaborDailyRollup.entries,
+                              LaborDailyRollup.completed_entries).filter(LaborDailyRollup.day >= since)
+        }
+        drifted: List[Cell] = [
+            cell for cell in set(totals) | set(stored)
+            if cell not in totals or cell not in stored
+            or stored[cell] != (round(totals[cell][0], 4), totals[cell][1], totals[cell][2])
+        ]
+        recompute_rollup_cells(db, drifted)
+        db.commit()
+        return {"entries": scanned, "checked": len(set(totals) | set(stored)), "repaired": len(drifted)}
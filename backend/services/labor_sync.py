@@ -0,0 +1,121 @@
+"""
+Delta sync for the labor screens.
+
+/labor/init and /labor/my-entries used to return every labor entry ever
+recorded (every entry in the shop, for an admin) on every screen load and
+every 30-second poll. With sync=true they answer in pages instead:
+
+  - First sync (no token): the newest `limit` entries, an older_cursor to
+    page further back with before=, and a sync_token.
+  - Delta (since=<sync_token>): only entries created, changed or
+    soft-deleted since the token — soft-deleted ones as deleted_ids — plus a
+    new token. Entries whose traveler changed (job number, work order) come
+    along too, since their rows show traveler fields. If more than `limit`
+    changed, has_more is true and the returned token continues the same
+    delta.
+
+The watermark is labor_entries.updated_at, stamped by the app at flush time
+(models.LaborEntry, install_labor_sync_stamps for pause logs). A delta looks
+back SYNC_OVERLAP_SECONDS before its watermark so a transaction that
+committed after a later-stamped one is not missed; clients merge by id, so
+re-sent rows are harmless. Tokens are opaque (base64url JSON, like
+utils/pagination cursors).
+"""
+
+import base64
+import json
+import os
+from datetime import datetime, timedelta, timezone
+from typing import List, Optional, Tuple
+
+from sqlalchemy import or_, select, tuple_
+
+from models import LaborEntry, Traveler
+from utils.pagination import after_cursor, encode_cursor
+
+SYNC_PAGE_SIZE = int(os.getenv('LABOR_SYNC_PAGE_SIZE', 500))
+SYNC_MAX_PAGE_SIZE = 5000
+SYNC_OVERLAP_SECONDS = int(os.getenv('LABOR_SYNC_OVERLAP_SECONDS', 120))
+
+
+def encode_sync_token(watermark: datetime, after: Optional[Tuple[datetime, int]] = None) -> str:
+    payload = {"w": watermark.isoformat()}
+    if after is not None:
+        payload["a"] = [after[0].isoformat(), after[1]]
+    raw = json.dumps(payload, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_sync_token(token: str) -> Tuple[datetime, Optional[Tuple[datetime, int]]]:
+    """(watermark, position within the delta or None). Raises ValueError on
+    anything that is not a token this module produced."""
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(token + "=" * (-len(token) % 4)))
+        watermark = datetime.fromisoformat(payload["w"])
+        after = payload.get("a")
+        if after is not None:
+            after = (datetime.fromisoformat(after[0]), int(after[1]))
+        return watermark, after
+    except (ValueError, TypeError, KeyError, IndexError) as e:
+        raise ValueError(f"Invalid sync token: {token!r}") from e
+
+
+def _page_size(limit: Optional[int]) -> int:
+    return max(1, min(limit or SYNC_PAGE_SIZE, SYNC_MAX_PAGE_SIZE))
+
+
+def sync_labor_entries(db, employee_id: Optional[int] = None, since: Optional[str] = None,
+                       before: Optional[str] = None, limit: Optional[int] = None) -> dict:
+    """One sync page of labor entries (all employees when employee_id is
+    None): {"entries": [LaborEntry], "deleted_ids", "sync_token", "has_more",
+    "older_cursor", "full"}. full is true for a first sync (replace local
+    state) and false for a delta (merge by id). Raises ValueError for a bad
+    token or cursor."""
+    size = _page_size(limit)
+    started = datetime.now(timezone.utc)
+
+    if since is None:
+        # First sync, or older history: newest first, keyset-paged.
+        query = db.query(LaborEntry)
+        if employee_id is not None:
+            query = query.filter(LaborEntry.employee_id == employee_id)
+        if before:
+            query = after_cursor(query, LaborEntry, before)
+        rows = query.order_by(LaborEntry.created_at.desc(), LaborEntry.id.desc()).limit(size + 1).all()
+        older = rows[size - 1] if len(rows) > size else None
+        return {
+            "entries": rows[:size],
+            "deleted_ids": [],
+            "sync_token": encode_sync_token(started),
+            "has_more": False,
+            "older_cursor": encode_cursor(older.created_at, older.id) if older is not None else None,
+            "full": before is None,
+        }
+
+    watermark, after = decode_sync_token(since)
+    cutoff = watermark - timedelta(seconds=SYNC_OVERLAP_SECONDS)
+    query = db.query(LaborEntry).execution_options(include_deleted=True).filter(or_(
+        LaborEntry.updated_at > cutoff,
+        LaborEntry.traveler_id.in_(select(Traveler.id).where(Traveler.updated_at > cutoff)),
+    ))
+    if employee_id is not None:
+        query = query.filter(LaborEntry.employee_id == employee_id)
+    if after is not None:
+        query = query.filter(tuple_(LaborEntry.updated_at, LaborEntry.id) > tuple_(*after))
+    rows = query.order_by(LaborEntry.updated_at, LaborEntry.id).limit(size + 1).all()
+
+    has_more = len(rows) > size
+    rows = rows[:size]
+    if has_more:
+        token = encode_sync_token(watermark, (rows[-1].updated_at, rows[-1].id))
+    else:
+        token = encode_sync_token(started)
+    live: List[LaborEntry] = [r for r in rows if r.deleted_at is None]
+    return {
+        "entries": live,
+        "deleted_ids": [r.id for r in rows if r.deleted_at is not None],
+        "sync_token": token,
+        "has_more": has_more,
+        "older_cursor": None,
+        "full": False,
+    }
@@ -0,0 +1,87 @@
+"""
+Estimated hours (and crew size) per process-step operation.
+
+The dashboard forecast, operator efficiency, analytics and advanced analytics
+each carried their own copy of this table and matched an operation against it
+by scanning every key for every step. They now share one table and one
+resolver:
+
+  - An exact match on the normalized (upper-cased, stripped) operation wins.
+  - Otherwise the first key, in table order, that contains the operation or
+    is contained in it ("SMT TOP SIDE" → SMT TOP).
+  - Otherwise DEFAULT_ESTIMATE.
+
+Operation strings repeat endlessly (a few dozen distinct values across every
+traveler), so resolve_operation() is memoized per distinct string and the
+scan runs once per string per process.
+"""
+
+from functools import lru_cache
+from typing import NamedTuple
+
+
+class OperationEstimate(NamedTuple):
+    hours: float
+    operators: int
+
+
+# Approximate hours per operation type (PCB assembly industry averages).
+# Order matters for the substring fallback: more specific names come first.
+OPERATION_ESTIMATES = {
+    "KITTING": OperationEstimate(1.5, 1),
+    "FEEDER LOAD": OperationEstimate(1.0, 1),
+    "SMT SET UP": OperationEstimate(1.5, 1),
+    "SMT TOP": OperationEstimate(3.0, 2),
+    "SMT BOTTOM": OperationEstimate(3.0, 2),
+    "SMT BOT": OperationEstimate(3.0, 2),
+    "REFLOW": OperationEstimate(1.5, 1),
+    "WASH": OperationEstimate(0.75, 1),
+    "AOI": OperationEstimate(1.5, 1),
+    "XRAY": OperationEstimate(1.0, 1),
+    "HAND SOLDER": OperationEstimate(3.0, 2),
+    "HAND ASSEMBLY": OperationEstimate(2.5, 2),
+    "TOUCH UP": OperationEstimate(1.5, 1),
+    "INSPECTION": OperationEstimate(1.5, 1),
+    "INTERNAL TESTING": OperationEstimate(2.0, 1),
+    "TESTING": OperationEstimate(2.0, 1),
+    "INTERNAL COATING": OperationEstimate(1.5, 1),
+    "CONFORMAL COAT": OperationEstimate(1.5, 1),
+    "LABELING": OperationEstimate(0.5, 1),
+    "PACKAGING": OperationEstimate(0.5, 1),
+    "SHIPPING": OperationEstimate(0.5, 1),
+    "QC": OperationEstimate(1.5, 1),
+    "PROGRAMMING": OperationEstimate(1.0, 1),
+    "DEPANEL": OperationEstimate(1.0, 1),
+    "STENCIL": OperationEstimate(0.75, 1),
+    "PASTE": OperationEstimate(0.75, 1),
+    "ENGINEERING": OperationEstimate(1.0, 1),
+    "VERIFY BOM": OperationEstimate(0.5, 1),
+    "INVENTORY": OperationEstimate(0.5, 1),
+    "PURCHASING": OperationEstimate(1.0, 1),
+    "TRIM": OperationEstimate(1.0, 1),
+    "WAVE": OperationEstimate(1.5, 1),
+    "MANUAL INSERTION": OperationEstimate(2.0, 1),
+    "COMPONENT PREP": OperationEstimate(1.5, 1),
+}
+DEFAULT_ESTIMATE = OperationEstimate(1.0, 1)
+
+_KEYS_IN_ORDER = tuple(OPERATION_ESTIMATES)
+
+
+@lru_cache(maxsize=4096)
+def resolve_operation(operation: str) -> OperationEstimate:
+    """The estimate for an operation name (see the module docstring for the
+    matching rules)."""
+    op = (operation or "").upper().strip()
+    if not op:
+        return DEFAULT_ESTIMATE
+    if op in OPERATION_ESTIMATES:
+        return OPERATION_ESTIMATES[op]
+    for key in _KEYS_IN_ORDER:
+        if key in op or op in key:
+            return OPERATION_ESTIMATES[key]
+    return DEFAULT_ESTIMATE
+
+
+def estimate_hours(operation: str) -> float:
+    return resolve_operation(operation).hours
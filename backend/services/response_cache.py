@@ -0,0 +1,428 @@
+"""
+Response cache for expensive read endpoints.
+
+/dashboard/stats is global, costs a few dozen queries and is polled every
+~30s by every open dashboard. It used to cache in a per-process dict: with
+several uvicorn workers each worker recomputed the same answer, and
+date-range keys were never evicted. (/dashboard/insights and /analytics/all
+are precomputed instead — services/snapshots.py.)
+
+Endpoints opt in with a decorator:
+
+    @router.get("/stats")
+    @cached_response("dashboard.stats", vary=("start_date", "end_date"))
+    async def get_dashboard_stats(start_date=None, end_date=None, db=..., ...):
+
+`vary` names the endpoint parameters the answer depends on; everything else
+(db session, current user) is left out of the key, so list a user parameter
+there if the response is per-user.
+
+The backend is chosen with RESPONSE_CACHE_BACKEND:
+
+  - "memory" (default): an in-process LRU with per-entry TTL, bounded at
+    RESPONSE_CACHE_MAX_ENTRIES. Values are stored as returned.
+  - "sqlite": a SQLite file at RESPONSE_CACHE_PATH shared by every worker on
+    the host, so one computation serves them all. Values are stored as JSON
+    (jsonable_encoder), expired rows are skipped and swept, and the least
+    recently read rows go first past RESPONSE_CACHE_MAX_ENTRIES. A failing
+    cache file degrades to a miss, never to an error. Each thread keeps one
+    connection; async endpoints make their cache calls in a worker thread so
+    the file I/O never blocks the event loop.
+
+Concurrent identical requests are coalesced (single flight). When an entry
+is missing, the first request computes it and every other request for the
+same key in this process waits on that computation instead of starting its
+own; with the sqlite backend a lease row extends this across workers, whose
+requests poll the cache for up to RESPONSE_CACHE_LEASE_WAIT seconds while
+another worker computes. Within RESPONSE_CACHE_REFRESH_AHEAD seconds of
+expiry, one request recomputes early while the rest are still served the
+cached value, so a poll storm at the TTL boundary never finds the cache
+empty. cache_stats() reports hits, misses, coalesced waits and early
+refreshes.
+
+Cached values are shared between requests; callers treat them as read-only.
+"""
+
+import asyncio
+import functools
+import inspect
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import Any, Callable, Iterable, Optional, Tuple
+
+from fastapi.encoders import jsonable_encoder
+
+logger = logging.getLogger(__name__)
+
+RESPONSE_CACHE_BACKEND = os.getenv('RESPONSE_CACHE_BACKEND', 'memory')
+RESPONSE_CACHE_PATH = os.getenv('RESPONSE_CACHE_PATH', '/tmp/nexus-response-cache.sqlite3')
+RESPONSE_CACHE_MAX_ENTRIES = int(os.getenv('RESPONSE_CACHE_MAX_ENTRIES', 256))
+RESPONSE_CACHE_TTL = float(os.getenv('RESPONSE_CACHE_TTL', 30))  # seconds
+RESPONSE_CACHE_REFRESH_AHEAD = float(os.getenv('RESPONSE_CACHE_REFRESH_AHEAD', 5))  # seconds before expiry
+RESPONSE_CACHE_LEASE_WAIT = float(os.getenv('RESPONSE_CACHE_LEASE_WAIT', 20))  # seconds to wait on another worker
+LEASE_POLL_INTERVAL = 0.05  # seconds
+
+_MISS = (False, None, 0.0)
+
+
+class MemoryCacheBackend:
+    """Per-process LRU cache with a TTL per entry."""
+
+    name = "memory"
+    blocking = False  # no I/O: async endpoints call it on the event loop
+
+    def __init__(self, max_entries: int = RESPONSE_CACHE_MAX_ENTRIES, clock: Callable[[], float] = time.monotonic):
+        self.max_entries = max_entries
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()  # key -> (value, expires_at)
+        self._counters = {"hits": 0, "misses": 0, "evictions": 0}
+
+    def get(self, key: str) -> Tuple[bool, Any, float]:
+        """(hit, value, seconds until it expires)."""
+        with self._lock:
+            entry = self._entries.get(key)
+            now = self._clock()
+            if entry is None or entry[1] <= now:
+                if entry is not None:
+                    del self._entries[key]
+                self._counters["misses"] += 1
+                return _MISS
+            self._entries.move_to_end(key)
+            self._counters["hits"] += 1
+            return True, entry[0], entry[1] - now
+
+    def set(self, key: str, value: Any, ttl: float) -> None:
+        with self._lock:
+            self._entries[key] = (value, self._clock() + ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._counters["evictions"] += 1
+
+    def delete(self, prefix: str = "") -> None:
+        with self._lock:
+            for key in [k for k in self._entries if k.startswith(prefix)]:
+                del self._entries[key]
+
+    def try_lease(self, key: str, ttl: float) -> bool:
+        return True  # one process: the in-process single flight is enough
+
+    def release_lease(self, key: str) -> None:
+        pass
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"backend": self.name, "entries": len(self._entries),
+                    "max_entries": self.max_entries, **self._counters}
+
+
+class SQLiteCacheBackend:
+    """Cache in a local SQLite file, shared by every process that opens it."""
+
+    name = "sqlite"
+    blocking = True
+
+    def __init__(self, path: str = RESPONSE_CACHE_PATH, max_entries: int = RESPONSE_CACHE_MAX_ENTRIES,
+                 clock: Callable[[], float] = time.time):
+        self.path = path
+        self.max_entries = max_entries
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._counters = {"hits": 0, "misses": 0, "evictions": 0, "errors": 0}
+        # WAL is a property of the file, so setting it once is enough.
+        self._execute("PRAGMA journal_mode=WAL")
+        self._execute("""CREATE TABLE IF NOT EXISTS response_cache (
+            key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL, read_at REAL NOT NULL)""")
+        self._execute("CREATE INDEX IF NOT EXISTS ix_response_cache_read_at ON response_cache (read_at)")
+        # Who is computing a key right now, across processes.
+        self._execute("CREATE TABLE IF NOT EXISTS response_cache_leases (key TEXT PRIMARY KEY, expires_at REAL NOT NULL)")
+
+    def _connect(self) -> sqlite3.Connection:
+        """This thread's connection, opened on first use."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._local.conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+        return conn
+
+    def _failed(self, e: sqlite3.Error) -> None:
+        conn = getattr(self._local, "conn", None)
+        self._local.conn = None  # reconnect next time
+        if conn is not None:
+            conn.close()
+        self._count("errors")
+        logger.warning(f"Response cache ({self.path}) unavailable: {e}")
+
+    def _execute(self, sql: str, params: tuple = ()):
+        """Run one statement; None (and a logged warning) if the file fails."""
+        try:
+            return self._connect().execute(sql, params).fetchall()
+        except sqlite3.Error as e:
+            self._failed(e)
+            return None
+
+    def _count(self, name: str, n: int = 1) -> None:
+        with self._lock:
+            self._counters[name] += n
+
+    def get(self, key: str) -> Tuple[bool, Any, float]:
+        """(hit, value, seconds until it expires)."""
+        now = self._clock()
+        rows = self._execute("SELECT value, expires_at FROM response_cache WHERE key = ? AND expires_at > ?", (key, now))
+        if not rows:
+            self._count("misses")
+            return _MISS
+        self._execute("UPDATE response_cache SET read_at = ? WHERE key = ?", (now, key))
+        self._count("hits")
+        return True, json.loads(rows[0][0]), rows[0][1] - now
+
+    def set(self, key: str, value: Any, ttl: float) -> None:
+        now = self._clock()
+        payload = json.dumps(jsonable_encoder(value))
+        if self._execute("INSERT OR REPLACE INTO response_cache (key, value, expires_at, read_at) VALUES (?, ?, ?, ?)",
+                         (key, payload, now + ttl, now)) is None:
+            return
+        self._execute("DELETE FROM response_cache WHERE expires_at <= ?", (now,))
+        over = self._execute("SELECT COUNT(*) - ? FROM response_cache", (self.max_entries,))
+        if over and over[0][0] > 0:
+            self._execute("DELETE FROM response_cache WHERE key IN "
+                          "(SELECT key FROM response_cache ORDER BY read_at LIMIT ?)", (over[0][0],))
+            self._count("evictions", over[0][0])
+
+    def delete(self, prefix: str = "") -> None:
+        self._execute("DELETE FROM response_cache WHERE substr(key, 1, ?) = ?", (len(prefix), prefix))
+
+    def try_lease(self, key: str, ttl: float) -> bool:
+        """Claim the right to compute key for up to ttl seconds. True when
+        claimed — or when the file fails, so a broken cache never blocks."""
+        now = self._clock()
+        try:
+            conn = self._connect()
+            conn.execute("DELETE FROM response_cache_leases WHERE key = ? AND expires_at <= ?", (key, now))
+            conn.execute("INSERT OR IGNORE INTO response_cache_leases (key, expires_at) VALUES (?, ?)",
+                         (key, now + ttl))
+            return conn.execute("SELECT changes()").fetchone()[0] == 1
+        except sqlite3.Error as e:
+            self._failed(e)
+            return True
+
+    def release_lease(self, key: str) -> None:
+        self._execute("DELETE FROM response_cache_leases WHERE key = ?", (key,))
+
+    def stats(self) -> dict:
+        rows = self._execute("SELECT COUNT(*) FROM response_cache")
+        with self._lock:
+            counters = dict(self._counters)
+        return {"backend": self.name, "path": self.path, "entries": rows[0][0] if rows else None,
+                "max_entries": self.max_entries, **counters}
+
+
+_BACKENDS = {"memory": MemoryCacheBackend, "sqlite": SQLiteCacheBackend}
+_backend = None
+
+
+def get_response_cache():
+    """The process's cache backend, created on first use from
+    RESPONSE_CACHE_BACKEND."""
+    global _backend
+    if _backend is None:
+        if RESPONSE_CACHE_BACKEND not in _BACKENDS:
+            raise ValueError(f"Unknown RESPONSE_CACHE_BACKEND {RESPONSE_CACHE_BACKEND!r}; "
+                             f"expected one of {sorted(_BACKENDS)}")
+        _backend = _BACKENDS[RESPONSE_CACHE_BACKEND]()
+    return _backend
+
+
+def set_response_cache(backend) -> None:
+    """Swap the backend (tests, or a deployment wiring its own)."""
+    global _backend
+    _backend = backend
+
+
+def cache_key(namespace: str, values: dict) -> str:
+    return f"{namespace}:{json.dumps(values, sort_keys=True, default=str)}"
+
+
+# ─── single flight ──────────────────────────────────────────────────────
+
+_inflight: dict = {}  # key -> Future of the computation running in this process
+_inflight_lock = threading.Lock()
+_flight_counters = {
+    "computed": 0,          # computations run (misses and early refreshes)
+    "coalesced": 0,         # requests that waited on another request's computation
+    "early_refreshes": 0,   # computations started before the entry expired
+    "served_while_refreshing": 0,
+    "waited_on_worker": 0,  # misses that waited on a computation in another worker
+}
+
+
+def _count(name: str) -> None:
+    with _inflight_lock:
+        _flight_counters[name] += 1
+
+
+def _join_flight(key: str) -> Tuple[Future, bool]:
+    """(future, True) for the caller that should compute key; (the running
+    computation's future, False) for everyone else."""
+    with _inflight_lock:
+        running = _inflight.get(key)
+        if running is not None:
+            return running, False
+        future = Future()
+        _inflight[key] = future
+        return future, True
+
+
+def _land_flight(key: str, future: Future, value: Any = None, error: Optional[BaseException] = None) -> None:
+    with _inflight_lock:
+        _inflight.pop(key, None)
+    if error is not None:
+        future.set_exception(error)
+    else:
+        future.set_result(value)
+
+
+async def _off_loop(fn: Callable, *args):
+    """Call fn from an async endpoint: in a worker thread when the backend
+    does blocking I/O, inline otherwise."""
+    if getattr(get_response_cache(), "blocking", True):
+        return await asyncio.to_thread(fn, *args)
+    return fn(*args)
+
+
+def cache_stats() -> dict:
+    with _inflight_lock:
+        flights = dict(_flight_counters, in_flight=len(_inflight))
+    return {**get_response_cache().stats(), **flights}
+
+
+class _Lookup:
+    """What the cache holds for a key and whether this caller should compute it."""
+
+    def __init__(self, key: str, refresh_ahead: float):
+        self.key = key
+        self.hit, self.value, ttl_left = get_response_cache().get(key)
+        self.fresh = self.hit and ttl_left > refresh_ahead
+        self.future = self.leader = None
+        if not self.fresh:
+            self.future, self.leader = _join_flight(key)
+
+
+def _worker_holds_lease(key: str, lease_ttl: float) -> bool:
+    """True when another worker is computing key (its value will land in the
+    shared backend)."""
+    return not get_response_cache().try_lease(key, lease_ttl)
+
+
+def _poll_for_other_worker(key: str) -> Tuple[bool, Any]:
+    hit, value, _ = get_response_cache().get(key)
+    return hit, value
+
+
+def cached_response(namespace: str, ttl: Optional[float] = None, vary: Iterable[str] = (),
+                    refresh_ahead: Optional[float] = None):
+    """Cache an endpoint's return value for `ttl` seconds (RESPONSE_CACHE_TTL
+    by default), keyed by `namespace` and the `vary` parameters, with
+    concurrent identical calls coalesced and refreshed `refresh_ahead`
+    seconds early (RESPONSE_CACHE_REFRESH_AHEAD by default). Works on async
+    and plain endpoints; FastAPI still sees the original signature."""
+    vary = tuple(vary)
+    lifetime = RESPONSE_CACHE_TTL if ttl is None else ttl
+    ahead = min(RESPONSE_CACHE_REFRESH_AHEAD if refresh_ahead is None else refresh_ahead, lifetime / 2)
+    lease_ttl = max(RESPONSE_CACHE_LEASE_WAIT, lifetime)
+
+    def decorate(endpoint):
+        def key_for(kwargs):
+            return cache_key(namespace, {name: kwargs.get(name) for name in vary})
+
+        def follow(lookup: "_Lookup"):
+            """(served, value) for a caller that is not computing."""
+            if lookup.hit:
+                _count("served_while_refreshing")
+                return True, lookup.value
+            _count("coalesced")
+            return False, None
+
+        def begin(lookup: "_Lookup") -> bool:
+            """Leader: False when another worker holds the lease."""
+            if _worker_holds_lease(lookup.key, lease_ttl):
+                return False
+            _count("computed")
+            if lookup.hit:
+                _count("early_refreshes")
+            return True
+
+        def finish(lookup: "_Lookup", value=None, error=None, stored=True):
+            if stored and error is None:
+                get_response_cache().set(lookup.key, value, lifetime)
+            get_response_cache().release_lease(lookup.key)
+            _land_flight(lookup.key, lookup.future, value, error)
+
+        if inspect.iscoroutinefunction(endpoint):
+            @functools.wraps(endpoint)
+            async def wrapper(*args, **kwargs):
+                lookup = await _off_loop(_Lookup, key_for(kwargs), ahead)
+                if lookup.fresh:
+                    return lookup.value
+                if not lookup.leader:
+                    served, value = follow(lookup)
+                    return value if served else await asyncio.wrap_future(lookup.future)
+                try:
+                    if not await _off_loop(begin, lookup):
+                        if lookup.hit:
+                            _land_flight(lookup.key, lookup.future, lookup.value)
+                            return lookup.value
+                        _count("waited_on_worker")
+                        deadline = time.monotonic() + RESPONSE_CACHE_LEASE_WAIT
+                        while time.monotonic() < deadline:
+                            await asyncio.sleep(LEASE_POLL_INTERVAL)
+                            hit, value = await _off_loop(_poll_for_other_worker, lookup.key)
+                            if hit:
+                                _land_flight(lookup.key, lookup.future, value)
+                                return value
+                        _count("computed")  # the other worker never delivered
+                    value = await endpoint(*args, **kwargs)
+                except BaseException as e:
+                    await _off_loop(finish, lookup, None, e)
+                    raise
+                await _off_loop(finish, lookup, value)
+                return value
+        else:
+            @functools.wraps(endpoint)
+            def wrapper(*args, **kwargs):
+                lookup = _Lookup(key_for(kwargs), ahead)
+                if lookup.fresh:
+                    return lookup.value
+                if not lookup.leader:
+                    served, value = follow(lookup)
+                    return value if served else lookup.future.result()
+                try:
+                    if not begin(lookup):
+                        if lookup.hit:
+                            _land_flight(lookup.key, lookup.future, lookup.value)
+                            return lookup.value
+                        _count("waited_on_worker")
+                        deadline = time.monotonic() + RESPONSE_CACHE_LEASE_WAIT
+                        while time.monotonic() < deadline:
+                            time.sleep(LEASE_POLL_INTERVAL)
+                            hit, value = _poll_for_other_worker(lookup.key)
+                            if hit:
+                                _land_flight(lookup.key, lookup.future, value)
+                                return value
+                        _count("computed")
+                    value = endpoint(*args, **kwargs)
+                except BaseException as e:
+                    finish(lookup, error=e)
+                    raise
+                finish(lookup, value)
+                return value
+        return wrapper
+
+    return decorate
@@ -0,0 +1,158 @@
+"""
+Precomputed snapshots of the insights and analytics payloads.
+
+/dashboard/insights and /analytics/all each build a dozen sections — operator
+efficiency, KOSH inventory, bottlenecks, heatmaps, anomalies, scorecards — at
+a cost of dozens of queries (and a KOSH round trip). They used to do it in the
+request path whenever the response cache had expired. Now a scheduler builds
+them and the endpoints only read the stored result:
+
+  - refresh_snapshots() recomputes a snapshot when it is older than
+    ANALYTICS_SNAPSHOT_MAX_AGE seconds, or when data_fingerprint() says labor,
+    steps or travelers changed and the snapshot is at least
+    ANALYTICS_SNAPSHOT_MIN_AGE seconds old. main.py calls it every
+    ANALYTICS_SNAPSHOT_POLL_INTERVAL seconds. It runs under a Postgres
+    advisory lock, so with several workers only one computes; the snapshot
+    is stored in analytics_snapshots for all of them.
+  - read_snapshot() is the endpoints' side: the stored payload plus
+    snapshot_computed_at / snapshot_age_seconds. Before the first scheduler
+    pass it computes and stores the snapshot inline; when concurrent first
+    requests race to store it, the losers read the winner's row.
+  - Each compute function reports its sections to a SectionTimer; the
+    per-section milliseconds are stored with the snapshot and listed by
+    snapshot_status() (GET /dashboard/snapshots).
+"""
+
+import json
+import os
+import time
+from datetime import datetime, timezone
+from typing import Callable, Dict, Optional
+
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy import func, case
+from sqlalchemy.exc import IntegrityError
+
+from models import AnalyticsSnapshot, LaborEntry, ProcessStep, Traveler
+from utils.db_helpers import single_runner
+
+ANALYTICS_SNAPSHOT_POLL_INTERVAL = int(os.getenv('ANALYTICS_SNAPSHOT_POLL_INTERVAL', 10))  # seconds
+ANALYTICS_SNAPSHOT_MIN_AGE = int(os.getenv('ANALYTICS_SNAPSHOT_MIN_AGE', 15))  # seconds
+ANALYTICS_SNAPSHOT_MAX_AGE = int(os.getenv('ANALYTICS_SNAPSHOT_MAX_AGE', 60))  # seconds
+ADVISORY_LOCK_KEY = 7_406_003  # arbitrary, unique to snapshot refresh
+
+INSIGHTS_SNAPSHOT = "dashboard.insights"
+ANALYTICS_SNAPSHOT = "analytics.all"
+
+
+class SectionTimer:
+    """Wall time per named section. start() closes the running section."""
+
+    def __init__(self):
+        self.timings: Dict[str, float] = {}
+        self._section: Optional[str] = None
+        self._started = 0.0
+
+    def start(self, section: str) -> None:
+        self.stop()
+        self._section = section
+        self._started = time.perf_counter()
+
+    def stop(self) -> None:
+        if self._section is not None:
+            elapsed = (time.perf_counter() - self._started) * 1000
+            self.timings[self._section] = round(self.timings.get(self._section, 0.0) + elapsed, 1)
+            self._section = None
+
+
+def _compute_functions() -> Dict[str, Callable]:
+    from routers.dashboard import compute_dashboard_insights
+    from routers.analytics import compute_analytics
+    return {INSIGHTS_SNAPSHOT: compute_dashboard_insights, ANALYTICS_SNAPSHOT: compute_analytics}
+
+
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def _age_seconds(snapshot: AnalyticsSnapshot) -> float:
+    computed_at = snapshot.computed_at
+    if computed_at.tzinfo is None:
+        computed_at = computed_at.replace(tzinfo=timezone.utc)
+    return max(0.0, (_utcnow() - computed_at).total_seconds())
+
+
+def data_fingerprint(db) -> str:
+    """Changes whenever labor is logged or closed, a step is completed, or a
+    traveler is created or edited. A few indexed aggregates."""
+    labor = db.query(
+        func.max(LaborEntry.id),
+        func.count(case((LaborEntry.end_time.is_(None), 1))),
+        func.max(LaborEntry.end_time),
+    ).one()
+    steps = db.query(func.max(ProcessStep.completed_at), func.count(case((ProcessStep.is_completed == True, 1)))).one()
+    travelers = db.query(func.max(Traveler.id), func.max(Traveler.updated_at)).one()
+    return json.dumps([*labor, *steps, *travelers], default=str)
+
+
+def compute_snapshot(db, name: str, fingerprint: Optional[str] = None) -> AnalyticsSnapshot:
+    """Build one snapshot now, store it and commit."""
+    timer = SectionTimer()
+    started = time.perf_counter()
+    payload = _compute_functions()[name](db, timer)
+    timer.stop()
+    snapshot = db.get(AnalyticsSnapshot, name) or AnalyticsSnapshot(name=name)
+    snapshot.payload = json.dumps(jsonable_encoder(payload))
+    snapshot.fingerprint = fingerprint if fingerprint is not None else data_fingerprint(db)
+    snapshot.section_timings = json.dumps(timer.timings)
+    snapshot.duration_ms = round((time.perf_counter() - started) * 1000, 1)
+    snapshot.computed_at = _utcnow()
+    db.add(snapshot)
+    db.commit()
+    return snapshot
+
+
+def refresh_snapshots(db, force: bool = False) -> dict:
+    """Recompute the snapshots that are due. Returns {name: duration_ms} for
+    the ones computed. On Postgres only one worker runs it at a time."""
+    with single_runner(db, ADVISORY_LOCK_KEY) as got_lock:
+        if not got_lock:
+            return {"skipped": "another worker is refreshing"}
+        fingerprint = data_fingerprint(db)
+        computed = {}
+        for name in _compute_functions():
+            snapshot = db.get(AnalyticsSnapshot, name)
+            if not force and snapshot is not None:
+                age = _age_seconds(snapshot)
+                changed = snapshot.fingerprint != fingerprint
+                if age < ANALYTICS_SNAPSHOT_MAX_AGE and not (changed and age >= ANALYTICS_SNAPSHOT_MIN_AGE):
+                    continue
+            computed[name] = compute_snapshot(db, name, fingerprint).duration_ms
+        return computed
+
+
+def read_snapshot(db, name: str) -> dict:
+    """The latest payload with its age. Computed inline only if the
+    scheduler has never stored one."""
+    snapshot = db.get(AnalyticsSnapshot, name)
+    if snapshot is None:
+        try:
+            snapshot = compute_snapshot(db, name)
+        except IntegrityError:
+            # Another request stored it first.
+            db.rollback()
+            snapshot = db.get(AnalyticsSnapshot, name)
+    payload = json.loads(snapshot.payload)
+    payload["snapshot_computed_at"] = snapshot.computed_at.isoformat()
+    payload["snapshot_age_seconds"] = round(_age_seconds(snapshot), 1)
+    return payload
+
+
+def snapshot_status(db) -> list:
+    return [{
+        "name": s.name,
+        "computed_at": s.computed_at.isoformat(),
+        "age_seconds": round(_age_seconds(s), 1),
+        "duration_ms": s.duration_ms,
+        "sections_ms": json.loads(s.section_timings or "{}"),
+    } for s in db.query(AnalyticsSnapshot).order_by(AnalyticsSnapshot.name)]
@@ -0,0 +1,139 @@
+"""
+Table version counters and the ETags derived from them.
+
+Browsers re-request /travelers, /travelers/{id}, /work-centers-mgmt and
+/labor/my-entries every time their 10-second Cache-Control expires, and every
+time the full JSON came back over the office uplink even when nothing had
+changed. Now:
+
+  - models.install_table_versions bumps table_versions.<table> in every
+    transaction that writes the table through the ORM (object flushes and
+    ORM bulk UPDATE/DELETE alike), in the same transaction as the write.
+    Raw SQL text writes are not seen — bump_table_versions() by hand after
+    one.
+  - Endpoints decorated with @versioned_etag(*tables) read those versions —
+    one primary-key query — and hash them with the request URL and the
+    caller's identity into a strong ETag. A request whose If-None-Match
+    matches gets a bodiless 304 before the endpoint runs; anything else runs
+    the endpoint as before and carries the ETag.
+
+An endpoint lists the tables its answer is read from, including counter tables
+written by other hooks (traveler_progress for the traveler list). Versions
+only ever go up and carry their bump time, so an ETag is never reused for
+different data, even if the table_versions rows are lost and restart at 1.
+"""
+
+import functools
+import hashlib
+import inspect
+from datetime import datetime, timezone
+from typing import Dict, Iterable, Tuple
+
+from fastapi import Request, Response
+from sqlalchemy import update
+from starlette.concurrency import run_in_threadpool
+
+from models import TableVersion
+
+Version = Tuple[int, str]  # (version, bumped at)
+
+
+def bump_table_versions(db, tables: Iterable[str]) -> None:
+    """Increment these tables' versions in the caller's transaction. Rows are
+    upserted in name order, so two transactions bumping overlapping tables
+    lock them in the same order."""
+    now = datetime.now(timezone.utc)
+    rows = [{"name": name, "version": 1, "updated_at": now} for name in sorted(set(tables))]
+    if not rows:
+        return
+    dialect = db.get_bind().dialect.name
+    if dialect in ("postgresql", "sqlite"):
+        if dialect == "postgresql":
+            from sqlalchemy.dialects.postgresql import insert
+        else:
+            from sqlalchemy.dialects.sqlite import insert
+        stmt = insert(TableVersion.__table__).values(rows)
+        db.execute(stmt.on_conflict_do_update(
+            index_elements=[TableVersion.name],
+            set_={"version": TableVersion.version + 1, "updated_at": stmt.excluded.updated_at},
+        ))
+        return
+    for row in rows:
+        bumped = db.execute(update(TableVersion.__table__).where(TableVersion.name == row["name"])
+                            .values(version=TableVersion.version + 1, updated_at=now))
+        if not bumped.rowcount:
+            db.execute(TableVersion.__table__.insert().values(row))
+
+
+def read_table_versions(db, tables: Iterable[str]) -> Dict[str, Version]:
+    """{table: (version, bumped at)}; a table never written since the
+    counters were added reads (0, "")."""
+    tables = sorted(set(tables))
+    found = {r.name: (r.version, r.updated_at.isoformat() if r.updated_at else "")
+             for r in db.query(TableVersion.name, TableVersion.version, TableVersion.updated_at)
+             .filter(TableVersion.name.in_(tables))}
+    return {name: found.get(name, (0, "")) for name in tables}
+
+
+def compute_etag(versions: Dict[str, Version], *vary) -> str:
+    raw = repr((sorted(versions.items()), vary)).encode()
+    return '"' + hashlib.sha256(raw).hexdigest()[:32] + '"'
+
+
+def etag_matches(if_none_match: str, etag: str) -> bool:
+    """If-None-Match uses the weak comparison: W/ prefixes are ignored."""
+    if not if_none_match:
+        return False
+    candidates = [c.strip() for c in if_none_match.split(",")]
+    return "*" in candidates or any(c.removeprefix("W/") == etag for c in candidates)
+
+
+def _caller_identity(user) -> tuple:
+    """What a per-user answer depends on: who, and what they may see."""
+    if user is None:
+        return ()
+    role = getattr(user, "role", None)
+    return (getattr(user, "id", None), getattr(role, "value", role), bool(getattr(user, "is_itar", False)))
+
+
+def versioned_etag(*tables: str, user_param: str = "current_user", db_param: str = "db"):
+    """ETag an endpoint by the versions of `tables`, and answer 304 without
+    running it when the client already has that version. The endpoint needs
+    its session as `db` and its user (if the answer is per-user) as
+    `current_user`; the request and response are added to its signature for
+    FastAPI when it does not declare them."""
+
+    def decorate(endpoint):
+        signature = inspect.signature(endpoint)
+        params = list(signature.parameters.values())
+        added = []
+        for name, annotation in (("request", Request), ("response", Response)):
+            if name not in signature.parameters:
+                params.append(inspect.Parameter(name, inspect.Parameter.KEYWORD_ONLY, annotation=annotation))
+                added.append(name)
+
+        @functools.wraps(endpoint)
+        async def wrapper(*args, **kwargs):
+            request: Request = kwargs["request"]
+            response: Response = kwargs["response"]
+            versions = read_table_versions(kwargs[db_param], tables)
+            etag = compute_etag(versions, request.url.path, str(request.query_params),
+                                _caller_identity(kwargs.get(user_param)))
+            if etag_matches(request.headers.get("if-none-match", ""), etag):
+                return Response(status_code=304, headers={"ETag": etag})
+            for name in added:
+                kwargs.pop(name)
+            if inspect.iscoroutinefunction(endpoint):
+                result = await endpoint(*args, **kwargs)
+            else:
+                result = await run_in_threadpool(endpoint, *args, **kwargs)
+            if isinstance(result, Response):
+                result.headers["ETag"] = etag
+            else:
+                response.headers["ETag"] = etag
+            return result
+
+        wrapper.__signature__ = signature.replace(parameters=params)
+        return wrapper
+
+    return decorate
@@ -0,0 +1,413 @@
+"""
+Denormalized per-traveler progress counters.
+
+The traveler list and the dashboard summary show, for every traveler,
+completed/total steps, progress per department, the current step, accepted /
+rejected quantities and labor totals. They used to load every ProcessStep and
+LaborEntry of every traveler on the page and count them in Python on every
+request. The counts now live in models.TravelerProgress and
+models.TravelerDepartmentProgress:
+
+  - recompute_progress() rebuilds the rows of a few travelers from their steps
+    and labor. models.install_progress_counters calls it in before_commit for
+    every traveler whose steps were added, removed or edited, or whose labor
+    was added, removed or moved (progress_changes() sorts a flush), so
+    set_step_completion, traveler edits and labor writes all keep the counters
+    current without each remembering to.
+  - apply_labor_deltas() is the cheap path for the common write: a labor entry
+    closed or its hours edited only moves labor_hours and
+    active_labor_entries, so before_commit adds the difference in one UPDATE
+    instead of recomputing. Pauses, resumes and other labor edits change no
+    counter and cost nothing.
+  - reconcile_progress() recomputes every traveler in batches and rewrites the
+    rows that disagree — the repair for writes the ORM never sees (bulk
+    UPDATEs, manual SQL, a work center moved to another department). main.py
+    runs it at startup, which also backfills travelers that predate the
+    tables, and then every TRAVELER_PROGRESS_RECONCILE_INTERVAL seconds.
+  - claim_step_completion() is clock-out's side: it marks one step complete
+    only if nobody has yet, and applies the completion to the traveler's
+    counters (remaining_steps / remaining_required, completed steps overall
+    and per department, the current step) in the same UPDATE that row-locks
+    them, so concurrent clock-outs on one traveler serialize on that row and
+    the last one sees zero — whether the traveler is done is read off the
+    counters instead of every step, and the claimed step is not recomputed.
+  - load_progress() is the read side. A traveler without rows yet is computed
+    on the fly (not stored), so a list is never missing counts.
+
+Department rules are the traveler router's (split_departments /
+visible_departments / counts_toward_progress), so the counters agree with the
+detail view.
+"""
+
+import os
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import func, case, inspect as sa_inspect, select, update
+
+from models import Traveler, ProcessStep, LaborEntry, WorkCenter, TravelerProgress, TravelerDepartmentProgress
+from utils.db_helpers import single_runner
+
+TRAVELER_PROGRESS_RECONCILE_INTERVAL = int(os.getenv('TRAVELER_PROGRESS_RECONCILE_INTERVAL', 900))  # seconds
+RECONCILE_BATCH = 500
+ADVISORY_LOCK_KEY = 7_406_002  # arbitrary, unique to progress reconciliation
+
+PROGRESS_FIELDS = (
+    "total_steps", "completed_steps", "current_step", "current_work_center",
+    "qty_accepted", "qty_rejected", "labor_hours", "labor_entries",
+    "active_labor_entries", "steps_with_labor", "remaining_steps", "remaining_required",
+)
+
+# Step columns the counters are computed from; editing any other (sign,
+# instructions, completed_at, ...) changes no counter.
+STEP_FIELDS = ("traveler_id", "step_number", "operation", "work_center_code",
+               "is_required", "is_completed", "accepted", "rejected")
+# Labor columns that decide which traveler and step an entry counts toward,
+# and whether it counts at all (soft-deleted entries do not).
+LABOR_MOVE_FIELDS = ("traveler_id", "step_id", "deleted_at")
+
+
+def _compute(db, traveler_ids: List[int]) -> Dict[int, Tuple[dict, List[dict]]]:
+    """{traveler_id: (progress values, [department values])} from the
+    travelers' current steps and labor. Four queries however many travelers."""
+    from routers.travelers import visible_departments
+
+    wc_dept_map = {wc.code: wc.department or 'Other' for wc in db.query(WorkCenter.code, WorkCenter.department).all()}
+
+    steps_by_traveler = defaultdict(list)
+    for s in db.query(
+        ProcessStep.id, ProcessStep.traveler_id, ProcessStep.step_number, ProcessStep.operation,
+        ProcessStep.work_center_code, ProcessStep.is_completed, ProcessStep.is_required,
+        ProcessStep.accepted, ProcessStep.rejected,
+    ).filter(ProcessStep.traveler_id.in_(traveler_ids)).order_by(ProcessStep.step_number, ProcessStep.id):
+        steps_by_traveler[s.traveler_id].append(s)
+
+    labor_totals = {
+        r.traveler_id: r for r in db.query(
+            LaborEntry.traveler_id,
+            func.sum(LaborEntry.hours_worked).label('hours'),
+            func.count(LaborEntry.id).label('entries'),
+            func.sum(case((LaborEntry.is_completed == False, 1), else_=0)).label('active'),
+        ).filter(LaborEntry.traveler_id.in_(traveler_ids)).group_by(LaborEntry.traveler_id)
+    }
+    labor_steps = defaultdict(set)
+    for r in db.query(LaborEntry.traveler_id, LaborEntry.step_id).filter(
+        LaborEntry.traveler_id.in_(traveler_ids), LaborEntry.step_id.isnot(None),
+    ).distinct():
+        labor_steps[r.traveler_id].add(r.step_id)
+
+    computed = {}
+    for traveler_id in traveler_ids:
+        steps = steps_by_traveler.get(traveler_id, [])
+        total = completed = 0
+        progress_step_ids = set()
+        departments: Dict[str, dict] = {}
+        for s in steps:
+            depts = visible_departments(wc_dept_map.get(s.work_center_code, 'Other'))
+            if depts:
+                total += 1
+                completed += 1 if s.is_completed else 0
+                progress_step_ids.add(s.id)
+            for d in depts:
+                dept = departments.setdefault(d, {"department": d, "position": len(departments),
+                                                  "total_steps": 0, "completed_steps": 0})
+                dept["total_steps"] += 1
+                dept["completed_steps"] += 1 if s.is_completed else 0
+        current = next((s for s in steps if not s.is_completed), None)
+        labor = labor_totals.get(traveler_id)
+        computed[traveler_id] = ({
+            "total_steps": total,
+            "completed_steps": completed,
+            "current_step": current.operation if current else None,
+            "current_work_center": current.work_center_code if current else None,
+            "qty_accepted": sum(s.accepted or 0 for s in steps),
+            "qty_rejected": sum(s.rejected or 0 for s in steps),
+            "labor_hours": round(float(labor.hours or 0), 4) if labor else 0.0,
+            "labor_entries": labor.entries if labor else 0,
+            "active_labor_entries": int(labor.active or 0) if labor else 0,
+            "steps_with_labor": len(labor_steps.get(traveler_id, set()) & progress_step_ids),
+            "remaining_steps": sum(1 for s in steps if not s.is_completed),
+            "remaining_required": sum(1 for s in steps if s.is_required and not s.is_completed),
+        }, list(departments.values()))
+    return computed
+
+
+def _stored(db, traveler_ids: List[int]):
+    progress = {p.traveler_id: p for p in
+                db.query(TravelerProgress).filter(TravelerProgress.traveler_id.in_(traveler_ids))}
+    departments = defaultdict(list)
+    for d in db.query(TravelerDepartmentProgress).filter(
+        TravelerDepartmentProgress.traveler_id.in_(traveler_ids)
+    ).order_by(TravelerDepartmentProgress.traveler_id, TravelerDepartmentProgress.position):
+        departments[d.traveler_id].append(d)
+    return progress, departments
+
+
+def _lock_progress(db, traveler_ids: List[int]) -> None:
+    """Take the progress rows of these travelers for the rest of the
+    transaction, in id order. claim_step_completion decrements the counters
+    under the same row lock, so steps read after this include every claim
+    that committed first. SQLite has no row locks; a no-op UPDATE takes its
+    database write lock instead (on the connection, so it is not counted as a
+    traveler_progress write by the table-version hook)."""
+    if db.get_bind().dialect.name == "postgresql":
+        db.query(TravelerProgress.traveler_id).filter(
+            TravelerProgress.traveler_id.in_(traveler_ids)
+        ).order_by(TravelerProgress.traveler_id).with_for_update().all()
+    else:
+        table = TravelerProgress.__table__
+        db.connection().execute(
+            update(table).where(table.c.traveler_id.in_(traveler_ids)).values(traveler_id=table.c.traveler_id)
+        )
+
+
+def _same(row: TravelerProgress, values: dict) -> bool:
+    # labor_hours is summed in floating point by the incremental path, so it
+    # matches a recompute to the rounding the recompute stores, not exactly.
+    return all(round(row.labor_hours or 0, 4) == values[f] if f == "labor_hours" else getattr(row, f) == values[f]
+               for f in PROGRESS_FIELDS)
+
+
+def _dept_values(d: TravelerDepartmentProgress) -> dict:
+    return {"department": d.department, "position": d.position,
+            "total_steps": d.total_steps, "completed_steps": d.completed_steps}
+
+
+def _write(db, computed, progress, departments, only_changed: bool = False) -> int:
+    """Store computed values over the stored rows. Returns how many
+    travelers' rows were written."""
+    written = 0
+    for traveler_id, (values, dept_values) in computed.items():
+        row = progress.get(traveler_id)
+        stored_depts = departments.get(traveler_id, [])
+        if only_changed and row is not None and _same(row, values) \
+                and [_dept_values(d) for d in stored_depts] == dept_values:
+            continue
+        if row is None:
+            db.add(TravelerProgress(traveler_id=traveler_id, **values))
+        else:
+            for f in PROGRESS_FIELDS:
+                setattr(row, f, values[f])
+        by_name = {d.department: d for d in stored_depts}
+        for dv in dept_values:
+            existing = by_name.pop(dv["department"], None)
+            if existing is None:
+                db.add(TravelerDepartmentProgress(traveler_id=traveler_id, **dv))
+            else:
+                existing.position = dv["position"]
+                existing.total_steps = dv["total_steps"]
+                existing.completed_steps = dv["completed_steps"]
+        for gone in by_name.values():
+            db.delete(gone)
+        written += 1
+    return written
+
+
+def recompute_progress(db, traveler_ids: Iterable[int]) -> int:
+    """Rebuild the counters of these travelers in the caller's transaction.
+    Ids of travelers that do not exist are ignored."""
+    ids = [i for i in set(traveler_ids) if i is not None]
+    if not ids:
+        return 0
+    ids = [i for (i,) in db.query(Traveler.id).filter(Traveler.id.in_(ids))]
+    if not ids:
+        return 0
+    _lock_progress(db, ids)
+    progress, departments = _stored(db, ids)
+    return _write(db, _compute(db, ids), progress, departments)
+
+
+def _history(obj, field):
+    """(value before this flush, value after) of one column."""
+    hist = sa_inspect(obj).attrs[field].history
+    unchanged = hist.unchanged[0] if hist.unchanged else None
+    return (hist.deleted[0] if hist.deleted else unchanged,
+            hist.added[0] if hist.added else unchanged)
+
+
+def _changed(obj, fields) -> set:
+    attrs = sa_inspect(obj).attrs
+    return {f for f in fields if attrs[f].history.has_changes()}
+
+
+def _active(is_completed) -> int:
+    # Matches _compute, which counts is_completed == False (not NULL).
+    return 1 if is_completed is False else 0
+
+
+def progress_changes(session) -> Tuple[set, Dict[int, List[float]]]:
+    """Sort what a flush did to steps and labor into ({traveler ids to
+    recompute}, {traveler_id: [labor hours delta, active entries delta]}).
+    Called from after_flush, while attribute history still holds the flush's
+    changes. No counter is computed from a traveler's own columns, so only
+    travelers added or removed are recomputed for themselves. A step completed
+    by claim_step_completion in this transaction already has its completion on
+    the counters and is not recomputed for it."""
+    from models import Traveler
+
+    recompute, deltas = set(), {}
+    claimed = session.info.get("progress_claimed", ())
+    for obj in list(session.new) + list(session.deleted):
+        if isinstance(obj, Traveler):
+            recompute.add(obj.id)
+        elif isinstance(obj, (ProcessStep, LaborEntry)):
+            recompute.add(obj.traveler_id)
+    for obj in session.dirty:
+        if isinstance(obj, ProcessStep):
+            fields = _changed(obj, STEP_FIELDS)
+            if obj.id in claimed and obj.is_completed:
+                fields.discard("is_completed")
+            if fields:
+                recompute.update(_history(obj, "traveler_id"))
+        elif isinstance(obj, LaborEntry):
+            if _changed(obj, LABOR_MOVE_FIELDS):
+                recompute.update(_history(obj, "traveler_id"))
+                continue
+            hours_before, hours_after = _history(obj, "hours_worked")
+            done_before, done_after = _history(obj, "is_completed")
+            hours = (hours_after or 0) - (hours_before or 0)
+            active = _active(done_after) - _active(done_before)
+            if hours or active:
+                delta = deltas.setdefault(obj.traveler_id, [0.0, 0])
+                delta[0] += hours
+                delta[1] += active
+    recompute.discard(None)
+    return recompute, deltas
+
+
+def apply_labor_deltas(db, deltas: Dict[int, List[float]]) -> set:
+    """Add labor hours / active-entry differences to the stored counters, one
+    row-locked UPDATE per traveler in id order. Returns the travelers that
+    have no counters yet, for the caller to recompute."""
+    missing = set()
+    for traveler_id in sorted(deltas):
+        hours, active = deltas[traveler_id]
+        if not hours and not active:
+            continue
+        updated = db.execute(
+            update(TravelerProgress)
+            .where(TravelerProgress.traveler_id == traveler_id)
+            .values(
+                labor_hours=TravelerProgress.labor_hours + hours,
+                active_labor_entries=TravelerProgress.active_labor_entries + active,
+            )
+            .execution_options(synchronize_session=False)
+        ).rowcount
+        if not updated:
+            missing.add(traveler_id)
+    return missing
+
+
+def _count_remaining(db, traveler_id: int) -> Tuple[int, int]:
+    remaining, required = db.query(
+        func.count(ProcessStep.id),
+        func.coalesce(func.sum(case((ProcessStep.is_required == True, 1), else_=0)), 0),
+    ).filter(ProcessStep.traveler_id == traveler_id, ProcessStep.is_completed == False).one()
+    return int(remaining), int(required)
+
+
+def claim_step_completion(db, step: ProcessStep) -> Optional[Tuple[int, int]]:
+    """Mark `step` complete in the caller's transaction if no one else has,
+    and return the traveler's (remaining_steps, remaining_required) after it;
+    None when the step was already complete. The caller still sets the step's
+    ORM attributes (completed_at, completed_by, ...) so the other flush hooks
+    see the change as usual; the progress hook knows the claim is already on
+    the counters.
+
+    Both writes are conditional UPDATEs: the step's only matches while it is
+    incomplete, and the counters' takes the traveler_progress row lock, so two
+    clock-outs racing on one traveler (or one step) apply one after the
+    other. The new current step is read in that same UPDATE. A traveler
+    whose counters are not computed yet has its steps counted instead and is
+    left for before_commit's recompute to store."""
+    from routers.travelers import visible_departments
+
+    claimed = db.execute(
+        update(ProcessStep)
+        .where(ProcessStep.id == step.id, ProcessStep.is_completed == False)
+        .values(is_completed=True)
+        .execution_options(synchronize_session=False)
+    ).rowcount
+    if not claimed:
+        return None
+    db.info.setdefault("progress_claimed", set()).add(step.id)
+    required = 1 if step.is_required else 0
+    department = db.query(WorkCenter.department).filter(WorkCenter.code == step.work_center_code).scalar()
+    departments = visible_departments(department or 'Other')
+
+    def current(column):
+        return (
+            select(column)
+            .where(ProcessStep.traveler_id == step.traveler_id, ProcessStep.is_completed == False)
+            .order_by(ProcessStep.step_number, ProcessStep.id)
+            .limit(1)
+            .scalar_subquery()
+        )
+
+    row = db.execute(
+        update(TravelerProgress)
+        .where(
+            TravelerProgress.traveler_id == step.traveler_id,
+            TravelerProgress.remaining_steps.isnot(None),
+            TravelerProgress.remaining_required.isnot(None),
+        )
+        .values(
+            remaining_steps=TravelerProgress.remaining_steps - 1,
+            remaining_required=TravelerProgress.remaining_required - required,
+            completed_steps=TravelerProgress.completed_steps + (1 if departments else 0),
+            current_step=current(ProcessStep.operation),
+            current_work_center=current(ProcessStep.work_center_code),
+        )
+        .returning(TravelerProgress.remaining_steps, TravelerProgress.remaining_required)
+        .execution_options(synchronize_session=False)
+    ).first()
+    if row is None:
+        db.info.setdefault("progress_touched", set()).add(step.traveler_id)
+        return _count_remaining(db, step.traveler_id)
+    if departments:
+        db.execute(
+            update(TravelerDepartmentProgress)
+            .where(
+                TravelerDepartmentProgress.traveler_id == step.traveler_id,
+                TravelerDepartmentProgress.department.in_(departments),
+            )
+            .values(completed_steps=TravelerDepartmentProgress.completed_steps + 1)
+            .execution_options(synchronize_session=False)
+        )
+    return max(row.remaining_steps, 0), max(row.remaining_required, 0)
+
+
+def load_progress(db, traveler_ids: List[int]):
+    """({traveler_id: TravelerProgress}, {traveler_id: [TravelerDepartmentProgress]})
+    for the given travelers. Travelers without stored rows get transient
+    objects computed now; nothing is written."""
+    progress, departments = _stored(db, traveler_ids)
+    missing = [i for i in traveler_ids if i not in progress]
+    if missing:
+        for traveler_id, (values, dept_values) in _compute(db, missing).items():
+            progress[traveler_id] = TravelerProgress(traveler_id=traveler_id, **values)
+            departments[traveler_id] = [TravelerDepartmentProgress(traveler_id=traveler_id, **dv)
+                                        for dv in dept_values]
+    return progress, departments
+
+
+def reconcile_progress(db) -> dict:
+    """Recompute every traveler's counters and rewrite the ones that drifted.
+    Commits per batch. On Postgres only one worker runs it at a time."""
+    with single_runner(db, ADVISORY_LOCK_KEY) as got_lock:
+        if not got_lock:
+            return {"skipped": "another worker is reconciling"}
+        checked = repaired = 0
+        last_id = 0
+        while True:
+            ids = [i for (i,) in db.query(Traveler.id).filter(Traveler.id > last_id)
+                   .order_by(Traveler.id).limit(RECONCILE_BATCH)]
+            if not ids:
+                break
+            _lock_progress(db, ids)
+            progress, departments = _stored(db, ids)
+            repaired += _write(db, _compute(db, ids), progress, departments, only_changed=True)
+            db.commit()
+            checked += len(ids)
+            last_id = ids[-1]
+        return {"checked": checked, "repaired": repaired}
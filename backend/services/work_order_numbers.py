@@ -0,0 +1,183 @@
+"""
+Work-order number allocation.
+
+A traveler's work order is a 5-digit sequential prefix, optionally with a
+suffix the user types ("26015", "26015-1"). The next prefix used to be found
+by loading every non-DRAFT work_order_number, regex-parsing each in Python and
+taking the max: a full scan on every traveler form, and two DRAFT -> CREATED
+transitions running together could both compute the same max.
+
+The last prefix handed out now lives in one counter row
+(models.WorkOrderCounter):
+
+  - next_work_order_prefix() reads it: the preview the form shows.
+  - allocate_work_order_prefix() increments it with UPDATE ... RETURNING.
+    The row lock it takes serializes concurrent allocations until commit, so
+    no two transactions get the same prefix.
+  - reserve_work_order_prefix() allocates and records a reservation for an
+    open traveler form; claim_work_order_prefix() ties it to the traveler
+    once saved; release_work_order_prefix() gives it back when the form is
+    abandoned. A released prefix is reused only if nothing was allocated after
+    it — the same "a draft that never shipped does not burn a number" rule
+    the max-scan had. Unclaimed reservations expire after
+    WORK_ORDER_RESERVATION_TTL seconds.
+  - note_work_order_used() (models.install_work_order_counter) keeps the
+    counter at or above any prefix a non-DRAFT traveler carries, including
+    ones typed by hand.
+
+seed_work_order_counter() creates the row from the current max; main.py runs
+it at startup, and allocation runs it if the row is somehow missing.
+"""
+
+import os
+import re
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+
+from sqlalchemy import update, select, insert
+
+from models import Traveler, WorkOrderCounter, WorkOrderReservation
+
+COUNTER_NAME = "work_order"
+WORK_ORDER_FLOOR = 26014  # the first allocated prefix is 26015
+WORK_ORDER_RESERVATION_TTL = int(os.getenv('WORK_ORDER_RESERVATION_TTL', 4 * 3600))  # seconds
+
+_PREFIX = re.compile(r'^(\d{5})')
+
+
+def work_order_prefix(work_order_number: Optional[str]) -> Optional[int]:
+    """26015 for "26015" or "26015-1"; None when there is no 5-digit prefix."""
+    m = _PREFIX.match(str(work_order_number or ''))
+    return int(m.group(1)) if m else None
+
+
+def _format(value: int) -> str:
+    return str(value).zfill(5)
+
+
+def _is_draft(status) -> bool:
+    value = status.value if hasattr(status, 'value') else status
+    return str(value).upper() == 'DRAFT'
+
+
+def seed_work_order_counter(connection) -> int:
+    """Create the counter row from the highest prefix on a non-DRAFT traveler
+    (one scan, at startup), or raise an existing row to it. Returns the
+    counter value."""
+    highest = WORK_ORDER_FLOOR
+    rows = connection.execute(select(Traveler.work_order_number, Traveler.status).where(
+        Traveler.work_order_number.isnot(None), Traveler.work_order_number != '',
+    ))
+    for work_order_number, status in rows:
+        prefix = work_order_prefix(work_order_number)
+        if prefix is not None and not _is_draft(status) and prefix > highest:
+            highest = prefix
+    current = connection.execute(
+        select(WorkOrderCounter.last_value).where(WorkOrderCounter.name == COUNTER_NAME)
+    ).scalar()
+    if current is None:
+        connection.execute(insert(WorkOrderCounter).values(name=COUNTER_NAME, last_value=highest))
+        return highest
+    _raise_to(connection, highest)
+    return max(current, highest)
+
+
+def _raise_to(connection, value: int) -> None:
+    connection.execute(update(WorkOrderCounter).where(
+        WorkOrderCounter.name == COUNTER_NAME, WorkOrderCounter.last_value < value,
+    ).values(last_value=value))
+
+
+def note_work_order_used(connection, work_order_number: Optional[str], status) -> None:
+    """Raise the counter to a prefix a non-DRAFT traveler now carries."""
+    prefix = work_order_prefix(work_order_number)
+    if prefix is not None and not _is_draft(status):
+        _raise_to(connection, prefix)
+
+
+def next_work_order_prefix(db) -> str:
+    """The prefix the next allocation will return (unless someone else
+    allocates first). Nothing is consumed."""
+    last = db.execute(
+        select(WorkOrderCounter.last_value).where(WorkOrderCounter.name == COUNTER_NAME)
+    ).scalar()
+    if last is None:
+        last = seed_work_order_counter(db.connection())
+    return _format(last + 1)
+
+
+def allocate_work_order_prefix(db) -> str:
+    """Consume the next prefix, in the caller's transaction."""
+    bump = update(WorkOrderCounter).where(WorkOrderCounter.name == COUNTER_NAME).values(
+        last_value=WorkOrderCounter.last_value + 1,
+    ).returning(WorkOrderCounter.last_value)
+    value = db.execute(bump).scalar()
+    if value is None:
+        seed_work_order_counter(db.connection())
+        value = db.execute(bump).scalar()
+    return _format(value)
+
+
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def _give_back(db, reservation: WorkOrderReservation) -> None:
+    reservation.released_at = _utcnow()
+    db.execute(update(WorkOrderCounter).where(
+        WorkOrderCounter.name == COUNTER_NAME,
+        WorkOrderCounter.last_value == int(reservation.prefix),
+    ).values(last_value=WorkOrderCounter.last_value - 1))
+
+
+def release_expired_reservations(db) -> int:
+    """Release unclaimed reservations past their expiry, newest first so a run
+    of abandoned prefixes at the top of the sequence is reclaimed whole."""
+    expired = db.query(WorkOrderReservation).filter(
+        WorkOrderReservation.traveler_id.is_(None),
+        WorkOrderReservation.released_at.is_(None),
+        WorkOrderReservation.expires_at < _utcnow(),
+    ).order_by(WorkOrderReservation.prefix.desc()).all()
+    for reservation in expired:
+        _give_back(db, reservation)
+    return len(expired)
+
+
+def reserve_work_order_prefix(db, user_id: Optional[int]) -> WorkOrderReservation:
+    """Allocate a prefix and hold it for an open traveler form."""
+    release_expired_reservations(db)
+    prefix = allocate_work_order_prefix(db)
+    # A prefix given back earlier can come round again; its old row is reused.
+    reservation = db.get(WorkOrderReservation, prefix) or WorkOrderReservation(prefix=prefix)
+    reservation.reserved_by = user_id
+    reservation.reserved_at = _utcnow()
+    reservation.expires_at = _utcnow() + timedelta(seconds=WORK_ORDER_RESERVATION_TTL)
+    reservation.traveler_id = None
+    reservation.released_at = None
+    db.add(reservation)
+    return reservation
+
+
+def claim_work_order_prefix(db, work_order_number: Optional[str], traveler_id: int) -> bool:
+    """Mark the reservation behind this work order as used by the traveler.
+    False when the prefix was not reserved (typed by hand, or allocated
+    directly)."""
+    prefix = work_order_prefix(work_order_number)
+    if prefix is None:
+        return False
+    reservation = db.get(WorkOrderReservation, _format(prefix))
+    if reservation is None or reservation.traveler_id is not None:
+        return False
+    reservation.traveler_id = traveler_id
+    reservation.released_at = None
+    return True
+
+
+def release_work_order_prefix(db, prefix: str) -> bool:
+    """Give back an unclaimed reservation. False if it was never reserved,
+    is already released, or a traveler has claimed it."""
+    reservation = db.get(WorkOrderReservation, prefix)
+    if reservation is None or reservation.traveler_id is not None or reservation.released_at is not None:
+        return False
+    _give_back(db, reservation)
+    return True
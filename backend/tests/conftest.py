@@ -0,0 +1,67 @@
+"""Fixtures shared by the API and service tests.
+
+`db` is a session on a fresh in-memory SQLite database, `admin` an ADMIN user
+in it and `client` a TestClient that reads that database as that user. Tests
+that count statements listen on `engine`. Tests that need several connections
+at once (threads racing each other) take `session_factory`, a sessionmaker on
+a file database of their own.
+"""
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from main import app
+from models import Base, User, UserRole
+from database import get_db
+from routers.auth import get_current_user
+
+_engine = create_engine(
+    "sqlite:///:memory:",
+    connect_args={"check_same_thread": False},
+    poolclass=StaticPool,
+)
+TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=_engine)
+
+
+@pytest.fixture
+def engine():
+    return _engine
+
+
+@pytest.fixture
+def db():
+    Base.metadata.create_all(bind=_engine)
+    session = TestingSessionLocal()
+    yield session
+    session.close()
+    Base.metadata.drop_all(bind=_engine)
+
+
+@pytest.fixture
+def admin(db):
+    user = User(username="admin@test", email="admin@test", first_name="T", last_name="A",
+                hashed_password="x", role=UserRole.ADMIN, is_active=True)
+    db.add(user)
+    db.commit()
+    db.refresh(user)
+    return user
+
+
+@pytest.fixture
+def client(db, admin, monkeypatch):
+    monkeypatch.setitem(app.dependency_overrides, get_db, lambda: db)
+    monkeypatch.setitem(app.dependency_overrides, get_current_user, lambda: admin)
+    return TestClient(app)
+
+
+@pytest.fixture
+def session_factory(tmp_path):
+    # A file, not :memory: — every thread gets a connection of its own and
+    # SQLite's write lock serializes the transactions, as row locks would.
+    file_engine = create_engine(f"sqlite:///{tmp_path / 'test.db'}",
+                                connect_args={"check_same_thread": False, "timeout": 60})
+    Base.metadata.create_all(bind=file_engine)
+    yield sessionmaker(autocommit=False, autoflush=False, bind=file_engine)
+    file_engine.dispose()
@@ -0,0 +1,99 @@
+"""Query budgets for /analytics/all.
+
+Anomaly detection, bottlenecks and operator scorecards used to run point
+queries per anomaly, per work center and per operator, so the snapshot got
+slower as the shop got busier. Each section now issues a fixed number of
+queries however many rows it reports.
+"""
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import event
+
+from models import Traveler, LaborEntry, User, UserRole, TravelerStatus, TravelerType, Priority
+from routers.analytics import compute_analytics
+from services.labor_anomalies import detect_labor_anomalies
+from services.snapshots import SectionTimer
+
+
+# Queries each section may issue, whatever the data.
+BUDGET = {"anomalies": 3, "bottlenecks": 3, "operator_scorecards": 4}
+
+
+class CountingTimer(SectionTimer):
+    """Counts the statements run while each section is open."""
+
+    def __init__(self, engine):
+        super().__init__()
+        self.engine = engine
+        self.queries = {}
+        event.listen(engine, "before_cursor_execute", self._count)
+
+    def _count(self, *args):
+        if self._section is not None:
+            self.queries[self._section] = self.queries.get(self._section, 0) + 1
+
+    def close(self):
+        event.remove(self.engine, "before_cursor_execute", self._count)
+
+
+def populate(db, operators: int, entries_each: int, first: int = 0):
+    now = datetime.now(timezone.utc)
+    for n in range(first, first + operators):
+        user = User(username=f"op{n}", email=f"op{n}@test", first_name="Op", last_name=str(n),
+                    hashed_password="x", role=UserRole.OPERATOR, is_active=True)
+        db.add(user)
+        db.flush()
+        traveler = Traveler(job_number=f"84{n:02d}", work_order_number=f"WO-{n}", traveler_type=TravelerType.ASSY,
+                            part_number="PN", part_description="-", revision="A", quantity=1,
+                            priority=Priority.NORMAL, work_center="ASSEMBLY", status=TravelerStatus.IN_PROGRESS,
+                            created_by=user.id, is_active=True)
+        db.add(traveler)
+        db.flush()
+        for i in range(entries_each):
+            wc = f"WC{i % 3}"
+            start = now - timedelta(hours=30 + i)
+            if i == 0:  # forgotten clock-out (one open timer per operator)
+                db.add(LaborEntry(traveler_id=traveler.id, employee_id=user.id, work_center=wc, start_time=start))
+            db.add_all([  # too short, too long
+                LaborEntry(traveler_id=traveler.id, employee_id=user.id, work_center=wc, start_time=start,
+                           end_time=start + timedelta(minutes=1), hours_worked=1 / 60, is_completed=True),
+                LaborEntry(traveler_id=traveler.id, employee_id=user.id, work_center=wc, start_time=start,
+                           end_time=start + timedelta(hours=11), hours_worked=11.0, is_completed=True),
+            ])
+    db.commit()
+
+
+def section_queries(db, engine):
+    timer = CountingTimer(engine)
+    try:
+        payload = compute_analytics(db, timer)
+        timer.stop()
+    finally:
+        timer.close()
+    return payload, {name: timer.queries.get(name, 0) for name in BUDGET}
+
+
+class TestQueryBudget:
+    def test_constant_whatever_the_volume(self, db, engine):
+        populate(db, operators=1, entries_each=1)
+        small, small_queries = section_queries(db, engine)
+        populate(db, operators=4, entries_each=6, first=1)
+        large, large_queries = section_queries(db, engine)
+
+        assert len(large["anomalies"]) > len(small["anomalies"])
+        assert len(large["operator_scorecards"]) == 5
+        assert large_queries == small_queries
+        for section, used in large_queries.items():
+            assert used <= BUDGET[section], (section, used)
+
+
+class TestThresholds:
+    def test_configurable(self, db):
+        populate(db, operators=1, entries_each=1)
+
+        def kinds(found):
+            return sorted(a["type"] for a in found)
+
+        assert kinds(detect_labor_anomalies(db)) == ["forgotten_clockout", "suspiciously_short", "unusually_long"]
+        assert kinds(detect_labor_anomalies(db, forgotten_clockout_hours=48, short_entry_minutes=0.5,
+                                            long_entry_hours=12)) == []
@@ -0,0 +1,153 @@
+"""Server-sent change events.
+
+Dashboards and the notification bell poll whether or not anything changed.
+Labor, step, notification and kitting writes now record change_events rows in
+their own transaction; each worker's broker reads new rows and pushes them to
+its /events/stream subscribers, so a write on any worker reaches every
+browser.
+"""
+import asyncio
+from datetime import datetime
+
+import pytest
+
+from models import (
+    ChangeEvent, Traveler, ProcessStep, LaborEntry, Notification, NotificationType, KittingTimerSession,
+    TravelerStatus, TravelerType, Priority,
+)
+import services.change_events as change_events
+from services.change_events import ChangeEventBroker
+
+
+@pytest.fixture
+def traveler(db, admin):
+    t = Traveler(job_number="8414", work_order_number="WO-8414", traveler_type=TravelerType.ASSY,
+                 part_number="PN-1", part_description="Test", revision="A", quantity=1,
+                 priority=Priority.NORMAL, work_center="ASSEMBLY", status=TravelerStatus.IN_PROGRESS,
+                 created_by=admin.id, is_active=True)
+    db.add(t)
+    db.flush()
+    db.add(ProcessStep(traveler_id=t.id, step_number=1, operation="SMT", work_center_code="SMT",
+                       instructions="-", is_completed=False))
+    db.commit()
+    db.refresh(t)
+    return t
+
+
+def kinds(db):
+    return [e.kind for e in db.query(ChangeEvent).order_by(ChangeEvent.id)]
+
+
+def notify(db, user, title="Labor started"):
+    db.add(Notification(user_id=user.id, notification_type=list(NotificationType)[0],
+                        title=title, message="-"))
+    db.commit()
+
+
+class TestRecordedWithTheWrite:
+    def test_labor_step_notification_and_kitting(self, db, traveler, admin):
+        entry = LaborEntry(traveler_id=traveler.id, employee_id=admin.id, start_time=datetime(2026, 9, 1, 8))
+        db.add(entry)
+        db.commit()
+        entry.end_time = datetime(2026, 9, 1, 9)
+        entry.is_completed = True
+        db.query(ProcessStep).one().is_completed = True
+        db.commit()
+        notify(db, admin)
+        db.add(KittingTimerSession(traveler_id=traveler.id, session_type="ACTIVE",
+                                   start_time=datetime(2026, 9, 1, 10)))
+        db.commit()
+        events = kinds(db)
+        assert events[0] == "labor.started"
+        assert sorted(events[1:3]) == ["labor.stopped", "step.completed"]  # same flush
+        assert events[3:] == ["notification.created", "kitting.changed"]
+
+    def test_rolled_back_write_emits_nothing(self, db, traveler, admin):
+        db.add(LaborEntry(traveler_id=traveler.id, employee_id=admin.id, start_time=datetime(2026, 9, 1, 8)))
+        db.flush()
+        db.rollback()
+        assert kinds(db) == []
+
+
+def commit_events(Session, *events):
+    db = Session()
+    db.add_all(events)
+    db.commit()
+    db.close()
+
+
+def event(kind, event_id=None, user_id=None):
+    return ChangeEvent(id=event_id, kind=kind, user_id=user_id, payload="{}")
+
+
+# The brokers poll from worker threads while the test writes, so these run on
+# a file database with a connection per session.
+class TestBroker:
+    def test_fans_out_across_workers_and_filters_by_user(self, session_factory):
+        async def received(subscriber, count):
+            return [(await asyncio.wait_for(subscriber.queue.get(), 5))["kind"] for _ in range(count)]
+
+        async def scenario():
+            # Two brokers = two workers; the write below happens on "neither".
+            worker_a = ChangeEventBroker(session_factory=session_factory, poll_interval=0.01)
+            worker_b = ChangeEventBroker(session_factory=session_factory, poll_interval=0.01)
+            await worker_a.poll_once()
+            await worker_b.poll_once()
+            admin_sub, operator_sub = worker_a.subscribe(1), worker_b.subscribe(2)
+
+            commit_events(session_factory, event("notification.created", user_id=1), event("labor.started"))
+            assert await received(admin_sub, 2) == ["notification.created", "labor.started"]
+            assert await received(operator_sub, 1) == ["labor.started"]
+            await asyncio.sleep(0.05)
+            assert admin_sub.queue.empty() and operator_sub.queue.empty()  # each delivered once
+            worker_a.unsubscribe(admin_sub)
+            worker_b.unsubscribe(operator_sub)
+
+        asyncio.run(scenario())
+
+    def test_stream_replays_after_last_event_id(self, session_factory, monkeypatch):
+        monkeypatch.setattr(change_events, "CHANGE_EVENT_LATE_WINDOW", 0)
+        commit_events(session_factory, event("notification.created", 1, user_id=1))
+        commit_events(session_factory, event("notification.created", 2, user_id=1))
+
+        async def scenario():
+            broker = ChangeEventBroker(session_factory=session_factory, poll_interval=0.01)
+            stream = broker.stream(1, last_event_id=1)
+            assert await stream.__anext__() == "retry: 3000\n\n"
+            replayed = await stream.__anext__()
+            await stream.aclose()
+            return replayed
+
+        assert asyncio.run(scenario()).startswith("id: 2\nevent: notification.created\n")
+
+
+class TestOutOfOrderCommits:
+    """Ids are assigned at flush; commits can land in the other order."""
+
+    def test_poll_delivers_a_lower_id_committed_late(self, session_factory):
+        broker = ChangeEventBroker(session_factory=session_factory)
+
+        async def scenario():
+            await broker.poll_once()
+            # The transaction that was given id 2 commits first...
+            commit_events(session_factory, event("labor.started", 2))
+            first = await broker.poll_once()
+            # ...then the one holding id 1.
+            commit_events(session_factory, event("labor.stopped", 1))
+            return first, await broker.poll_once(), await broker.poll_once()
+
+        assert asyncio.run(scenario()) == (1, 1, 0)
+
+    def test_replay_includes_a_lower_id_committed_late(self, session_factory):
+        commit_events(session_factory, event("labor.started", 2))
+        commit_events(session_factory, event("labor.stopped", 1))  # after the browser saw id 2
+
+        async def scenario():
+            broker = ChangeEventBroker(session_factory=session_factory, poll_interval=0.01)
+            stream = broker.stream(1, last_event_id=2)
+            assert await stream.__anext__() == "retry: 3000\n\n"
+            replayed = await stream.__anext__()
+            await stream.aclose()
+            return replayed
+
+        assert asyncio.run(scenario()).startswith("id: 1\nevent: labor.stopped\n")
@@ -0,0 +1,87 @@
+"""Concurrent KOSH + NEXUS fetches for the composite job endpoints.
+
+The enriched job page and the timeline used to read KOSH and then NEXUS one
+after the other. The KOSH side now runs on a bounded thread pool while the
+NEXUS side runs on the request thread, so the page costs max(KOSH, NEXUS), and
+a Server-Timing header reports each phase.
+"""
+import time
+from datetime import datetime
+
+import pytest
+
+from models import Traveler, TravelerStatus, TravelerType, Priority
+from services.composite_fetch import PhaseTimings, fetch_alongside
+from services.kosh_cache import KoshCache
+
+
+KOSH_LATENCY = 0.2
+
+
+def server_timing(header):
+    return {part.split(";")[0]: float(part.split("dur=")[1]) for part in header.split(", ")}
+
+
+class TestFetchAlongside:
+    def test_sides_overlap(self):
+        timings = PhaseTimings()
+        started = time.perf_counter()
+        future, local = fetch_alongside(
+            lambda: time.sleep(KOSH_LATENCY) or "kosh",
+            lambda: time.sleep(KOSH_LATENCY) or "nexus",
+            timings,
+        )
+        elapsed = time.perf_counter() - started
+        assert (future.result(), local) == ("kosh", "nexus")
+        assert elapsed < KOSH_LATENCY * 1.75, "latency is max(KOSH, NEXUS), not the sum"
+        assert set(server_timing(timings.header())) == {"kosh", "nexus", "total"}
+
+    def test_remote_errors_surface_on_result(self):
+        def down():
+            raise RuntimeError("KOSH down")
+
+        future, local = fetch_alongside(down, lambda: "nexus")
+        assert local == "nexus"
+        with pytest.raises(RuntimeError):
+            future.result()
+
+
+@pytest.fixture
+def client(client, db, admin, monkeypatch):
+    from routers import jobs
+
+    def slow_kosh(sql, params):
+        time.sleep(KOSH_LATENCY)
+        if 'FROM warehouse."tblJob"' in sql:
+            return [{
+                "id": 1, "job_number": "8414", "description": "PCB ASSY", "customer": "ACME",
+                "cust_pn": "CPN", "build_qty": 1, "order_qty": 10, "job_rev": "A", "cust_rev": "A",
+                "wo_number": "", "status": "In Mfg", "notes": "", "created_by": "kosh",
+                "created_at": datetime(2026, 9, 1), "updated_at": datetime(2026, 9, 1),
+            }]
+        return []
+
+    monkeypatch.setattr(jobs, "_kosh_fetchall", slow_kosh)
+    monkeypatch.setattr(jobs, "kosh_cache", KoshCache())
+    db.add(Traveler(job_number="8414", work_order_number="WO-8414", traveler_type=TravelerType.ASSY,
+                    part_number="PN-1", part_description="PCB ASSY", revision="A", quantity=10,
+                    priority=Priority.NORMAL, work_center="ASSEMBLY",
+                    status=TravelerStatus.IN_PROGRESS, created_by=admin.id, is_active=True))
+    db.commit()
+    return client
+
+
+class TestCompositeEndpoints:
+    def test_enriched_job_reports_phase_timings(self, client):
+        r = client.get("/jobs/8414/enriched")
+        assert r.status_code == 200
+        assert r.json()["traveler_count"] == 1
+        phases = server_timing(r.headers["Server-Timing"])
+        assert {"kosh", "nexus", "merge", "total"} <= set(phases)
+        assert phases["kosh"] >= KOSH_LATENCY * 1000
+
+    def test_timeline_reads_kosh_alongside_nexus(self, client):
+        r = client.get("/jobs/8414/timeline")
+        assert r.status_code == 200
+        assert [e["type"] for e in r.json()["events"]][0] == "job_created"
+        assert {"kosh", "nexus"} <= set(server_timing(r.headers["Server-Timing"]))
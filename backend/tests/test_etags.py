@@ -0,0 +1,80 @@
+"""Version-based ETags.
+
+List and detail endpoints are refetched every time the browser's 10-second
+cache expires. Each ORM write now bumps a per-table version in its own
+transaction, the endpoints derive a strong ETag from the versions of the
+tables they read, and a matching If-None-Match gets a 304 before the
+endpoint's queries run.
+"""
+from sqlalchemy import event
+
+from main import app
+from models import WorkCenter, User, UserRole
+from routers.auth import get_current_user
+from services.table_versions import read_table_versions
+
+
+def version(db, table):
+    return read_table_versions(db, [table])[table][0]
+
+
+class TestVersionBumps:
+    def test_commits_bump_and_rollbacks_do_not(self, db, admin):
+        before = version(db, "work_centers")
+        db.add(WorkCenter(name="SMT", code="SMT", department="SMT"))
+        db.commit()
+        assert version(db, "work_centers") == before + 1
+
+        db.query(WorkCenter).one().name = "SMT TOP"
+        db.flush()
+        db.rollback()
+        assert version(db, "work_centers") == before + 1
+
+    def test_bulk_update_bumps(self, db, admin):
+        db.add(WorkCenter(name="SMT", code="SMT", department="SMT"))
+        db.commit()
+        before = version(db, "work_centers")
+        db.query(WorkCenter).update({WorkCenter.sort_order: 5}, synchronize_session=False)
+        db.commit()
+        assert version(db, "work_centers") == before + 1
+        assert version(db, "labor_entries") == 0
+
+
+class TestConditionalGet:
+    def test_304_without_running_the_query(self, client, db, engine):
+        db.add(WorkCenter(name="SMT", code="SMT", department="SMT"))
+        db.commit()
+        first = client.get("/work-centers-mgmt")
+        etag = first.headers["etag"]
+        assert first.status_code == 200 and etag.startswith('"')
+
+        statements = []
+
+        def listener(conn, cursor, statement, *args):
+            statements.append(statement)
+
+        event.listen(engine, "before_cursor_execute", listener)
+        try:
+            again = client.get("/work-centers-mgmt", headers={"If-None-Match": etag})
+        finally:
+            event.remove(engine, "before_cursor_execute", listener)
+        assert again.status_code == 304 and again.headers["etag"] == etag and again.content == b""
+        assert not any("FROM work_centers" in s for s in statements)
+
+        db.add(WorkCenter(name="HAND", code="HAND", department="Soldering"))
+        db.commit()
+        changed = client.get("/work-centers-mgmt", headers={"If-None-Match": etag})
+        assert changed.status_code == 200 and changed.headers["etag"] != etag
+        assert len(changed.json()) == 2
+
+    def test_etag_varies_by_query_and_user(self, client, db, admin, monkeypatch):
+        all_entries = client.get("/labor/my-entries").headers["etag"]
+        assert client.get("/labor/my-entries", params={"days": 7}).headers["etag"] != all_entries
+
+        operator = User(username="op@test", email="op@test", first_name="O", last_name="P",
+                        hashed_password="x", role=UserRole.OPERATOR, is_active=True)
+        db.add(operator)
+        db.commit()
+        monkeypatch.setitem(app.dependency_overrides, get_current_user, lambda: operator)
+        mine = client.get("/labor/my-entries", headers={"If-None-Match": all_entries})
+        assert mine.status_code == 200 and mine.headers["etag"] != all_entries
@@ -0,0 +1,88 @@
+"""Stored job-number keys on travelers.
+
+Job matching used to strip compliance suffixes in SQL with regexp_replace(),
+which no index can serve, and then assign travelers to jobs by scanning every
+job number. travelers.base_job_number (plus lead_free_suffix / itar_suffix) is
+now kept in step with job_number on write and is what the queries filter on.
+"""
+import pytest
+
+from models import Traveler, TravelerStatus, TravelerType, Priority
+import routers.jobs as jobs_router
+from routers.jobs import traveler_matches_job, _traveler_rollups
+from utils.job_numbers import job_number_keys, base_job_number
+
+
+@pytest.mark.parametrize("job_number, base, lead_free, itar, descriptor", [
+    ("8414", "8414", False, False, ""),
+    ("8414LM", "8414", True, True, ""),
+    ("8414m", "8414", False, True, ""),
+    ("8689L CABLE ASSY", "8689", True, False, "CABLE ASSY"),
+    ("8762L-KANBAN", "8762", True, False, "KANBAN"),
+    ("8813L-4BA ASSY", "8813L-4BA", False, False, "ASSY"),
+    ("8813L-4DA", "8813L-4DA", False, False, ""),
+])
+def test_job_number_keys(job_number, base, lead_free, itar, descriptor):
+    assert job_number_keys(job_number) == (base, lead_free, itar, descriptor)
+
+
+@pytest.mark.parametrize("traveler_jn, job_number", [
+    ("8813L-4A", "8813L-4A"), ("8414L", "8414"), ("8414LM", "8414"),
+    ("8813L-4BA ASSY", "8813L-4BA"), ("8689L CABLE ASSY", "8689L"),
+    ("8762L KANBAN", "8762L"), ("8762L-KANBAN", "8762L"), ("8813L-4L", "8813L-4"),
+])
+def test_every_match_shares_the_base(traveler_jn, job_number):
+    # What lets the queries pre-filter on the indexed column without losing rows.
+    assert traveler_matches_job(traveler_jn, job_number)
+    assert base_job_number(traveler_jn) == base_job_number(job_number)
+
+
+def make_traveler(db, admin, job_number):
+    t = Traveler(job_number=job_number, work_order_number=f"WO-{job_number}", traveler_type=TravelerType.ASSY,
+                 part_number="PN-1", part_description="Test", revision="A", quantity=1,
+                 priority=Priority.NORMAL, work_center="ASSEMBLY", status=TravelerStatus.CREATED,
+                 created_by=admin.id, is_active=True)
+    db.add(t)
+    db.commit()
+    db.refresh(t)
+    return t
+
+
+class TestKeysMaintainedOnWrite:
+    def test_insert_and_job_number_change(self, db, admin):
+        t = make_traveler(db, admin, "8414LM")
+        assert (t.base_job_number, t.lead_free_suffix, t.itar_suffix) == ("8414", True, True)
+
+        t.job_number = "9001L CABLE ASSY"
+        db.commit()
+        db.refresh(t)
+        assert (t.base_job_number, t.lead_free_suffix, t.itar_suffix) == ("9001", True, False)
+
+
+class TestJobGrouping:
+    def test_travelers_land_on_their_own_job(self, db, admin):
+        for jn in ("8414", "8414L", "8414LM", "84140", "8689L CABLE ASSY"):
+            make_traveler(db, admin, jn)
+
+        by_job, _, _ = _traveler_rollups(db, ["8414", "8414L", "8689L"])
+
+        # "8414LM" qualifies for both 8414 and 8414L; the job listed first wins.
+        assert sorted(t.job_number for t in by_job["8414"]) == ["8414", "8414LM"]
+        assert [t.job_number for t in by_job["8414L"]] == ["8414L"]
+        # Descriptors never move labor hours to another job in the list rollup.
+        assert by_job["8689L"] == []
+
+    def test_job_travelers_endpoint_uses_the_same_rule(self, db, admin, client):
+        for jn in ("8813L-4A", "8813L-4BA ASSY", "8813L-4DA"):
+            make_traveler(db, admin, jn)
+        own = client.get("/jobs/8813L-4BA/travelers").json()
+        assert [t["job_number"] for t in own["travelers"]] == ["8813L-4BA ASSY"]
+        assert client.get("/jobs/8813L-4D/travelers").json()["total"] == 0
+
+    def test_job_progress_counts_only_the_jobs_travelers(self, db, admin, client, monkeypatch):
+        # "841" must not pick up "8414" travelers the way a prefix match did.
+        for jn in ("841", "841L", "8414", "84140"):
+            make_traveler(db, admin, jn)
+        monkeypatch.setattr(jobs_router, "_kosh_job_or_404", lambda job_number: {"order_qty": 4})
+        body = client.get("/jobs/841/progress").json()
+        assert body["total_travelers"] == 2
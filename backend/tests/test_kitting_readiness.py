@@ -0,0 +1,137 @@
+"""Batch KOSH parts readiness for kitting.
+
+The long-wait sweep used to ask KOSH about each WAITING_PARTS job separately.
+Readiness is now computed for every job in one KOSH query and compared in
+memory, with the same rule as before: a BOM line is covered by stock-room
+inventory matching its ACI part number OR its MPN, MFG Floor excluded. KOSH is
+replaced by the rows that query returns.
+"""
+import pytest
+from datetime import datetime, timedelta, timezone
+
+from models import (
+    KittingEventLog, KittingTimerSession, Traveler, TravelerStatus, TravelerType, Priority,
+)
+from routers.kitting_timer import WAITING, sweep_waiting_sessions
+from services import kitting_readiness
+from services.kitting_readiness import compute_readiness
+from services.kosh_cache import KoshCache
+
+
+def job(jn, order_qty):
+    return {"kind": "job", "job": jn, "item": None, "mpn": None, "qty": order_qty}
+
+
+def bom(jn, aci_pn, mpn, qty_per):
+    return {"kind": "bom", "job": jn, "item": aci_pn, "mpn": mpn, "qty": qty_per}
+
+
+def stock(item, mpn, on_hand):
+    return {"kind": "stock", "job": None, "item": item, "mpn": mpn, "qty": on_hand}
+
+
+KOSH_ROWS = [
+    job("8414", 10), bom("8414", "ACI-1", "MPN-1", 2), bom("8414", "ACI-2", "MPN-2", 1),
+    job("9000", 5), bom("9000", "ACI-1", "MPN-1", 10),
+    job("9100", 1),
+    stock("ACI-1", "MPN-1", 30), stock("ACI-2", None, 4), stock(None, "MPN-2", 6),
+]
+
+
+class TestComputeReadiness:
+    def test_jobs_sharing_parts_are_compared_against_the_same_stock(self):
+        result = compute_readiness(["8414", "9000"], KOSH_ROWS)
+        assert result["8414"]["ready"] is True
+        assert result["9000"] == {
+            "job_number": "9000", "kosh_job_number": "9000", "ready": False,
+            "bom_lines": 1, "short_lines": 1,
+        }
+
+    def test_item_and_mpn_matches_add_up_but_never_double_count(self):
+        # ACI-2 needs 10: 4 matched on item + 6 matched on mpn covers it...
+        rows = [job("1", 10), bom("1", "ACI-2", "MPN-2", 1),
+                stock("ACI-2", None, 4), stock(None, "MPN-2", 6)]
+        assert compute_readiness(["1"], rows)["1"]["ready"] is True
+        # ...but one row matching on both must count once, not twice.
+        rows = [job("1", 10), bom("1", "ACI-2", "MPN-2", 1), stock("ACI-2", "MPN-2", 6)]
+        assert compute_readiness(["1"], rows)["1"]["ready"] is False
+
+    def test_compliance_suffix_falls_back_to_the_base_job(self):
+        result = compute_readiness(["8414L", "8414M"], KOSH_ROWS)
+        assert result["8414L"]["kosh_job_number"] == "8414"
+        assert result["8414L"]["ready"] is True
+
+    def test_unknown_job_or_empty_bom_is_none(self):
+        result = compute_readiness(["7777", "9100"], KOSH_ROWS)
+        assert result["7777"]["ready"] is None
+        assert result["9100"]["ready"] is None
+
+
+@pytest.fixture
+def kosh(monkeypatch):
+    """Fake KOSH: counts round trips and returns KOSH_ROWS."""
+    calls = []
+
+    def fetch(candidates):
+        calls.append(sorted(candidates))
+        return KOSH_ROWS
+
+    monkeypatch.setattr(kitting_readiness, "fetch_readiness_rows", fetch)
+    monkeypatch.setattr("services.kosh_cache.kosh_cache", KoshCache())
+    return calls
+
+
+def waiting_traveler(db, admin, job_number, hours_waiting=1):
+    t = Traveler(job_number=job_number, work_order_number=f"WO-{job_number}", traveler_type=TravelerType.ASSY,
+                 part_number="PN-1", part_description="Test", revision="A", quantity=1,
+                 priority=Priority.NORMAL, work_center="ASSEMBLY", status=TravelerStatus.IN_PROGRESS,
+                 created_by=admin.id, is_active=True)
+    db.add(t)
+    db.flush()
+    db.add(KittingTimerSession(
+        traveler_id=t.id, session_type=WAITING,
+        start_time=datetime.now(timezone.utc) - timedelta(hours=hours_waiting),
+    ))
+    db.commit()
+    return t
+
+
+class TestSweep:
+    def test_sweep_asks_kosh_once_and_closes_ready_jobs(self, db, admin, kosh):
+        ready = waiting_traveler(db, admin, "8414L")
+        short = waiting_traveler(db, admin, "9000")
+        unknown = waiting_traveler(db, admin, "7777")
+
+        result = sweep_waiting_sessions(db)
+
+        assert len(kosh) == 1, "one KOSH query for every waiting job"
+        assert result["open_waiting_sessions"] == 3
+        assert result["auto_closed_waiting"] == 1
+        open_ids = {s.traveler_id for s in db.query(KittingTimerSession)
+                    .filter(KittingTimerSession.end_time.is_(None))}
+        assert open_ids == {short.id, unknown.id}
+        assert db.query(KittingEventLog).filter_by(
+            traveler_id=ready.id, event_type="PARTS_RECEIVED").count() == 1
+
+    def test_long_waits_are_still_notified_when_kosh_is_down(self, db, admin, monkeypatch):
+        def down(candidates):
+            raise RuntimeError("KOSH unavailable")
+
+        monkeypatch.setattr(kitting_readiness, "fetch_readiness_rows", down)
+        monkeypatch.setattr("services.kosh_cache.kosh_cache", KoshCache())
+        waiting_traveler(db, admin, "8414", hours_waiting=30)
+
+        result = sweep_waiting_sessions(db)
+        assert result["auto_closed_waiting"] == 0
+        assert result["newly_notified"] == 1
+
+
+class TestReadinessEndpoint:
+    def test_bulk_readiness(self, client, kosh):
+        r = client.get("/kitting/readiness", params={"jobs": "8414, 9000,7777"})
+        assert r.status_code == 200
+        body = r.json()
+        assert [j["ready"] for j in body["jobs"]] == [True, False, None]
+        assert (body["ready"], body["short"], body["unknown"]) == (1, 1, 1)
+        client.get("/kitting/readiness", params={"jobs": "8414,9000"})
+        assert len(kosh) == 1, "repeat lookups are served from the KOSH cache"
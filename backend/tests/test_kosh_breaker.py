@@ -0,0 +1,240 @@
+"""The KOSH circuit breaker and NEXUS-only degraded job pages.
+
+When KOSH keeps failing or crawling, the breaker opens and KOSH calls fail fast
+instead of each waiting out a timeout; after a cool-down one probe is let
+through and a healthy answer closes it again. Meanwhile the enriched job pages
+answer from NEXUS with kosh_unavailable set. KOSH is a flaky stand-in that
+injects connect failures and latency.
+"""
+import time
+
+import psycopg2
+import pytest
+
+from models import Traveler, TravelerStatus, TravelerType, Priority
+from services import kosh_breaker, kosh_pool
+from services.kosh_breaker import CircuitBreaker, KoshCircuitOpen, CLOSED, OPEN, HALF_OPEN
+from services.kosh_cache import KoshCache
+from services.kosh_pool import KoshPool
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class FlakyKosh:
+    """Stand-in KOSH server: refuses connections while `down`, and sleeps
+    `latency` seconds in every query."""
+
+    def __init__(self):
+        self.down = False
+        self.latency = 0.0
+        self.connects = 0
+        self.queries = 0
+
+    def connect(self):
+        self.connects += 1
+        if self.down:
+            raise psycopg2.OperationalError("could not connect to server: Connection refused")
+        return _Conn(self)
+
+
+class _Cursor:
+    def __init__(self, server):
+        self.server = server
+
+    def execute(self, sql, params=None):
+        if sql.startswith("SET"):
+            return
+        self.server.queries += 1
+        if self.server.down:
+            raise psycopg2.OperationalError("server closed the connection unexpectedly")
+        time.sleep(self.server.latency)
+
+    def fetchone(self):
+        return (1,)
+
+    def fetchall(self):
+        return []
+
+    def close(self):
+        pass
+
+
+class _Conn:
+    def __init__(self, server):
+        self.server = server
+        self.closed = 0
+
+    def cursor(self, cursor_factory=None):
+        return _Cursor(self.server)
+
+    def commit(self):
+        pass
+
+    def rollback(self):
+        pass
+
+    def close(self):
+        self.closed = 1
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+@pytest.fixture
+def breaker(clock, monkeypatch):
+    b = CircuitBreaker(failure_threshold=3, reset_seconds=30, slow_call_seconds=0.05, clock=clock)
+    monkeypatch.setattr(kosh_breaker, "kosh_breaker", b)
+    return b
+
+
+@pytest.fixture
+def kosh(breaker):
+    server = FlakyKosh()
+    old = kosh_pool.set_kosh_pool(KoshPool(connect=server.connect, maxconn=2, checkout_timeout=0.05,
+                                           ping_after_seconds=None))
+    yield server
+    kosh_pool.set_kosh_pool(old)
+
+
+def query(sql="SELECT 1", long_running=False):
+    conn = kosh_pool.checkout(long_running=long_running)
+    try:
+        conn.cursor().execute(sql)
+    finally:
+        conn.close()
+
+
+class TestCircuitBreaker:
+    def test_opens_after_consecutive_failures_and_success_resets_the_count(self, breaker):
+        breaker.record_failure()
+        breaker.record_failure()
+        breaker.record_success()
+        breaker.record_failure()
+        breaker.record_failure()
+        assert breaker.state == CLOSED
+        breaker.record_failure()
+        assert breaker.state == OPEN
+        assert breaker.allow() is False
+        assert breaker.stats()["rejected"] == 1
+
+    def test_half_open_lets_one_probe_through(self, breaker, clock):
+        for _ in range(3):
+            breaker.record_failure()
+        clock.now += 30
+        assert breaker.state == HALF_OPEN
+        assert breaker.allow() is True
+        assert breaker.allow() is False, "only one probe at a time"
+
+        breaker.record_failure()
+        assert breaker.state == OPEN, "a failed probe reopens the circuit"
+        clock.now += 30
+        assert breaker.allow() is True
+        breaker.record_success()
+        assert breaker.state == CLOSED
+        assert breaker.allow() is True
+
+    def test_slow_calls_count_as_failures(self, breaker):
+        for _ in range(3):
+            breaker.record_success(duration=1.0)
+        assert breaker.state == OPEN
+        assert breaker.stats()["slow_calls"] == 3
+
+
+class TestBreakerAroundThePool:
+    def test_kosh_outage_fails_fast_then_recovers(self, kosh, breaker, clock):
+        query()
+        kosh.down = True
+        for _ in range(3):
+            with pytest.raises(psycopg2.OperationalError):
+                query()
+        assert breaker.state == OPEN
+
+        connects = kosh.connects
+        with pytest.raises(KoshCircuitOpen):
+            query()
+        assert kosh.connects == connects, "an open circuit never touches the network"
+
+        kosh.down = False
+        clock.now += 30
+        query()  # the half-open probe
+        assert breaker.state == CLOSED
+
+    def test_injected_latency_trips_the_breaker(self, kosh, breaker):
+        kosh.latency = 0.06
+        for _ in range(3):
+            query()
+        assert breaker.state == OPEN
+        with pytest.raises(KoshCircuitOpen):
+            query()
+
+    def test_long_running_checkouts_are_not_slow_calls(self, kosh, breaker):
+        # The mirror sync's full pulls are slow by design.
+        kosh.latency = 0.06
+        for _ in range(5):
+            query(long_running=True)
+        assert breaker.state == CLOSED
+        assert breaker.stats()["slow_calls"] == 0
+
+        kosh.down = True
+        for _ in range(3):
+            with pytest.raises(psycopg2.OperationalError):
+                query(long_running=True)
+        assert breaker.state == OPEN, "their failures still count"
+
+    def test_bad_queries_do_not_count(self, kosh, breaker, monkeypatch):
+        def bad_execute(self, sql, params=None):
+            raise psycopg2.ProgrammingError("syntax error")
+
+        monkeypatch.setattr(_Cursor, "execute", bad_execute)
+        for _ in range(5):
+            with pytest.raises(psycopg2.ProgrammingError):
+                query()
+        assert breaker.state == CLOSED
+
+
+@pytest.fixture
+def client(client, db, admin, kosh, monkeypatch):
+    from routers import jobs
+
+    monkeypatch.setattr(jobs, "kosh_cache", KoshCache())
+    db.add(Traveler(job_number="8414L", work_order_number="WO-8414L", traveler_type=TravelerType.ASSY,
+                    part_number="PN-1", part_description="PCB ASSY", revision="A", quantity=10,
+                    customer_name="ACME", priority=Priority.NORMAL, work_center="ASSEMBLY",
+                    status=TravelerStatus.IN_PROGRESS, created_by=admin.id, is_active=True))
+    db.commit()
+    return client
+
+
+class TestDegradedJobPages:
+    def test_enriched_job_is_served_from_nexus_when_kosh_is_down(self, client, kosh, breaker):
+        kosh.down = True
+        r = client.get("/jobs/8414/enriched")
+        assert r.status_code == 200
+        body = r.json()
+        assert body["kosh_unavailable"] is True
+        assert body["description"] == "PCB ASSY"
+        assert body["traveler_count"] == 1
+        assert body["kitting_status"] == "unknown"
+
+    def test_enriched_list_is_served_from_nexus_while_the_circuit_is_open(self, client, kosh, breaker):
+        for _ in range(3):
+            breaker.record_failure()
+        r = client.get("/jobs/list-enriched")
+        assert r.status_code == 200
+        body = r.json()
+        assert body["kosh_unavailable"] is True
+        assert body["source"] == "nexus"
+        assert [(j["job_number"], j["traveler_count"]) for j in body["jobs"]] == [("8414L", 1)]
+        assert kosh.connects == 0
+
+    def test_unknown_job_is_still_a_404(self, client, kosh):
+        kosh.down = True
+        assert client.get("/jobs/7777/enriched").status_code == 404
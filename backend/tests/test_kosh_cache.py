@@ -0,0 +1,140 @@
+"""The KOSH read-through cache.
+
+Job pages used to re-read the same tblJob row and BOM rows from KOSH once per
+endpoint. The cache serves repeats from memory, refreshes stale entries in the
+background, falls back to old data when KOSH fails, and loads a list page's
+misses in one bulk call. A fake clock drives expiry; KOSH itself is replaced by
+counting loaders.
+"""
+import threading
+
+import pytest
+
+from services.kosh_cache import KoshCache
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+@pytest.fixture
+def cache(clock):
+    return KoshCache(ttl=60, stale_ttl=600, max_entries=3, clock=clock)
+
+
+def _wait_for_refresh(cache):
+    cache._executor.shutdown(wait=True)
+
+
+class TestKoshCache:
+    def test_fresh_entry_is_served_without_reloading(self, cache):
+        calls = []
+        for _ in range(3):
+            assert cache.get("job", "8414", lambda: calls.append(1) or {"order_qty": 5}) == {"order_qty": 5}
+        assert len(calls) == 1
+        assert cache.stats()["hits"] == 2
+
+    def test_missing_job_is_cached_as_none(self, cache):
+        calls = []
+        assert cache.get("job", "nope", lambda: calls.append(1)) is None
+        assert cache.get("job", "nope", lambda: calls.append(1)) is None
+        assert len(calls) == 1
+
+    def test_stale_entry_is_served_while_refreshing_in_background(self, cache, clock):
+        cache.get("job", "8414", lambda: "old")
+        clock.now += 120
+        started = threading.Event()
+
+        def reload():
+            started.set()
+            return "new"
+
+        assert cache.get("job", "8414", reload) == "old"
+        _wait_for_refresh(cache)
+        assert started.is_set()
+        assert cache.get("job", "8414", lambda: "unused") == "new"
+        assert cache.stats()["stale_served"] == 1
+        assert cache.stats()["refreshes"] == 1
+
+    def test_expired_entry_is_served_when_kosh_fails(self, cache, clock):
+        cache.get("job", "8414", lambda: "old")
+        clock.now += 3600
+
+        def down():
+            raise RuntimeError("KOSH unavailable")
+
+        assert cache.get("job", "8414", down) == "old"
+        assert cache.stats()["served_on_error"] == 1
+
+    def test_true_miss_surfaces_the_error(self, cache):
+        def down():
+            raise RuntimeError("KOSH unavailable")
+
+        with pytest.raises(RuntimeError):
+            cache.get("job", "8414", down)
+
+    def test_least_recently_used_entry_is_evicted(self, cache):
+        for jn in ("1", "2", "3"):
+            cache.get("job", jn, lambda: jn)
+        cache.get("job", "1", lambda: "reload")  # touch "1" so "2" is oldest
+        cache.get("job", "4", lambda: "4")
+        calls = []
+        cache.get("job", "2", lambda: calls.append(1) or "2")
+        assert calls == [1]
+        assert cache.stats()["evictions"] >= 1
+        assert cache.stats()["entries"] == 3
+
+    def test_get_many_loads_all_misses_in_one_call(self, clock):
+        cache = KoshCache(ttl=60, stale_ttl=600, max_entries=100, clock=clock)
+        cache.prime("job", {"1": "one"})
+        batches = []
+
+        def bulk(jns):
+            batches.append(list(jns))
+            return {jn: f"row {jn}" for jn in jns if jn != "3"}
+
+        result = cache.get_many("job", ["1", "2", "3", "2"], bulk)
+        assert batches == [["2", "3"]]
+        assert result == {"1": "one", "2": "row 2", "3": None}
+        cache.get_many("job", ["1", "2", "3"], bulk)
+        assert len(batches) == 1, "cached rows and cached misses must not go back to KOSH"
+
+
+class TestJobEndpointsShareKoshReads:
+    def test_job_page_reads_the_job_row_once(self, monkeypatch):
+        from routers import jobs
+
+        monkeypatch.setattr(jobs, "kosh_cache", KoshCache(max_entries=100))
+        queries = []
+
+        def fake_fetchall(sql, params):
+            queries.append(sql)
+            if 'FROM warehouse."tblJob"' in sql and "ANY" in sql:
+                return [{
+                    "id": 1, "job_number": "8414", "description": "PCB ASSY", "customer": "ACME",
+                    "cust_pn": "CPN", "build_qty": 2, "order_qty": 10, "job_rev": "A", "cust_rev": "A",
+                    "wo_number": "WO-1", "status": "New", "notes": "", "created_by": "kosh",
+                    "created_at": None, "updated_at": None,
+                }]
+            return [{
+                "aci_pn": "ACI-1", "description": "cap", "line_no": "1",
+                "qty_per_board": 2, "stockroom_qty": 50, "mfg_floor_qty": 20,
+            }]
+
+        monkeypatch.setattr(jobs, "_kosh_fetchall", fake_fetchall)
+
+        assert jobs.get_job_detail("8414")["order_qty"] == 10
+        status = jobs.get_kitting_status("8414")
+        jobs.get_kitting_status("8414")
+
+        assert status["kitted"] == 1
+        assert len(queries) == 2, "one tblJob read + one BOM read for the whole page"
@@ -0,0 +1,145 @@
+"""The KOSH mirror: tblJob / tblBOM / inventory copied into NEXUS tables.
+
+Incremental passes pick up rows by updated_at; periodic hash-diff passes fetch
+only rows whose hash changed and remove rows KOSH deleted. Job lists read the
+mirror while it is fresh and KOSH live otherwise. KOSH is a fake cursor that
+answers the handful of statement shapes the sync issues for tblJob.
+"""
+import hashlib
+from datetime import datetime, timedelta
+
+import pytest
+
+from models import KoshJobMirror, KoshSyncState
+from services import kosh_mirror
+
+
+T0 = datetime(2026, 9, 1, 8, 0)
+
+
+def kosh_job(jn, status="New", updated_at=T0, created_at=T0):
+    return {
+        "id": int(jn), "job_number": jn, "description": f"PCB ASSY {jn}", "customer": "ACME",
+        "cust_pn": "CPN", "build_qty": 1, "order_qty": 10, "job_rev": "A", "cust_rev": "A",
+        "wo_number": "", "status": status, "notes": "", "created_by": "kosh",
+        "created_at": created_at, "updated_at": updated_at,
+    }
+
+
+class FakeKoshCursor:
+    """Answers the statements the mirror sync sends for tblJob."""
+
+    def __init__(self, jobs):
+        self.jobs = jobs  # job_number -> row
+        self.result = []
+        self.statements = []
+
+    @staticmethod
+    def _hash(row):
+        return hashlib.md5(repr(sorted(row.items())).encode()).hexdigest()
+
+    def _with_hash(self, row):
+        return {**row, "row_hash": self._hash(row)}
+
+    def execute(self, sql, params=()):
+        self.statements.append(sql)
+        rows = list(self.jobs.values())
+        if "information_schema" in sql:
+            self.result = [{"?column?": 1}]
+        elif "MAX(updated_at)" in sql:
+            self.result = [{"m": max(r["updated_at"] for r in rows) if rows else None}]
+        elif " AS k," in sql:
+            self.result = [{"k": r["job_number"], "h": self._hash(r)} for r in rows]
+        elif "= ANY(%s)" in sql:
+            self.result = [self._with_hash(r) for r in rows if r["job_number"] in params[0]]
+        elif "updated_at >= %s" in sql:
+            self.result = [self._with_hash(r) for r in rows if r["updated_at"] >= params[0]]
+        else:
+            raise AssertionError(f"unexpected KOSH statement: {sql}")
+
+    def fetchone(self):
+        return self.result[0] if self.result else None
+
+    def fetchall(self):
+        return self.result
+
+
+@pytest.fixture
+def kosh():
+    kosh_mirror._updated_at_support.clear()
+    yield FakeKoshCursor({jn: kosh_job(jn) for jn in ("8414", "8415", "8416")})
+    kosh_mirror._updated_at_support.clear()
+
+
+def mirrored(db):
+    return {j.job_number: j.status for j in db.query(KoshJobMirror).all()}
+
+
+class TestJobMirrorSync:
+    def test_first_pass_loads_everything(self, db, kosh):
+        result = kosh_mirror.sync_table(db, kosh, "tblJob")
+        assert result["mode"] == "full"
+        assert mirrored(db) == {"8414": "New", "8415": "New", "8416": "New"}
+        state = db.query(KoshSyncState).filter_by(table_name="tblJob").one()
+        assert state.high_water_mark == T0
+        assert state.rows == 3
+
+    def test_incremental_pass_applies_only_updated_rows(self, db, kosh):
+        kosh_mirror.sync_table(db, kosh, "tblJob")
+        kosh.jobs["8414"] = kosh_job("8414", status="In Mfg", updated_at=T0 + timedelta(hours=1))
+        kosh.jobs["9000"] = kosh_job("9000", updated_at=T0 + timedelta(hours=2))
+
+        result = kosh_mirror.sync_table(db, kosh, "tblJob")
+
+        assert result["mode"] == "incremental"
+        assert result["changed"] == 2
+        assert mirrored(db)["8414"] == "In Mfg"
+        assert "9000" in mirrored(db)
+        state = db.query(KoshSyncState).filter_by(table_name="tblJob").one()
+        assert state.high_water_mark == T0 + timedelta(hours=2)
+
+    def test_hash_diff_pass_fetches_changed_rows_and_removes_deleted(self, db, kosh):
+        kosh_mirror.sync_table(db, kosh, "tblJob")
+        # Changed without touching updated_at — only a hash diff can see it.
+        kosh.jobs["8415"] = {**kosh.jobs["8415"], "status": "Complete"}
+        del kosh.jobs["8416"]
+
+        kosh.statements.clear()
+        result = kosh_mirror.sync_table(db, kosh, "tblJob", force_full=True)
+
+        assert result["changed"] == 2
+        assert mirrored(db) == {"8414": "New", "8415": "Complete"}
+        fetches = [s for s in kosh.statements if "= ANY(%s)" in s]
+        assert len(fetches) == 1, "only the changed row is re-fetched, in one statement"
+
+    def test_sync_lag_metric(self, db, kosh):
+        assert kosh_mirror.mirror_is_fresh(db) is False
+        kosh_mirror.sync_table(db, kosh, "tblJob")
+        status = kosh_mirror.mirror_status(db)
+        assert status["tables"]["tblJob"]["lag_seconds"] < 5
+        assert kosh_mirror.mirror_is_fresh(db) is True
+
+        state = db.query(KoshSyncState).filter_by(table_name="tblJob").one()
+        state.last_synced_at = datetime.utcnow() - timedelta(seconds=kosh_mirror.KOSH_MIRROR_MAX_LAG + 60)
+        db.commit()
+        assert kosh_mirror.mirror_is_fresh(db) is False
+
+
+class TestJobListReadsMirror:
+    def test_list_is_served_from_a_fresh_mirror_without_kosh(self, db, kosh, client, monkeypatch):
+        from routers import jobs
+
+        kosh.jobs["8415"] = kosh_job("8415", created_at=T0 + timedelta(days=1))
+        kosh_mirror.sync_table(db, kosh, "tblJob")
+
+        def kosh_down(*args, **kwargs):
+            raise AssertionError("KOSH must not be queried while the mirror is fresh")
+
+        monkeypatch.setattr(jobs, "get_kosh_connection", kosh_down)
+        r = client.get("/jobs", params={"q": "841", "limit": 2})
+
+        assert r.status_code == 200
+        body = r.json()
+        assert body["source"] == "mirror"
+        assert body["total"] == 3
+        assert [j["job_number"] for j in body["jobs"]][0] == "8415"
@@ -0,0 +1,157 @@
+"""The KOSH connection pool.
+
+Every KOSH read used to open and close its own psycopg2 connection. The pool
+hands the same connections out again, bounded, health-checked, and under a
+per-checkout statement timeout. A fake connection stands in for KOSH here; the
+SQL-level stand-in for benchmarking lives in db/kosh-standin.
+"""
+import threading
+
+import pytest
+
+from services import kosh_pool
+from services.kosh_pool import KoshPool, KoshPoolTimeout
+
+
+class FakeCursor:
+    def __init__(self, conn):
+        self.conn = conn
+
+    def execute(self, sql, params=None):
+        if self.conn.dead:
+            raise RuntimeError("server closed the connection unexpectedly")
+        self.conn.executed.append((sql, params))
+
+    def fetchone(self):
+        return (1,)
+
+    def close(self):
+        pass
+
+
+class FakeConnection:
+    def __init__(self):
+        self.closed = 0
+        self.dead = False
+        self.executed = []
+        self.rollbacks = 0
+
+    def cursor(self, cursor_factory=None):
+        return FakeCursor(self)
+
+    def commit(self):
+        pass
+
+    def rollback(self):
+        if self.dead:
+            raise RuntimeError("connection already closed")
+        self.rollbacks += 1
+
+    def close(self):
+        self.closed = 1
+
+    def timeouts_set(self):
+        return [p[0] for sql, p in self.executed if sql.startswith("SET statement_timeout")]
+
+
+@pytest.fixture
+def opened():
+    return []
+
+
+@pytest.fixture
+def pool(opened):
+    def connect():
+        conn = FakeConnection()
+        opened.append(conn)
+        return conn
+    return KoshPool(connect=connect, maxconn=2, checkout_timeout=0.05,
+                    statement_timeout_ms=1000, ping_after_seconds=None)
+
+
+class TestKoshPool:
+    def test_connections_are_reused(self, pool, opened):
+        for _ in range(5):
+            with pool.connection() as conn:
+                conn.cursor().execute("SELECT 1")
+        assert len(opened) == 1
+        assert pool.stats()["checkouts"] == 5
+        assert pool.stats()["connects"] == 1
+
+    def test_release_rolls_back_the_transaction(self, pool, opened):
+        with pool.connection():
+            pass
+        assert opened[0].rollbacks == 1
+
+    def test_pool_is_bounded_and_times_out(self, pool):
+        a = pool.acquire()
+        b = pool.acquire()
+        with pytest.raises(KoshPoolTimeout):
+            pool.acquire()
+        stats = pool.stats()
+        assert stats["in_use"] == 2
+        assert stats["timeouts"] == 1
+        pool.release(a)
+        pool.release(b)
+        assert pool.stats()["in_use"] == 0
+
+    def test_waiter_gets_the_returned_connection(self, opened):
+        pool = KoshPool(connect=lambda: opened.append(FakeConnection()) or opened[-1],
+                        maxconn=1, checkout_timeout=2, ping_after_seconds=None)
+        held = pool.acquire()
+        got = []
+        waiter = threading.Thread(target=lambda: got.append(pool.acquire()))
+        waiter.start()
+        pool.release(held)
+        waiter.join(timeout=2)
+        assert got == [held]
+        assert pool.stats()["waits"] == 1
+
+    def test_dead_idle_connection_is_replaced(self, opened):
+        pool = KoshPool(connect=lambda: opened.append(FakeConnection()) or opened[-1],
+                        maxconn=2, ping_after_seconds=0)
+        with pool.connection():
+            pass
+        opened[0].dead = True
+        with pool.connection() as conn:
+            assert conn is opened[1]
+        assert pool.stats()["discarded"] == 1
+
+    def test_statement_timeout_is_set_per_checkout(self, pool, opened):
+        with pool.connection():
+            pass
+        with pool.connection():
+            pass
+        assert opened[0].timeouts_set() == [1000], "unchanged timeout must not be re-sent"
+        with pool.connection(statement_timeout_ms=250):
+            pass
+        with pool.connection():
+            pass
+        assert opened[0].timeouts_set() == [1000, 250, 1000]
+
+    def test_double_release_does_not_grow_the_pool(self, pool):
+        conn = pool.acquire()
+        pool.release(conn)
+        pool.release(conn)
+        assert pool.stats()["idle"] == 1
+        a, b = pool.acquire(), pool.acquire()
+        with pytest.raises(KoshPoolTimeout):
+            pool.acquire()
+        pool.release(a)
+        pool.release(b)
+
+
+class TestGetKoshConnection:
+    def test_close_returns_the_connection_to_the_pool(self, pool, opened):
+        from routers.jobs import get_kosh_connection
+
+        old = kosh_pool.set_kosh_pool(pool)
+        try:
+            for _ in range(3):
+                conn = get_kosh_connection()
+                conn.cursor().execute("SELECT 1")
+                conn.close()
+            assert len(opened) == 1
+            assert pool.stats()["in_use"] == 0
+        finally:
+            kosh_pool.set_kosh_pool(old)
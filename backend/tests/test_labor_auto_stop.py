@@ -0,0 +1,149 @@
+"""End-of-shift auto-stop.
+
+A labor timer still running the next shop day is stopped at 17:00 on the day
+it started, with its pauses subtracted from the hours; same-day overtime past
+17:00 is left alone. It used to happen inside GET
+/labor/init — one pause query per running entry, then a commit, on a read. Now
+a scheduled job closes the entries with set-based UPDATEs, closes each entry
+once however often it runs, and the labor reads only read.
+"""
+import pytest
+from datetime import datetime, timezone
+from sqlalchemy import event
+
+import services.labor_auto_stop as labor_auto_stop
+from models import (
+    ChangeEvent, LaborDailyRollup, LaborEntry, PauseLog, Traveler, User, UserRole,
+    TravelerStatus, TravelerType, Priority,
+)
+from services.labor_auto_stop import auto_stop_labor
+
+
+def at(day, hour, minute=0):
+    return datetime(2026, 9, day, hour, minute, tzinfo=timezone.utc)
+
+
+@pytest.fixture(autouse=True)
+def shop_time_is_utc(monkeypatch):
+    monkeypatch.setattr(labor_auto_stop, "LABOR_AUTO_STOP_TIMEZONE", "UTC")
+
+
+@pytest.fixture
+def traveler(db, admin):
+    t = Traveler(job_number="JOB-STOP", work_order_number="WO-1", traveler_type=TravelerType.ASSY,
+                 part_number="PN-1", part_description="Test", revision="A", quantity=1,
+                 priority=Priority.NORMAL, work_center="ASSEMBLY", status=TravelerStatus.IN_PROGRESS,
+                 created_by=admin.id, is_active=True)
+    db.add(t)
+    db.commit()
+    db.refresh(t)
+    return t
+
+
+def operator(db, n):
+    user = User(username=f"op{n}@test", email=f"op{n}@test", first_name="Op", last_name=str(n),
+                hashed_password="x", role=UserRole.OPERATOR, is_active=True)
+    db.add(user)
+    db.flush()
+    return user
+
+
+def running(db, traveler, employee, start):
+    entry = LaborEntry(traveler_id=traveler.id, employee_id=employee.id, work_center="ASSEMBLY",
+                       start_time=start, is_completed=False)
+    db.add(entry)
+    db.commit()
+    db.refresh(entry)
+    return entry
+
+
+class TestAutoStop:
+    def test_stops_at_the_cutoff_less_pauses(self, db, admin, traveler):
+        entry = running(db, traveler, admin, at(3, 9))
+        db.add(PauseLog(labor_entry_id=entry.id, paused_at=at(3, 12), resumed_at=at(3, 12, 30),
+                        duration_seconds=1800))
+        db.commit()
+
+        result = auto_stop_labor(db, now=at(4, 8))
+        db.expire_all()
+
+        assert result["completed_count"] == 1
+        assert entry.is_completed is True
+        assert entry.end_time.replace(tzinfo=timezone.utc) == at(3, 17)
+        assert entry.hours_worked == pytest.approx(7.5)
+        rollup = db.query(LaborDailyRollup).one()
+        assert rollup.hours == pytest.approx(7.5) and rollup.completed_entries == 1
+        assert db.query(ChangeEvent).filter(ChangeEvent.kind == "labor.stopped").count() == 1
+
+    def test_same_day_overtime_keeps_running(self, db, admin, traveler):
+        entry = running(db, traveler, admin, at(3, 16))
+        assert auto_stop_labor(db, now=at(3, 16, 30))["completed_count"] == 0
+        assert auto_stop_labor(db, now=at(3, 17, 5))["completed_count"] == 0
+        db.expire_all()
+        assert entry.end_time is None and entry.is_completed is False
+
+        assert auto_stop_labor(db, now=at(4, 0, 5))["completed_count"] == 1
+        db.expire_all()
+        assert entry.end_time.replace(tzinfo=timezone.utc) == at(3, 17)
+        assert entry.hours_worked == pytest.approx(1.0)
+
+    def test_same_day_cutoff_is_opt_in(self, db, admin, traveler, monkeypatch):
+        monkeypatch.setattr(labor_auto_stop, "LABOR_AUTO_STOP_SAME_DAY", True)
+        running(db, traveler, admin, at(3, 16))
+        assert auto_stop_labor(db, now=at(3, 16, 30))["completed_count"] == 0
+        assert auto_stop_labor(db, now=at(3, 17, 5))["completed_count"] == 1
+
+    def test_an_evening_start_runs_to_the_next_cutoff(self, db, admin, traveler):
+        entry = running(db, traveler, admin, at(3, 18))
+        assert auto_stop_labor(db, now=at(3, 23))["completed_count"] == 0
+        assert auto_stop_labor(db, now=at(4, 17, 5))["completed_count"] == 1
+        db.expire_all()
+        assert entry.end_time.replace(tzinfo=timezone.utc) == at(4, 17)
+
+    def test_runs_again_close_nothing_twice(self, db, admin, traveler):
+        running(db, traveler, admin, at(3, 9))
+        assert auto_stop_labor(db, now=at(4, 8))["completed_count"] == 1
+        assert auto_stop_labor(db, now=at(4, 8, 5))["completed_count"] == 0
+        assert db.query(ChangeEvent).filter(ChangeEvent.kind == "labor.stopped").count() == 1
+
+    def test_query_count_does_not_grow_with_entries(self, db, engine, admin, traveler):
+        for n in range(6):
+            running(db, traveler, operator(db, n), at(3, 8 + n))
+
+        statements = []
+
+        def listener(conn, cursor, statement, *args):
+            statements.append(statement)
+
+        event.listen(engine, "before_cursor_execute", listener)
+        try:
+            result = auto_stop_labor(db, now=at(4, 8))
+        finally:
+            event.remove(engine, "before_cursor_execute", listener)
+
+        assert result["completed_count"] == 6
+        updates = [s for s in statements if s.lstrip().upper().startswith("UPDATE LABOR_ENTRIES")]
+        assert len(updates) == 1
+        assert sum("FROM pause_logs" in s for s in statements) == 1
+
+
+class TestReadsDoNotWrite:
+    def test_labor_init_leaves_running_timers_alone(self, client, db, engine, admin, traveler):
+        entry = running(db, traveler, admin, datetime(2020, 1, 2, 9, tzinfo=timezone.utc))
+
+        statements = []
+
+        def listener(conn, cursor, statement, *args):
+            statements.append(statement)
+
+        event.listen(engine, "before_cursor_execute", listener)
+        try:
+            assert client.get("/labor/init").status_code == 200
+            check = client.get("/labor/check-auto-stop").json()
+        finally:
+            event.remove(engine, "before_cursor_execute", listener)
+
+        assert not [s for s in statements if s.lstrip().upper().startswith(("UPDATE", "INSERT", "DELETE"))]
+        assert check["pending_count"] == 1
+        db.expire_all()
+        assert entry.end_time is None
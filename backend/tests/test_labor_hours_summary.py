@@ -0,0 +1,96 @@
+"""/labor/hours-summary.
+
+Payroll's per-employee hours by day, week and month used to load every
+completed entry and look its employee up one query at a time. It is now one
+grouped query with the employee joined in, and can be downloaded as CSV.
+"""
+import csv
+import io
+
+import pytest
+from datetime import datetime, timedelta, timezone
+from sqlalchemy import event
+
+from models import LaborEntry, Traveler, User, UserRole, TravelerStatus, TravelerType, Priority
+
+
+@pytest.fixture
+def labor(db, admin):
+    """Two operators; Bo works Sunday and Monday of one week, Cy works twice
+    on one day. One open timer and one entry outside the window."""
+    bo = User(username="bo@test", email="bo@test", first_name="Bo", last_name="B",
+              hashed_password="x", role=UserRole.OPERATOR, is_active=True)
+    cy = User(username="cy@test", email="cy@test", first_name="Cy", last_name="C",
+              hashed_password="x", role=UserRole.OPERATOR, is_active=True)
+    db.add_all([bo, cy])
+    db.flush()
+    t = Traveler(job_number="JOB-HRS", work_order_number="WO-1", traveler_type=TravelerType.ASSY,
+                 part_number="PN-1", part_description="Test", revision="A", quantity=1,
+                 priority=Priority.NORMAL, work_center="ASSEMBLY", status=TravelerStatus.IN_PROGRESS,
+                 created_by=admin.id, is_active=True)
+    db.add(t)
+    db.flush()
+
+    monday = (datetime.now(timezone.utc) - timedelta(days=7)).replace(hour=9, minute=0, second=0, microsecond=0)
+    monday -= timedelta(days=monday.weekday())
+    sunday = monday - timedelta(days=1)
+
+    def entry(user, start, hours, completed=True, created=None):
+        return LaborEntry(traveler_id=t.id, employee_id=user.id, work_center="ASSEMBLY",
+                          start_time=start, end_time=start + timedelta(hours=hours) if completed else None,
+                          hours_worked=hours, is_completed=completed, created_at=created or start)
+
+    db.add_all([
+        entry(bo, sunday, 2.0),
+        entry(bo, monday, 3.5),
+        entry(cy, monday, 1.25),
+        entry(cy, monday + timedelta(hours=3), 0.75),
+        entry(admin, monday, 8.0, completed=False),
+        entry(cy, monday, 5.0, created=datetime.now(timezone.utc) - timedelta(days=90)),
+    ])
+    db.commit()
+    return {"bo": bo, "cy": cy, "monday": monday.date(), "sunday": sunday.date()}
+
+
+class TestHoursSummary:
+    def test_breakdowns(self, client, labor):
+        body = client.get("/labor/hours-summary", params={"days": 30}).json()
+        assert [e["employee_name"] for e in body["employees"]] == ["Bo B", "Cy C"]
+        bo, cy = body["employees"]
+
+        assert bo["total_hours"] == 5.5
+        assert [d["hours"] for d in bo["daily_breakdown"]] == [2.0, 3.5]
+        assert [w["week_start"] for w in bo["weekly_breakdown"]] == [
+            str(labor["sunday"] - timedelta(days=6)), str(labor["monday"])]
+        assert cy["total_hours"] == 2.0
+        assert cy["daily_breakdown"] == [{"date": str(labor["monday"]), "hours": 2.0}]
+        assert cy["weekly_breakdown"][0]["week_end"] == str(labor["monday"] + timedelta(days=6))
+
+    def test_one_query_however_many_entries(self, client, engine, labor):
+        statements = []
+
+        def listener(conn, cursor, statement, *args):
+            statements.append(statement)
+
+        event.listen(engine, "before_cursor_execute", listener)
+        try:
+            assert client.get("/labor/hours-summary").status_code == 200
+        finally:
+            event.remove(engine, "before_cursor_execute", listener)
+        assert sum("FROM labor_entries" in s for s in statements) == 1
+        assert not any(s.lstrip().startswith("SELECT users.") for s in statements)
+
+    def test_csv_by_week(self, client, labor):
+        response = client.get("/labor/hours-summary", params={"format": "csv", "granularity": "week"})
+        assert response.headers["content-type"].startswith("text/csv")
+        assert "attachment" in response.headers["content-disposition"]
+        rows = list(csv.reader(io.StringIO(response.text)))
+        assert rows[0] == ["employee_id", "employee_name", "week", "hours"]
+        assert rows[1:] == [
+            [str(labor["bo"].id), "Bo B", str(labor["sunday"] - timedelta(days=6)), "2.0"],
+            [str(labor["bo"].id), "Bo B", str(labor["monday"]), "3.5"],
+            [str(labor["cy"].id), "Cy C", str(labor["monday"]), "2.0"],
+        ]
+
+    def test_unknown_format_is_rejected(self, client, labor):
+        assert client.get("/labor/hours-summary", params={"format": "xml"}).status_code == 422
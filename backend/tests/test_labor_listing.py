@@ -0,0 +1,91 @@
+"""Filtered, keyset-paged GET /labor.
+
+The labor list returned every entry ever logged, ran one pause query per
+entry, and built a response model per row. It now filters in SQL (employee,
+traveler, work center, start-date range), pages on (created_at, id) with
+X-Next-Cursor like GET /travelers, and fetches pauses for a whole page in one
+query.
+"""
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import event
+
+from models import LaborEntry, PauseLog, Traveler, TravelerStatus, TravelerType, Priority
+
+
+START = datetime(2026, 9, 1, 8, 0, tzinfo=timezone.utc)
+
+
+@pytest.fixture
+def entries(db, admin):
+    """Nine closed entries, one a day, alternating SMT / HAND, each paused
+    twice. Pairs share a created_at so the id tie-break is exercised."""
+    t = Traveler(job_number="JOB-LIST", work_order_number="WO-1", traveler_type=TravelerType.ASSY,
+                 part_number="PN-1", part_description="Test", revision="A", quantity=1,
+                 priority=Priority.NORMAL, work_center="ASSEMBLY", status=TravelerStatus.IN_PROGRESS,
+                 created_by=admin.id, is_active=True)
+    db.add(t)
+    db.flush()
+    rows = []
+    for i in range(9):
+        start = START + timedelta(days=i)
+        rows.append(LaborEntry(traveler_id=t.id, employee_id=admin.id, work_center="SMT" if i % 2 else "HAND",
+                               start_time=start, end_time=start + timedelta(hours=2), hours_worked=2.0,
+                               is_completed=True, created_at=START + timedelta(days=i // 2)))
+    db.add_all(rows)
+    db.flush()
+    for entry in rows:
+        for n in range(2):
+            db.add(PauseLog(labor_entry_id=entry.id, paused_at=entry.start_time + timedelta(minutes=30 * n),
+                            duration_seconds=60))
+    db.commit()
+    return rows
+
+
+def newest_first(rows):
+    return [e.id for e in sorted(rows, key=lambda e: (e.created_at, e.id), reverse=True)]
+
+
+class TestLaborListing:
+    def test_unpaged_call_still_returns_everything(self, client, entries):
+        body = client.get("/labor/").json()
+        assert [e["id"] for e in body] == newest_first(entries)
+        assert body[0]["pause_count"] == 2 and body[0]["total_pause_seconds"] == 120
+        assert body[0]["pause_logs"][0]["duration_seconds"] == 60
+
+    def test_cursor_pages_cover_everything_once(self, client, entries):
+        seen, cursor = [], ""
+        while cursor is not None:
+            response = client.get("/labor/", params={"cursor": cursor, "limit": 4})
+            seen += [e["id"] for e in response.json()]
+            cursor = response.headers.get("x-next-cursor")
+        assert seen == newest_first(entries)
+
+    def test_filters(self, client, entries, admin):
+        smt = client.get("/labor/", params={"work_center": " smt "}).json()
+        assert {e["work_center"] for e in smt} == {"SMT"} and len(smt) == 4
+
+        ranged = client.get("/labor/", params={"start_date": "2026-09-02", "end_date": "2026-09-04"}).json()
+        assert sorted(e["start_time"][:10] for e in ranged) == ["2026-09-02", "2026-09-03", "2026-09-04"]
+
+        assert len(client.get("/labor/", params={"employee_id": admin.id}).json()) == 9
+        assert client.get("/labor/", params={"employee_id": admin.id + 1}).json() == []
+        assert len(client.get("/labor/", params={"traveler_id": entries[0].traveler_id}).json()) == 9
+
+    def test_pauses_are_fetched_once_per_page(self, client, engine, entries):
+        statements = []
+
+        def listener(conn, cursor, statement, *args):
+            statements.append(statement)
+
+        event.listen(engine, "before_cursor_execute", listener)
+        try:
+            assert client.get("/labor/", params={"cursor": "", "limit": 8}).status_code == 200
+        finally:
+            event.remove(engine, "before_cursor_execute", listener)
+        assert sum("FROM pause_logs" in s for s in statements) == 1
+
+    def test_bad_input_is_rejected(self, client, entries):
+        assert client.get("/labor/", params={"cursor": "not-a-cursor"}).status_code == 400
+        assert client.get("/labor/", params={"start_date": "09/01/2026"}).status_code == 400
@@ -0,0 +1,185 @@
+"""Daily labor rollups.
+
+Dashboard stats and the labor summary used to sum labor_entries over the
+requested range on every call. labor_daily_rollups now holds closed labor per
+day x work center x traveler x employee, recomputed in the same transaction
+as any ORM write that closes, edits or soft-deletes an entry, and rebuilt
+from scratch by rebuild_labor_rollups().
+"""
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timedelta, timezone
+
+import pytest
+
+from models import (
+    Traveler, LaborEntry, LaborDailyRollup, WorkCenter, User, UserRole,
+    TravelerStatus, TravelerType, Priority,
+)
+from services import response_cache
+from services.labor_rollups import rebuild_labor_rollups, reconcile_labor_rollups
+
+
+DAY = date(2026, 9, 1)
+DAY_START = datetime(2026, 9, 1, 8)
+
+
+@pytest.fixture
+def traveler(db, admin):
+    db.add(WorkCenter(name="SMT", code="SMT", department="SMT", category="SMT hrs. Actual"))
+    db.add(WorkCenter(name="HAND SOLDER", code="HAND", department="Soldering", category="HAND hrs. Actual"))
+    t = Traveler(job_number="8414", work_order_number="WO-8414", traveler_type=TravelerType.ASSY,
+                 part_number="PN-1", part_description="Test", revision="A", quantity=10,
+                 priority=Priority.NORMAL, work_center="ASSEMBLY", status=TravelerStatus.IN_PROGRESS,
+                 created_by=admin.id, is_active=True)
+    db.add(t)
+    db.commit()
+    db.refresh(t)
+    return t
+
+
+def clock(db, traveler, employee, work_center, start, hours, closed=True):
+    entry = LaborEntry(traveler_id=traveler.id, employee_id=employee.id, work_center=work_center,
+                       start_time=start, end_time=start + timedelta(hours=hours) if closed else None,
+                       hours_worked=hours if closed else 0.0, is_completed=closed)
+    db.add(entry)
+    db.commit()
+    return entry
+
+
+def rollups(db):
+    db.expire_all()
+    return sorted((r.day, r.work_center, r.hours, r.entries)
+                  for r in db.query(LaborDailyRollup).all())
+
+
+class TestMaintainedOnWrite:
+    def test_close_edit_and_soft_delete(self, db, traveler, admin):
+        entry = clock(db, traveler, admin, "SMT", datetime(2026, 9, 1, 8), 2.0, closed=False)
+        assert rollups(db) == []  # an open timer is not rolled up
+
+        entry.end_time = datetime(2026, 9, 1, 10)
+        entry.hours_worked = 2.0
+        entry.is_completed = True
+        clock(db, traveler, admin, "SMT", datetime(2026, 9, 1, 13), 1.5)
+        assert rollups(db) == [(DAY, "SMT", 3.5, 2)]
+
+        # Moving an entry to another day and work center moves its hours.
+        entry.start_time = datetime(2026, 9, 2, 8)
+        entry.work_center = "HAND SOLDER"
+        db.commit()
+        assert rollups(db) == [(DAY, "SMT", 1.5, 1), (DAY + timedelta(days=1), "HAND SOLDER", 2.0, 1)]
+
+        entry.deleted_at = datetime.now(timezone.utc)
+        db.commit()
+        assert rollups(db) == [(DAY, "SMT", 1.5, 1)]
+
+    def test_rolled_back_change_leaves_rollups_alone(self, db, traveler, admin):
+        entry = clock(db, traveler, admin, "SMT", datetime(2026, 9, 1, 8), 2.0)
+        entry.hours_worked = 9.0
+        db.flush()
+        db.rollback()
+        assert rollups(db) == [(DAY, "SMT", 2.0, 1)]
+
+
+class TestRebuild:
+    def test_repairs_bulk_updates(self, db, traveler, admin):
+        clock(db, traveler, admin, "SMT", datetime(2026, 8, 30, 8), 1.0)
+        clock(db, traveler, admin, "SMT", datetime(2026, 9, 1, 8), 2.0)
+        db.query(LaborEntry).update({LaborEntry.hours_worked: 4.0}, synchronize_session=False)
+        db.commit()
+        assert rollups(db) == [(date(2026, 8, 30), "SMT", 1.0, 1), (DAY, "SMT", 2.0, 1)]
+
+        assert rebuild_labor_rollups(db, since=DAY) == {"entries": 1, "cells": 1}
+        assert rollups(db) == [(date(2026, 8, 30), "SMT", 1.0, 1), (DAY, "SMT", 4.0, 1)]
+        rebuild_labor_rollups(db)
+        assert rollups(db) == [(date(2026, 8, 30), "SMT", 4.0, 1), (DAY, "SMT", 4.0, 1)]
+
+    def test_reconcile_repairs_only_the_recent_drifted_cells(self, db, traveler, admin):
+        clock(db, traveler, admin, "SMT", datetime(2026, 7, 1, 8), 1.0)
+        clock(db, traveler, admin, "SMT", datetime(2026, 8, 30, 8), 1.0)
+        clock(db, traveler, admin, "HAND SOLDER", DAY_START, 2.0)
+        db.query(LaborEntry).filter(LaborEntry.work_center == "SMT").update(
+            {LaborEntry.hours_worked: 4.0}, synchronize_session=False)
+        db.commit()
+
+        result = reconcile_labor_rollups(db, days=7, today=DAY)
+        assert (result["checked"], result["repaired"]) == (2, 1)
+        assert rollups(db) == [(date(2026, 7, 1), "SMT", 1.0, 1), (date(2026, 8, 30), "SMT", 4.0, 1),
+                               (DAY, "HAND SOLDER", 2.0, 1)]
+        assert reconcile_labor_rollups(db, days=7, today=DAY)["repaired"] == 0
+
+
+def test_concurrent_writes_to_one_cell_all_count(session_factory):
+    # Many operators' entries landing in the same cell at once: each
+    # transaction upserts and locks the cell before summing, so none fails on
+    # the unique constraint and none loses another's hours.
+    db = session_factory()
+    user = User(username="admin@test", email="admin@test", first_name="T", last_name="A",
+                hashed_password="x", role=UserRole.ADMIN, is_active=True)
+    db.add(user)
+    db.flush()
+    t = Traveler(job_number="8414", work_order_number="WO-8414", traveler_type=TravelerType.ASSY,
+                 part_number="PN-1", part_description="Test", revision="A", quantity=10,
+                 priority=Priority.NORMAL, work_center="ASSEMBLY", status=TravelerStatus.IN_PROGRESS,
+                 created_by=user.id, is_active=True)
+    db.add(t)
+    db.commit()
+    traveler_id, user_id = t.id, user.id
+    db.close()
+
+    def write(n):
+        session = session_factory()
+        try:
+            start = DAY_START + timedelta(minutes=n)
+            session.add(LaborEntry(traveler_id=traveler_id, employee_id=user_id, work_center="SMT",
+                                   start_time=start, end_time=start + timedelta(minutes=30),
+                                   hours_worked=0.5, is_completed=True))
+            session.commit()
+        finally:
+            session.close()
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        list(pool.map(write, range(24)))
+
+    db = session_factory()
+    assert rollups(db) == [(DAY, "SMT", 12.0, 24)]
+    db.close()
+
+
+class TestReadsSumRollups:
+    def test_labor_summary(self, client, db, traveler, admin):
+        today = datetime.now(timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0, tzinfo=None)
+        clock(db, traveler, admin, "SMT", today, 2.0)
+        clock(db, traveler, admin, "SMT", today - timedelta(days=30), 5.0)
+        clock(db, traveler, admin, "SMT", today + timedelta(minutes=1), 0.0, closed=False)
+
+        body = client.get("/labor/summary", params={"days": 7}).json()
+        assert (body["total_hours"], body["total_entries"], body["completed_entries"], body["active_entries"]) \
+            == (2.0, 2, 1, 1)
+
+    def test_category_report_summary(self, client, db, traveler, admin):
+        clock(db, traveler, admin, "SMT", datetime(2026, 9, 1, 8), 2.0)
+        clock(db, traveler, admin, " hand solder ", datetime(2026, 9, 2, 8), 1.0)
+        clock(db, traveler, admin, "SMT", datetime(2026, 9, 5, 8), 4.0)
+        params = {"start_date": "2026-09-01", "end_date": "2026-09-02", "job_number": " 8414"}
+
+        rows = client.get("/labor/category-report", params=params).json()
+        assert sorted((r["category"], r["hours_worked"]) for r in rows) == [
+            ("HAND hrs. Actual", 1.0), ("SMT hrs. Actual", 2.0)]
+        summary = client.get("/labor/category-report", params={**params, "summary": True}).json()
+        assert summary == [{"category": "HAND hrs. Actual", "hours_worked": 1.0, "entries": 1},
+                           {"category": "SMT hrs. Actual", "hours_worked": 2.0, "entries": 1}]
+        only_smt = client.get("/labor/category-report", params={**params, "category": "smt hrs. actual"}).json()
+        assert [r["hours_worked"] for r in only_smt] == [2.0]
+
+    def test_dashboard_labor_sections(self, client, db, traveler, admin, monkeypatch):
+        monkeypatch.setattr(response_cache, "_backend", response_cache.MemoryCacheBackend())
+        clock(db, traveler, admin, "SMT", datetime(2026, 9, 1, 8), 2.0)
+        clock(db, traveler, admin, "HAND SOLDER", datetime(2026, 9, 2, 8), 1.0)
+
+        r = client.get("/dashboard/stats", params={"start_date": "2026-09-01", "end_date": "2026-09-07"})
+        assert r.status_code == 200, r.text
+        body = r.json()
+        assert body["total_labor_hours"] == 3.0
+        assert [d["date"] for d in body["labor_trend"]] == ["Sep 01", "Sep 02"]
+        assert body["labor_trend"][0]["_details"]["SMT"] == [{"job": "8414", "hours": 2.0}]
@@ -0,0 +1,123 @@
+"""Delta sync for /labor/init and /labor/my-entries.
+
+Both endpoints returned every labor entry ever logged on every load and every
+30-second poll. With sync=true the first page is bounded, and a client that
+passes back its sync token gets only the entries created, changed or
+soft-deleted since — so the payload stops growing with the table's history.
+"""
+import pytest
+from datetime import datetime, timedelta, timezone
+
+import services.labor_sync as labor_sync
+from models import Traveler, LaborEntry, PauseLog, TravelerStatus, TravelerType, Priority
+
+
+LONG_AGO = datetime(2026, 1, 5, 9, 0, tzinfo=timezone.utc)
+
+
+@pytest.fixture
+def client(client, monkeypatch):
+    # No look-back: the test controls exactly which rows are "since the token".
+    monkeypatch.setattr(labor_sync, "SYNC_OVERLAP_SECONDS", 0)
+    return client
+
+
+@pytest.fixture
+def history(db, admin):
+    """Twelve closed entries last changed long ago."""
+    t = Traveler(job_number="JOB-SYNC", work_order_number="WO-1", traveler_type=TravelerType.ASSY,
+                 part_number="PN-1", part_description="Test", revision="A", quantity=1,
+                 priority=Priority.NORMAL, work_center="ASSEMBLY", status=TravelerStatus.IN_PROGRESS,
+                 created_by=admin.id, is_active=True, updated_at=LONG_AGO)
+    db.add(t)
+    db.flush()
+    entries = []
+    for i in range(12):
+        start = LONG_AGO + timedelta(hours=i)
+        entries.append(LaborEntry(
+            traveler_id=t.id, employee_id=admin.id, work_center="ASSEMBLY",
+            start_time=start, end_time=start + timedelta(minutes=30), hours_worked=0.5,
+            is_completed=True, created_at=start, updated_at=start,
+        ))
+    db.add_all(entries)
+    db.commit()
+    return entries
+
+
+def ids(payload):
+    return [e["id"] for e in payload["entries"]]
+
+
+class TestFirstSync:
+    def test_first_page_is_bounded_and_pages_back(self, client, history):
+        first = client.get("/labor/my-entries", params={"sync": "true", "limit": 5}).json()
+        assert first["full"] is True
+        assert ids(first) == [e.id for e in reversed(history)][:5]
+        assert first["sync_token"] and first["older_cursor"]
+
+        seen = ids(first)
+        cursor = first["older_cursor"]
+        while cursor:
+            page = client.get("/labor/my-entries", params={"before": cursor, "limit": 5}).json()
+            assert page["full"] is False
+            seen += ids(page)
+            cursor = page["older_cursor"]
+        assert seen == [e.id for e in reversed(history)]
+
+    def test_plain_request_still_returns_the_list(self, client, history):
+        body = client.get("/labor/my-entries").json()
+        assert isinstance(body, list) and len(body) == 12
+
+
+class TestDelta:
+    def test_nothing_changed_means_nothing_sent(self, client, history):
+        token = client.get("/labor/init", params={"sync": "true"}).json()["sync_token"]
+        delta = client.get("/labor/init", params={"since": token}).json()
+        assert delta["entries"] == [] and delta["deleted_ids"] == []
+        assert delta["has_more"] is False and delta["full"] is False
+
+    def test_changed_new_and_deleted_entries(self, client, db, history, admin):
+        token = client.get("/labor/my-entries", params={"sync": "true"}).json()["sync_token"]
+
+        history[0].comment = "recounted"
+        db.add(LaborEntry(traveler_id=history[0].traveler_id, employee_id=admin.id, work_center="SMT",
+                          start_time=LONG_AGO, end_time=LONG_AGO + timedelta(hours=1),
+                          hours_worked=1.0, is_completed=True))
+        db.commit()
+        assert client.delete(f"/labor/{history[1].id}").status_code == 200
+
+        delta = client.get("/labor/my-entries", params={"since": token}).json()
+        by_id = {e["id"]: e for e in delta["entries"]}
+        assert by_id[history[0].id]["comment"] == "recounted"
+        assert any(e["work_center"] == "SMT" for e in delta["entries"])
+        assert len(by_id) == 2
+        assert delta["deleted_ids"] == [history[1].id]
+
+        again = client.get("/labor/my-entries", params={"since": delta["sync_token"]}).json()
+        assert again["entries"] == [] and again["deleted_ids"] == []
+
+    def test_a_pause_resends_its_entry(self, client, db, history):
+        token = client.get("/labor/init", params={"sync": "true"}).json()["sync_token"]
+        db.add(PauseLog(labor_entry_id=history[3].id, paused_at=LONG_AGO, duration_seconds=60))
+        db.commit()
+
+        delta = client.get("/labor/init", params={"since": token}).json()
+        assert ids(delta) == [history[3].id]
+        assert delta["entries"][0]["pause_count"] == 1
+
+    def test_large_delta_is_paged(self, client, db, history):
+        token = client.get("/labor/init", params={"sync": "true"}).json()["sync_token"]
+        for entry in history:
+            entry.comment = "bulk"
+        db.commit()
+
+        seen, has_more = [], True
+        while has_more:
+            page = client.get("/labor/init", params={"since": token, "limit": 5}).json()
+            seen += ids(page)
+            token, has_more = page["sync_token"], page["has_more"]
+        assert sorted(seen) == sorted(e.id for e in history)
+
+    def test_bad_token_is_rejected(self, client, history):
+        assert client.get("/labor/init", params={"since": "not-a-token"}).status_code == 400
+        assert client.get("/labor/my-entries", params={"since": "not-a-token"}).status_code == 400
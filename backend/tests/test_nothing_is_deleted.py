@@ -7,50 +7,12 @@ models.install_soft_delete_filter, so totals stay correct while the row survives
 """
 import pytest
 from datetime import datetime, timezone
-from fastapi.testclient import TestClient
-from sqlalchemy import create_engine, func, text
-from sqlalchemy.orm import sessionmaker
-from sqlalchemy.pool import StaticPool
+from sqlalchemy import func, text
 
-from main import app
 from models import (
-    Base, Traveler, LaborEntry, PauseLog, CommunicationLog, QualityCheckItem,
-    User, UserRole, TravelerStatus, TravelerType, Priority, SOFT_DELETE_MODELS,
+    Traveler, LaborEntry, PauseLog, CommunicationLog, QualityCheckItem,
+    TravelerStatus, TravelerType, Priority, SOFT_DELETE_MODELS,
 )
-from database import get_db
-from routers.auth import get_current_user
-
-engine = create_engine(
-    "sqlite:///:memory:",
-    connect_args={"check_same_thread": False},
-    poolclass=StaticPool,
-)
-TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
-
-
-@pytest.fixture
-def db():
-    Base.metadata.create_all(bind=engine)
-    session = TestingSessionLocal()
-    yield session
-    session.close()
-    Base.metadata.drop_all(bind=engine)
-
-
-@pytest.fixture
-def admin(db):
-    user = User(username="admin@test", email="admin@test", first_name="T", last_name="A",
-                hashed_password="x", role=UserRole.ADMIN, is_active=True)
-    db.add(user); db.commit(); db.refresh(user)
-    return user
-
-
-@pytest.fixture
-def client(db, admin):
-    app.dependency_overrides[get_db] = lambda: db
-    app.dependency_overrides[get_current_user] = lambda: admin
-    yield TestClient(app)
-    app.dependency_overrides.clear()
 
 
 @pytest.fixture
@@ -0,0 +1,76 @@
+"""Operation estimates and operator efficiency.
+
+Four modules carried their own copy of the hours-per-operation table, each
+scanning it per step, and dashboard insights ran one step query per top
+operator. services/operation_estimates resolves an operation once per
+distinct name, and operator efficiency comes from one grouped query.
+"""
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import event
+
+from models import Traveler, ProcessStep, LaborEntry, User, UserRole, TravelerStatus, TravelerType, Priority
+from routers.dashboard import compute_dashboard_insights
+from services.operation_estimates import DEFAULT_ESTIMATE, estimate_hours, resolve_operation
+from services.snapshots import SectionTimer
+
+
+class TestResolver:
+    def test_matching_rules(self):
+        assert estimate_hours(" smt top ") == 3.0
+        assert estimate_hours("SMT TOP SIDE") == 3.0
+        assert estimate_hours("INTERNAL TESTING - FINAL") == 2.0
+        assert resolve_operation("HAND SOLDER").operators == 2
+        assert resolve_operation("UNKNOWN OP") == resolve_operation("") == resolve_operation(None) == DEFAULT_ESTIMATE
+
+    def test_memoized_per_distinct_operation(self):
+        resolve_operation.cache_clear()
+        for _ in range(100):
+            estimate_hours("REFLOW OVEN 2")
+        info = resolve_operation.cache_info()
+        assert (info.misses, info.hits) == (1, 99)
+
+
+class TestOperatorEfficiency:
+    def test_one_query_for_all_operators(self, db, engine):
+        now = datetime.now(timezone.utc)
+        for n in range(5):
+            user = User(username=f"op{n}", email=f"op{n}@test", first_name="Op", last_name=str(n),
+                        hashed_password="x", role=UserRole.OPERATOR, is_active=True)
+            db.add(user)
+            db.flush()
+            traveler = Traveler(job_number=f"84{n}", work_order_number=f"WO-{n}", traveler_type=TravelerType.ASSY,
+                                part_number="PN", part_description="-", revision="A", quantity=1,
+                                priority=Priority.NORMAL, work_center="ASSEMBLY", status=TravelerStatus.IN_PROGRESS,
+                                created_by=user.id, is_active=True)
+            db.add(traveler)
+            db.flush()
+            for step_number, operation in enumerate(["SMT TOP", "WASH"], start=1):
+                step = ProcessStep(traveler_id=traveler.id, step_number=step_number, operation=operation,
+                                   work_center_code=operation, instructions="-")
+                db.add(step)
+                db.flush()
+                start = now - timedelta(hours=5 - step_number)
+                db.add(LaborEntry(traveler_id=traveler.id, step_id=step.id, employee_id=user.id,
+                                  work_center=operation, start_time=start, end_time=start + timedelta(hours=n + 1),
+                                  hours_worked=float(n + 1), is_completed=True))
+        db.commit()
+
+        statements = []
+        timer = SectionTimer()
+
+        def listener(conn, cursor, statement, *args):
+            statements.append(timer._section)
+
+        event.listen(engine, "before_cursor_execute", listener)
+        try:
+            payload = compute_dashboard_insights(db, timer)
+        finally:
+            event.remove(engine, "before_cursor_execute", listener)
+
+        assert statements.count("operator_efficiency") == 1
+        efficiency = payload["operator_efficiency"]
+        assert [e["username"] for e in efficiency] == ["op4", "op3", "op2", "op1", "op0"]
+        # SMT TOP (3.0h) + WASH (0.75h) estimated against 2 x 1h logged.
+        assert (efficiency[-1]["actual_hours"], efficiency[-1]["estimated_hours"], efficiency[-1]["entries"]) \
+            == (2.0, 3.8, 2)
@@ -0,0 +1,208 @@
+"""Shared response cache for the dashboard and analytics endpoints.
+
+The expensive global endpoints used to cache in per-process dicts that every
+uvicorn worker filled separately and that never evicted old date ranges. They
+now opt in to services.response_cache, whose backends evict by TTL and LRU —
+and whose sqlite backend is shared by every worker on the host. When an entry
+expires, concurrent identical requests wait on one computation instead of
+each running their own.
+"""
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from services import response_cache
+from services.response_cache import MemoryCacheBackend, SQLiteCacheBackend, cached_response
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def make_backend(request, tmp_path):
+    def make(max_entries=3, clock=None):
+        if request.param == "memory":
+            return MemoryCacheBackend(max_entries=max_entries, clock=clock)
+        return SQLiteCacheBackend(str(tmp_path / "cache.sqlite3"), max_entries=max_entries, clock=clock)
+    return make
+
+
+class TestBackends:
+    def test_ttl_and_lru_eviction(self, make_backend):
+        clock = Clock()
+        cache = make_backend(clock=clock)
+        cache.set("a", {"n": 1}, ttl=30)
+        cache.set("b", {"n": 2}, ttl=30)
+        cache.set("c", {"n": 3}, ttl=60)
+        clock.now += 1
+        assert cache.get("a")[:2] == (True, {"n": 1})  # a is now the most recently read
+        clock.now += 1
+        cache.set("d", {"n": 4}, ttl=60)
+        assert not cache.get("b")[0]
+        assert cache.get("a")[0]
+
+        clock.now += 45
+        assert not cache.get("a")[0]
+        assert cache.get("c") == (True, {"n": 3}, 13.0)
+
+    def test_delete_by_prefix(self, make_backend):
+        cache = make_backend(clock=Clock())
+        cache.set("dashboard.stats:1", 1, ttl=30)
+        cache.set("analytics.all:{}", 2, ttl=30)
+        cache.delete("dashboard.")
+        assert not cache.get("dashboard.stats:1")[0]
+        assert cache.get("analytics.all:{}")[:2] == (True, 2)
+
+
+def test_sqlite_backend_is_shared_between_instances(tmp_path):
+    path = str(tmp_path / "cache.sqlite3")
+    SQLiteCacheBackend(path).set("k", {"rows": [1, 2]}, ttl=30)
+    assert SQLiteCacheBackend(path).get("k")[:2] == (True, {"rows": [1, 2]})
+
+
+def test_decorator_varies_on_named_parameters(monkeypatch):
+    monkeypatch.setattr(response_cache, "_backend", MemoryCacheBackend())
+    calls = []
+
+    @cached_response("test.endpoint", ttl=30, vary=("start_date",))
+    async def endpoint(start_date=None, db=None):
+        calls.append(start_date)
+        return {"start_date": start_date, "call": len(calls)}
+
+    run = asyncio.run
+    assert run(endpoint(start_date="2026-09-01", db=object()))["call"] == 1
+    assert run(endpoint(start_date="2026-09-01", db=object()))["call"] == 1
+    assert run(endpoint(start_date="2026-09-02", db=object()))["call"] == 2
+    assert calls == ["2026-09-01", "2026-09-02"]
+
+
+@pytest.fixture
+def flights(monkeypatch):
+    """A fresh backend and fresh single-flight counters."""
+    monkeypatch.setattr(response_cache, "_backend", MemoryCacheBackend())
+    monkeypatch.setattr(response_cache, "_flight_counters", dict.fromkeys(response_cache._flight_counters, 0))
+    return response_cache._flight_counters
+
+
+class TestSingleFlight:
+    def test_concurrent_misses_share_one_computation(self, flights):
+        started = threading.Event()
+        release = threading.Event()
+        calls = []
+
+        @cached_response("test.slow", ttl=30)
+        def endpoint(db=None):
+            calls.append(1)
+            started.set()
+            release.wait(5)
+            return {"value": 42}
+
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            leader = pool.submit(endpoint)
+            started.wait(5)
+            followers = [pool.submit(endpoint) for _ in range(7)]
+            time.sleep(0.1)
+            release.set()
+            results = [leader.result()] + [f.result() for f in followers]
+
+        assert results == [{"value": 42}] * 8
+        assert len(calls) == 1
+        assert (flights["computed"], flights["coalesced"]) == (1, 7)
+
+    def test_errors_reach_every_waiter_and_are_not_cached(self, flights):
+        started = threading.Event()
+        release = threading.Event()
+
+        @cached_response("test.failing", ttl=30)
+        def endpoint():
+            started.set()
+            release.wait(5)
+            raise RuntimeError("db down")
+
+        with ThreadPoolExecutor(max_workers=3) as pool:
+            leader = pool.submit(endpoint)
+            started.wait(5)
+            follower = pool.submit(endpoint)
+            time.sleep(0.1)
+            release.set()
+            for f in (leader, follower):
+                with pytest.raises(RuntimeError):
+                    f.result()
+        assert response_cache._inflight == {}
+
+    def test_refreshes_early_while_serving_the_cached_value(self, monkeypatch, flights):
+        clock = Clock()
+        monkeypatch.setattr(response_cache, "_backend", MemoryCacheBackend(clock=clock))
+        calls = []
+
+        @cached_response("test.early", ttl=30, refresh_ahead=5)
+        async def endpoint():
+            calls.append(1)
+            return len(calls)
+
+        assert asyncio.run(endpoint()) == 1
+        clock.now += 20
+        assert asyncio.run(endpoint()) == 1  # fresh
+        clock.now += 6  # 4s left: inside the refresh window
+        assert asyncio.run(endpoint()) == 2
+        assert flights["early_refreshes"] == 1
+        clock.now += 6  # the refreshed entry has 24s left
+        assert asyncio.run(endpoint()) == 2
+
+
+def test_other_worker_computation_is_awaited(tmp_path, monkeypatch, flights):
+    path = str(tmp_path / "cache.sqlite3")
+    other_worker = SQLiteCacheBackend(path)
+    monkeypatch.setattr(response_cache, "_backend", SQLiteCacheBackend(path))
+    assert other_worker.try_lease("test.shared:{}", ttl=30)
+
+    def deliver():
+        time.sleep(0.2)
+        other_worker.set("test.shared:{}", {"from": "other"}, ttl=30)
+        other_worker.release_lease("test.shared:{}")
+
+    @cached_response("test.shared", ttl=30)
+    def endpoint():
+        return {"from": "here"}
+
+    threading.Thread(target=deliver).start()
+    assert endpoint() == {"from": "other"}
+    assert (flights["waited_on_worker"], flights["computed"]) == (1, 0)
+
+
+def test_async_endpoints_keep_sqlite_io_off_the_event_loop(tmp_path, monkeypatch, flights):
+    calls = []
+
+    class Recording(SQLiteCacheBackend):
+        def get(self, key):
+            calls.append(("get", threading.get_ident()))
+            return super().get(key)
+
+        def set(self, key, value, ttl):
+            calls.append(("set", threading.get_ident()))
+            super().set(key, value, ttl)
+
+        def try_lease(self, key, ttl):
+            calls.append(("try_lease", threading.get_ident()))
+            return super().try_lease(key, ttl)
+
+    monkeypatch.setattr(response_cache, "_backend", Recording(str(tmp_path / "cache.sqlite3")))
+    loop_threads = []
+
+    @cached_response("test.async", ttl=30)
+    async def endpoint():
+        loop_threads.append(threading.get_ident())
+        return {"value": 1}
+
+    assert asyncio.run(endpoint()) == {"value": 1}
+    assert asyncio.run(endpoint()) == {"value": 1}  # served from the file
+    assert [name for name, _ in calls] == ["get", "try_lease", "set", "get"]
+    assert loop_threads and all(ident not in loop_threads for _, ident in calls)
@@ -0,0 +1,108 @@
+"""Precomputed insights/analytics snapshots.
+
+/dashboard/insights and /analytics/all used to build a dozen sections in the
+request path. A scheduler now stores them in analytics_snapshots — on a fixed
+cadence, or sooner when labor/steps/travelers change — and the endpoints read
+the latest one with its age.
+"""
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import event
+
+from models import AnalyticsSnapshot, Traveler, LaborEntry, TravelerStatus, TravelerType, Priority
+from services import snapshots
+from services.snapshots import ANALYTICS_SNAPSHOT, INSIGHTS_SNAPSHOT, refresh_snapshots
+
+
+@pytest.fixture
+def runs(monkeypatch):
+    """Stand-in compute functions that count their runs."""
+    counts = {INSIGHTS_SNAPSHOT: 0, ANALYTICS_SNAPSHOT: 0}
+
+    def make(name):
+        def compute(db, timer):
+            counts[name] += 1
+            timer.start("first")
+            timer.start("second")
+            return {"run": counts[name]}
+        return compute
+
+    monkeypatch.setattr(snapshots, "_compute_functions",
+                        lambda: {name: make(name) for name in counts})
+    return counts
+
+
+def age_by(db, seconds):
+    for s in db.query(AnalyticsSnapshot):
+        s.computed_at = s.computed_at - timedelta(seconds=seconds)
+    db.commit()
+
+
+class TestScheduler:
+    def test_recomputes_when_stale_or_changed(self, db, admin, runs):
+        assert set(refresh_snapshots(db)) == {INSIGHTS_SNAPSHOT, ANALYTICS_SNAPSHOT}
+        assert refresh_snapshots(db) == {}
+
+        # Data changed, but the snapshot is younger than the minimum age.
+        t = Traveler(job_number="8414", work_order_number="WO-8414", traveler_type=TravelerType.ASSY,
+                     part_number="PN-1", part_description="Test", revision="A", quantity=1,
+                     priority=Priority.NORMAL, work_center="ASSEMBLY", status=TravelerStatus.IN_PROGRESS,
+                     created_by=admin.id, is_active=True)
+        db.add(t)
+        db.commit()
+        assert refresh_snapshots(db) == {}
+        age_by(db, snapshots.ANALYTICS_SNAPSHOT_MIN_AGE)
+        assert len(refresh_snapshots(db)) == 2
+
+        # Unchanged data is recomputed only past the maximum age.
+        age_by(db, snapshots.ANALYTICS_SNAPSHOT_MIN_AGE)
+        assert refresh_snapshots(db) == {}
+        age_by(db, snapshots.ANALYTICS_SNAPSHOT_MAX_AGE)
+        assert len(refresh_snapshots(db)) == 2
+        assert runs == {INSIGHTS_SNAPSHOT: 3, ANALYTICS_SNAPSHOT: 3}
+
+    def test_labor_changes_the_fingerprint(self, db, admin):
+        t = Traveler(job_number="8414", work_order_number="WO-8414", traveler_type=TravelerType.ASSY,
+                     part_number="PN-1", part_description="Test", revision="A", quantity=1,
+                     priority=Priority.NORMAL, work_center="ASSEMBLY", status=TravelerStatus.IN_PROGRESS,
+                     created_by=admin.id, is_active=True)
+        db.add(t)
+        db.commit()
+        entry = LaborEntry(traveler_id=t.id, employee_id=admin.id, start_time=datetime(2026, 9, 1, 8))
+        db.add(entry)
+        db.commit()
+        before = snapshots.data_fingerprint(db)
+        entry.end_time = datetime(2026, 9, 1, 9)
+        db.commit()
+        assert snapshots.data_fingerprint(db) != before
+
+
+class TestEndpoints:
+    def test_reads_snapshot_with_age_and_timings(self, client, db, runs):
+        body = client.get("/analytics/all").json()  # no snapshot yet: computed inline
+        assert body["run"] == 1 and body["snapshot_age_seconds"] < 5
+        age_by(db, 30)
+        body = client.get("/analytics/all").json()
+        assert body["run"] == 1 and body["snapshot_age_seconds"] >= 30
+
+        [status] = client.get("/dashboard/snapshots").json()
+        assert status["name"] == ANALYTICS_SNAPSHOT
+        assert set(status["sections_ms"]) == {"first", "second"}
+
+    def test_concurrent_first_reads_share_one_snapshot(self, session_factory, runs):
+        # Both requests find no snapshot; the other one stores it just before
+        # this one flushes its own, which must not fail on the primary key.
+        with session_factory() as db:
+            @event.listens_for(db, "before_flush", once=True)
+            def other_request_stores_first(session, flush_context, instances):
+                with session_factory() as other:
+                    snapshots.compute_snapshot(other, ANALYTICS_SNAPSHOT)
+
+            assert snapshots.read_snapshot(db, ANALYTICS_SNAPSHOT)["run"] == 2
+            assert db.query(AnalyticsSnapshot).count() == 1
+
+    def test_real_analytics_payload(self, db, admin):
+        payload = snapshots.read_snapshot(db, ANALYTICS_SNAPSHOT)
+        assert {"anomalies", "operator_scorecards", "kitting_analytics"} <= set(payload)
+        assert "kitting_analytics" in snapshots.snapshot_status(db)[0]["sections_ms"]
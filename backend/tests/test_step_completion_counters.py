@@ -0,0 +1,259 @@
+"""Traveler completion from remaining-step counters.
+
+Every clock-out on a step used to load all of the traveler's steps to decide
+whether the traveler was done. traveler_progress now carries remaining_steps
+and remaining_required; a clock-out claims its step and decrements them in
+row-locked UPDATEs, so the check is O(1) and operators clocking out of the
+last steps at the same moment still complete the traveler exactly once.
+"""
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import event
+
+from models import (
+    LaborEntry, PauseLog, ProcessStep, Traveler, TravelerDepartmentProgress, TravelerProgress, User, UserRole,
+    WorkCenter, TravelerStatus, TravelerType, Priority,
+)
+from routers.labor import update_step_and_traveler_progress
+from services.traveler_progress import reconcile_progress, recompute_progress
+
+START = datetime(2026, 9, 1, 8, 0, tzinfo=timezone.utc)
+
+
+def build(db, steps, optional=(), shipping=None, operators_per_step=1):
+    """A traveler with `steps` steps, each with running timers, committed so
+    the progress counters exist."""
+    admin = User(username="admin@test", email="admin@test", first_name="T", last_name="A",
+                 hashed_password="x", role=UserRole.ADMIN, is_active=True)
+    db.add(admin)
+    db.flush()
+    t = Traveler(job_number="JOB-CNT", work_order_number="WO-CNT", traveler_type=TravelerType.ASSY,
+                 part_number="PN-1", part_description="Test", revision="A", quantity=1,
+                 priority=Priority.NORMAL, work_center="ASSEMBLY", status=TravelerStatus.IN_PROGRESS,
+                 created_by=admin.id, is_active=True)
+    db.add(t)
+    db.flush()
+    entry_ids, n = [], 0
+    for i in range(1, steps + 1):
+        step = ProcessStep(traveler_id=t.id, step_number=i, operation="SHIPPING" if i == shipping else f"OP {i}",
+                           work_center_code="SMT", instructions="-", is_completed=False,
+                           is_required=i not in optional)
+        db.add(step)
+        db.flush()
+        for _ in range(operators_per_step):
+            n += 1
+            operator = User(username=f"op{n}@test", email=f"op{n}@test", first_name="Op", last_name=str(n),
+                            hashed_password="x", role=UserRole.OPERATOR, is_active=True)
+            db.add(operator)
+            db.flush()
+            entry = LaborEntry(traveler_id=t.id, step_id=step.id, employee_id=operator.id,
+                               work_center="SMT", start_time=START, is_completed=False)
+            db.add(entry)
+            db.flush()
+            entry_ids.append(entry.id)
+    db.commit()
+    return t.id, entry_ids
+
+
+def clock_out(session_factory, entry_id):
+    db = session_factory()
+    try:
+        entry = db.get(LaborEntry, entry_id)
+        entry.end_time = START + timedelta(hours=1)
+        entry.is_completed = True
+        entry.hours_worked = 1.0
+        update_step_and_traveler_progress(db, entry)
+        db.commit()
+    finally:
+        db.close()
+
+
+def state(session_factory, traveler_id):
+    db = session_factory()
+    try:
+        t = db.get(Traveler, traveler_id)
+        p = db.get(TravelerProgress, traveler_id)
+        done = db.query(ProcessStep).filter(ProcessStep.traveler_id == traveler_id,
+                                            ProcessStep.is_completed == True).count()
+        return t.status, done, (p.remaining_steps, p.remaining_required)
+    finally:
+        db.close()
+
+
+def test_counters_are_maintained(session_factory):
+    db = session_factory()
+    traveler_id, entries = build(db, 3)
+    db.close()
+    assert state(session_factory, traveler_id) == (TravelerStatus.IN_PROGRESS, 0, (3, 3))
+
+    clock_out(session_factory, entries[0])
+    assert state(session_factory, traveler_id) == (TravelerStatus.IN_PROGRESS, 1, (2, 2))
+
+
+def test_completion_does_not_load_the_steps(session_factory):
+    db = session_factory()
+    traveler_id, entries = build(db, 12)
+    db.close()
+    for entry_id in entries[:-1]:
+        clock_out(session_factory, entry_id)
+
+    db = session_factory()
+    engine = db.get_bind()
+    statements = []
+
+    def listener(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    entry = db.get(LaborEntry, entries[-1])
+    entry.end_time, entry.is_completed = START + timedelta(hours=1), True
+    event.listen(engine, "before_cursor_execute", listener)
+    try:
+        update_step_and_traveler_progress(db, entry)
+    finally:
+        event.remove(engine, "before_cursor_execute", listener)
+    db.commit()
+    db.close()
+
+    step_reads = [s for s in statements if s.lstrip().startswith("SELECT") and "FROM process_steps" in s]
+    assert len(step_reads) == 1  # the clocked-out step itself
+    assert state(session_factory, traveler_id)[0] == TravelerStatus.COMPLETED
+
+
+def statements_during(session_factory, action):
+    engine = session_factory.kw["bind"]
+    statements = []
+
+    def listener(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", listener)
+    try:
+        action()
+    finally:
+        event.remove(engine, "before_cursor_execute", listener)
+    return statements
+
+
+def test_clock_out_and_commit_scan_no_steps(session_factory):
+    # The claim puts the completion on the counters; the commit only adds the
+    # closed entry's hours. Neither reads the traveler's steps or labor.
+    db = session_factory()
+    db.add(WorkCenter(name="SMT", code="SMT", department="SMT"))
+    db.commit()
+    traveler_id, entries = build(db, 6)
+    db.close()
+
+    statements = statements_during(session_factory, lambda: clock_out(session_factory, entries[0]))
+
+    step_reads = [s for s in statements if s.lstrip().startswith("SELECT") and "FROM process_steps" in s]
+    assert len(step_reads) == 1 and "WHERE process_steps.id = " in step_reads[0]
+    assert not any("sum(labor_entries.hours_worked)" in s for s in statements)
+    db = session_factory()
+    p = db.get(TravelerProgress, traveler_id)
+    assert (p.completed_steps, p.current_step, p.labor_hours, p.active_labor_entries) == (1, "OP 2", 1.0, 5)
+    assert [d.completed_steps for d in db.query(TravelerDepartmentProgress)] == [1]
+    assert reconcile_progress(db)["repaired"] == 0  # the deltas agree with a recompute
+    db.close()
+
+
+def test_pause_and_resume_touch_no_counters(session_factory):
+    db = session_factory()
+    traveler_id, entries = build(db, 2)
+    db.close()
+
+    def pause_and_resume():
+        db = session_factory()
+        pause = PauseLog(labor_entry_id=entries[0], paused_at=START + timedelta(minutes=10))
+        db.add(pause)
+        db.commit()
+        pause.resumed_at = START + timedelta(minutes=20)
+        pause.duration_seconds = 600
+        db.commit()
+        db.close()
+
+    statements = statements_during(session_factory, pause_and_resume)
+    assert not any("process_steps" in s or "traveler_progress" in s for s in statements)
+
+
+def test_shipping_waits_for_required_steps_only(session_factory):
+    db = session_factory()
+    traveler_id, entries = build(db, 3, optional={2}, shipping=3)
+    db.close()
+    clock_out(session_factory, entries[2])
+    assert state(session_factory, traveler_id) == (TravelerStatus.IN_PROGRESS, 1, (2, 1))
+
+
+def test_shipping_completes_with_optional_steps_open(session_factory):
+    db = session_factory()
+    traveler_id, entries = build(db, 3, optional={2}, shipping=3)
+    db.close()
+    clock_out(session_factory, entries[0])
+    clock_out(session_factory, entries[2])
+    assert state(session_factory, traveler_id) == (TravelerStatus.COMPLETED, 2, (1, 0))
+
+
+def test_parallel_clock_outs_complete_the_traveler_once(session_factory):
+    # Two operators on every step, all clocking out at once: each step is
+    # claimed by exactly one of them and the counters end at zero.
+    db = session_factory()
+    traveler_id, entries = build(db, 15, operators_per_step=2)
+    db.close()
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        list(pool.map(lambda entry_id: clock_out(session_factory, entry_id), entries))
+
+    assert state(session_factory, traveler_id) == (TravelerStatus.COMPLETED, 15, (0, 0))
+
+
+def test_recompute_waits_for_a_pending_claim(session_factory):
+    # A step edit (or labor write) recomputes the counters at commit while a
+    # clock-out on another step has claimed it but not yet committed. The
+    # recompute must not read the steps from before the claim and put the
+    # counter back up, or the traveler would never complete.
+    db = session_factory()
+    traveler_id, entries = build(db, 2)
+    # Counters that drifted (a write the hooks never saw), for the recompute
+    # to repair.
+    progress = TravelerProgress.__table__
+    db.connection().execute(progress.update().where(progress.c.traveler_id == traveler_id)
+                            .values(remaining_steps=5, remaining_required=5))
+    db.commit()
+    db.close()
+    claimed, release = threading.Event(), threading.Event()
+
+    def clock_out_slowly():
+        db = session_factory()
+        try:
+            entry = db.get(LaborEntry, entries[0])
+            entry.end_time = START + timedelta(hours=1)
+            entry.is_completed = True
+            update_step_and_traveler_progress(db, entry)
+            claimed.set()
+            release.wait(10)
+            db.commit()
+        finally:
+            db.close()
+
+    def recompute():
+        db = session_factory()
+        try:
+            recompute_progress(db, [traveler_id])
+            db.commit()
+        finally:
+            db.close()
+
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        claim = pool.submit(clock_out_slowly)
+        assert claimed.wait(10)
+        other = pool.submit(recompute)
+        time.sleep(0.3)  # the recompute is now waiting on the progress row
+        release.set()
+        claim.result()
+        other.result()
+
+    assert state(session_factory, traveler_id) == (TravelerStatus.IN_PROGRESS, 1, (1, 1))
+    clock_out(session_factory, entries[1])
+    assert state(session_factory, traveler_id) == (TravelerStatus.COMPLETED, 2, (0, 0))
@@ -0,0 +1,112 @@
+"""Denormalized per-traveler progress counters.
+
+The traveler list and dashboard used to load every step and labor entry of
+every traveler they showed and count them per request. traveler_progress /
+traveler_department_progress now hold those counts, recomputed in the same
+transaction as any ORM write to a traveler's steps or labor, and a
+reconciliation pass repairs rows changed behind the ORM's back.
+"""
+from datetime import datetime
+
+import pytest
+
+from main import app
+from models import (
+    Traveler, ProcessStep, LaborEntry, WorkCenter, TravelerProgress, TravelerDepartmentProgress,
+    TravelerStatus, TravelerType, Priority,
+)
+from routers.travelers import get_user_or_system
+from services.traveler_progress import reconcile_progress
+
+
+@pytest.fixture
+def traveler(db, admin):
+    for code, dept in (("KITTING", "Receiving"), ("SMT", "SMT"), ("SOLDER_TEST", "Soldering/Test")):
+        db.add(WorkCenter(name=code, code=code, department=dept))
+    t = Traveler(job_number="8414", work_order_number="WO-8414", traveler_type=TravelerType.ASSY,
+                 part_number="PN-1", part_description="Test", revision="A", quantity=10,
+                 priority=Priority.NORMAL, work_center="ASSEMBLY", status=TravelerStatus.IN_PROGRESS,
+                 created_by=admin.id, is_active=True)
+    db.add(t)
+    db.flush()
+    for n, code in enumerate(("KITTING", "SMT", "SOLDER_TEST"), start=1):
+        db.add(ProcessStep(traveler_id=t.id, step_number=n, operation=code, work_center_code=code,
+                           instructions="-", is_completed=False))
+    db.commit()
+    db.refresh(t)
+    return t
+
+
+def steps(db, traveler):
+    return {s.operation: s for s in db.query(ProcessStep).filter(ProcessStep.traveler_id == traveler.id)}
+
+
+def counters(db, traveler):
+    db.expire_all()
+    p = db.get(TravelerProgress, traveler.id)
+    depts = db.query(TravelerDepartmentProgress).filter(
+        TravelerDepartmentProgress.traveler_id == traveler.id
+    ).order_by(TravelerDepartmentProgress.position).all()
+    return p, [(d.department, d.completed_steps, d.total_steps) for d in depts]
+
+
+class TestMaintainedOnWrite:
+    def test_created_with_the_traveler(self, db, traveler):
+        p, depts = counters(db, traveler)
+        # Kitting (Receiving) is left out of progress but is still the current step.
+        assert (p.completed_steps, p.total_steps, p.current_step) == (0, 2, "KITTING")
+        assert depts == [("SMT", 0, 1), ("Soldering", 0, 1), ("Test", 0, 1)]
+
+    def test_step_completion_and_labor(self, db, traveler, admin):
+        s = steps(db, traveler)
+        s["KITTING"].is_completed = True
+        s["SMT"].is_completed = True
+        s["SMT"].accepted = 9
+        db.add(LaborEntry(traveler_id=traveler.id, step_id=s["SMT"].id, employee_id=admin.id,
+                          start_time=datetime(2026, 9, 1, 8), end_time=datetime(2026, 9, 1, 10),
+                          hours_worked=2.0, is_completed=True))
+        db.add(LaborEntry(traveler_id=traveler.id, step_id=s["KITTING"].id, employee_id=admin.id,
+                          start_time=datetime(2026, 9, 1, 10), hours_worked=0.5, is_completed=False))
+        db.commit()
+
+        p, depts = counters(db, traveler)
+        assert (p.completed_steps, p.current_step, p.qty_accepted) == (1, "SOLDER_TEST", 9)
+        assert (p.labor_hours, p.labor_entries, p.active_labor_entries) == (2.5, 2, 1)
+        assert p.steps_with_labor == 1  # kitting labor counts in hours, not in the step ratio
+        assert depts[0] == ("SMT", 1, 1)
+
+    def test_rolled_back_change_leaves_counters_alone(self, db, traveler):
+        steps(db, traveler)["SMT"].is_completed = True
+        db.flush()
+        db.rollback()
+        assert counters(db, traveler)[0].completed_steps == 0
+
+
+class TestReconcile:
+    def test_repairs_drift_and_backfills(self, db, traveler):
+        # A bulk UPDATE never passes through the flush hooks.
+        db.query(ProcessStep).filter(ProcessStep.traveler_id == traveler.id).update(
+            {ProcessStep.is_completed: True}, synchronize_session=False)
+        db.query(TravelerDepartmentProgress).delete()
+        db.commit()
+        assert counters(db, traveler)[0].completed_steps == 0
+
+        assert reconcile_progress(db) == {"checked": 1, "repaired": 1}
+        p, depts = counters(db, traveler)
+        assert (p.completed_steps, p.current_step) == (2, None)
+        assert depts == [("SMT", 1, 1), ("Soldering", 1, 1), ("Test", 1, 1)]
+        assert reconcile_progress(db)["repaired"] == 0
+
+
+class TestListsReadCounters:
+    def test_list_and_dashboard(self, client, db, traveler, admin, monkeypatch):
+        steps(db, traveler)["SMT"].is_completed = True
+        db.commit()
+        monkeypatch.setitem(app.dependency_overrides, get_user_or_system, lambda: admin)
+
+        [row] = client.get("/travelers/").json()
+        assert (row["completed_steps"], row["total_steps"], row["percent_complete"]) == (1, 2, 50.0)
+        assert [d["department"] for d in row["department_progress"]] == ["SMT", "Soldering", "Test"]
+
+        [card] = client.get("/travelers/dashboard-summary").json()
+        assert (card["completed_steps"], card["current_step"]) == (1, "KITTING")
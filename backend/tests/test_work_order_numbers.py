@@ -0,0 +1,106 @@
+"""Sequence-backed work-order numbers.
+
+The next work-order prefix used to be the max over every non-DRAFT traveler's
+work order, recomputed on each traveler form and on each DRAFT -> CREATED
+promotion, where two promotions could compute the same number. A counter row
+now hands prefixes out; open forms reserve one, and an abandoned form gives
+its number back if nothing was allocated after it.
+"""
+import pytest
+
+from main import app
+from models import Traveler, TravelerStatus, TravelerType, Priority, User, UserRole
+from routers.travelers import get_user_or_system
+from services.work_order_numbers import (
+    next_work_order_prefix, allocate_work_order_prefix, reserve_work_order_prefix,
+    release_work_order_prefix, claim_work_order_prefix, seed_work_order_counter,
+)
+
+
+@pytest.fixture
+def client(client, admin, monkeypatch):
+    monkeypatch.setitem(app.dependency_overrides, get_user_or_system, lambda: admin)
+    return client
+
+
+def make_traveler(db, admin, job_number, work_order_number, status=TravelerStatus.CREATED):
+    t = Traveler(job_number=job_number, work_order_number=work_order_number, traveler_type=TravelerType.ASSY,
+                 part_number="PN-1", part_description="Test", revision="A", quantity=1,
+                 priority=Priority.NORMAL, work_center="ASSEMBLY", status=status,
+                 created_by=admin.id, is_active=True)
+    db.add(t)
+    db.commit()
+    db.refresh(t)
+    return t
+
+
+class TestCounter:
+    def test_seeded_from_highest_non_draft_prefix(self, db, admin):
+        make_traveler(db, admin, "1", "26100-2")
+        make_traveler(db, admin, "2", "26300", status=TravelerStatus.DRAFT)
+        assert seed_work_order_counter(db.connection()) == 26100
+        assert next_work_order_prefix(db) == "26101"
+
+    def test_allocation_is_sequential(self, db):
+        assert [allocate_work_order_prefix(db) for _ in range(3)] == ["26015", "26016", "26017"]
+
+    def test_hand_typed_work_order_raises_the_counter(self, db, admin):
+        assert allocate_work_order_prefix(db) == "26015"
+        db.commit()
+        make_traveler(db, admin, "1", "26500-1")
+        assert next_work_order_prefix(db) == "26501"
+        # A draft does not consume its number until it is promoted.
+        make_traveler(db, admin, "2", "26900", status=TravelerStatus.DRAFT)
+        assert next_work_order_prefix(db) == "26501"
+
+
+class TestReservations:
+    def test_release_gives_back_only_the_latest(self, db, admin):
+        first = reserve_work_order_prefix(db, admin.id).prefix
+        second = reserve_work_order_prefix(db, admin.id).prefix
+        db.commit()
+        assert release_work_order_prefix(db, first)  # released, but 26016 is already out
+        assert next_work_order_prefix(db) == "26017"
+        assert release_work_order_prefix(db, second)
+        assert next_work_order_prefix(db) == "26016"
+        assert not release_work_order_prefix(db, second)
+
+    def test_claimed_reservation_is_not_released(self, client, db, admin):
+        prefix = client.post("/travelers/work-order-numbers/reserve").json()["next_work_order_prefix"]
+        assert prefix == "26015"
+        assert client.get("/travelers/next-work-order-number").json() == {"next_work_order_prefix": "26016"}
+
+        make_traveler(db, admin, "8414", f"{prefix}-1")
+        t = db.query(Traveler).filter(Traveler.job_number == "8414").one()
+        assert claim_work_order_prefix(db, t.work_order_number, t.id)
+        db.commit()
+        assert client.delete(f"/travelers/work-order-numbers/{prefix}").json()["released"] is False
+
+    def test_only_the_reserving_user_or_an_admin_releases(self, client, db, admin, monkeypatch):
+        operator = User(username="op@test", email="op@test", first_name="O", last_name="P",
+                        hashed_password="x", role=UserRole.OPERATOR, is_active=True)
+        other = User(username="other@test", email="other@test", first_name="O", last_name="T",
+                     hashed_password="x", role=UserRole.OPERATOR, is_active=True)
+        db.add_all([operator, other])
+        db.commit()
+        mine = reserve_work_order_prefix(db, operator.id).prefix
+        theirs = reserve_work_order_prefix(db, other.id).prefix
+        db.commit()
+
+        monkeypatch.setitem(app.dependency_overrides, get_user_or_system, lambda: operator)
+        assert client.delete(f"/travelers/work-order-numbers/{theirs}").status_code == 403
+        assert client.delete(f"/travelers/work-order-numbers/{mine}").json()["released"] is True
+
+        monkeypatch.setitem(app.dependency_overrides, get_user_or_system, lambda: admin)
+        assert client.delete(f"/travelers/work-order-numbers/{theirs}").json()["released"] is True
+
+
+class TestDraftPromotion:
+    def test_promotion_allocates_from_the_counter(self, client, db, admin):
+        make_traveler(db, admin, "1", "26200")
+        draft = make_traveler(db, admin, "2", None, status=TravelerStatus.DRAFT)
+
+        r = client.patch(f"/travelers/{draft.id}", json={"status": "CREATED"})
+        assert r.status_code == 200, r.text
+        db.refresh(draft)
+        assert draft.work_order_number == "26201"
@@ -1,5 +1,5 @@
 """Backend utilities package"""
 
-from .db_helpers import with_transaction, safe_query, validate_positive_number, validate_date_range
+from .db_helpers import with_transaction, safe_query, validate_positive_number, validate_date_range, single_runner
 
-__all__ = ['with_transaction', 'safe_query', 'validate_positive_number', 'validate_date_range']
+__all__ = ['with_transaction', 'safe_query', 'validate_positive_number', 'validate_date_range', 'single_runner']
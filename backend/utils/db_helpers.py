@@ -3,7 +3,9 @@ Database Helper Utilities
 Provides transaction management and error handling helpers
 """
 
+from contextlib import contextmanager
 from functools import wraps
+from sqlalchemy import text
 from sqlalchemy.orm import Session
 from fastapi import HTTPException
 import logging
@@ -71,3 +73,26 @@ def validate_date_range(start_date, end_date, start_name="start_date", end_name=
             status_code=400,
             detail=f"{end_name} must be after {start_name}"
         )
+
+
+@contextmanager
+def single_runner(db, lock_key: int):
+    """Yields True if this worker holds `lock_key` and should run the job.
+
+    A Postgres session advisory lock held on a connection of its own — the
+    Session hands its connection back to the pool at every commit, so it can't
+    carry the lock. Elsewhere (SQLite, one process) there is nothing to
+    coordinate and the answer is always True.
+    """
+    engine = db.get_bind()
+    if engine.dialect.name != "postgresql":
+        yield True
+        return
+    with engine.connect() as conn:
+        got = conn.execute(text("SELECT pg_try_advisory_lock(:k)"), {"k": lock_key}).scalar()
+        try:
+            yield bool(got)
+        finally:
+            if got:
+                conn.execute(text("SELECT pg_advisory_unlock(:k)"), {"k": lock_key})
+                conn.commit()
@@ -0,0 +1,38 @@
+"""ITAR visibility rules shared by every router.
+
+Travelers on ITAR jobs are visible only to admins and to users flagged
+is_itar. Whether a traveler is ITAR is classified from its job number
+(utils.job_numbers.is_itar_job_number) once, on write, and stored in
+travelers.itar_restricted — so list queries for everyone else filter on that indexed
+boolean instead of evaluating a regex against every row.
+"""
+
+from models import Traveler
+from utils.job_numbers import is_itar_job_number
+
+
+def can_view_itar(user) -> bool:
+    """Admins and users granted ITAR access see ITAR travelers."""
+    is_admin = user.role.value == 'ADMIN' if hasattr(user.role, 'value') else user.role == 'ADMIN'
+    return is_admin or bool(getattr(user, 'is_itar', False))
+
+
+def is_itar_traveler(traveler) -> bool:
+    """The stored classification, or the job number for a row not yet
+    backfilled."""
+    if traveler.itar_restricted is not None:
+        return traveler.itar_restricted
+    return is_itar_job_number(traveler.job_number)
+
+
+def exclude_itar(query):
+    """Drop ITAR travelers from a Traveler query. Rows not yet classified
+    (NULL) are dropped too: unknown is treated as restricted."""
+    # "= false" (not "IS false") so PostgreSQL can use the partial index
+    # ix_travelers_non_itar_created_at, whose predicate is itar_restricted = false.
+    return query.filter(Traveler.itar_restricted == False)
+
+
+def itar_visible(query, user):
+    """A Traveler query limited to what `user` may see."""
+    return query if can_view_itar(user) else exclude_itar(query)
@@ -0,0 +1,67 @@
+"""Job-number keys: the base job number and its compliance suffixes.
+
+A traveler's job_number is the KOSH job number plus whatever the UI appended:
+compliance letters — 'L' (lead-free) and/or 'M' (ITAR), "8414" -> "8414LM" —
+and/or a trailing work descriptor, "8689L CABLE ASSY", "8762L-KANBAN". Job
+matching used to strip those in SQL with regexp_replace(), which no index can
+serve. The travelers table now stores the parsed form (base_job_number,
+lead_free_suffix, itar_suffix), kept in step with job_number on every write
+(models.py) and backfilled at startup (main.py).
+
+    "8414"             -> base "8414",      no suffix
+    "8414LM"           -> base "8414",      lead-free + ITAR
+    "8689L CABLE ASSY" -> base "8689",      lead-free, descriptor "CABLE ASSY"
+    "8813L-4BA ASSY"   -> base "8813L-4BA"  ("-4BA" carries digits: part of the job)
+
+Two job numbers can only refer to the same job (routers.jobs
+.traveler_matches_job) if their base job numbers are equal, so the indexed
+column narrows the candidates and the exact rule runs on that handful.
+"""
+
+import re
+from typing import NamedTuple
+
+COMPLIANCE_LETTERS = ("L", "M")
+
+# ITAR access classification: an 'M' straight after a digit, then 'L', white
+# space or the end — "8414M", "8414ML", "8414M CABLE". Narrower than
+# itar_suffix on purpose ("8414LM" is not restricted); this is the rule the
+# visibility checks have always applied, now stored as travelers.itar_restricted.
+ITAR_JOB_NUMBER = re.compile(r'[0-9]M[L\s]|[0-9]M$|[0-9]ML$')
+
+
+class JobNumberKeys(NamedTuple):
+    base: str
+    lead_free: bool
+    itar: bool
+    descriptor: str
+
+
+def split_descriptor(job_number: str):
+    """(job, descriptor) for a job number. The descriptor is the text after
+    the first space or hyphen past which everything is purely alphabetic —
+    the same rule traveler_matches_job uses to tell "-KANBAN" (a descriptor)
+    from "-4A" (a different job)."""
+    jn = (job_number or "").upper().strip()
+    for i, c in enumerate(jn):
+        if c in (" ", "-") and i > 0:
+            rest = jn[i + 1:]
+            squashed = rest.replace(" ", "").replace("-", "")
+            if squashed and squashed.isalpha():
+                return jn[:i].rstrip(" -"), rest.strip(" -")
+    return jn.rstrip(" -"), ""
+
+
+def job_number_keys(job_number: str) -> JobNumberKeys:
+    job, descriptor = split_descriptor(job_number)
+    base = job.rstrip("".join(COMPLIANCE_LETTERS))
+    suffix = job[len(base):]
+    return JobNumberKeys(base, "L" in suffix, "M" in suffix, descriptor)
+
+
+def base_job_number(job_number: str) -> str:
+    return job_number_keys(job_number).base
+
+
+def is_itar_job_number(job_number: str) -> bool:
+    return bool(ITAR_JOB_NUMBER.search(job_number or ""))
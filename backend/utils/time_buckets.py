@@ -0,0 +1,97 @@
+"""Time-bucketed aggregation in one statement.
+
+Trend charts (on-time delivery per week, yield per week, hours per day) used
+to run one query per bucket, hydrating whole ORM rows and doing the date math
+in Python. bucketed_series() groups by the bucket in SQL instead — date_trunc
+on PostgreSQL, date()/strftime() on SQLite, both on the UTC date — and fills
+the buckets that had no rows, so callers always get one entry per bucket.
+
+Buckets are "day", "week" (starting Monday, like date.weekday()) and "month".
+"""
+
+from datetime import date, datetime, time, timedelta, timezone
+from typing import Dict, List
+
+from sqlalchemy import func, literal_column
+
+UNITS = ("day", "week", "month")
+
+# due_date and friends are stored as 'YYYY-MM-DD' text; a value of that shape
+# compares correctly as a string against utc_date_text().
+ISO_DATE_PATTERN = "____-__-__"
+
+
+def bucket_start(day: date, unit: str) -> date:
+    if unit == "day":
+        return day
+    if unit == "week":
+        return day - timedelta(days=day.weekday())
+    if unit == "month":
+        return day.replace(day=1)
+    raise ValueError(f"Unknown bucket unit: {unit!r}")
+
+
+def bucket_starts(first: date, last: date, unit: str) -> List[date]:
+    """Every bucket from the one holding `first` to the one holding `last`."""
+    starts, current = [], bucket_start(first, unit)
+    while current <= last:
+        starts.append(current)
+        if unit == "month":
+            current = (current.replace(day=28) + timedelta(days=4)).replace(day=1)
+        else:
+            current += timedelta(days=1 if unit == "day" else 7)
+    return starts
+
+
+def _is_postgres(db) -> bool:
+    return db.get_bind().dialect.name == "postgresql"
+
+
+def bucket_column(db, column, unit: str):
+    """SQL for the start of `column`'s UTC bucket."""
+    if unit not in UNITS:
+        raise ValueError(f"Unknown bucket unit: {unit!r}")
+    if _is_postgres(db):
+        return func.date_trunc(unit, func.timezone("UTC", column))
+    if unit == "day":
+        return func.date(column)
+    if unit == "week":
+        return func.date(column, "-6 days", "weekday 1")
+    return func.strftime("%Y-%m-01", column)
+
+
+def utc_date_text(db, column):
+    """`column`'s UTC date as 'YYYY-MM-DD' text."""
+    if _is_postgres(db):
+        return func.to_char(func.timezone("UTC", column), literal_column("'YYYY-MM-DD'"))
+    return func.date(column)
+
+
+def _as_date(value) -> date:
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    return date.fromisoformat(str(value)[:10])
+
+
+def bucketed_series(db, column, unit: str, first: date, last: date, metrics: Dict[str, object],
+                    *filters) -> List[dict]:
+    """One row per bucket from `first` to `last` (inclusive, UTC dates):
+    {"bucket": <bucket start date>, <metric>: <value>, ...}. `metrics` maps
+    names to aggregate expressions; buckets without rows read 0. One query."""
+    bucket = bucket_column(db, column, unit).label("bucket")
+    start = datetime.combine(bucket_start(first, unit), time.min, tzinfo=timezone.utc)
+    end = datetime.combine(last + timedelta(days=1), time.min, tzinfo=timezone.utc)
+    rows = db.query(bucket, *(expr.label(name) for name, expr in metrics.items())).filter(
+        column >= start,
+        column < end,
+        *filters,
+    ).group_by(bucket).all()
+    found = {_as_date(row.bucket): row for row in rows}
+    series = []
+    for starts_at in bucket_starts(first, last, unit):
+        row = found.get(starts_at)
+        series.append({"bucket": starts_at,
+                       **{name: (getattr(row, name) or 0) if row is not None else 0 for name in metrics}})
+    return series
@@ -0,0 +1,137 @@
+-- KOSH stand-in: warehouse schema + synthetic data
+--
+-- A local copy of the three KOSH tables NEXUS reads (warehouse."tblJob",
+-- "tblBOM", "tblWhse_Inventory") so the KOSH connection pool, cache and
+-- readiness queries can be exercised and benchmarked without the production
+-- KOSH server. Column names and types follow what the NEXUS routers select;
+-- quantities stored as text in KOSH (tblBOM.qty, tblBOM.cost,
+-- tblWhse_Inventory.mfg_qty) are text here too so the CASTs behave the same.
+--
+-- Started by docker/docker-compose.kosh-standin.yml. Sizes are controlled by
+-- the psql variables below (defaults: 500 jobs x 40 BOM lines, 8000 stock rows).
+
+\set jobs 500
+\set bom_lines 40
+\set parts 4000
+
+CREATE SCHEMA IF NOT EXISTS warehouse;
+
+CREATE TABLE IF NOT EXISTS warehouse."tblJob" (
+    id          SERIAL PRIMARY KEY,
+    job_number  VARCHAR(50) NOT NULL UNIQUE,
+    description TEXT,
+    customer    VARCHAR(100),
+    cust_pn     VARCHAR(100),
+    build_qty   INTEGER,
+    order_qty   INTEGER,
+    job_rev     VARCHAR(20),
+    cust_rev    VARCHAR(20),
+    wo_number   VARCHAR(50),
+    status      VARCHAR(30),
+    notes       TEXT,
+    created_by  VARCHAR(100),
+    created_at  TIMESTAMP DEFAULT NOW(),
+    updated_at  TIMESTAMP DEFAULT NOW()
+);
+
+CREATE TABLE IF NOT EXISTS warehouse."tblBOM" (
+    id         SERIAL PRIMARY KEY,
+    job        VARCHAR(50) NOT NULL,
+    line       VARCHAR(10),
+    aci_pn     VARCHAR(100),
+    "DESC"     TEXT,
+    mpn        VARCHAR(100),
+    man        VARCHAR(100),
+    qty        VARCHAR(20),
+    cost       VARCHAR(20),
+    pou        VARCHAR(20),
+    job_rev    VARCHAR(20),
+    last_rev   VARCHAR(20),
+    cust       VARCHAR(100),
+    cust_pn    VARCHAR(100),
+    cust_rev   VARCHAR(20),
+    created_at TIMESTAMP DEFAULT NOW(),
+    updated_at TIMESTAMP DEFAULT NOW()
+);
+CREATE INDEX IF NOT EXISTS ix_tblbom_job ON warehouse."tblBOM" (job);
+
+CREATE TABLE IF NOT EXISTS warehouse."tblWhse_Inventory" (
+    id         SERIAL PRIMARY KEY,
+    pcn        VARCHAR(50),
+    item       VARCHAR(100),
+    mpn        VARCHAR(100),
+    onhandqty  INTEGER DEFAULT 0,
+    mfg_qty    VARCHAR(20),
+    loc_to     VARCHAR(50),
+    vendor     VARCHAR(100),
+    dc         VARCHAR(20),
+    po         VARCHAR(50),
+    updated_at TIMESTAMP DEFAULT NOW()
+);
+CREATE INDEX IF NOT EXISTS ix_whse_item ON warehouse."tblWhse_Inventory" (item);
+CREATE INDEX IF NOT EXISTS ix_whse_mpn ON warehouse."tblWhse_Inventory" (mpn);
+
+-- Jobs: a mix of plain, lead-free (L) and ITAR (M) numbers across the statuses
+-- the dashboard filters on.
+INSERT INTO warehouse."tblJob"
+    (job_number, description, customer, cust_pn, build_qty, order_qty, job_rev,
+     cust_rev, wo_number, status, created_by, created_at, updated_at)
+SELECT
+    (7000 + g)::text || CASE WHEN g % 7 = 0 THEN 'L' WHEN g % 11 = 0 THEN 'M' ELSE '' END,
+    CASE WHEN g % 5 = 0 THEN 'CABLE ASSY ' ELSE 'PCB ASSY ' END || g,
+    'CUSTOMER ' || (g % 25),
+    'CPN-' || g,
+    1 + g % 50,
+    1 + g % 50,
+    chr(65 + g % 3),
+    chr(65 + g % 3),
+    'WO-' || g,
+    (ARRAY['New', 'In Prep', 'In Mfg', 'Complete'])[1 + g % 4],
+    'standin',
+    NOW() - (g || ' hours')::interval,
+    NOW() - (g || ' minutes')::interval
+FROM generate_series(1, :jobs) AS g
+ON CONFLICT (job_number) DO NOTHING;
+
+-- BOM lines: each job draws :bom_lines parts from the shared part space, so
+-- parts overlap across jobs the way real common components (caps, resistors) do.
+INSERT INTO warehouse."tblBOM"
+    (job, line, aci_pn, "DESC", mpn, man, qty, cost, pou, job_rev, last_rev, cust, cust_pn, cust_rev)
+SELECT
+    j.job_number,
+    l::text,
+    'ACI-' || ((j.id * 37 + l * 101) % :parts),
+    'Component ' || ((j.id * 37 + l * 101) % :parts),
+    'MPN-' || ((j.id * 37 + l * 101) % :parts),
+    'MFR ' || (l % 9),
+    (1 + l % 6)::text,
+    to_char(0.01 * (1 + l % 90), 'FM990.0000'),
+    CASE WHEN l % 10 = 0 THEN 'Y' ELSE '' END,
+    j.job_rev,
+    j.job_rev,
+    j.customer,
+    j.cust_pn,
+    j.cust_rev
+FROM warehouse."tblJob" j
+CROSS JOIN generate_series(1, :bom_lines) AS l;
+
+-- Inventory: two stock-room rows and one MFG Floor row per part, with enough
+-- zero-stock parts that a realistic share of jobs come out short.
+INSERT INTO warehouse."tblWhse_Inventory"
+    (pcn, item, mpn, onhandqty, mfg_qty, loc_to, vendor, dc, po)
+SELECT
+    'PCN' || p || '-' || r,
+    'ACI-' || p,
+    'MPN-' || p,
+    CASE WHEN r = 3 THEN 0 WHEN p % 13 = 0 THEN 0 ELSE (p * 7 + r * 31) % 400 END,
+    CASE WHEN r = 3 THEN ((p * 3) % 60)::text ELSE '0' END,
+    CASE WHEN r = 3 THEN 'MFG Floor' ELSE 'Stock Room ' || r END,
+    'VENDOR ' || (p % 17),
+    (2400 + p % 52)::text,
+    'PO-' || (p % 900)
+FROM generate_series(0, :parts - 1) AS p
+CROSS JOIN generate_series(1, 3) AS r;
+
+ANALYZE warehouse."tblJob";
+ANALYZE warehouse."tblBOM";
+ANALYZE warehouse."tblWhse_Inventory";
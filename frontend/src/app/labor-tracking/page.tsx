@@ -11,9 +11,10 @@ import Autocomplete, { AutocompleteHandle } from '@/components/ui/Autocomplete';
 import { toast } from 'sonner';
 import { API_BASE_URL } from '@/config/api';
 import { offlineFetch } from '@/lib/offlineSync';
-import { readLiveCache, writeLiveCache, notifyDataUpdated, LIVE_REFRESH_MS } from '@/lib/liveCache';
+import { readLiveCache, notifyDataUpdated, LIVE_REFRESH_MS } from '@/lib/liveCache';
 
 const LABOR_CACHE_KEY = 'nexus_labor_entries_v1';
+const LABOR_SYNC_KEY = 'nexus_labor_sync_v1';
 
 interface LaborEntry {
   id: number;
@@ -87,6 +88,115 @@ function SortableTh({
   );
 }
 
+// Delta sync (backend services/labor_sync.py): the page keeps the entries it
+// already has in LABOR_CACHE_KEY and asks /labor only for what changed since
+// its sync token. The token is tied to the signed-in session, so a new login
+// starts over with a full (bounded) first page.
+interface LaborSyncPage {
+  entries: LaborEntry[];
+  deleted_ids: number[];
+  sync_token: string;
+  has_more: boolean;
+  older_cursor: string | null;
+  full: boolean;
+  active_entry?: any;
+}
+
+const laborSyncSession = () => (localStorage.getItem('nexus_token') || 'mock-token').slice(-16);
+
+function readLaborSyncToken(session: string): string | null {
+  const saved = readLiveCache<{ session: string; token: string }>(LABOR_SYNC_KEY);
+  return saved && saved.session === session ? saved.token : null;
+}
+
+function saveLaborSync(session: string, token: string | null, entries: LaborEntry[]) {
+  try {
+    localStorage.setItem(LABOR_CACHE_KEY, JSON.stringify(entries));
+    if (token) localStorage.setItem(LABOR_SYNC_KEY, JSON.stringify({ session, token }));
+  } catch {
+    // The entries didn't fit: drop the token so the next load starts over
+    // instead of merging deltas into a stale list.
+    localStorage.removeItem(LABOR_SYNC_KEY);
+  }
+}
+
+function mergeLaborEntries(current: LaborEntry[], changed: LaborEntry[], deletedIds: number[]): LaborEntry[] {
+  const replaced = new Set<number>([...deletedIds, ...changed.map(e => e.id)]);
+  return [...changed, ...current.filter(e => !replaced.has(e.id))]
+    .filter(e => e.hours_worked >= 0)
+    .sort((a, b) => (b.created_at || '').localeCompare(a.created_at || '') || b.id - a.id);
+}
+
+/** Bring the cached entries up to date from `path` (/labor/init or
+ *  /labor/my-entries). Returns the merged entries and the first page (for
+ *  /labor/init's active_entry), or null when the request failed. After a full
+ *  first sync, older history is paged in behind it and handed to onOlder. */
+async function syncLaborEntries(
+  path: string,
+  onOlder?: (entries: LaborEntry[]) => void,
+): Promise<{ entries: LaborEntry[]; first: LaborSyncPage } | null> {
+  const session = laborSyncSession();
+  const headers = { 'Authorization': `Bearer ${localStorage.getItem('nexus_token') || 'mock-token'}` };
+  let since = readLaborSyncToken(session);
+  let first: LaborSyncPage | null = null;
+  let full = false;
+  let olderCursor: string | null = null;
+  const changed = new Map<number, LaborEntry>();
+  const deleted = new Set<number>();
+  for (;;) {
+    const params = new URLSearchParams({ sync: 'true' });
+    if (since) params.set('since', since);
+    const res = await fetch(`${API_BASE_URL}${path}?${params}`, { headers });
+    if (res.status === 400 && since) {
+      // Token no longer understood (e.g. after a server upgrade): start over.
+      since = null;
+      continue;
+    }
+    if (!res.ok) return null;
+    const page: LaborSyncPage = await res.json();
+    first = first ?? page;
+    if (page.full) {
+      full = true;
+      olderCursor = page.older_cursor;
+    }
+    for (const entry of page.entries) {
+      changed.set(entry.id, entry);
+      deleted.delete(entry.id);
+    }
+    for (const id of page.deleted_ids) {
+      changed.delete(id);
+      deleted.add(id);
+    }
+    since = page.sync_token;
+    if (!page.has_more) break;
+  }
+  // Merge into the cache as it is now, not as it was when the sync started:
+  // an older-history load may have added to it in the meantime.
+  const base = full ? [] : (readLiveCache<LaborEntry[]>(LABOR_CACHE_KEY) ?? []);
+  const entries = mergeLaborEntries(base, Array.from(changed.values()), Array.from(deleted));
+  saveLaborSync(session, since, entries);
+  if (olderCursor) void loadOlderLaborEntries(path, olderCursor, session, onOlder);
+  return { entries, first: first as LaborSyncPage };
+}
+
+async function loadOlderLaborEntries(
+  path: string,
+  cursor: string | null,
+  session: string,
+  onOlder?: (entries: LaborEntry[]) => void,
+) {
+  const headers = { 'Authorization': `Bearer ${localStorage.getItem('nexus_token') || 'mock-token'}` };
+  while (cursor) {
+    const res = await fetch(`${API_BASE_URL}${path}?sync=true&before=${encodeURIComponent(cursor)}`, { headers });
+    if (!res.ok) return;
+    const page: LaborSyncPage = await res.json();
+    const entries = mergeLaborEntries(readLiveCache<LaborEntry[]>(LABOR_CACHE_KEY) ?? [], page.entries, []);
+    saveLaborSync(session, null, entries);
+    onOlder?.(entries);
+    cursor = page.older_cursor;
+  }
+}
+
 export default function LaborTrackingPage() {
   const { user } = useAuth();
   // Card grid for everyone, dense table for the users listed in viewPrefs.
@@ -308,19 +418,15 @@ export default function LaborTrackingPage() {
   // Combined init fetch — single API call for active entry + entries + auto-stop
   const fetchLaborInit = async (silent = false) => {
     try {
-      const token = localStorage.getItem('nexus_token');
-      const res = await fetch(`${API_BASE_URL}/labor/init`, {
-        headers: { 'Authorization': `Bearer ${token || 'mock-token'}` }
-      });
-      if (res.ok) {
-        const data = await res.json();
+      const synced = await syncLaborEntries('/labor/init', setLaborEntries);
+      if (synced) {
+        const data = synced.first;
         // Set entries
-        const validEntries = (data.entries || []).filter((entry: LaborEntry) => entry.hours_worked >= 0);
+        const validEntries = synced.entries;
         const json = JSON.stringify(validEntries);
         const changed = lastLaborJsonRef.current !== '' && lastLaborJsonRef.current !== json;
         lastLaborJsonRef.current = json;
         setLaborEntries(validEntries);
-        writeLiveCache(LABOR_CACHE_KEY, validEntries);
         if (silent && changed) notifyDataUpdated();
         // Set active entry — restore full timer state so the circular
         // display and pause/resume buttons work correctly on page load.
@@ -816,18 +922,11 @@ export default function LaborTrackingPage() {
   const fetchLaborEntries = async (silent = false) => {
     if (!silent) setIsLoading(true);
     try {
-      const token = localStorage.getItem('nexus_token');
-      const response = await fetch(`${API_BASE_URL}/labor/my-entries`, {
-        headers: {
-          'Authorization': `Bearer ${token || 'mock-token'}`
-        }
-      });
-
-      if (response.ok) {
-        const data = await response.json();
-        // Backend now returns job_number and work_center directly - no need for N+1 calls
-        const validEntries = data.filter((entry: LaborEntry) => entry.hours_worked >= 0);
-        setLaborEntries(validEntries);
+      // Only what changed since the last sync comes back; job_number and
+      // work_center are on each entry, so no N+1 calls.
+      const synced = await syncLaborEntries('/labor/my-entries', setLaborEntries);
+      if (synced) {
+        setLaborEntries(synced.entries);
       } else {
         console.error('Failed to fetch labor entries');
       }
@@ -338,11 +338,32 @@ export default function TravelerForm({ mode = 'create', initialData, travelerId,
   // duplicate travelers. Disables the Create/Update and Save-as-Draft buttons
   // while a save request is in flight.
   const [isSubmitting, setIsSubmitting] = useState(false);
+  // Work-order prefix this form holds a reservation on. Saving the traveler
+  // claims it server-side; otherwise it's given back when the form closes or a
+  // new number is generated (releasing a claimed prefix is a no-op).
+  const reservedPrefixRef = useRef<string | null>(null);
+  const releaseReservedPrefix = () => {
+    const prefix = reservedPrefixRef.current;
+    if (!prefix) return;
+    reservedPrefixRef.current = null;
+    fetch(`${API_BASE_URL}/travelers/work-order-numbers/${prefix}`, {
+      method: 'DELETE',
+      keepalive: true,
+      headers: {
+        'Authorization': `Bearer ${localStorage.getItem('nexus_token') || 'mock-token'}`
+      }
+    }).catch(() => { /* unreleased reservations expire server-side */ });
+  };
+  // eslint-disable-next-line react-hooks/exhaustive-deps
+  useEffect(() => releaseReservedPrefix, []);
+
   const fetchNextWorkOrderNumber = async (opts?: { silent?: boolean }) => {
     const silent = opts?.silent ?? false;
     try {
       if (!silent) setIsGeneratingWO(true);
-      const response = await fetch(`${API_BASE_URL}/travelers/next-work-order-number`, {
+      releaseReservedPrefix();
+      const response = await fetch(`${API_BASE_URL}/travelers/work-order-numbers/reserve`, {
+        method: 'POST',
         headers: {
           'Authorization': `Bearer ${localStorage.getItem('nexus_token') || 'mock-token'}`
         }
@@ -350,6 +371,7 @@ export default function TravelerForm({ mode = 'create', initialData, travelerId,
       if (response.ok) {
         const data = await response.json();
         if (data.next_work_order_prefix) {
+          reservedPrefixRef.current = data.next_work_order_prefix;
           setWorkOrderPrefix(data.next_work_order_prefix);
           setWorkOrderSuffix('');
           if (!silent) toast.success(`Generated WO ${data.next_work_order_prefix}`);
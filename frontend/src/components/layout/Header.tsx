@@ -9,6 +9,7 @@ import { SunIcon, MoonIcon } from '@heroicons/react/24/outline';
 import { useAuth } from '@/context/AuthContext';
 import { useTheme } from '@/context/ThemeContext';
 import { canAccessMaintenance } from '@/lib/access';
+import { subscribeChangeEvents } from '@/lib/changeEvents';
 import GlobalSearch from '@/components/GlobalSearch';
 import { toast } from 'sonner';
 import { API_BASE_URL } from '@/config/api';
@@ -54,9 +55,14 @@ export default function Header() {
   useEffect(() => {
     if (user && user.role === 'ADMIN') {
       fetchNotifications();
-      // Poll for new notifications every 2 minutes — reduced from 30s
+      // New notifications are pushed over /events/stream; the 2 minute poll
+      // is the fallback when the stream is down.
+      const unsubscribe = subscribeChangeEvents(['notification.created'], () => fetchNotifications());
       const interval = setInterval(fetchNotifications, 120000);
-      return () => clearInterval(interval);
+      return () => {
+        unsubscribe();
+        clearInterval(interval);
+      };
     }
   }, [user]);
 
@@ -1,7 +1,8 @@
 'use client';
 
 import { useState, useEffect, useCallback, useRef } from 'react';
-import { fetchWithCache, getAuthHeaders } from '@/lib/fetchWithCache';
+import { fetchWithCache, getAuthHeaders, invalidateCache } from '@/lib/fetchWithCache';
+import { subscribeChangeEvents } from '@/lib/changeEvents';
 import { notifyDataUpdated, LIVE_REFRESH_MS } from '@/lib/liveCache';
 
 export interface DashboardData {
@@ -85,6 +86,11 @@ const LABOR_TTL = 30_000;      // 30s for labor (more real-time)
 // Live auto-refresh so changes other users make surface within ~30s.
 const POLL_INTERVAL = LIVE_REFRESH_MS;
 
+// Labor/step/kitting change events trigger a refetch; a burst (e.g. a step
+// completed and its timer stopped) is folded into one.
+const CHANGE_EVENT_DEBOUNCE_MS = 2000;
+const CHANGE_EVENT_KINDS = ['labor', 'step', 'kitting'];
+
 // Persist the last successful dashboard payload so a fresh page load can paint
 // the full dashboard instantly from localStorage, then revalidate in the
 // background. Biggest perceived-speed win that doesn't depend on the network.
@@ -185,11 +191,22 @@ export function useDashboardData(startDate: Date, endDate: Date) {
     // If we painted cached data already, revalidate silently (no skeleton flash).
     fetchDashboardData(readDashboardCache() !== null);
 
-    // Poll every 5 minutes instead of 60 seconds
+    // Refetch when the server pushes a relevant change; polling stays as the
+    // fallback for when the event stream is unavailable.
+    let debounce: ReturnType<typeof setTimeout> | null = null;
+    const unsubscribe = subscribeChangeEvents(CHANGE_EVENT_KINDS, () => {
+      if (debounce) clearTimeout(debounce);
+      debounce = setTimeout(() => {
+        ['/dashboard/', '/analytics/', '/travelers/dashboard-summary', '/labor/'].forEach(invalidateCache);
+        fetchDashboardData(true);
+      }, CHANGE_EVENT_DEBOUNCE_MS);
+    });
     const interval = setInterval(() => fetchDashboardData(true), POLL_INTERVAL);
 
     return () => {
       mountedRef.current = false;
+      unsubscribe();
+      if (debounce) clearTimeout(debounce);
       clearInterval(interval);
     };
   }, [fetchDashboardData]);
@@ -0,0 +1,123 @@
+'use client';
+
+/**
+ * Live change events from GET /events/stream (server-sent events).
+ *
+ * The backend pushes an event whenever labor is started/stopped, a step is
+ * completed, a notification is created or kitting changes, so pages can
+ * refetch right away instead of waiting for their next poll. Pages keep their
+ * polling as a fallback for when the stream is down.
+ *
+ * EventSource can't send an Authorization header, so this reads the stream
+ * with fetch. One connection is shared by every subscriber in the tab; it
+ * opens with the first subscriber, closes with the last, and reconnects with
+ * Last-Event-ID so events missed while disconnected are replayed.
+ */
+
+import { API_BASE_URL } from '@/config/api';
+
+export interface ChangeEvent {
+  id: number;
+  kind: string;
+  traveler_id: number | null;
+  [key: string]: unknown;
+}
+
+type Handler = (event: ChangeEvent) => void;
+
+const subscribers = new Set<{ prefixes: string[]; handler: Handler }>();
+let controller: AbortController | null = null;
+let lastEventId: string | null = null;
+let retryMs = 3000;
+
+function dispatch(event: ChangeEvent) {
+  for (const sub of subscribers) {
+    if (sub.prefixes.some((p) => event.kind === p || event.kind.startsWith(p + '.'))) {
+      try {
+        sub.handler(event);
+      } catch (err) {
+        console.error('Change event handler failed:', err);
+      }
+    }
+  }
+}
+
+// Parse one "\n\n"-terminated SSE block.
+function handleBlock(block: string) {
+  let id: string | null = null;
+  let data = '';
+  for (const line of block.split('\n')) {
+    if (line.startsWith(':')) continue;  // keepalive comment
+    const sep = line.indexOf(':');
+    const field = sep === -1 ? line : line.slice(0, sep);
+    const value = sep === -1 ? '' : line.slice(sep + 1).replace(/^ /, '');
+    if (field === 'id') id = value;
+    else if (field === 'data') data += value;
+    else if (field === 'retry' && /^\d+$/.test(value)) retryMs = Number(value);
+  }
+  if (id !== null) lastEventId = id;
+  if (data) {
+    try {
+      dispatch({ ...JSON.parse(data), id: Number(id) } as ChangeEvent);
+    } catch {
+      /* malformed event — ignore */
+    }
+  }
+}
+
+async function connect(signal: AbortSignal) {
+  while (!signal.aborted) {
+    try {
+      const token = localStorage.getItem('nexus_token');
+      if (!token) return;
+      const headers: Record<string, string> = {
+        'Authorization': `Bearer ${token}`,
+        'Accept': 'text/event-stream',
+      };
+      if (lastEventId) headers['Last-Event-ID'] = lastEventId;
+      const res = await fetch(`${API_BASE_URL}/events/stream`, { headers, signal, cache: 'no-store' });
+      if (res.status === 401 || res.status === 403) return;  // logged out; polling carries on
+      if (!res.ok || !res.body) throw new Error(`${res.status} ${res.statusText}`);
+
+      const reader = res.body.pipeThrough(new TextDecoderStream()).getReader();
+      let buffer = '';
+      for (;;) {
+        const { value, done } = await reader.read();
+        if (done) break;
+        buffer += value.replace(/\r\n?/g, '\n');
+        let end;
+        while ((end = buffer.indexOf('\n\n')) !== -1) {
+          handleBlock(buffer.slice(0, end));
+          buffer = buffer.slice(end + 2);
+        }
+      }
+    } catch {
+      if (signal.aborted) return;
+    }
+    await new Promise((resolve) => setTimeout(resolve, retryMs));
+  }
+}
+
+/**
+ * Call `handler` for events whose kind is one of `kinds` or starts with
+ * "<kind>." (so 'labor' matches 'labor.started'). Returns an unsubscribe
+ * function.
+ */
+export function subscribeChangeEvents(kinds: string[], handler: Handler): () => void {
+  const sub = { prefixes: kinds, handler };
+  subscribers.add(sub);
+  if (typeof window !== 'undefined' && controller === null && typeof TextDecoderStream !== 'undefined') {
+    const current = new AbortController();
+    controller = current;
+    connect(current.signal).finally(() => {
+      if (controller === current) controller = null;  // gave up (e.g. logged out); next subscriber retries
+    });
+  }
+  return () => {
+    subscribers.delete(sub);
+    if (subscribers.size === 0 && controller) {
+      controller.abort();
+      controller = null;
+    }
+  };
+}
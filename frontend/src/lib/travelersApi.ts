@@ -12,17 +12,20 @@ export const TRAVELERS_PAGE_SIZE = 200;
 export const MAX_TRAVELER_PAGES = 50;
 
 /**
- * Fetch every traveler row, one page at a time, stopping at the first short or
- * empty batch. Throws on a non-OK response so callers can retry or fall back to
- * their cache.
+ * Fetch every traveler row, one page at a time, following the X-Next-Cursor
+ * header (keyset paging: each page costs the same however deep it is, and
+ * travelers created mid-walk don't shift later pages). Stops when the header is
+ * absent or a batch comes back empty. Throws on a non-OK response so callers can
+ * retry or fall back to their cache.
  */
 export async function fetchAllTravelerRows(): Promise<Record<string, unknown>[]> {
   const token = typeof window !== 'undefined' ? localStorage.getItem('nexus_token') || '' : '';
   const rows: Record<string, unknown>[] = [];
+  let cursor = '';
 
   for (let page = 0; page < MAX_TRAVELER_PAGES; page++) {
     const response = await fetch(
-      `${API_BASE_URL}/travelers/?skip=${page * TRAVELERS_PAGE_SIZE}&limit=${TRAVELERS_PAGE_SIZE}`,
+      `${API_BASE_URL}/travelers/?cursor=${encodeURIComponent(cursor)}&limit=${TRAVELERS_PAGE_SIZE}`,
       { headers: { 'Authorization': `Bearer ${token}` } }
     );
     if (!response.ok) {
@@ -31,7 +34,9 @@ export async function fetchAllTravelerRows(): Promise<Record<string, unknown>[]>
     const batch = await response.json();
     if (!Array.isArray(batch) || batch.length === 0) break;
     rows.push(...batch);
-    if (batch.length < TRAVELERS_PAGE_SIZE) break;
+    const next = response.headers.get('X-Next-Cursor');
+    if (!next) break;
+    cursor = next;
   }
 
   return rows;